@@ -3,45 +3,34 @@
 API endpoints for physical receipt verification.
 """
 
-import os
-
-import psycopg2
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from psycopg2.extras import RealDictCursor
 
+from ..db import get_async_connection
+from ..matview_refresh import status_headers, view_status_async
+from ..schema_migrations import ensure_schema_async
+
 router = APIRouter(
     prefix="/api/receipts/verification", tags=["receipt_verification"]
 )
 
 
-def get_db_connection():
-    """Get database connection."""
-    kwargs = {}
-    if os.environ.get("DB_SSLMODE"):
-        kwargs["sslmode"] = os.environ["DB_SSLMODE"]
-    if os.environ.get("DB_CHANNEL_BINDING"):
-        kwargs["channel_binding"] = os.environ["DB_CHANNEL_BINDING"]
-    return psycopg2.connect(
-        host=os.environ.get("DB_HOST", "localhost"),
-        database=os.environ.get("DB_NAME", "almsdata"),
-        user=os.environ.get("DB_USER", "postgres"),
-        password=os.environ.get("DB_PASSWORD", ""),
-        **kwargs,
-    )
-
-
 @router.get("/summary")
-async def get_verification_summary():
-    """Get overall verification statistics."""
-    conn = get_db_connection()
+async def get_verification_summary(conn=Depends(get_async_connection)):
+    """Get overall verification statistics.
+
+    ``snapshot_age_seconds`` is the age of the materialized view.
+    """
+    await ensure_schema_async()
     cur = conn.cursor(cursor_factory=RealDictCursor)
+    status_cur = conn.cursor()
 
     try:
         # Use materialized view for better performance
-        cur.execute("""
+        await cur.execute("""
             SELECT * FROM mv_receipt_verification_summary;
         """)
-        result = cur.fetchone()
+        result = await cur.fetchone()
         return {
             "total_receipts": result["total_receipts"],
             "verified_count": result["physically_verified_count"],
@@ -49,36 +38,51 @@ async def get_verification_summary():
             "verification_percentage": float(
                 result["verification_percentage"] or 0
             ),
+            **await view_status_async(
+                status_cur, "mv_receipt_verification_summary"
+            ),
         }
     finally:
         cur.close()
-        conn.close()
+        status_cur.close()
 
 
 @router.get("/by-year")
-async def get_verification_by_year():
-    """Get verification stats by year."""
-    conn = get_db_connection()
+async def get_verification_by_year(
+    response: Response, conn=Depends(get_async_connection)
+):
+    """Get verification stats by year.
+
+    The materialized view's age is in the ``X-Snapshot-*`` headers.
+    """
+    await ensure_schema_async()
     cur = conn.cursor(cursor_factory=RealDictCursor)
+    status_cur = conn.cursor()
 
     try:
         # Use materialized view for better performance
-        cur.execute("""
+        await cur.execute("""
             SELECT * FROM mv_receipt_verification_by_year
             ORDER BY year;
         """)
-        return [dict(row) for row in cur.fetchall()]
+        rows = [dict(row) for row in await cur.fetchall()]
+        status = await view_status_async(
+            status_cur, "mv_receipt_verification_by_year"
+        )
+        response.headers.update(status_headers(status))
+        return rows
     finally:
         cur.close()
-        conn.close()
+        status_cur.close()
 
 
 @router.get("/unverified")
 async def get_unverified_receipts(
-    year: int = Query(None), limit: int = Query(100, le=1000)
+    year: int = Query(None),
+    limit: int = Query(100, le=1000),
+    conn=Depends(get_async_connection),
 ):
     """Get unverified receipts."""
-    conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
@@ -90,7 +94,7 @@ async def get_unverified_receipts(
         if year:
             where += f" AND EXTRACT(YEAR FROM r.receipt_date) = {year}"
 
-        cur.execute(f"""
+        await cur.execute(f"""
             SELECT
               r.receipt_id,
               r.receipt_date,
@@ -108,22 +112,22 @@ async def get_unverified_receipts(
             ORDER BY r.receipt_date DESC
             LIMIT {limit};
         """)
-        return [dict(row) for row in cur.fetchall()]
+        return [dict(row) for row in await cur.fetchall()]
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/verify/{receipt_id}")
 async def mark_receipt_verified(
-    receipt_id: int, verified_by: str = Query(default="system")
+    receipt_id: int,
+    verified_by: str = Query(default="system"),
+    conn=Depends(get_async_connection),
 ):
     """Mark a receipt as physically verified."""
-    conn = get_db_connection()
     cur = conn.cursor()
 
     try:
-        cur.execute(
+        await cur.execute(
             """
             UPDATE receipts
             SET
@@ -136,11 +140,11 @@ async def mark_receipt_verified(
             (verified_by, receipt_id),
         )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
         if not result:
             raise HTTPException(status_code=404, detail="Receipt not found")
 
-        conn.commit()
+        await conn.commit()
         return {
             "receipt_id": result[0],
             "receipt_date": str(result[1]),
@@ -150,17 +154,17 @@ async def mark_receipt_verified(
         }
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/unverify/{receipt_id}")
-async def mark_receipt_unverified(receipt_id: int):
+async def mark_receipt_unverified(
+    receipt_id: int, conn=Depends(get_async_connection)
+):
     """Mark a receipt as not verified."""
-    conn = get_db_connection()
     cur = conn.cursor()
 
     try:
-        cur.execute(
+        await cur.execute(
             """
             UPDATE receipts
             SET
@@ -173,23 +177,23 @@ async def mark_receipt_unverified(receipt_id: int):
             (receipt_id,),
         )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
         if not result:
             raise HTTPException(status_code=404, detail="Receipt not found")
 
-        conn.commit()
+        await conn.commit()
         return {"receipt_id": result[0], "status": "unverified"}
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/verified")
 async def get_verified_receipts(
-    year: int = Query(None), limit: int = Query(100, le=1000)
+    year: int = Query(None),
+    limit: int = Query(100, le=1000),
+    conn=Depends(get_async_connection),
 ):
     """Get verified receipts (matched to banking)."""
-    conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
@@ -197,7 +201,7 @@ async def get_verified_receipts(
         if year:
             where += f" AND EXTRACT(YEAR FROM r.receipt_date) = {year}"
 
-        cur.execute(f"""
+        await cur.execute(f"""
             SELECT
               r.receipt_id,
               r.receipt_date,
@@ -214,7 +218,6 @@ async def get_verified_receipts(
             ORDER BY r.receipt_date DESC
             LIMIT {limit};
         """)
-        return [dict(row) for row in cur.fetchall()]
+        return [dict(row) for row in await cur.fetchall()]
     finally:
         cur.close()
-        conn.close()
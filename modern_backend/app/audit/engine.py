@@ -8,7 +8,11 @@ from collections import Counter
 from datetime import date, datetime, timedelta
 from typing import Any
 
+from ..pagination import Keyset, estimate_count, next_cursor, page_rows
+from ..schema_catalog import schema_catalog
+from ..schema_migrations import ensure_schema
 from .catalog import AUDIT_EVENT_SCHEMA
+from .partitions import AUDIT_EVENTS_TABLE
 from .schemas import (
     AuditCheckFinding,
     AuditCheckReport,
@@ -16,45 +20,9 @@ from .schemas import (
     AuditEvent,
     AuditStatus,
 )
+from .writer import audit_writer, canonical_event_json, write_chained_batch
 
-
-def _table_exists(conn, table_name: str) -> bool:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT 1
-            FROM information_schema.tables
-            WHERE table_schema = 'public' AND table_name = %s
-            LIMIT 1
-            """,
-            (table_name,),
-        )
-        return cur.fetchone() is not None
-
-
-def _has_column(conn, table_name: str, column_name: str) -> bool:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT 1
-            FROM information_schema.columns
-            WHERE table_schema = 'public'
-              AND table_name = %s
-              AND column_name = %s
-            LIMIT 1
-            """,
-            (table_name, column_name),
-        )
-        return cur.fetchone() is not None
-
-
-def _first_existing_column(
-    conn, table_name: str, candidates: list[str]
-) -> str | None:
-    for candidate in candidates:
-        if _has_column(conn, table_name, candidate):
-            return candidate
-    return None
+_EVENT_KEYSET = Keyset("occurred_at", "audit_event_pk")
 
 
 def _safe_count(conn, sql: str, params: tuple[Any, ...] = ()) -> int:
@@ -72,133 +40,12 @@ def _safe_sum(conn, sql: str, params: tuple[Any, ...] = ()) -> float:
 
 
 def ensure_audit_storage(conn) -> None:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS audit_events (
-                audit_event_pk BIGSERIAL PRIMARY KEY,
-                event_id TEXT UNIQUE NOT NULL,
-                occurred_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                module TEXT NOT NULL,
-                entity_type TEXT NOT NULL,
-                entity_id TEXT NOT NULL,
-                action TEXT NOT NULL,
-                source TEXT NOT NULL,
-                correlation_id TEXT,
-                actor_json JSONB NOT NULL,
-                before_json JSONB,
-                after_json JSONB,
-                evidence_links JSONB NOT NULL DEFAULT '[]'::jsonb,
-                retention_until DATE NOT NULL,
-                note TEXT,
-                prev_hash TEXT,
-                event_hash TEXT,
-                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS audit_package_runs (
-                package_run_id BIGSERIAL PRIMARY KEY,
-                package_id TEXT UNIQUE NOT NULL,
-                package_name TEXT NOT NULL,
-                package_mode TEXT NOT NULL,
-                fiscal_year INTEGER NOT NULL,
-                date_from DATE,
-                date_to DATE,
-                generated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                generated_by TEXT NOT NULL,
-                generated_by_name TEXT,
-                correlation_id TEXT,
-                retention_policy TEXT NOT NULL DEFAULT '6+ years',
-                overall_status TEXT NOT NULL,
-                content_hash TEXT NOT NULL,
-                zip_path TEXT NOT NULL,
-                notes_path TEXT NOT NULL,
-                manifest_json JSONB NOT NULL,
-                checks_json JSONB NOT NULL,
-                status TEXT NOT NULL DEFAULT 'ready'
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS audit_check_runs (
-                audit_check_run_id BIGSERIAL PRIMARY KEY,
-                run_id TEXT UNIQUE NOT NULL,
-                fiscal_year INTEGER NOT NULL,
-                generated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                generated_by TEXT NOT NULL,
-                correlation_id TEXT,
-                overall_status TEXT NOT NULL,
-                summary_json JSONB NOT NULL,
-                findings_json JSONB NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_audit_events_occurred_at
-            ON audit_events (occurred_at DESC)
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_audit_events_module_action_time
-            ON audit_events (module, action, occurred_at DESC)
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_audit_events_entity
-            ON audit_events (entity_type, entity_id)
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_audit_events_username
-            ON audit_events ((actor_json->>'username'))
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_audit_events_correlation_id
-            ON audit_events (correlation_id)
-            WHERE correlation_id IS NOT NULL
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_audit_package_runs_fiscal_year_generated
-            ON audit_package_runs (fiscal_year, generated_at DESC)
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_audit_check_runs_fiscal_year_generated
-            ON audit_check_runs (fiscal_year, generated_at DESC)
-            """
-        )
-        cur.execute(
-            """
-            CREATE OR REPLACE FUNCTION prevent_audit_event_mutation()
-            RETURNS trigger AS $$
-            BEGIN
-                RAISE EXCEPTION 'audit_events is append-only';
-            END;
-            $$ LANGUAGE plpgsql;
-            """
-        )
-        cur.execute("DROP TRIGGER IF EXISTS trg_audit_events_immutable ON audit_events")
-        cur.execute(
-            """
-            CREATE TRIGGER trg_audit_events_immutable
-            BEFORE UPDATE OR DELETE ON audit_events
-            FOR EACH ROW EXECUTE FUNCTION prevent_audit_event_mutation()
-            """
-        )
-    conn.commit()
+    """Audit tables are created by schema migration 1, not per request."""
+    ensure_schema()
+
+
+def _enqueue_audit_event(event: AuditEvent) -> None:
+    audit_writer.submit(event)
 
 
 def record_audit_event(
@@ -207,53 +54,32 @@ def record_audit_event(
     *,
     ensure_storage: bool = True,
     commit: bool = True,
+    wait: bool | None = None,
 ) -> dict[str, Any]:
+    """Append ``event`` to the audit chain with ``conn``'s transaction.
+
+    ``wait`` picks the durability; it defaults to ``AUDIT_WRITE_MODE``.
+    Synchronous events are chained and inserted on ``conn`` itself
+    (:func:`~.writer.write_chained_batch`), so they commit or roll back
+    with the change and a failed write raises here. The chain lock is
+    held until ``conn`` commits.
+
+    Fire-and-forget events are handed to the group-commit writer
+    (``audit.writer``) once ``conn`` commits, and dropped on rollback.
+    The writer uses its own transaction, so such an event can be lost if
+    its write fails; that is logged and counted in ``events_failed``.
+    Connections without commit hooks (not opened through ``db``) always
+    chain the event inline. ``commit=True`` commits ``conn`` here.
+    """
     if ensure_storage:
         ensure_audit_storage(conn)
-    payload = event.model_dump(mode="json")
-    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
-    with conn.cursor() as cur:
-        cur.execute(
-            "SELECT event_hash FROM audit_events ORDER BY audit_event_pk DESC LIMIT 1"
-        )
-        row = cur.fetchone()
-        prev_hash = row[0] if row else None
-    event.prev_hash = prev_hash
-    event.event_hash = hashlib.sha256(
-        ((prev_hash or "") + canonical).encode("utf-8")
-    ).hexdigest()
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO audit_events (
-                event_id, occurred_at, module, entity_type, entity_id,
-                action, source, correlation_id, actor_json, before_json,
-                after_json, evidence_links, retention_until, note, prev_hash,
-                event_hash
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb,
-                %s::jsonb, %s::jsonb, %s, %s, %s, %s
-            )
-            """,
-            (
-                event.event_id,
-                event.occurred_at,
-                event.module,
-                event.entity_type,
-                event.entity_id,
-                event.action,
-                event.source,
-                event.correlation_id,
-                json.dumps(event.actor.model_dump(mode="json")),
-                json.dumps(event.before) if event.before is not None else None,
-                json.dumps(event.after) if event.after is not None else None,
-                json.dumps(event.evidence_links),
-                event.retention_until,
-                event.note,
-                event.prev_hash,
-                event.event_hash,
-            ),
-        )
+    if wait is None:
+        wait = audit_writer.wait_by_default
+    after_commit = getattr(conn, "after_commit", None)
+    if wait or after_commit is None:
+        write_chained_batch(conn, [(event, canonical_event_json(event))])
+    else:
+        after_commit(lambda: _enqueue_audit_event(event))
     if commit:
         conn.commit()
     return event.model_dump(mode="json")
@@ -270,17 +96,27 @@ def list_audit_events(
     action: str | None = None,
     limit: int = 200,
     offset: int = 0,
+    cursor: str | None = None,
+    estimate_total: bool = False,
 ) -> dict[str, Any]:
+    """Audit events, newest first.
+
+    Pass ``next_cursor`` back as ``cursor`` to page without ``offset``.
+    Cursor pages skip the exact ``total`` unless ``estimate_total`` asks
+    for the planner's estimate.
+    """
     ensure_audit_storage(conn)
     where_clauses = ["1=1"]
     params: list[Any] = []
 
+    # Plain range predicates on occurred_at let the planner prune to the
+    # yearly partitions that overlap the requested dates.
     if date_from is not None:
-        where_clauses.append("occurred_at::date >= %s")
+        where_clauses.append("occurred_at >= %s")
         params.append(date_from)
     if date_to is not None:
-        where_clauses.append("occurred_at::date <= %s")
-        params.append(date_to)
+        where_clauses.append("occurred_at < %s")
+        params.append(date_to + timedelta(days=1))
     if module:
         where_clauses.append("module = %s")
         params.append(module)
@@ -295,17 +131,33 @@ def list_audit_events(
         params.append(action)
 
     where_sql = " AND ".join(where_clauses)
+    filters = {
+        "date_from": date_from,
+        "date_to": date_to,
+        "module": module,
+        "username": username,
+        "entity_type": entity_type,
+        "action": action,
+    }
+    after_sql, after_params = _EVENT_KEYSET.where(cursor, filters)
+    page_sql = where_sql + (f" AND {after_sql}" if after_sql else "")
 
     with conn.cursor() as cur:
-        cur.execute(
-            f"""
-            SELECT COUNT(*)
-            FROM audit_events
-            WHERE {where_sql}
-            """,
-            tuple(params),
-        )
-        total = int(cur.fetchone()[0] or 0)
+        count_sql = f"SELECT 1 FROM {AUDIT_EVENTS_TABLE} WHERE {where_sql}"
+        if estimate_total:
+            total = estimate_count(cur, count_sql, tuple(params))
+        elif cursor:
+            total = None
+        else:
+            cur.execute(
+                f"""
+                SELECT COUNT(*)
+                FROM {AUDIT_EVENTS_TABLE}
+                WHERE {where_sql}
+                """,
+                tuple(params),
+            )
+            total = int(cur.fetchone()[0] or 0)
 
         cur.execute(
             f"""
@@ -325,15 +177,23 @@ def list_audit_events(
                 retention_until,
                 note,
                 prev_hash,
-                event_hash
-            FROM audit_events
-            WHERE {where_sql}
-            ORDER BY occurred_at DESC, audit_event_pk DESC
+                event_hash,
+                audit_event_pk
+            FROM {AUDIT_EVENTS_TABLE}
+            WHERE {page_sql}
+            ORDER BY {_EVENT_KEYSET.order_by()}
             LIMIT %s OFFSET %s
             """,
-            tuple([*params, limit, offset]),
+            tuple(
+                [
+                    *params,
+                    *after_params,
+                    limit + 1,
+                    0 if cursor else offset,
+                ]
+            ),
         )
-        rows = cur.fetchall() or []
+        rows, has_more = page_rows(cur.fetchall() or [], limit)
 
     items = []
     for row in rows:
@@ -360,9 +220,11 @@ def list_audit_events(
 
     return {
         "total": total,
+        "total_is_estimate": estimate_total,
         "limit": limit,
         "offset": offset,
         "items": items,
+        "next_cursor": next_cursor(rows, has_more, 1, 16, filters),
     }
 
 
@@ -474,7 +336,7 @@ def _finding(
 
 
 def _check_employee_identity(conn) -> AuditCheckFinding:
-    if not _table_exists(conn, "employees"):
+    if not schema_catalog.has_table(conn, "employees"):
         return _finding(
             "employee-identity",
             "WARN",
@@ -484,8 +346,8 @@ def _check_employee_identity(conn) -> AuditCheckFinding:
             suggested_fix_steps=["Confirm employee master table name and SIN/TD1 fields."],
         )
 
-    sin_col = _first_existing_column(conn, "employees", ["sin", "sin_number", "sin_no"])
-    td1_col = _first_existing_column(
+    sin_col = schema_catalog.first_existing_column(conn, "employees", ["sin", "sin_number", "sin_no"])
+    td1_col = schema_catalog.first_existing_column(
         conn,
         "employees",
         ["td1_province", "province_of_employment", "province", "tax_province"],
@@ -533,7 +395,7 @@ def _check_employee_identity(conn) -> AuditCheckFinding:
 
 
 def _check_pd7a_reconciliation(conn, fiscal_year: int) -> AuditCheckFinding:
-    if not _table_exists(conn, "cra_pd7a_returns"):
+    if not schema_catalog.has_table(conn, "cra_pd7a_returns"):
         return _finding(
             "pd7a-reconciliation",
             "WARN",
@@ -593,7 +455,10 @@ def _check_pd7a_reconciliation(conn, fiscal_year: int) -> AuditCheckFinding:
 
 
 def _check_t4_reconciliation(conn, fiscal_year: int) -> AuditCheckFinding:
-    if not (_table_exists(conn, "employee_t4_records") or _table_exists(conn, "t4_entries")):
+    if not (
+        schema_catalog.has_table(conn, "employee_t4_records")
+        or schema_catalog.has_table(conn, "t4_entries")
+    ):
         return _finding(
             "t4-reconciliation",
             "WARN",
@@ -602,7 +467,7 @@ def _check_t4_reconciliation(conn, fiscal_year: int) -> AuditCheckFinding:
             requires_confirmation=True,
             data_sources=["employee_t4_records", "t4_entries"],
         )
-    if not _table_exists(conn, "driver_payroll"):
+    if not schema_catalog.has_table(conn, "driver_payroll"):
         return _finding(
             "t4-reconciliation",
             "WARN",
@@ -611,7 +476,7 @@ def _check_t4_reconciliation(conn, fiscal_year: int) -> AuditCheckFinding:
             requires_confirmation=True,
             data_sources=["driver_payroll"],
         )
-    table_name = "employee_t4_records" if _table_exists(conn, "employee_t4_records") else "t4_entries"
+    table_name = "employee_t4_records" if schema_catalog.has_table(conn, "employee_t4_records") else "t4_entries"
     box14_col = (
         "box_14_employment_income"
         if table_name == "employee_t4_records"
@@ -650,8 +515,8 @@ def _check_t4_reconciliation(conn, fiscal_year: int) -> AuditCheckFinding:
 
 def _check_invoice_and_trip_uniqueness(conn) -> list[AuditCheckFinding]:
     findings: list[AuditCheckFinding] = []
-    if _table_exists(conn, "invoices"):
-        invoice_col = _first_existing_column(conn, "invoices", ["invoice_number", "invoice_no", "number"])
+    if schema_catalog.has_table(conn, "invoices"):
+        invoice_col = schema_catalog.first_existing_column(conn, "invoices", ["invoice_number", "invoice_no", "number"])
         if invoice_col:
             with conn.cursor() as cur:
                 cur.execute(
@@ -711,9 +576,9 @@ def _check_invoice_and_trip_uniqueness(conn) -> list[AuditCheckFinding]:
             )
         )
 
-    if _table_exists(conn, "charters"):
-        reserve_col = _first_existing_column(conn, "charters", ["reserve_number", "reserve_no"])
-        trip_col = _first_existing_column(conn, "charters", ["charter_id", "trip_id"])
+    if schema_catalog.has_table(conn, "charters"):
+        reserve_col = schema_catalog.first_existing_column(conn, "charters", ["reserve_number", "reserve_no"])
+        trip_col = schema_catalog.first_existing_column(conn, "charters", ["charter_id", "trip_id"])
         if reserve_col:
             with conn.cursor() as cur:
                 cur.execute(
@@ -776,7 +641,7 @@ def _check_invoice_and_trip_uniqueness(conn) -> list[AuditCheckFinding]:
 
 
 def _check_period_close(conn, fiscal_year: int) -> AuditCheckFinding:
-    if not _table_exists(conn, "year_end_closes"):
+    if not schema_catalog.has_table(conn, "year_end_closes"):
         return _finding(
             "period-close-lock",
             "WARN",
@@ -817,16 +682,16 @@ def _check_period_close(conn, fiscal_year: int) -> AuditCheckFinding:
 
 
 def _check_audit_trail_storage(conn) -> AuditCheckFinding:
-    if not _table_exists(conn, "audit_events"):
+    if not schema_catalog.has_table(conn, AUDIT_EVENTS_TABLE):
         return _finding(
             "audit-trail",
             "FAIL",
             "critical",
             "audit_events table is missing; core financial audit trail is not yet implemented.",
             suggested_fix_steps=["Create audit_events storage and wire mutation logging into write paths."],
-            data_sources=["audit_events"],
+            data_sources=[AUDIT_EVENTS_TABLE],
         )
-    count = _safe_count(conn, "SELECT COUNT(*) FROM audit_events")
+    count = _safe_count(conn, f"SELECT COUNT(*) FROM {AUDIT_EVENTS_TABLE}")
     if count <= 0:
         return _finding(
             "audit-trail",
@@ -835,19 +700,19 @@ def _check_audit_trail_storage(conn) -> AuditCheckFinding:
             "audit_events table exists but contains no rows yet; mutation logging coverage remains to be wired.",
             requires_confirmation=True,
             suggested_fix_steps=["Attach audit-event writes to financial, payroll, and year-end mutations."],
-            data_sources=["audit_events"],
+            data_sources=[AUDIT_EVENTS_TABLE],
         )
     return _finding(
         "audit-trail",
         "PASS",
         "low",
         f"audit_events contains {count} entries.",
-        data_sources=["audit_events"],
+        data_sources=[AUDIT_EVENTS_TABLE],
     )
 
 
 def _check_package_retention(conn) -> AuditCheckFinding:
-    if not _table_exists(conn, "audit_package_runs"):
+    if not schema_catalog.has_table(conn, "audit_package_runs"):
         return _finding(
             "package-retention",
             "FAIL",
@@ -869,7 +734,7 @@ def _check_package_retention(conn) -> AuditCheckFinding:
 def _check_impossible_values(conn, fiscal_year: int) -> list[AuditCheckFinding]:
     findings: list[AuditCheckFinding] = []
 
-    if _table_exists(conn, "payments"):
+    if schema_catalog.has_table(conn, "payments"):
         bad_payments = _safe_count(
             conn,
             """
@@ -898,7 +763,7 @@ def _check_impossible_values(conn, fiscal_year: int) -> list[AuditCheckFinding]:
             )
         )
 
-    if _table_exists(conn, "invoices"):
+    if schema_catalog.has_table(conn, "invoices"):
         bad_invoices = _safe_count(
             conn,
             """
@@ -927,7 +792,7 @@ def _check_impossible_values(conn, fiscal_year: int) -> list[AuditCheckFinding]:
             )
         )
 
-    if _table_exists(conn, "cra_pd7a_returns"):
+    if schema_catalog.has_table(conn, "cra_pd7a_returns"):
         pd7a_total = _safe_count(
             conn,
             """
@@ -971,14 +836,14 @@ def _check_impossible_values(conn, fiscal_year: int) -> list[AuditCheckFinding]:
 
 
 def _check_audit_coverage(conn) -> AuditCheckFinding:
-    if not _table_exists(conn, "audit_events"):
+    if not schema_catalog.has_table(conn, AUDIT_EVENTS_TABLE):
         return _finding(
             "audit-coverage",
             "FAIL",
             "critical",
             "audit_events table is missing; cannot verify mutation coverage.",
             suggested_fix_steps=["Create audit_events and wire mutation routes."],
-            data_sources=["audit_events"],
+            data_sources=[AUDIT_EVENTS_TABLE],
         )
 
     expected_actions = [
@@ -1037,9 +902,9 @@ def _check_audit_coverage(conn) -> AuditCheckFinding:
 
     with conn.cursor() as cur:
         cur.execute(
-            """
+            f"""
             SELECT module, action, COUNT(*)
-            FROM audit_events
+            FROM {AUDIT_EVENTS_TABLE}
             GROUP BY module, action
             """
         )
@@ -1058,7 +923,7 @@ def _check_audit_coverage(conn) -> AuditCheckFinding:
                 "Wire missing mutation routes to record_audit_event.",
                 "Backfill historical events only if policy allows and source truth is available.",
             ],
-            data_sources=["audit_events"],
+            data_sources=[AUDIT_EVENTS_TABLE],
             requires_confirmation=True,
         )
 
@@ -1067,7 +932,7 @@ def _check_audit_coverage(conn) -> AuditCheckFinding:
         "PASS",
         "low",
         "All currently expected core mutation audit events are present.",
-        data_sources=["audit_events"],
+        data_sources=[AUDIT_EVENTS_TABLE],
     )
 
 
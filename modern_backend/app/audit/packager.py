@@ -8,7 +8,7 @@ import json
 import tempfile
 import zipfile
 from collections.abc import Iterable
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
@@ -20,42 +20,16 @@ try:
 except Exception:  # pragma: no cover - optional dependency fallback
     Workbook = None
 
+from ..db import dedicated_connection
+from ..schema_catalog import schema_catalog
 from .engine import ensure_audit_storage, generate_audit_check_report
+from .partitions import AUDIT_EVENTS_TABLE
 from .schemas import (
     AuditCheckRequest,
     PackageArtifact,
     PackageManifest,
 )
-
-
-def _table_exists(conn, table_name: str) -> bool:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT 1
-            FROM information_schema.tables
-            WHERE table_schema = 'public' AND table_name = %s
-            LIMIT 1
-            """,
-            (table_name,),
-        )
-        return cur.fetchone() is not None
-
-
-def _has_column(conn, table_name: str, column_name: str) -> bool:
-        with conn.cursor() as cur:
-                cur.execute(
-                        """
-                        SELECT 1
-                        FROM information_schema.columns
-                        WHERE table_schema = 'public'
-                            AND table_name = %s
-                            AND column_name = %s
-                        LIMIT 1
-                        """,
-                        (table_name, column_name),
-                )
-                return cur.fetchone() is not None
+from .verifier import verify_audit_chain
 
 
 def _safe_query(conn, sql: str, params: tuple[Any, ...] = ()) -> tuple[list[str], list[tuple[Any, ...]]]:
@@ -130,7 +104,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
     date_to = request.date_to or date(request.fiscal_year, 12, 31)
     sections: dict[str, tuple[list[str], list[tuple[Any, ...]], list[str]]] = {}
 
-    if _table_exists(conn, "charters"):
+    if schema_catalog.has_table(conn, "charters"):
         headers, rows = _safe_query(
             conn,
             """
@@ -144,7 +118,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
         )
         sections["trip_register"] = (headers, rows, ["charters"])
 
-    if _table_exists(conn, "invoices"):
+    if schema_catalog.has_table(conn, "invoices"):
         headers, rows = _safe_query(
             conn,
             """
@@ -156,7 +130,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
         )
         sections["invoice_register"] = (headers, rows, ["invoices"])
 
-    if _table_exists(conn, "driver_payroll"):
+    if schema_catalog.has_table(conn, "driver_payroll"):
         headers, rows = _safe_query(
             conn,
             """
@@ -169,7 +143,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
         )
         sections["driver_earnings"] = (headers, rows, ["driver_payroll"])
 
-    if _table_exists(conn, "payroll_entries"):
+    if schema_catalog.has_table(conn, "payroll_entries"):
         headers, rows = _safe_query(
             conn,
             """
@@ -183,7 +157,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
         )
         sections["payroll_register"] = (headers, rows, ["payroll_entries"])
 
-    if _table_exists(conn, "cra_pd7a_returns"):
+    if schema_catalog.has_table(conn, "cra_pd7a_returns"):
         headers, rows = _safe_query(
             conn,
             """
@@ -200,7 +174,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
         )
         sections["remittance_summary"] = (headers, rows, ["cra_pd7a_returns"])
 
-    if _table_exists(conn, "employee_t4_records"):
+    if schema_catalog.has_table(conn, "employee_t4_records"):
         headers, rows = _safe_query(
             conn,
             """
@@ -213,7 +187,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
             (request.fiscal_year,),
         )
         sections["t4_summary"] = (headers, rows, ["employee_t4_records"])
-    elif _table_exists(conn, "t4_entries"):
+    elif schema_catalog.has_table(conn, "t4_entries"):
         headers, rows = _safe_query(
             conn,
             """
@@ -227,7 +201,7 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
         )
         sections["t4_summary"] = (headers, rows, ["t4_entries"])
 
-    if _table_exists(conn, "general_ledger"):
+    if schema_catalog.has_table(conn, "general_ledger"):
         headers, rows = _safe_query(
             conn,
             """
@@ -241,9 +215,8 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
         )
         sections["general_ledger"] = (headers, rows, ["general_ledger"])
 
-        if _has_column(conn, "general_ledger", "gifi_code") and _has_column(
-            conn, "general_ledger", "debit"
-        ) and _has_column(conn, "general_ledger", "credit"):
+        gl_cols = schema_catalog.column_set(conn, "general_ledger")
+        if {"gifi_code", "debit", "credit"} <= gl_cols:
             headers, rows = _safe_query(
                 conn,
                 """
@@ -264,26 +237,28 @@ def _build_sections(conn, request: AuditCheckRequest) -> dict[str, tuple[list[st
                 ["general_ledger"],
             )
 
-    if _table_exists(conn, "audit_events"):
+    if schema_catalog.has_table(conn, AUDIT_EVENTS_TABLE):
+        # A half-open range on occurred_at prunes the scan to the fiscal
+        # year's partition(s).
         headers, rows = _safe_query(
             conn,
-            """
+            f"""
             SELECT event_id, occurred_at, module, entity_type, entity_id,
                    action, source, correlation_id, retention_until,
                    note, prev_hash, event_hash
-            FROM audit_events
-            WHERE occurred_at::date BETWEEN %s AND %s
+            FROM {AUDIT_EVENTS_TABLE}
+            WHERE occurred_at >= %s AND occurred_at < %s
             ORDER BY occurred_at, audit_event_pk
             LIMIT 100000
             """,
-            (date_from, date_to),
+            (date_from, date_to + timedelta(days=1)),
         )
-        sections["audit_events"] = (headers, rows, ["audit_events"])
+        sections["audit_events"] = (headers, rows, [AUDIT_EVENTS_TABLE])
 
-    if _table_exists(conn, "employee_roe_records"):
+    if schema_catalog.has_table(conn, "employee_roe_records"):
         year_col = None
         for candidate in ["tax_year", "year", "reporting_year"]:
-            if _has_column(conn, "employee_roe_records", candidate):
+            if schema_catalog.has_column(conn, "employee_roe_records", candidate):
                 year_col = candidate
                 break
 
@@ -425,7 +400,16 @@ def generate_year_end_package(
     checks_path = package_dir / "audit_checks.json"
     _write_json(checks_path, checks_json)
 
+    # Incremental from the last checkpoint, so this only reads events
+    # written since the previous verification.
+    chain = verify_audit_chain(dedicated_connection)
+    _write_json(package_dir / "audit_chain_verification.json", chain)
+
     notes_text = generate_notes_to_auditor(conn, request, report, sections)
+    notes_text += (
+        f"\n- Hash chain verification: {chain['status']} through event "
+        f"{chain['verified_through_pk']} (head hash {chain['head_hash']})."
+    )
     notes_path = package_dir / "notes_to_auditor.md"
     _write_text(notes_path, notes_text)
     notes_pdf_path = package_dir / "notes_to_auditor.pdf"
@@ -445,6 +429,10 @@ def generate_year_end_package(
             "artifacts": [artifact.model_dump(mode="json") for artifact in artifacts],
             "checks": [finding.model_dump(mode="json") for finding in report.findings],
             "notes_file": notes_path.name,
+            "audit_chain": {
+                key: chain[key]
+                for key in ("status", "verified_through_pk", "head_hash")
+            },
         },
     )
 
@@ -0,0 +1,181 @@
+"""Yearly range partitions for the audit event store.
+
+Audit events live in ``audit_events_partitioned``, range-partitioned on
+``occurred_at`` into one ``audit_events_<year>`` partition per calendar
+year, with a default partition as a safety net. The manager:
+
+- creates partitions ahead of time, so new events never land in the
+  default partition;
+- detaches whole past years once every row's ``retention_until`` has
+  passed. This replaces row-by-row deletes, which the immutability
+  trigger forbids anyway. Detached tables stay in the database for
+  archiving until an operator drops them.
+
+Detaching the oldest year moves the start of the hash chain. Its first
+remaining event keeps the ``prev_hash`` of the last detached one.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections.abc import Callable
+from datetime import date
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+AUDIT_EVENTS_TABLE = "audit_events_partitioned"
+DEFAULT_PARTITION = "audit_events_partitioned_default"
+
+_PARTITION_RE = re.compile(r"^audit_events_(\d{4})$")
+# Keeps two workers from running maintenance at the same time.
+_MAINTENANCE_LOCK_KEY = 7_310_054
+
+
+def partition_name(year: int) -> str:
+    return f"audit_events_{int(year)}"
+
+
+def year_bounds(year: int) -> tuple[date, date]:
+    """Half-open ``[start, end)`` range covered by ``year``'s partition."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def list_partitions(cur) -> dict[int, str]:
+    """Yearly partitions currently attached, keyed by year."""
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = %s
+        """,
+        (AUDIT_EVENTS_TABLE,),
+    )
+    partitions: dict[int, str] = {}
+    for (relname,) in cur.fetchall():
+        match = _PARTITION_RE.match(relname)
+        if match:
+            partitions[int(match.group(1))] = relname
+    return partitions
+
+
+def create_year_partition(cur, year: int) -> bool:
+    """Attach a partition for ``year``; False if it already exists.
+
+    Fails if the default partition already holds rows for that year, so
+    partitions should be created before the year starts.
+    """
+    name = partition_name(year)
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    if cur.fetchone()[0]:
+        return False
+    start, end = year_bounds(year)
+    cur.execute(
+        f"CREATE TABLE {name} PARTITION OF {AUDIT_EVENTS_TABLE} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        (start, end),
+    )
+    logger.info("Created audit partition %s", name)
+    return True
+
+
+def detach_expired_partitions(cur, today: date) -> list[str]:
+    """Detach past-year partitions whose rows are all past retention.
+
+    Partitions are only removed from the oldest end: the first year
+    still retained stops the sweep, even if later years have expired,
+    so the hash chain that stays attached has no gaps.
+    """
+    detached: list[str] = []
+    for year, name in sorted(list_partitions(cur).items()):
+        if year_bounds(year)[1] > today:
+            break
+        cur.execute(f"SELECT MAX(retention_until) FROM {name}")
+        row = cur.fetchone()
+        retained_until = row[0] if row else None
+        if retained_until is not None and retained_until >= today:
+            break
+        cur.execute(
+            f"ALTER TABLE {AUDIT_EVENTS_TABLE} DETACH PARTITION {name}"
+        )
+        detached.append(name)
+        logger.info(
+            "Detached audit partition %s (retained until %s)",
+            name,
+            retained_until,
+        )
+    return detached
+
+
+def maintain_partitions(
+    conn, *, today: date | None = None, years_ahead: int = 1
+) -> dict[str, Any]:
+    """Create upcoming partitions and detach expired ones, then commit."""
+    today = today or date.today()
+    created: list[str] = []
+    detached: list[str] = []
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT pg_try_advisory_xact_lock(%s)", (_MAINTENANCE_LOCK_KEY,)
+        )
+        if not cur.fetchone()[0]:
+            conn.rollback()
+            return {"skipped": True, "created": created, "detached": detached}
+        for year in range(today.year, today.year + years_ahead + 1):
+            if create_year_partition(cur, year):
+                created.append(partition_name(year))
+        detached = detach_expired_partitions(cur, today)
+    conn.commit()
+    return {"skipped": False, "created": created, "detached": detached}
+
+
+class AuditPartitionManager:
+    """Runs :func:`maintain_partitions` now and then every ``interval``."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        years_ahead: int = 1,
+        interval: float = 24 * 3600.0,
+    ):
+        self._connect = connect
+        self.years_ahead = years_ahead
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self, today: date | None = None) -> dict[str, Any]:
+        conn = self._connect()
+        try:
+            return maintain_partitions(
+                conn, today=today, years_ahead=self.years_ahead
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="audit-partition-manager", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Audit partition maintenance failed")
+            self._stop.wait(self.interval)
@@ -8,7 +8,8 @@ from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
 
-from ..db import get_connection
+from ..db import dedicated_connection, get_db
+from ..schema_migrations import ensure_schema
 from .catalog import AUDIT_EVENT_CATALOG, AUDIT_EVENT_SCHEMA, get_system_inventory
 from .engine import (
     generate_audit_check_report,
@@ -18,6 +19,7 @@ from .engine import (
 )
 from .packager import generate_notes_to_auditor, generate_year_end_package
 from .schemas import AuditCheckRequest
+from .verifier import verify_audit_chain
 
 router = APIRouter(prefix="/api/audit", tags=["audit"])
 
@@ -32,7 +34,7 @@ def audit_inventory():
 
 
 @router.post("/checks")
-def audit_checks(payload: AuditCheckRequest, conn=Depends(get_connection)):
+def audit_checks(payload: AuditCheckRequest, conn=Depends(get_db)):
     return generate_audit_check_report(conn, payload).model_dump(mode="json")
 
 
@@ -46,7 +48,9 @@ def audit_events(
     action: str | None = Query(default=None),
     limit: int = Query(default=200, ge=1, le=2000),
     offset: int = Query(default=0, ge=0),
-    conn=Depends(get_connection),
+    cursor: str | None = Query(default=None),
+    estimate_total: bool = Query(default=False),
+    conn=Depends(get_db),
 ):
     return list_audit_events(
         conn,
@@ -58,6 +62,20 @@ def audit_events(
         action=action,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        estimate_total=estimate_total,
+    )
+
+
+@router.post("/chain/verify")
+def audit_chain_verify(
+    full: bool = Query(default=False),
+    workers: int = Query(default=4, ge=1, le=16),
+):
+    """Verify the hash chain since the last checkpoint (or fully)."""
+    ensure_schema()
+    return verify_audit_chain(
+        dedicated_connection, full=full, workers=workers
     )
 
 
@@ -66,7 +84,7 @@ def audit_packages(
     fiscal_year: int | None = Query(default=None, ge=2000, le=2100),
     limit: int = Query(default=50, ge=1, le=500),
     offset: int = Query(default=0, ge=0),
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
     return list_audit_packages(
         conn,
@@ -78,14 +96,14 @@ def audit_packages(
 
 @router.post("/package/year-end")
 def audit_year_end_package(
-    payload: AuditCheckRequest, conn=Depends(get_connection)
+    payload: AuditCheckRequest, conn=Depends(get_db)
 ):
     manifest = generate_year_end_package(conn, payload)
     return manifest.model_dump(mode="json")
 
 
 @router.get("/package/{package_id}/download")
-def audit_download_package(package_id: str, conn=Depends(get_connection)):
+def audit_download_package(package_id: str, conn=Depends(get_db)):
     package = get_audit_package(conn, package_id)
     if not package:
         raise HTTPException(status_code=404, detail="Package not found")
@@ -102,7 +120,7 @@ def audit_download_package(package_id: str, conn=Depends(get_connection)):
 
 
 @router.post("/notes")
-def audit_notes(payload: AuditCheckRequest, conn=Depends(get_connection)):
+def audit_notes(payload: AuditCheckRequest, conn=Depends(get_db)):
     report = generate_audit_check_report(conn, payload)
     notes = generate_notes_to_auditor(conn, payload, report)
     return {"fiscal_year": payload.fiscal_year, "notes": notes}
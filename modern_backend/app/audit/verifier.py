@@ -0,0 +1,286 @@
+"""Incremental, parallel verification of the audit hash chain.
+
+Each stored event must satisfy two rules:
+
+- ``event_hash`` is ``chain_hash(prev_hash, canonical_json)``;
+- ``prev_hash`` equals the ``event_hash`` of the event before it in
+  ``audit_event_pk`` order.
+
+The pk range after the last verified checkpoint is split into segments.
+Each segment is streamed through a server-side cursor on its own
+connection, and segments run in parallel. A segment checks every row
+against its own stored ``prev_hash`` and the links inside the segment.
+Afterwards the segment boundaries are stitched together, and a clean run
+records a checkpoint (last pk and hash) in ``audit_chain_checkpoints``.
+The next run then only reads events written since.
+
+Without a checkpoint, the first remaining event's ``prev_hash`` is taken
+as the anchor. It is the genesis event or the last one in a detached
+partition (see ``audit.partitions``).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from .partitions import AUDIT_EVENTS_TABLE
+from .schemas import AuditEvent, AuditEventActor
+from .writer import canonical_event_json, chain_hash
+
+_SEGMENT_SQL = f"""
+    SELECT audit_event_pk, event_id, occurred_at, module, entity_type,
+           entity_id, action, source, correlation_id, actor_json,
+           before_json, after_json, evidence_links, retention_until, note,
+           prev_hash, event_hash
+    FROM {AUDIT_EVENTS_TABLE}
+    WHERE audit_event_pk > %s AND audit_event_pk <= %s
+    ORDER BY audit_event_pk
+"""
+
+
+def _canonical_candidates(row) -> list[str]:
+    (
+        _pk,
+        event_id,
+        occurred_at,
+        module,
+        entity_type,
+        entity_id,
+        action,
+        source,
+        correlation_id,
+        actor_json,
+        before_json,
+        after_json,
+        evidence_links,
+        retention_until,
+        note,
+        _prev_hash,
+        _event_hash,
+    ) = row
+    fields = {
+        "event_id": event_id,
+        "module": module,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "action": action,
+        "source": source,
+        "correlation_id": correlation_id,
+        "actor": AuditEventActor(**(actor_json or {})),
+        "before": before_json,
+        "after": after_json,
+        "evidence_links": evidence_links or [],
+        "retention_until": retention_until,
+        "note": note,
+    }
+    # Events are hashed with a naive UTC occurred_at, which the database
+    # hands back as an aware timestamp in the session time zone.
+    candidates = [occurred_at]
+    if getattr(occurred_at, "tzinfo", None) is not None:
+        candidates.insert(0, occurred_at.replace(tzinfo=None))
+    return [
+        canonical_event_json(AuditEvent(occurred_at=value, **fields))
+        for value in candidates
+    ]
+
+
+class _Segment:
+    __slots__ = (
+        "breaks",
+        "count",
+        "first_pk",
+        "first_prev_hash",
+        "high",
+        "last_hash",
+        "last_pk",
+        "low",
+    )
+
+    def __init__(self, low: int, high: int):
+        self.low = low
+        self.high = high
+        self.count = 0
+        self.first_pk: int | None = None
+        self.first_prev_hash: str | None = None
+        self.last_pk: int | None = None
+        self.last_hash: str | None = None
+        self.breaks: list[dict[str, Any]] = []
+
+
+def verify_segment(
+    conn, low: int, high: int, *, max_breaks: int = 50, itersize: int = 5000
+) -> _Segment:
+    """Verify events with ``low < audit_event_pk <= high`` on ``conn``."""
+    segment = _Segment(low, high)
+    cur = conn.cursor(name=f"audit_chain_{low}_{high}")
+    cur.itersize = itersize
+    try:
+        cur.execute(_SEGMENT_SQL, (low, high))
+        for row in cur:
+            pk, prev_hash, event_hash = row[0], row[15], row[16]
+            if segment.first_pk is None:
+                segment.first_pk = pk
+                segment.first_prev_hash = prev_hash
+            elif prev_hash != segment.last_hash:
+                segment.breaks.append(
+                    {
+                        "audit_event_pk": pk,
+                        "problem": "prev_hash_mismatch",
+                        "expected": segment.last_hash,
+                        "found": prev_hash,
+                    }
+                )
+            if not any(
+                chain_hash(prev_hash, canonical) == event_hash
+                for canonical in _canonical_candidates(row)
+            ):
+                segment.breaks.append(
+                    {
+                        "audit_event_pk": pk,
+                        "problem": "event_hash_mismatch",
+                        "found": event_hash,
+                    }
+                )
+            segment.count += 1
+            segment.last_pk = pk
+            segment.last_hash = event_hash
+            if len(segment.breaks) >= max_breaks:
+                break
+    finally:
+        cur.close()
+    conn.rollback()
+    return segment
+
+
+def _latest_checkpoint(cur) -> tuple[int, str | None] | None:
+    cur.execute(
+        """
+        SELECT verified_through_pk, event_hash
+        FROM audit_chain_checkpoints
+        WHERE status = 'ok'
+        ORDER BY verified_through_pk DESC
+        LIMIT 1
+        """
+    )
+    row = cur.fetchone()
+    return (int(row[0]), row[1]) if row else None
+
+
+def verify_audit_chain(
+    connect: Callable[[], Any],
+    *,
+    full: bool = False,
+    workers: int = 4,
+    segment_size: int = 100_000,
+    record: bool = True,
+    max_breaks: int = 50,
+) -> dict[str, Any]:
+    """Verify the chain from the last checkpoint (or from the start).
+
+    ``connect`` opens a connection. It is called once for the checkpoint
+    bookkeeping and once per segment.
+    """
+    started = time.perf_counter()
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            checkpoint = None if full else _latest_checkpoint(cur)
+            cur.execute(
+                f"SELECT MAX(audit_event_pk) FROM {AUDIT_EVENTS_TABLE}"
+            )
+            row = cur.fetchone()
+        head_pk = int(row[0]) if row and row[0] is not None else 0
+        start_pk, expected = checkpoint if checkpoint else (0, None)
+        ranges = [
+            (low, min(low + segment_size, head_pk))
+            for low in range(start_pk, head_pk, max(1, segment_size))
+        ]
+
+        def run(bounds: tuple[int, int]) -> _Segment:
+            segment_conn = connect()
+            try:
+                return verify_segment(
+                    segment_conn, *bounds, max_breaks=max_breaks
+                )
+            finally:
+                segment_conn.close()
+
+        if len(ranges) > 1 and workers > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(workers, len(ranges)),
+                thread_name_prefix="audit-chain-verify",
+            ) as pool:
+                segments = list(pool.map(run, ranges))
+        else:
+            segments = [run(bounds) for bounds in ranges]
+
+        breaks: list[dict[str, Any]] = []
+        anchor = expected
+        previous_hash = expected
+        first = True
+        verified = 0
+        last_pk, last_hash = checkpoint if checkpoint else (0, None)
+        for segment in segments:
+            if segment.first_pk is None:
+                continue
+            if first and checkpoint is None:
+                anchor = segment.first_prev_hash
+            elif segment.first_prev_hash != previous_hash:
+                breaks.append(
+                    {
+                        "audit_event_pk": segment.first_pk,
+                        "problem": "prev_hash_mismatch",
+                        "expected": previous_hash,
+                        "found": segment.first_prev_hash,
+                    }
+                )
+            first = False
+            breaks.extend(segment.breaks)
+            verified += segment.count
+            previous_hash = segment.last_hash
+            last_pk, last_hash = segment.last_pk, segment.last_hash
+
+        breaks.sort(key=lambda b: b["audit_event_pk"])
+        status = "ok" if not breaks else "broken"
+        result = {
+            "status": status,
+            "mode": "incremental" if checkpoint else "full",
+            "resumed_from_pk": start_pk,
+            "anchor_prev_hash": anchor,
+            "verified_through_pk": last_pk,
+            "head_hash": last_hash,
+            "events_verified": verified,
+            "segments": len(ranges),
+            "breaks": breaks[:max_breaks],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if record and (verified or breaks):
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO audit_chain_checkpoints (
+                        verified_through_pk, event_hash, events_verified,
+                        status, detail
+                    ) VALUES (%s, %s, %s, %s, %s::jsonb)
+                    """,
+                    (
+                        last_pk,
+                        last_hash,
+                        verified,
+                        status,
+                        json.dumps(
+                            {
+                                "resumed_from_pk": start_pk,
+                                "breaks": result["breaks"],
+                            }
+                        ),
+                    ),
+                )
+            conn.commit()
+        return result
+    finally:
+        conn.close()
@@ -0,0 +1,307 @@
+"""Group-commit writer for the hash-chained audit event store.
+
+Every event's ``event_hash`` covers the previous event's hash, so events
+must be chained one at a time in insert order. Rather than reading the
+chain tail inside each business transaction, a per-process writer thread
+drains queued events in batches:
+
+- it takes ``pg_advisory_xact_lock`` so batches from different workers
+  never interleave;
+- it reads the chain tail once per batch;
+- it inserts the whole batch with one multi-row ``INSERT``. Rows take
+  ``audit_event_pk`` from the table's sequence in chain order.
+
+Callers choose durability per event. With ``wait=True`` they block until
+the batch holding their event has committed. With ``wait=False``
+(fire-and-forget) they return at once. ``AUDIT_WRITE_MODE``
+(``sync``/``async``) sets the default. ``engine.record_audit_event``
+writes synchronous events on the caller's own connection instead, with
+:func:`write_chained_batch`, and queues only fire-and-forget ones here.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from contextlib import suppress
+from typing import Any
+
+from ..db import dedicated_connection
+from .partitions import AUDIT_EVENTS_TABLE
+from .schemas import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+# Shared with anything else that appends to the chain.
+AUDIT_CHAIN_LOCK_KEY = 7_310_053
+
+_INSERT_COLUMNS = f"""
+    INSERT INTO {AUDIT_EVENTS_TABLE} (
+        event_id, occurred_at, module, entity_type, entity_id,
+        action, source, correlation_id, actor_json, before_json,
+        after_json, evidence_links, retention_until, note, prev_hash,
+        event_hash
+    ) VALUES
+"""
+_ROW_PLACEHOLDER = (
+    "(%s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb,"
+    " %s::jsonb, %s::jsonb, %s, %s, %s, %s)"
+)
+
+
+def canonical_event_json(event: AuditEvent) -> str:
+    """Serialise ``event`` exactly as it is hashed into the chain."""
+    payload = event.model_dump(mode="json")
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def chain_hash(prev_hash: str | None, canonical: str) -> str:
+    return hashlib.sha256(
+        ((prev_hash or "") + canonical).encode("utf-8")
+    ).hexdigest()
+
+
+def _row_params(event: AuditEvent) -> tuple[Any, ...]:
+    return (
+        event.event_id,
+        event.occurred_at,
+        event.module,
+        event.entity_type,
+        event.entity_id,
+        event.action,
+        event.source,
+        event.correlation_id,
+        json.dumps(event.actor.model_dump(mode="json")),
+        json.dumps(event.before) if event.before is not None else None,
+        json.dumps(event.after) if event.after is not None else None,
+        json.dumps(event.evidence_links),
+        event.retention_until,
+        event.note,
+        event.prev_hash,
+        event.event_hash,
+    )
+
+
+def write_chained_batch(
+    conn, items: Sequence[tuple[AuditEvent, str]]
+) -> None:
+    """Chain and insert ``(event, canonical_json)`` pairs on ``conn``.
+
+    Takes the chain lock for the rest of the caller's transaction; the
+    caller commits.
+    """
+    if not items:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT pg_advisory_xact_lock(%s)", (AUDIT_CHAIN_LOCK_KEY,)
+        )
+        cur.execute(
+            f"SELECT event_hash FROM {AUDIT_EVENTS_TABLE} "
+            "ORDER BY audit_event_pk DESC LIMIT 1"
+        )
+        row = cur.fetchone()
+        prev_hash = row[0] if row else None
+        params: list[Any] = []
+        for event, canonical in items:
+            event.prev_hash = prev_hash
+            event.event_hash = chain_hash(prev_hash, canonical)
+            prev_hash = event.event_hash
+            params.extend(_row_params(event))
+        cur.execute(
+            _INSERT_COLUMNS + ",\n".join([_ROW_PLACEHOLDER] * len(items)),
+            params,
+        )
+
+
+class _Pending:
+    __slots__ = ("canonical", "event", "future")
+
+    def __init__(
+        self, event: AuditEvent | None, canonical: str, future: Future
+    ):
+        self.event = event
+        self.canonical = canonical
+        self.future = future
+
+
+class AuditWriter:
+    """Per-process queue feeding one background batch writer.
+
+    ``connect`` opens the writer's own connection. It is kept across
+    batches and reopened after a failure.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        max_batch: int = 500,
+        linger: float = 0.0,
+        wait_by_default: bool = True,
+    ):
+        self._connect = connect
+        self.max_batch = max(1, max_batch)
+        self.linger = linger
+        self.wait_by_default = wait_by_default
+        self._queue: queue.SimpleQueue[_Pending | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._conn = None
+        self._written = 0
+        self._failed = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._last_batch_ms = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="audit-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, event: AuditEvent) -> Future:
+        """Queue ``event``; the future resolves once its batch commits."""
+        return self.submit_many([event])[0]
+
+    def submit_many(self, events: Sequence[AuditEvent]) -> list[Future]:
+        """Queue ``events`` back to back so they share a batch."""
+        futures: list[Future] = []
+        for event in events:
+            future: Future = Future()
+            self._queue.put(
+                _Pending(event, canonical_event_json(event), future)
+            )
+            futures.append(future)
+        self.start()
+        return futures
+
+    def record(
+        self, event: AuditEvent, *, wait: bool | None = None
+    ) -> dict[str, Any]:
+        """Queue ``event`` and, for synchronous durability, wait for it."""
+        future = self.submit(event)
+        if self.wait_by_default if wait is None else wait:
+            future.result()
+        return event.model_dump(mode="json")
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Block until everything queued so far has been written."""
+        future: Future = Future()
+        self._queue.put(_Pending(None, "", future))
+        self.start()
+        future.result(timeout)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Write what is still queued, then stop the thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queued": self._queue.qsize(),
+            "events_written": self._written,
+            "events_failed": self._failed,
+            "batches": self._batches,
+            "largest_batch": self._largest_batch,
+            "last_batch_ms": round(self._last_batch_ms, 2),
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch:
+                try:
+                    if self.linger > 0:
+                        remaining = max(0.0, deadline - time.monotonic())
+                        nxt = self._queue.get(timeout=remaining)
+                    else:
+                        nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            self._write(batch)
+        # Drain anything queued before stop() so fire-and-forget events
+        # are not lost on shutdown.
+        leftover: list[_Pending] = []
+        with suppress(queue.Empty):
+            while True:
+                nxt = self._queue.get_nowait()
+                if nxt is not None:
+                    leftover.append(nxt)
+        for start in range(0, len(leftover), self.max_batch):
+            self._write(leftover[start : start + self.max_batch])
+        if self._conn is not None:
+            with suppress(Exception):
+                self._conn.close()
+            self._conn = None
+
+    def _write(self, batch: list[_Pending]) -> None:
+        items = [(p.event, p.canonical) for p in batch if p.event is not None]
+        started = time.perf_counter()
+        error: Exception | None = None
+        # One retry on a fresh connection covers a dropped session.
+        for _attempt in range(2):
+            try:
+                if items:
+                    if self._conn is None or self._conn.closed:
+                        self._conn = self._connect()
+                    write_chained_batch(self._conn, items)
+                    self._conn.commit()
+                error = None
+                break
+            except Exception as exc:
+                error = exc
+                if self._conn is not None:
+                    with suppress(Exception):
+                        self._conn.close()
+                self._conn = None
+        self._last_batch_ms = (time.perf_counter() - started) * 1000.0
+        if error is not None:
+            self._failed += len(items)
+            logger.error(
+                "Audit batch of %d event(s) failed: %s (event_ids=%s)",
+                len(items),
+                error,
+                [event.event_id for event, _ in items],
+            )
+            for pending in batch:
+                pending.future.set_exception(error)
+            return
+        self._written += len(items)
+        if items:
+            self._batches += 1
+            self._largest_batch = max(self._largest_batch, len(items))
+        for pending in batch:
+            pending.future.set_result(None)
+
+
+audit_writer = AuditWriter(
+    dedicated_connection,
+    max_batch=int(os.environ.get("AUDIT_BATCH_MAX", "500")),
+    linger=float(os.environ.get("AUDIT_BATCH_LINGER_MS", "0")) / 1000.0,
+    wait_by_default=os.environ.get("AUDIT_WRITE_MODE", "sync").lower()
+    != "async",
+)
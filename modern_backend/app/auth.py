@@ -3,6 +3,7 @@
 from fastapi import HTTPException, Request, status
 
 from .routers.driver_auth import get_session, parse_bearer_token
+from .sessions import session_store
 
 PROTECTED_PATH_PREFIXES = (
     "/api",
@@ -37,15 +38,14 @@ def is_auth_exempt_path(path: str) -> bool:
     )
 
 
-def resolve_authenticated_user(request: Request) -> dict | None:
+def _session_token(request: Request) -> str | None:
     authorization = request.headers.get("Authorization")
-    session_token = parse_bearer_token(authorization) or request.cookies.get(
+    return parse_bearer_token(authorization) or request.cookies.get(
         "session_token"
     )
-    if not session_token:
-        return None
 
-    session = get_session(session_token)
+
+def _session_user(session: dict | None) -> dict | None:
     if not session:
         return None
 
@@ -59,6 +59,21 @@ def resolve_authenticated_user(request: Request) -> dict | None:
     }
 
 
+def resolve_authenticated_user(request: Request) -> dict | None:
+    session_token = _session_token(request)
+    if not session_token:
+        return None
+    return _session_user(get_session(session_token))
+
+
+async def resolve_authenticated_user_async(request: Request) -> dict | None:
+    """Like :func:`resolve_authenticated_user`, for middleware."""
+    session_token = _session_token(request)
+    if not session_token:
+        return None
+    return _session_user(await session_store.get_async(session_token))
+
+
 def get_current_user(request: Request) -> dict:
     user = getattr(request.state, "current_user", None)
     if user:
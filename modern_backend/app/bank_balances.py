@@ -0,0 +1,127 @@
+"""Bank account balances from monthly checkpoints.
+
+Schema migration 18 adds ``bank_balance_checkpoints``. It stores one
+row per account and month, holding the account's closing balance at the
+end of that month. Statement triggers on ``banking_transactions`` fold
+each insert, update or delete into the affected month and every later
+month. A typical write, into the current month, touches one checkpoint
+row.
+
+An opening balance is then the closing balance of the latest checkpoint
+before the period's month. To that it adds the transactions between the
+first of that month and the period start. It no longer sums an
+account's whole history. Running balances come from a window ``SUM``
+over the period's transactions.
+"""
+
+import logging
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+# Columns of banking_transactions the checkpoints are computed from.
+# Without them schema migration 18 leaves the triggers out.
+CHECKPOINT_COLUMNS = ("account_number", "transaction_date", "amount")
+
+# Closing balance per account and month, cumulative over all history.
+REBUILD_CHECKPOINTS_SQL = """
+    INSERT INTO bank_balance_checkpoints
+        (account_number, month, closing_balance)
+    SELECT account_number, month,
+           SUM(net_amount) OVER (
+               PARTITION BY account_number ORDER BY month
+           )
+    FROM (
+        SELECT account_number,
+               date_trunc('month', transaction_date)::date AS month,
+               COALESCE(SUM(amount), 0) AS net_amount
+        FROM banking_transactions
+        WHERE account_number IS NOT NULL AND transaction_date IS NOT NULL
+        GROUP BY 1, 2
+    ) monthly
+"""
+
+OPENING_BALANCES_SQL = """
+    SELECT a.account_number,
+           COALESCE(cp.closing_balance, 0) + COALESCE(p.partial, 0)
+    FROM unnest(%s::text[]) AS a(account_number)
+    LEFT JOIN LATERAL (
+        SELECT c.closing_balance
+        FROM bank_balance_checkpoints c
+        WHERE c.account_number = a.account_number
+          AND c.month < date_trunc('month', %s::date)
+        ORDER BY c.month DESC
+        LIMIT 1
+    ) cp ON true
+    LEFT JOIN LATERAL (
+        SELECT SUM(bt.amount) AS partial
+        FROM banking_transactions bt
+        WHERE bt.account_number = a.account_number
+          AND bt.transaction_date >= date_trunc('month', %s::date)
+          AND bt.transaction_date < %s::date
+    ) p ON true
+"""
+
+# Period transactions with their receipts. The running balance is taken
+# over bank rows only, so a transaction paid by several receipts is not
+# counted once per receipt.
+RUNNING_BALANCE_SQL = """
+    SELECT
+        t.transaction_date,
+        t.description,
+        t.amount,
+        t.transaction_id,
+        r.vendor_name,
+        r.receipt_id,
+        r.total_amount,
+        r.receipt_id,
+        t.period_total
+    FROM (
+        SELECT
+            bt.transaction_date,
+            bt.description,
+            bt.amount,
+            bt.transaction_id,
+            COALESCE(
+                SUM(bt.amount) OVER (
+                    ORDER BY bt.transaction_date, bt.transaction_id
+                ),
+                0
+            ) AS period_total
+        FROM banking_transactions bt
+        WHERE bt.account_number = %s
+          AND bt.transaction_date BETWEEN %s AND %s
+    ) t
+    LEFT JOIN receipts r ON t.transaction_id = r.banking_transaction_id
+    ORDER BY t.transaction_date, t.transaction_id
+"""
+
+
+async def opening_balances(
+    cur, account_numbers: list[str], start_date: date | str
+) -> dict[str, float]:
+    """Each account's balance before ``start_date``, in one query."""
+    if not account_numbers:
+        return {}
+    await cur.execute(
+        OPENING_BALANCES_SQL,
+        [list(account_numbers), start_date, start_date, start_date],
+    )
+    return {
+        row[0]: float(row[1]) if row[1] else 0.0
+        for row in await cur.fetchall()
+    }
+
+
+def rebuild_checkpoints(cur) -> int:
+    """Recompute every checkpoint from ``banking_transactions``.
+
+    Returns the number of checkpoint rows written. Use it to repair the
+    table after bulk loads that ran with triggers disabled.
+    """
+    cur.execute("LOCK TABLE banking_transactions IN SHARE MODE")
+    cur.execute("DELETE FROM bank_balance_checkpoints")
+    cur.execute(REBUILD_CHECKPOINTS_SQL)
+    written = max(cur.rowcount, 0)
+    logger.info("Rebuilt %s bank balance checkpoints", written)
+    return written
@@ -0,0 +1,216 @@
+"""Receipt match suggestions for unreconciled bank transactions.
+
+One query does the whole run. The unreconciled transactions of the
+account are joined ``LATERAL`` to the receipts with the same absolute
+amount within ``window_days`` of the transaction date. The amount is
+probed in whole cents as ``IN (a, -a)`` so the receipts
+``(cents, receipt_date)`` index from schema migration 16 can serve it.
+``ABS(gross_amount) = ...`` could not use an index. Rows come
+back through a server-side cursor, ordered by transaction, so
+whole-account runs are suggested in a single pass.
+
+Candidates are ranked by :func:`confidence`. The score combines the
+amount match, the date distance and the word overlap between the bank
+description and the receipt's vendor and description.
+"""
+
+import re
+from collections.abc import Iterator
+from datetime import date
+from typing import Any
+
+from .export_stream import iter_query
+from .schema_catalog import schema_catalog
+from .utils.amounts import cents_sql
+
+# Weights of the confidence components; they sum to 1.
+AMOUNT_WEIGHT = 0.5
+DATE_WEIGHT = 0.3
+TEXT_WEIGHT = 0.2
+
+# Bank-statement boilerplate that says nothing about the payee.
+_NOISE_WORDS = frozenset(
+    {
+        "card",
+        "debit",
+        "withdrawal",
+        "purchase",
+        "payment",
+        "pos",
+        "pre",
+        "auth",
+        "transfer",
+        "the",
+        "and",
+        "inc",
+        "ltd",
+    }
+)
+_WORD = re.compile(r"[a-z][a-z0-9&']{2,}")
+
+
+def words(text: str | None) -> frozenset[str]:
+    """Lower-cased words of ``text`` without statement boilerplate."""
+    return frozenset(_WORD.findall((text or "").lower())) - _NOISE_WORDS
+
+
+def text_similarity(
+    bank_text: str | None, *receipt_texts: str | None
+) -> float:
+    """Share of the shorter word set found in the other (0..1)."""
+    bank = words(bank_text)
+    receipt = frozenset().union(*(words(t) for t in receipt_texts))
+    if not bank or not receipt:
+        return 0.0
+    return len(bank & receipt) / min(len(bank), len(receipt))
+
+
+def confidence(
+    bank_amount: float,
+    receipt_amount: float,
+    date_gap: int,
+    window_days: int,
+    similarity: float,
+) -> float:
+    """Score in 0..1; a same-sign amount counts fully, a flipped sign half."""
+    amount = 1.0 if bank_amount == receipt_amount else 0.5
+    closeness = 1.0 - min(date_gap, window_days + 1) / (window_days + 1)
+    score = (
+        AMOUNT_WEIGHT * amount
+        + DATE_WEIGHT * closeness
+        + TEXT_WEIGHT * similarity
+    )
+    return round(score, 3)
+
+
+def _suggestion_sql(conn, *, limit_rows: bool) -> str:
+    bank_date = (
+        schema_catalog.first_existing_column(
+            conn, "banking_transactions", ["transaction_date", "trans_date"]
+        )
+        or "transaction_date"
+    )
+    bank_text = schema_catalog.first_existing_column(
+        conn, "banking_transactions", ["description", "trans_description"]
+    )
+    receipt_cols = schema_catalog.column_set(conn, "receipts")
+    vendor = "r.vendor_name" if "vendor_name" in receipt_cols else "NULL"
+    unlinked = (
+        "AND r.banking_transaction_id IS NULL"
+        if "banking_transaction_id" in receipt_cols
+        else ""
+    )
+    limit = "LIMIT %s" if limit_rows else ""
+    return f"""
+        WITH bank AS (
+            SELECT transaction_id, {bank_date} AS trans_date,
+                   {bank_text or "NULL"} AS trans_description,
+                   COALESCE(debit_amount, 0)
+                   - COALESCE(credit_amount, 0) AS amount
+            FROM banking_transactions
+            WHERE bank_id = %s
+              AND (reconciliation_status IS NULL
+               OR reconciliation_status IN ('unreconciled','ignored'))
+            ORDER BY {bank_date} DESC, transaction_id
+            {limit}
+        )
+        SELECT b.transaction_id, b.trans_date, b.trans_description,
+               b.amount, m.receipt_id, m.receipt_date, m.description,
+               m.vendor_name, m.gross_amount, m.date_gap
+        FROM bank b
+        JOIN LATERAL (
+            SELECT r.receipt_id, r.receipt_date, r.description,
+                   {vendor} AS vendor_name, r.gross_amount,
+                   ABS(r.receipt_date - b.trans_date) AS date_gap
+            FROM receipts r
+            WHERE {cents_sql("r.gross_amount")}
+                  IN (ROUND(b.amount * 100)::bigint,
+                      -ROUND(b.amount * 100)::bigint)
+              AND r.receipt_date BETWEEN b.trans_date - %s
+                                     AND b.trans_date + %s
+              {unlinked}
+            ORDER BY date_gap, r.receipt_id
+            LIMIT %s
+        ) m ON true
+        WHERE b.amount <> 0
+        ORDER BY b.trans_date DESC, b.transaction_id
+    """
+
+
+def suggest_matches(
+    conn,
+    bank_id: int,
+    *,
+    window_days: int = 1,
+    max_results: int | None = 200,
+    candidates: int = 5,
+    pool: int = 20,
+) -> Iterator[dict[str, Any]]:
+    """Yield one suggestion per transaction that has candidate receipts.
+
+    ``max_results`` caps the transactions considered (newest first);
+    ``None`` runs the whole account. Up to ``pool`` receipts closest in
+    date are scored per transaction, and the best ``candidates`` kept.
+    """
+    params: list[Any] = [bank_id]
+    if max_results is not None:
+        params.append(max_results)
+    params.extend([window_days, window_days, max(pool, candidates)])
+    sql = _suggestion_sql(conn, limit_rows=max_results is not None)
+
+    current: dict[str, Any] | None = None
+    for row in iter_query(conn, sql, params):
+        txn_id = row["transaction_id"]
+        if current is None or current["transaction_id"] != txn_id:
+            if current is not None:
+                yield _finish(current, candidates)
+            current = _start(row)
+        current["candidates"].append(_candidate(row, current, window_days))
+    if current is not None:
+        yield _finish(current, candidates)
+
+
+def _iso(value: Any) -> str:
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def _start(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "transaction_id": row["transaction_id"],
+        "transaction_date": _iso(row["trans_date"]),
+        "amount": round(float(row["amount"] or 0), 2),
+        "description": row["trans_description"],
+        "candidates": [],
+    }
+
+
+def _candidate(
+    row: dict[str, Any], txn: dict[str, Any], window_days: int
+) -> dict[str, Any]:
+    gross = round(float(row["gross_amount"] or 0), 2)
+    gap = int(row["date_gap"] or 0)
+    similarity = text_similarity(
+        txn["description"], row["vendor_name"], row["description"]
+    )
+    return {
+        "receipt_id": row["receipt_id"],
+        "receipt_date": _iso(row["receipt_date"]),
+        "description": row["description"],
+        "vendor_name": row["vendor_name"],
+        "gross_amount": gross,
+        "date_gap_days": gap,
+        "text_similarity": round(similarity, 3),
+        "confidence": confidence(
+            txn["amount"], gross, gap, window_days, similarity
+        ),
+    }
+
+
+def _finish(txn: dict[str, Any], candidates: int) -> dict[str, Any]:
+    ranked = sorted(
+        txn["candidates"],
+        key=lambda c: (-c["confidence"], c["date_gap_days"], c["receipt_id"]),
+    )[:candidates]
+    txn["candidates"] = ranked
+    txn["confidence"] = ranked[0]["confidence"]
+    return txn
@@ -1,12 +1,137 @@
+import asyncio
+import contextvars
+import logging
 import os
-from collections.abc import Iterator
-from contextlib import contextmanager, suppress
+import threading
+import time
+import traceback
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, suppress
+from typing import Any, TypeVar
 
 import psycopg2
+import psycopg2.extensions
 from psycopg2 import pool
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 _LOGGED_DB_TARGET = False
 _connection_pool = None
+_pool_lock = threading.Lock()
+_async_pool = None
+
+# Event-loop guard: "warn" (default) logs each offending call site once,
+# "raise" turns a sync DB call on the event loop into an error, "off"
+# disables the check.
+_LOOP_GUARD_MODE = os.environ.get("DB_LOOP_GUARD", "warn").lower()
+_loop_guard_seen: set[tuple[str, int]] = set()
+
+# Label of the request currently checking out connections (set by the HTTP
+# middleware) so leak reports name the route, not just the stack.
+_checkout_owner: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "db_checkout_owner", default=None
+)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _guard_event_loop(operation: str) -> None:
+    """Flag blocking psycopg2 work issued from an event-loop coroutine."""
+    if _LOOP_GUARD_MODE == "off" or not _on_event_loop():
+        return
+    if _LOOP_GUARD_MODE == "raise":
+        raise RuntimeError(
+            f"Blocking DB call ({operation}) made on the event loop; "
+            "use db.async_cursor() or get_async_connection instead"
+        )
+    stack = traceback.extract_stack()[:-2]
+    caller = next(
+        (
+            frame
+            for frame in reversed(stack)
+            if not frame.filename.endswith(os.path.join("app", "db.py"))
+        ),
+        stack[-1] if stack else None,
+    )
+    site = (caller.filename, caller.lineno) if caller else ("?", 0)
+    if site in _loop_guard_seen:
+        return
+    _loop_guard_seen.add(site)
+    logger.warning(
+        "Blocking DB call (%s) on the event loop at %s:%s\n%s",
+        operation,
+        site[0],
+        site[1],
+        "".join(traceback.format_list(stack[-8:])),
+    )
+
+
+_after_commit_failures = 0
+_after_commit_lock = threading.Lock()
+
+
+def _count_after_commit_failure() -> None:
+    global _after_commit_failures
+    with _after_commit_lock:
+        _after_commit_failures += 1
+
+
+class GuardedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that reports use from an event-loop coroutine.
+
+    It also runs ``after_commit`` callbacks once the current transaction
+    commits; a rollback discards them. Callbacks that return a ``Future``
+    are all started first and then waited on together, so ``commit()``
+    returns only when that follow-up work has finished. The data is
+    already committed by then, so a failing callback is logged and
+    counted in :func:`pool_stats` instead of raised.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._after_commit: list[Callable[[], Any]] = []
+
+    def cursor(self, *args, **kwargs):
+        _guard_event_loop("cursor")
+        return super().cursor(*args, **kwargs)
+
+    def after_commit(self, callback: Callable[[], Any]) -> None:
+        self._after_commit.append(callback)
+
+    def commit(self):
+        _guard_event_loop("commit")
+        result = super().commit()
+        callbacks, self._after_commit = self._after_commit, []
+        outcomes = []
+        for callback in callbacks:
+            try:
+                outcomes.append(callback())
+            except Exception:
+                _count_after_commit_failure()
+                logger.exception("after_commit callback failed")
+        for outcome in outcomes:
+            if not isinstance(outcome, Future):
+                continue
+            try:
+                outcome.result()
+            except Exception:
+                _count_after_commit_failure()
+                logger.exception("after_commit callback failed")
+        return result
+
+    def rollback(self):
+        _guard_event_loop("rollback")
+        self._after_commit.clear()
+        return super().rollback()
 
 
 def _log_db_target_once():
@@ -26,81 +151,365 @@ def _log_db_target_once():
     )
 
 
+class PoolTimeout(pool.PoolError):
+    """No pooled connection became free within ``DB_POOL_TIMEOUT``."""
+
+
+@contextmanager
+def checkout_owner(label: str) -> Iterator[None]:
+    """Attribute connections checked out in this context to ``label``."""
+    token = _checkout_owner.set(label)
+    try:
+        yield
+    finally:
+        _checkout_owner.reset(token)
+
+
+class _Checkout:
+    __slots__ = ("conn", "owner", "reported", "since", "stack")
+
+    def __init__(self, conn, owner: str | None, stack):
+        self.conn = conn
+        self.since = time.monotonic()
+        self.owner = owner
+        self.stack = stack
+        self.reported = False
+
+    def describe(self) -> str:
+        where = "".join(traceback.format_list(self.stack)) if self.stack else ""
+        return f"owner={self.owner or 'unknown'}\n{where}"
+
+
+class InstrumentedConnectionPool:
+    """Thread-safe psycopg2 pool with bounded waits and checkout metrics.
+
+    ``psycopg2.pool.SimpleConnectionPool`` is not thread-safe and fails
+    immediately when exhausted; sync handlers share this pool across the
+    anyio threadpool, so checkouts are serialized under a condition
+    variable and wait up to ``timeout`` seconds for a connection to free up.
+    Idle connections are only re-validated (``SELECT 1``) once they have sat
+    unused for ``validate_idle_after`` seconds.
+
+    With ``leak_threshold`` > 0 each checkout records its owner and stack; a
+    watchdog logs connections held longer than the threshold and reclaims
+    the slot of any connection closed without being returned.
+    """
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        *,
+        timeout: float,
+        validate_idle_after: float,
+        leak_threshold: float = 0.0,
+        **connect_kwargs,
+    ):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_idle_after = validate_idle_after
+        self.leak_threshold = leak_threshold
+        self._connect_kwargs = connect_kwargs
+        self._cond = threading.Condition()
+        self._idle: list[tuple[Any, float]] = []
+        self._in_use: dict[int, _Checkout] = {}
+        self._opening = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "checkout_wait_ms_total": 0.0,
+            "checkout_wait_ms_max": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "validations": 0,
+            "validation_failures": 0,
+            "leaks_detected": 0,
+            "leaks_reclaimed": 0,
+        }
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+        self._stop = threading.Event()
+        if leak_threshold > 0:
+            threading.Thread(
+                target=self._watch_leaks, name="db-leak-watchdog", daemon=True
+            ).start()
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        with suppress(Exception):
+            conn.close()
+        with self._cond:
+            self._stats["connections_closed"] += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _checkout(self, conn) -> _Checkout:
+        stack = None
+        if self.leak_threshold > 0:
+            stack = [
+                frame
+                for frame in traceback.extract_stack(limit=16)
+                if not frame.filename.endswith(os.path.join("app", "db.py"))
+            ][-8:]
+        return _Checkout(conn, _checkout_owner.get(), stack)
+
+    def _watch_leaks(self) -> None:
+        interval = max(1.0, self.leak_threshold / 2)
+        while not self._stop.wait(interval):
+            self.reap()
+
+    def _reclaim_closed(self) -> int:
+        """Free slots of connections closed without ``putconn`` (lock held)."""
+        now = time.monotonic()
+        closed = [
+            key for key, checkout in self._in_use.items() if checkout.conn.closed
+        ]
+        for key in closed:
+            checkout = self._in_use.pop(key)
+            logger.warning(
+                "Pooled connection closed instead of returned after %.1fs; "
+                "slot reclaimed. Acquired by %s",
+                now - checkout.since,
+                checkout.describe(),
+            )
+        if closed:
+            self._stats["leaks_reclaimed"] += len(closed)
+            self._cond.notify(len(closed))
+        return len(closed)
+
+    def reap(self) -> None:
+        """Report long-held checkouts and reclaim closed-but-unreturned ones."""
+        now = time.monotonic()
+        with self._cond:
+            self._reclaim_closed()
+            held = [
+                checkout
+                for checkout in self._in_use.values()
+                if self.leak_threshold > 0
+                and not checkout.reported
+                and now - checkout.since >= self.leak_threshold
+            ]
+            for checkout in held:
+                checkout.reported = True
+            self._stats["leaks_detected"] += len(held)
+        for checkout in held:
+            logger.warning(
+                "Pooled connection held for %.1fs (threshold %.0fs); "
+                "possible leak. Acquired by %s",
+                now - checkout.since,
+                self.leak_threshold,
+                checkout.describe(),
+            )
+
+    def _open_count(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            conn = None
+            idle_since = 0.0
+            with self._cond:
+                self._waiting += 1
+                try:
+                    while True:
+                        if self._closed:
+                            raise pool.PoolError("connection pool is closed")
+                        if self._idle:
+                            conn, idle_since = self._idle.pop()
+                            self._in_use[id(conn)] = self._checkout(conn)
+                            break
+                        if self._open_count() < self.maxconn:
+                            self._opening += 1
+                            break
+                        if self._reclaim_closed():
+                            continue
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(
+                                "connection pool exhausted: no connection "
+                                f"free after {self.timeout:.1f}s "
+                                f"({self.maxconn} in use)"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                finally:
+                    with self._cond:
+                        self._opening -= 1
+                        if conn is not None:
+                            self._in_use[id(conn)] = self._checkout(conn)
+                        else:
+                            self._cond.notify()
+            elif conn.closed or (
+                time.monotonic() - idle_since >= self.validate_idle_after
+                and not self._validate(conn)
+            ):
+                with self._cond:
+                    self._in_use.pop(id(conn), None)
+                self._discard(conn)
+                continue
+
+            waited_ms = (time.monotonic() - started) * 1000.0
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["checkout_wait_ms_total"] += waited_ms
+                self._stats["checkout_wait_ms_max"] = max(
+                    self._stats["checkout_wait_ms_max"], waited_ms
+                )
+            return conn
+
+    def _validate(self, conn) -> bool:
+        alive = self._is_alive(conn)
+        with self._cond:
+            self._stats["validations"] += 1
+            if not alive:
+                self._stats["validation_failures"] += 1
+        return alive
+
+    def putconn(self, conn, close: bool = False) -> None:
+        with self._cond:
+            owned = self._in_use.pop(id(conn), None) is not None
+        if not owned:
+            # Not ours (e.g. a pre-pool direct connection): just close it.
+            with suppress(Exception):
+                conn.close()
+            return
+        hooks = getattr(conn, "_after_commit", None)
+        if hooks:
+            # Never run a previous borrower's callbacks on the next commit.
+            hooks.clear()
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    close = True
+        if close or conn.closed or self._closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            oldest = min(
+                (checkout.since for checkout in self._in_use.values()),
+                default=now,
+            )
+            return {
+                **self._stats,
+                "checkout_wait_ms_avg": (
+                    self._stats["checkout_wait_ms_total"] / checkouts
+                    if checkouts
+                    else 0.0
+                ),
+                "max_size": self.maxconn,
+                "open": self._open_count(),
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "oldest_checkout_s": round(now - oldest, 3),
+            }
+
+
+def _connect_kwargs() -> dict[str, Any]:
+    kwargs: dict[str, Any] = {
+        "host": os.environ.get("DB_HOST", "localhost"),
+        "port": int(os.environ.get("DB_PORT", "5432")),
+        "database": os.environ.get("DB_NAME", "almsdata"),
+        "user": os.environ.get("DB_USER", "postgres"),
+        "password": os.environ.get("DB_PASSWORD", ""),
+        # search_path is applied once at connect time instead of a
+        # SET round trip on every checkout.
+        "options": f"-c search_path={os.environ.get('DB_SEARCH_PATH', 'public')}",
+        "connection_factory": GuardedConnection,
+    }
+    if os.environ.get("DB_SSLMODE"):
+        kwargs["sslmode"] = os.environ["DB_SSLMODE"]
+    if os.environ.get("DB_CHANNEL_BINDING"):
+        kwargs["channel_binding"] = os.environ["DB_CHANNEL_BINDING"]
+    return kwargs
+
+
 def _get_pool():
     """Get or create the connection pool"""
     global _connection_pool
     if _connection_pool is None:
-        _log_db_target_once()
-        _ssl_kwargs = {}
-        if os.environ.get("DB_SSLMODE"):
-            _ssl_kwargs["sslmode"] = os.environ["DB_SSLMODE"]
-        if os.environ.get("DB_CHANNEL_BINDING"):
-            _ssl_kwargs["channel_binding"] = os.environ["DB_CHANNEL_BINDING"]
-        _connection_pool = pool.SimpleConnectionPool(
-            minconn=1,
-            maxconn=20,
-            host=os.environ.get("DB_HOST", "localhost"),
-            port=int(os.environ.get("DB_PORT", "5432")),
-            database=os.environ.get("DB_NAME", "almsdata"),
-            user=os.environ.get("DB_USER", "postgres"),
-            password=os.environ.get("DB_PASSWORD", ""),
-            **_ssl_kwargs,
-        )
+        with _pool_lock:
+            if _connection_pool is None:
+                _log_db_target_once()
+                _connection_pool = InstrumentedConnectionPool(
+                    minconn=int(os.environ.get("DB_POOL_MIN", "1")),
+                    maxconn=int(os.environ.get("DB_POOL_MAX", "20")),
+                    timeout=float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+                    validate_idle_after=float(
+                        os.environ.get("DB_POOL_VALIDATE_IDLE_SECONDS", "30")
+                    ),
+                    leak_threshold=float(
+                        os.environ.get("DB_LEAK_THRESHOLD_SECONDS", "30")
+                    ),
+                    **_connect_kwargs(),
+                )
     return _connection_pool
 
 
+def dedicated_connection():
+    """Open an unpooled connection for long-lived sessions (LISTEN loops)."""
+    kwargs = _connect_kwargs()
+    kwargs.pop("connection_factory")
+    return psycopg2.connect(**kwargs)
+
+
 def get_connection():
     """Get a connection from the pool with auto-reconnect on failure"""
+    _guard_event_loop("get_connection")
     _log_db_target_once()
     max_retries = 3
 
     for attempt in range(max_retries):
         try:
-            conn_pool = _get_pool()
-            conn = conn_pool.getconn()
-
-            # Test if connection is alive
-            try:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT 1")
-                # Set search_path for Neon compatibility
-                with conn.cursor() as cur:
-                    cur.execute("SET search_path TO public")
-                conn.commit()
-                return conn
-            except (psycopg2.OperationalError, psycopg2.InterfaceError):
-                # Connection is stale, return it and try again
-                conn_pool.putconn(conn, close=True)
-                if attempt < max_retries - 1:
-                    continue
-                raise
-
-        except Exception as e:
+            return _get_pool().getconn()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
             if attempt == max_retries - 1:
-                # Last attempt failed, try direct connection
-                try:
-                    _ssl_kwargs2 = {}
-                    if os.environ.get("DB_SSLMODE"):
-                        _ssl_kwargs2["sslmode"] = os.environ["DB_SSLMODE"]
-                    if os.environ.get("DB_CHANNEL_BINDING"):
-                        _ssl_kwargs2["channel_binding"] = os.environ[
-                            "DB_CHANNEL_BINDING"
-                        ]
-                    conn = psycopg2.connect(
-                        host=os.environ.get("DB_HOST", "localhost"),
-                        port=int(os.environ.get("DB_PORT", "5432")),
-                        database=os.environ.get("DB_NAME", "almsdata"),
-                        user=os.environ.get("DB_USER", "postgres"),
-                        password=os.environ.get("DB_PASSWORD", ""),
-                        **_ssl_kwargs2,
-                    )
-                    with conn.cursor() as cur:
-                        cur.execute("SET search_path TO public")
-                    conn.commit()
-                    return conn
-                except Exception as err:
-                    raise e from err
-            continue
+                raise
 
     raise psycopg2.OperationalError(
         "Failed to get database connection after retries"
@@ -118,6 +527,42 @@ def return_connection(conn):
             conn.close()
 
 
+@contextmanager
+def pooled_connection() -> Iterator[Any]:
+    """Check out a pooled connection and always hand it back."""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        return_connection(conn)
+
+
+def get_db() -> Iterator[Any]:
+    """FastAPI dependency yielding a pooled connection for one request.
+
+    The connection goes back to the pool (rolled back if a transaction is
+    still open) once the response has been produced, including on errors.
+    """
+    with pooled_connection() as conn:
+        yield conn
+
+
+def pool_stats() -> dict[str, Any]:
+    """Checkout wait, in-use and churn counters for the connection pools,
+    plus failed ``after_commit`` callbacks."""
+    stats: dict[str, Any] = {
+        "sync": (
+            {"initialized": True, **_connection_pool.stats()}
+            if _connection_pool is not None
+            else {"initialized": False}
+        )
+    }
+    if _async_pool is not None:
+        stats["async"] = _async_pool.stats()
+    stats["after_commit_failures"] = _after_commit_failures
+    return stats
+
+
 @contextmanager
 def cursor() -> Iterator[
     psycopg2.extensions.cursor
@@ -138,9 +583,200 @@ def cursor() -> Iterator[
         return_connection(conn)
 
 
+class AsyncCursor:
+    """Awaitable facade over a psycopg2 cursor.
+
+    Every statement and fetch runs on the async pool's DB executor, so the
+    event loop is never blocked on the network round trip.
+    """
+
+    def __init__(self, conn: "AsyncConnection", *args, **kwargs):
+        self._conn = conn
+        self._args = args
+        self._kwargs = kwargs
+        self._cur: psycopg2.extensions.cursor | None = None  # type: ignore[name-defined]
+
+    def _cursor(self):
+        if self._cur is None:
+            self._cur = self._conn.raw.cursor(*self._args, **self._kwargs)
+        return self._cur
+
+    async def execute(self, query, params=None) -> None:
+        await self._conn._call(lambda: self._cursor().execute(query, params))
+
+    async def executemany(self, query, params_seq) -> None:
+        await self._conn._call(
+            lambda: self._cursor().executemany(query, params_seq)
+        )
+
+    async def fetchone(self):
+        return await self._conn._call(lambda: self._cursor().fetchone())
+
+    async def fetchmany(self, size: int | None = None):
+        if size is None:
+            return await self._conn._call(lambda: self._cursor().fetchmany())
+        return await self._conn._call(lambda: self._cursor().fetchmany(size))
+
+    async def fetchall(self):
+        return await self._conn._call(lambda: self._cursor().fetchall())
+
+    @property
+    def rowcount(self) -> int:
+        return self._cur.rowcount if self._cur is not None else -1
+
+    @property
+    def description(self):
+        return self._cur.description if self._cur is not None else None
+
+    def close(self) -> None:
+        if self._cur is not None:
+            with suppress(Exception):
+                self._cur.close()
+
+
+class AsyncConnection:
+    """A pooled psycopg2 connection driven from coroutines."""
+
+    def __init__(self, raw, executor: ThreadPoolExecutor):
+        self.raw = raw
+        self._executor = executor
+        self._inflight: Future | None = None
+
+    async def _call(self, fn: Callable[[], T]) -> T:
+        self._inflight = self._executor.submit(fn)
+        return await asyncio.wrap_future(self._inflight)
+
+    def cursor(self, *args, **kwargs) -> AsyncCursor:
+        return AsyncCursor(self, *args, **kwargs)
+
+    async def commit(self) -> None:
+        await self._call(self.raw.commit)
+
+    async def rollback(self) -> None:
+        await self._call(self.raw.rollback)
+
+    async def run_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run ``fn(raw_conn, *args, **kwargs)`` on the DB executor.
+
+        Bridges existing sync helpers (audit writers, schema probes) that
+        take a psycopg2 connection.
+        """
+        return await self._call(lambda: fn(self.raw, *args, **kwargs))
+
+    async def _settle(self) -> None:
+        # A cancelled coroutine does not stop its statement; wait for it
+        # before the connection goes back to the pool.
+        if self._inflight is not None and not self._inflight.done():
+            with suppress(BaseException):
+                await asyncio.shield(asyncio.wrap_future(self._inflight))
+
+
+class AsyncConnectionPool:
+    """asyncio front-end over the shared psycopg2 pool.
+
+    Checkouts wait on a semaphore instead of failing with "connection pool
+    exhausted", and all blocking work runs on a dedicated executor sized to
+    the pool so DB calls never queue behind unrelated threadpool work.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._slots = asyncio.Semaphore(max_size)
+        self._in_use = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_size, thread_name_prefix="db-async"
+        )
+
+    async def acquire(self) -> AsyncConnection:
+        await self._slots.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            # Carry the request's checkout owner into the executor thread.
+            ctx = contextvars.copy_context()
+            raw = await loop.run_in_executor(
+                self._executor, ctx.run, get_connection
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        self._in_use += 1
+        return AsyncConnection(raw, self._executor)
+
+    async def release(self, conn: AsyncConnection) -> None:
+        loop = asyncio.get_running_loop()
+
+        def _finish() -> None:
+            with suppress(Exception):
+                if conn.raw.closed == 0:
+                    conn.raw.rollback()
+            return_connection(conn.raw)
+
+        try:
+            await conn._settle()
+            await asyncio.shield(loop.run_in_executor(self._executor, _finish))
+        finally:
+            self._in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {"max_size": self.max_size, "in_use": self._in_use}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def _get_async_pool() -> AsyncConnectionPool:
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncConnectionPool(
+            int(os.environ.get("DB_ASYNC_POOL_MAX", "10"))
+        )
+    return _async_pool
+
+
+@asynccontextmanager
+async def async_connection() -> AsyncIterator[AsyncConnection]:
+    """Borrow a pooled connection for use from a coroutine.
+
+    The caller owns the transaction; anything uncommitted is rolled back
+    when the connection is returned.
+    """
+    async_pool = _get_async_pool()
+    conn = await async_pool.acquire()
+    try:
+        yield conn
+    finally:
+        await async_pool.release(conn)
+
+
+@asynccontextmanager
+async def async_cursor(*args, **kwargs) -> AsyncIterator[AsyncCursor]:
+    """Async variant of :func:`cursor`: commit on success, rollback on error."""
+    async with async_connection() as conn:
+        cur = conn.cursor(*args, **kwargs)
+        try:
+            yield cur
+            await conn.commit()
+        except BaseException:
+            with suppress(Exception):
+                await conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+async def get_async_connection() -> AsyncIterator[AsyncConnection]:
+    """FastAPI dependency yielding an :class:`AsyncConnection`."""
+    async with async_connection() as conn:
+        yield conn
+
+
 def close_all_connections():
     """Close all connections in the pool (call on shutdown)"""
-    global _connection_pool
+    global _connection_pool, _async_pool
+    if _async_pool is not None:
+        _async_pool.close()
+        _async_pool = None
     if _connection_pool is not None:
         _connection_pool.closeall()
         _connection_pool = None
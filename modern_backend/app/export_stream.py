@@ -0,0 +1,338 @@
+"""Constant-memory CSV / NDJSON exports.
+
+Report exports used to fetch every row, build the whole file in a
+``StringIO`` and send it in one response. Here rows are read through a
+named (server-side) cursor ``EXPORT_CHUNK_ROWS`` (2000) at a time and
+encoded as they arrive. ``StreamingResponse`` sends each chunk as soon as
+it is ready, so worker memory does not grow with the export size.
+
+A streamed body outlives the request handler, so ``QueryExport`` reads
+on its own pooled connection, checked out only while the body is being
+sent. It is not the request's ``get_db`` connection.
+
+``zip_query_exports`` builds a ZIP of several queries while it streams.
+Each query runs ``COPY ... TO STDOUT`` on its own pooled connection,
+``EXPORT_ZIP_WORKERS`` (4) at a time. Output flows through small bounded
+buffers into the archive, one entry after another. Row counts come from
+the ``COPY`` command tags.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+import zipfile
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import StreamingResponse
+
+from .db import pooled_connection
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "2000"))
+EXPORT_ZIP_WORKERS = int(os.environ.get("EXPORT_ZIP_WORKERS", "4"))
+# Encoded output is handed to the response in pieces of about this size.
+_FLUSH_BYTES = 64 * 1024
+# COPY chunks buffered per ZIP entry before its producer waits.
+_PIPE_CHUNKS = 64
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+RowTransform = Callable[[dict[str, Any]], dict[str, Any]]
+
+
+def iter_query(
+    conn,
+    sql: str,
+    params: Sequence[Any] = (),
+    *,
+    transform: RowTransform | None = None,
+    chunk_size: int = EXPORT_CHUNK_ROWS,
+    on_columns: Callable[[list[str]], None] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield rows of ``sql`` as dicts, ``chunk_size`` rows per round trip.
+
+    ``on_columns`` receives the column names once they are known, even
+    when the query returns no rows.
+    """
+    cur = conn.cursor(name=f"export_{uuid.uuid4().hex[:16]}")
+    try:
+        cur.execute(sql, params)
+        columns: list[str] | None = None
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if columns is None and cur.description is not None:
+                columns = [d[0] for d in cur.description]
+                if on_columns is not None:
+                    on_columns(columns)
+            if not rows:
+                break
+            for row in rows:
+                record = dict(zip(columns, row, strict=False))
+                yield transform(record) if transform else record
+    finally:
+        cur.close()
+
+
+class QueryExport:
+    """Rows of one query, read on a fresh pooled connection when iterated."""
+
+    def __init__(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        *,
+        transform: RowTransform | None = None,
+        chunk_size: int = EXPORT_CHUNK_ROWS,
+    ):
+        self.sql = sql
+        self.params = list(params)
+        self.transform = transform
+        self.chunk_size = chunk_size
+        self.columns: list[str] | None = None
+
+    def _set_columns(self, columns: list[str]) -> None:
+        self.columns = columns
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        with pooled_connection() as conn:
+            try:
+                yield from iter_query(
+                    conn,
+                    self.sql,
+                    self.params,
+                    transform=self.transform,
+                    chunk_size=self.chunk_size,
+                    on_columns=self._set_columns,
+                )
+            finally:
+                conn.rollback()
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def encode_csv(
+    rows: Iterable[dict[str, Any]], columns: Sequence[str] | None = None
+) -> Iterator[bytes]:
+    """CSV with a header row; columns default to the first row's keys."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header: Sequence[str] | None = None
+    for row in rows:
+        if header is None:
+            header = columns or list(row)
+            writer.writerow(header)
+        writer.writerow([_csv_cell(row.get(c)) for c in header])
+        if buffer.tell() >= _FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if header is None:
+        header = columns or getattr(rows, "columns", None)
+        if header:
+            writer.writerow(header)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(rows: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    """One JSON object per line."""
+    chunk: list[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, default=_json_default, separators=(",", ":"))
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= _FLUSH_BYTES:
+            yield ("\n".join(chunk) + "\n").encode("utf-8")
+            chunk, size = [], 0
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode("utf-8")
+
+
+def export_response(
+    rows: Iterable[dict[str, Any]],
+    fmt: str,
+    filename: str,
+    *,
+    columns: Sequence[str] | None = None,
+) -> StreamingResponse:
+    """Stream ``rows`` as ``fmt`` (``csv`` or ``ndjson``).
+
+    ``filename`` is given without an extension.
+    """
+    fmt = fmt.lower()
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"unsupported export format: {fmt}")
+    body = encode_csv(rows, columns) if fmt == "csv" else encode_ndjson(rows)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{fmt}"'
+            )
+        },
+    )
+
+
+class _ExportCancelled(Exception):
+    pass
+
+
+class _ChunkPipe:
+    """Bounded hand-off from one ``COPY`` to its ZIP entry."""
+
+    _DONE = object()
+
+    def __init__(self, cancelled: threading.Event):
+        self._queue: queue.Queue = queue.Queue(maxsize=_PIPE_CHUNKS)
+        self._cancelled = cancelled
+        self._error: BaseException | None = None
+
+    def _put(self, item) -> None:
+        while True:
+            if self._cancelled.is_set():
+                raise _ExportCancelled()
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if data:
+            self._put(bytes(data))
+        return len(data)
+
+    def close(self, error: BaseException | None = None) -> None:
+        self._error = error
+        with suppress(_ExportCancelled):
+            self._put(self._DONE)
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield item
+
+
+class _ZipSink:
+    """Write-only, unseekable target for ``zipfile``; drained as we go."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def copy_csv(conn, sql: str, params: Sequence[Any], out) -> int:
+    """``COPY`` the rows of ``sql`` as CSV (with header) into ``out``."""
+    with conn.cursor() as cur:
+        statement = cur.mogrify(sql, params) if params else sql
+        if isinstance(statement, bytes):
+            statement = statement.decode("utf-8")
+        cur.copy_expert(
+            f"COPY ({statement}) TO STDOUT WITH (FORMAT csv, HEADER true)",
+            out,
+        )
+        return max(cur.rowcount, 0)
+
+
+def zip_query_exports(
+    members: Sequence[tuple[str, str, Sequence[Any]]],
+    *,
+    workers: int = EXPORT_ZIP_WORKERS,
+    readme: Callable[[dict[str, int]], str] | None = None,
+) -> Iterator[bytes]:
+    """Stream a ZIP with one CSV entry per ``(name, sql, params)``.
+
+    ``readme`` receives the rows written per entry and returns the text
+    of a trailing ``README.txt``.
+    """
+    cancelled = threading.Event()
+    pipes = [_ChunkPipe(cancelled) for _ in members]
+    counts: dict[str, int] = {}
+
+    def produce(member: tuple[str, str, Sequence[Any]], pipe) -> None:
+        name, sql, params = member
+        try:
+            with pooled_connection() as conn:
+                try:
+                    counts[name] = copy_csv(conn, sql, params, pipe)
+                finally:
+                    conn.rollback()
+        except _ExportCancelled:
+            return
+        except BaseException as exc:
+            logger.exception("Export of %s failed", name)
+            pipe.close(exc)
+            return
+        pipe.close()
+
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(members) or 1)),
+        thread_name_prefix="export-zip",
+    )
+    sink = _ZipSink()
+    try:
+        # Submitted in entry order, so the entry being read is always
+        # one that a worker has already started.
+        for member, pipe in zip(members, pipes, strict=True):
+            pool.submit(produce, member, pipe)
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+            for (name, _sql, _params), pipe in zip(
+                members, pipes, strict=True
+            ):
+                with archive.open(name, "w", force_zip64=True) as entry:
+                    for chunk in pipe:
+                        entry.write(chunk)
+                        yield from sink.drain()
+                yield from sink.drain()
+            if readme is not None:
+                archive.writestr("README.txt", readme(dict(counts)))
+        yield from sink.drain()
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
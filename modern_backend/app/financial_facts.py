@@ -0,0 +1,289 @@
+"""Daily financial facts: revenue, expenses, GST and pay by day.
+
+Month and year totals used to scan ``charters`` and ``receipts`` with
+``EXTRACT(MONTH/YEAR FROM ...) = %s``. Those predicates cannot use the
+date indexes. Schema migration 22 adds ``daily_financial_facts``, with
+one row per day, source table, ``category`` and ``account_code``. Each
+row holds the summed measures and the number of source rows behind it:
+
+* ``charters``: ``revenue`` and ``gst_collected``, by ``charter_date``
+  (or ``pickup_date``).
+* ``receipts``: ``expenses`` (gross, or ``amount``) and ``gst_paid``, by
+  ``receipt_date`` (or ``date``), ``category`` and ``gl_account_code``.
+* ``payments``: ``payments``, by ``payment_date``.
+* ``driver_payroll``: ``payroll`` (gross pay), by ``pay_date``.
+
+Source schemas differ between installs, so :data:`FACT_SOURCES` lists
+candidate columns. :func:`install_fact_triggers` uses the first one each
+table has. Statement triggers add the changed rows' deltas, so the facts
+stay current without rescans. Readers filter ``fact_date >= %s AND
+fact_date < %s`` with the bounds from :func:`month_bounds` or
+:func:`year_bounds`, and fall back to :func:`source_totals` when the
+table is missing. :func:`rebuild_facts` recomputes everything.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+MEASURES = (
+    "revenue",
+    "expenses",
+    "gst_collected",
+    "gst_paid",
+    "payments",
+    "payroll",
+)
+
+TRIGGER_PREFIX = "trg_daily_financial_facts"
+
+
+@dataclass(frozen=True)
+class FactSource:
+    """How one source table feeds ``daily_financial_facts``.
+
+    Each tuple lists candidate columns; the first one present is used.
+    Missing measures count as zero.
+    """
+
+    table: str
+    date_columns: tuple[str, ...]
+    measures: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    category_columns: tuple[str, ...] = ()
+    account_columns: tuple[str, ...] = ()
+
+
+FACT_SOURCES = (
+    FactSource(
+        "charters",
+        ("charter_date", "pickup_date"),
+        {
+            "revenue": ("total_amount_due", "grand_total"),
+            "gst_collected": ("gst_amount",),
+        },
+    ),
+    FactSource(
+        "receipts",
+        ("receipt_date", "date"),
+        {
+            "expenses": ("gross_amount", "amount"),
+            "gst_paid": ("gst_amount",),
+        },
+        category_columns=("category",),
+        account_columns=("gl_account_code",),
+    ),
+    FactSource("payments", ("payment_date",), {"payments": ("amount",)}),
+    FactSource(
+        "driver_payroll", ("pay_date",), {"payroll": ("gross_pay",)}
+    ),
+)
+
+_KEY = (
+    "fact_date, source, (category IS NULL), COALESCE(category, ''),"
+    " (account_code IS NULL), COALESCE(account_code, '')"
+)
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+    """Half-open ``[first day, first day of next month)``."""
+    if month == 12:
+        return date(year, 12, 1), date(year + 1, 1, 1)
+    return date(year, month, 1), date(year, month + 1, 1)
+
+
+def year_bounds(year: int) -> tuple[date, date]:
+    """Half-open ``[1 January, 1 January next year)``."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def table_columns(cur, table: str) -> set[str]:
+    """Columns of ``table``; empty if it does not exist."""
+    cur.execute(
+        """
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attnum > 0
+          AND NOT attisdropped
+        """,
+        (table,),
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def _first(candidates: tuple[str, ...], columns: set[str]) -> str | None:
+    return next((c for c in candidates if c in columns), None)
+
+
+def source_rows_sql(
+    source: FactSource, columns: set[str], relation: str, sign: int
+) -> str | None:
+    """``SELECT`` of ``relation``'s rows as signed fact deltas.
+
+    Returns None when the table lacks every date column.
+    """
+    date_col = _first(source.date_columns, columns)
+    if date_col is None:
+        return None
+    category = _first(source.category_columns, columns)
+    account = _first(source.account_columns, columns)
+    select = [
+        f"'{source.table}'::text AS source",
+        f"r.{date_col}::date AS fact_date",
+        f"{'r.' + category if category else 'NULL'}::text AS category",
+        f"{'r.' + account if account else 'NULL'}::text AS account_code",
+    ]
+    for measure in MEASURES:
+        col = _first(source.measures.get(measure, ()), columns)
+        expr = f"COALESCE(r.{col}::numeric, 0)" if col else "0::numeric"
+        select.append(f"{expr} AS {measure}")
+    select.append(f"{sign} AS sign")
+    return (
+        f"SELECT {', '.join(select)} FROM {relation} r"
+        f" WHERE r.{date_col} IS NOT NULL"
+    )
+
+
+def upsert_sql(changes: str) -> str:
+    """Add the signed rows of ``changes`` to ``daily_financial_facts``.
+
+    Groups that net to nothing, like updates of other columns, are
+    skipped. Keys are written in order so concurrent writers lock rows
+    in the same order.
+    """
+    sums = ", ".join(f"SUM(c.{m} * c.sign)" for m in MEASURES)
+    nonzero = " OR ".join(f"SUM(c.{m} * c.sign) <> 0" for m in MEASURES)
+    updates = ", ".join(f"{m} = f.{m} + EXCLUDED.{m}" for m in MEASURES)
+    return f"""
+        INSERT INTO daily_financial_facts AS f (
+            fact_date, source, category, account_code,
+            {', '.join(MEASURES)}, row_count
+        )
+        SELECT c.fact_date, c.source, c.category, c.account_code,
+               {sums}, SUM(c.sign)
+        FROM ({changes}) c
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(c.sign) <> 0 OR {nonzero}
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT ({_KEY}) DO UPDATE SET
+            {updates},
+            row_count = f.row_count + EXCLUDED.row_count
+    """
+
+
+def sync_function_sql(source: FactSource, columns: set[str]) -> str | None:
+    """Trigger function keeping the facts in step with ``source``."""
+    inserted = source_rows_sql(source, columns, "new_rows", 1)
+    deleted = source_rows_sql(source, columns, "old_rows", -1)
+    if inserted is None or deleted is None:
+        return None
+    return f"""
+        CREATE OR REPLACE FUNCTION daily_financial_facts_{source.table}()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {upsert_sql(inserted)};
+            ELSIF TG_OP = 'DELETE' THEN
+                {upsert_sql(deleted)};
+            ELSE
+                {upsert_sql(f"{inserted} UNION ALL {deleted}")};
+            END IF;
+            DELETE FROM daily_financial_facts WHERE row_count = 0;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+
+
+def install_fact_triggers(cur) -> list[str]:
+    """(Re)create the triggers; returns the source tables covered.
+
+    Run it again after a source table gains or loses a fact column.
+    """
+    installed = []
+    for source in FACT_SOURCES:
+        function = sync_function_sql(
+            source, table_columns(cur, source.table)
+        )
+        if function is None:
+            logger.warning(
+                "daily_financial_facts: skipping %s, no date column",
+                source.table,
+            )
+            continue
+        cur.execute(function)
+        for event, referencing in (
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ):
+            name = f"{TRIGGER_PREFIX}_{event.lower()}"
+            cur.execute(f"DROP TRIGGER IF EXISTS {name} ON {source.table}")
+            cur.execute(
+                f"CREATE TRIGGER {name} AFTER {event} ON {source.table}"
+                f" REFERENCING {referencing} FOR EACH STATEMENT"
+                f" EXECUTE FUNCTION daily_financial_facts_{source.table}()"
+            )
+        installed.append(source.table)
+    return installed
+
+
+def facts_available(cur) -> bool:
+    """Whether ``daily_financial_facts`` exists (schema migration 22)."""
+    cur.execute("SELECT to_regclass('daily_financial_facts') IS NOT NULL")
+    return bool(cur.fetchone()[0])
+
+
+def source_totals(
+    cur,
+    table: str,
+    measures: tuple[str, ...],
+    start: date,
+    end: date,
+    *,
+    exclude_category: str | None = None,
+) -> list[float]:
+    """``measures`` summed straight from ``table`` over ``[start, end)``.
+
+    The fallback for readers when :func:`facts_available` is false. It
+    uses the same candidate columns as the triggers; missing ones sum
+    to zero.
+    """
+    source = next(s for s in FACT_SOURCES if s.table == table)
+    columns = table_columns(cur, table)
+    date_col = _first(source.date_columns, columns)
+    if date_col is None:
+        return [0.0] * len(measures)
+    sums = []
+    for measure in measures:
+        col = _first(source.measures.get(measure, ()), columns)
+        sums.append(f"COALESCE(SUM({col}), 0)" if col else "0")
+    where = f"{date_col} >= %s AND {date_col} < %s"
+    params: list = [start, end]
+    category = _first(source.category_columns, columns)
+    if exclude_category is not None and category:
+        where += f" AND {category} != %s"
+        params.append(exclude_category)
+    cur.execute(
+        f"SELECT {', '.join(sums)} FROM {table} WHERE {where}", params
+    )
+    return [float(value or 0) for value in cur.fetchone()]
+
+
+def rebuild_facts(cur) -> int:
+    """Recompute ``daily_financial_facts``; returns the rows written."""
+    selects = []
+    for source in FACT_SOURCES:
+        sql = source_rows_sql(
+            source, table_columns(cur, source.table), source.table, 1
+        )
+        if sql is not None:
+            cur.execute(f"LOCK TABLE {source.table} IN SHARE MODE")
+            selects.append(sql)
+    cur.execute("DELETE FROM daily_financial_facts")
+    if not selects:
+        return 0
+    cur.execute(upsert_sql(" UNION ALL ".join(selects)))
+    written = max(cur.rowcount, 0)
+    logger.info("Rebuilt %s daily financial facts", written)
+    return written
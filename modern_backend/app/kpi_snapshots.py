@@ -0,0 +1,270 @@
+"""Precomputed KPI snapshots for the landing-page dashboards.
+
+``/api/dashboard``, ``/api/reports/company-snapshot`` and
+``/api/accounting/stats`` aggregate charters, payments, receipts and
+fleet tables, and every logged-in user's landing page calls them.
+:class:`KpiSnapshotRefresher` computes every variant (each dashboard
+``date_filter``, each company-snapshot range, the current accounting
+month) in a background thread and stores them in ``kpi_snapshots``
+(schema migration 21). A request is then one primary-key read.
+
+The refresher polls the data versions of :data:`KPI_SOURCE_TABLES`
+(see :mod:`app.report_cache`) every ``poll`` seconds. It recomputes when
+they change, when the snapshots are older than ``interval``, or when the
+day rolls over, since the date windows are relative to today. Where the
+versions are not tracked, only the age and the day count. Snapshots
+from another day are never served. Several workers may run the
+refresher; an advisory lock lets one of them refresh at a time, and the
+stored versions tell the others the work is done.
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Callable
+from datetime import date, datetime
+from typing import Any
+
+from .report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+KPI_SOURCE_TABLES = (
+    "charters",
+    "employees",
+    "payments",
+    "quotations",
+    "receipts",
+    "vehicles",
+)
+
+DASHBOARD_FILTERS = (
+    "",
+    "today",
+    "upcoming_week",
+    "this_month",
+    "this_year",
+    "future_all",
+)
+COMPANY_SNAPSHOT_RANGES = ("today", "wtd", "mtd", "ytd", "all")
+ACCOUNTING_STATS_KEY = "accounting-stats"
+
+_REFRESH_LOCK_KEY = 7_310_021
+
+
+def dashboard_key(date_filter: str) -> str:
+    """Snapshot key; unknown filters mean "no date range", like ``""``."""
+    if date_filter not in DASHBOARD_FILTERS:
+        date_filter = ""
+    return f"dashboard:{date_filter}"
+
+
+def company_snapshot_key(date_range: str) -> str:
+    """Snapshot key; other ranges cover all dates, like ``"all"``.
+
+    ``custom`` ranges with explicit dates are computed live instead.
+    """
+    if date_range not in COMPANY_SNAPSHOT_RANGES:
+        date_range = "all"
+    return f"company-snapshot:{date_range}"
+
+
+def snapshot_specs() -> dict[str, Callable[[Any], dict[str, Any]]]:
+    """Snapshot key -> ``compute(cur)`` for every precomputed variant."""
+    from .routers.accounting import compute_accounting_stats
+    from .routers.metrics import compute_dashboard_metrics
+    from .routers.reports import compute_company_snapshot
+
+    specs: dict[str, Callable[[Any], dict[str, Any]]] = {}
+    for date_filter in DASHBOARD_FILTERS:
+        specs[dashboard_key(date_filter)] = (
+            lambda cur, f=date_filter: compute_dashboard_metrics(cur, f)
+        )
+    for date_range in COMPANY_SNAPSHOT_RANGES:
+        specs[company_snapshot_key(date_range)] = (
+            lambda cur, r=date_range: compute_company_snapshot(cur, r)
+        )
+    specs[ACCOUNTING_STATS_KEY] = lambda cur: compute_accounting_stats(cur)
+    return specs
+
+
+def read_snapshot(cur, key: str) -> dict[str, Any] | None:
+    """Today's snapshot under ``key`` plus its age, or None."""
+    cur.execute(
+        """
+        SELECT payload, refreshed_at,
+               EXTRACT(EPOCH FROM clock_timestamp() - refreshed_at)
+        FROM kpi_snapshots
+        WHERE snapshot_key = %s
+        """,
+        (key,),
+    )
+    row = cur.fetchone()
+    if row is None or row[1].astimezone().date() != date.today():
+        return None
+    payload, refreshed_at, age = row
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return {
+        **payload,
+        "snapshot_refreshed_at": refreshed_at.isoformat(),
+        "snapshot_age_seconds": round(float(age), 1),
+    }
+
+
+def live_result(payload: dict[str, Any]) -> dict[str, Any]:
+    """``payload`` computed for this request, marked as not a snapshot."""
+    return {
+        **payload,
+        "snapshot_refreshed_at": None,
+        "snapshot_age_seconds": None,
+    }
+
+
+def _stored_state(cur) -> tuple[Any, datetime | None, float]:
+    """Versions, time and age in seconds of the latest refresh."""
+    cur.execute(
+        """
+        SELECT source_versions, refreshed_at,
+               EXTRACT(EPOCH FROM clock_timestamp() - refreshed_at)
+        FROM kpi_snapshots
+        ORDER BY refreshed_at DESC
+        LIMIT 1
+        """
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None, None, 0.0
+    versions = row[0]
+    if isinstance(versions, str):
+        versions = json.loads(versions)
+    return versions, row[1], float(row[2])
+
+
+def refresh_snapshots(cur, *, interval: float, force: bool = False) -> int:
+    """Recompute stale snapshots; returns how many were written.
+
+    Returns 0 without work when another session holds the refresh lock
+    or nothing is stale. A variant whose query fails keeps its previous
+    snapshot.
+    """
+    cur.execute(
+        "SELECT pg_try_advisory_xact_lock(%s)", (_REFRESH_LOCK_KEY,)
+    )
+    if not cur.fetchone()[0]:
+        return 0
+    versions = report_cache.versions(cur, KPI_SOURCE_TABLES)
+    stored_versions, refreshed_at, age = _stored_state(cur)
+    if not force and refreshed_at is not None:
+        # Without version tracking only the age and the day decide.
+        fresh = (
+            age < interval
+            and refreshed_at.astimezone().date() == date.today()
+            and (versions is None or versions == stored_versions)
+        )
+        if fresh:
+            return 0
+
+    written = 0
+    for key, compute in snapshot_specs().items():
+        cur.execute("SAVEPOINT kpi_snapshot")
+        try:
+            payload = compute(cur)
+        except Exception:
+            cur.execute("ROLLBACK TO SAVEPOINT kpi_snapshot")
+            logger.exception("KPI snapshot %s failed", key)
+            continue
+        cur.execute(
+            """
+            INSERT INTO kpi_snapshots
+                (snapshot_key, payload, source_versions, refreshed_at)
+            VALUES (%s, %s::jsonb, %s::jsonb, clock_timestamp())
+            ON CONFLICT (snapshot_key) DO UPDATE
+            SET payload = EXCLUDED.payload,
+                source_versions = EXCLUDED.source_versions,
+                refreshed_at = EXCLUDED.refreshed_at
+            """,
+            (
+                key,
+                json.dumps(payload, default=str),
+                json.dumps(versions),
+            ),
+        )
+        cur.execute("RELEASE SAVEPOINT kpi_snapshot")
+        written += 1
+    return written
+
+
+class KpiSnapshotRefresher:
+    """Runs :func:`refresh_snapshots` every ``poll`` seconds."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        interval: float = 300.0,
+        poll: float = 15.0,
+    ):
+        self._connect = connect
+        self.interval = interval
+        self.poll = poll
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._refreshes = 0
+        self._failures = 0
+        self._last_refresh: datetime | None = None
+
+    def run_once(self, *, force: bool = False) -> int:
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                written = refresh_snapshots(
+                    cur, interval=self.interval, force=force
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            with self._lock:
+                self._failures += 1
+            raise
+        finally:
+            conn.close()
+        if written:
+            with self._lock:
+                self._refreshes += 1
+                self._last_refresh = datetime.now()
+        return written
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="kpi-snapshot-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "poll": self.poll,
+                "refreshes": self._refreshes,
+                "failures": self._failures,
+                "last_refresh": (
+                    self._last_refresh.isoformat()
+                    if self._last_refresh
+                    else None
+                ),
+            }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("KPI snapshot refresh failed")
+            self._stop.wait(self.poll)
@@ -0,0 +1,133 @@
+"""Per-account monthly rollups of ``general_ledger``.
+
+Schema migration 19 adds ``gl_period_balances``. It holds one row per
+month and (``account``, ``account_name``, ``account_type``), with the
+summed debits, credits, ``credit - debit`` and the number of ledger rows.
+Statement triggers on ``general_ledger`` add the changed rows' deltas to
+the months they fall in, so rollups stay current without rescanning the
+ledger.
+
+Reports read :data:`LEDGER_PERIOD_SQL`. For whole months in the range it
+returns rollup rows. For the partial months at either end it returns
+ledger rows, which the ``general_ledger (date)`` index finds. The
+trial balance then sums a few hundred rows instead of the whole
+ledger. :func:`check_rollups` compares the table against a full
+recompute, and :func:`rebuild_rollups` repairs it.
+"""
+
+import logging
+from datetime import date, timedelta
+
+logger = logging.getLogger(__name__)
+
+_RECOMPUTE_SQL = """
+    SELECT date_trunc('month', date)::date AS month,
+           account::text, account_name::text, account_type::text,
+           COALESCE(SUM(debit::numeric), 0) AS debit,
+           COALESCE(SUM(credit::numeric), 0) AS credit,
+           COALESCE(SUM((credit - debit)::numeric), 0) AS net_credit,
+           COUNT(*) AS row_count
+    FROM general_ledger
+    WHERE date IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+"""
+
+# Rows shaped (date, account_name, account, account_type, debit, credit,
+# net_credit). Params come from ledger_period_params().
+LEDGER_PERIOD_SQL = """
+    SELECT month AS date, account_name, account, account_type,
+           debit, credit, net_credit
+    FROM gl_period_balances
+    WHERE month >= %s AND month < %s
+    UNION ALL
+    SELECT date, account_name::text, account::text, account_type::text,
+           debit, credit, credit - debit
+    FROM general_ledger
+    WHERE (date >= %s AND date < %s) OR (date >= %s AND date <= %s)
+"""
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def ledger_period_params(start: date | None, end: date) -> list[date]:
+    """Params for :data:`LEDGER_PERIOD_SQL` covering ``start``..``end``.
+
+    ``start=None`` means from the beginning of the ledger.
+    """
+    start = start or date.min
+    first_full = _month_start(start)
+    if first_full < start:
+        first_full = _month_start(first_full + timedelta(days=32))
+    after_full = _month_start(end + timedelta(days=1))
+    if first_full >= after_full:
+        # No whole month in range: read it all from the ledger.
+        first_full = after_full = start
+    return [first_full, after_full, start, first_full, after_full, end]
+
+
+def rebuild_rollups(cur) -> int:
+    """Recompute ``gl_period_balances``; returns the rows written."""
+    cur.execute("LOCK TABLE general_ledger IN SHARE MODE")
+    cur.execute("DELETE FROM gl_period_balances")
+    cur.execute(
+        "INSERT INTO gl_period_balances (month, account, account_name,"
+        " account_type, debit, credit, net_credit, row_count)"
+        + _RECOMPUTE_SQL
+    )
+    written = max(cur.rowcount, 0)
+    logger.info("Rebuilt %s general ledger rollups", written)
+    return written
+
+
+def check_rollups(cur, limit: int = 100) -> dict:
+    """Compare ``gl_period_balances`` with a full recompute.
+
+    ``missing`` rows are expected but absent or different; ``unexpected``
+    rows are stored but not expected. At most ``limit`` rows are listed.
+    """
+    cur.execute(
+        f"""
+        WITH expected AS ({_RECOMPUTE_SQL}),
+        stored AS (
+            SELECT month, account, account_name, account_type,
+                   debit, credit, net_credit, row_count
+            FROM gl_period_balances
+        ),
+        diff AS (
+            (SELECT 'missing' AS side, * FROM expected
+             EXCEPT SELECT 'missing', * FROM stored)
+            UNION ALL
+            (SELECT 'unexpected', * FROM stored
+             EXCEPT SELECT 'unexpected', * FROM expected)
+        )
+        SELECT *, COUNT(*) OVER () FROM diff
+        ORDER BY month, account, account_name, account_type, side
+        LIMIT %s
+        """,
+        (limit,),
+    )
+    rows = cur.fetchall()
+    mismatches = [
+        {
+            "side": r[0],
+            "month": r[1].isoformat(),
+            "account": r[2],
+            "account_name": r[3],
+            "account_type": r[4],
+            "debit": float(r[5]),
+            "credit": float(r[6]),
+            "net_credit": float(r[7]),
+            "row_count": r[8],
+        }
+        for r in rows
+    ]
+    count = rows[0][9] if rows else 0
+    if count:
+        logger.warning("General ledger rollups: %s mismatched rows", count)
+    return {
+        "consistent": count == 0,
+        "mismatch_count": count,
+        "mismatches": mismatches,
+    }
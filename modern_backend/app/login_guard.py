@@ -0,0 +1,316 @@
+"""Lockout and bounded password checking for the login endpoints.
+
+``LoginThrottle`` counts failed logins per username. After
+``MAX_LOGIN_ATTEMPTS`` (5) failures within ``LOGIN_LOCKOUT_MINUTES`` (15)
+the username is locked for that long, and further attempts are refused
+before any password hashing happens. Counters live in the ``UNLOGGED``
+``auth_login_attempts`` table so all workers share them
+(``SESSION_BACKEND=memory`` keeps them per process). Each worker also
+remembers active lockouts to skip the database while they last.
+Failed logins create a row per username tried, so counters older than
+the lockout window and not locked are purged every
+``LOGIN_ATTEMPT_PURGE_SECONDS`` (300), piggybacking on a failed login.
+
+``check_password`` runs the blocking credential check (a DB lookup plus
+``bcrypt.checkpw``) on a small dedicated thread pool. At most
+``LOGIN_MAX_CONCURRENCY`` (8) checks are queued or running at once;
+callers wait up to ``LOGIN_QUEUE_TIMEOUT_SECONDS`` (5) for a slot.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from .db import pooled_connection
+from .schema_migrations import ensure_schema
+
+logger = logging.getLogger(__name__)
+
+
+class LoginBusy(Exception):
+    """No credential-check slot became free in time."""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _normalize(username: str) -> str:
+    return (username or "").strip().lower()
+
+
+class MemoryAttemptBackend:
+    """Per-process failure counters."""
+
+    def __init__(self):
+        # username -> [failures, last_failed_at, locked_until]
+        self._rows: dict[str, list[Any]] = {}
+        self._lock = threading.Lock()
+
+    def locked_until(self, username: str, now: datetime) -> datetime | None:
+        with self._lock:
+            row = self._rows.get(username)
+        if row and row[2] and row[2] > now:
+            return row[2]
+        return None
+
+    def record_failure(
+        self,
+        username: str,
+        now: datetime,
+        *,
+        max_attempts: int,
+        lockout: timedelta,
+    ) -> datetime | None:
+        with self._lock:
+            row = self._rows.get(username)
+            if row is None or row[1] < now - lockout:
+                row = self._rows[username] = [0, now, None]
+            row[0] += 1
+            row[1] = now
+            if row[0] >= max_attempts:
+                row[0] = 0
+                row[2] = now + lockout
+                return row[2]
+        return None
+
+    def clear(self, username: str) -> None:
+        with self._lock:
+            self._rows.pop(username, None)
+
+    def purge_stale(self, now: datetime, lockout: timedelta) -> int:
+        with self._lock:
+            stale = [
+                username
+                for username, row in self._rows.items()
+                if row[1] < now - lockout and not (row[2] and row[2] > now)
+            ]
+            for username in stale:
+                del self._rows[username]
+        return len(stale)
+
+
+class PostgresAttemptBackend:
+    """Failure counters in ``auth_login_attempts`` (schema migration 13)."""
+
+    def __init__(self, connection: Callable[[], Any] = pooled_connection):
+        self._connection = connection
+
+    def locked_until(self, username: str, now: datetime) -> datetime | None:
+        ensure_schema()
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT locked_until FROM auth_login_attempts
+                    WHERE username = %s AND locked_until > %s
+                    """,
+                    (username, now),
+                )
+                row = cur.fetchone()
+            conn.rollback()
+        return row[0] if row else None
+
+    def record_failure(
+        self,
+        username: str,
+        now: datetime,
+        *,
+        max_attempts: int,
+        lockout: timedelta,
+    ) -> datetime | None:
+        ensure_schema()
+        locked_until = None
+        with self._connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        INSERT INTO auth_login_attempts AS a (
+                            username, failures, last_failed_at
+                        ) VALUES (%s, 1, %s)
+                        ON CONFLICT (username) DO UPDATE
+                        SET failures = CASE
+                                WHEN a.last_failed_at < %s THEN 1
+                                ELSE a.failures + 1
+                            END,
+                            last_failed_at = EXCLUDED.last_failed_at
+                        RETURNING failures
+                        """,
+                        (username, now, now - lockout),
+                    )
+                    if cur.fetchone()[0] >= max_attempts:
+                        locked_until = now + lockout
+                        cur.execute(
+                            """
+                            UPDATE auth_login_attempts
+                            SET failures = 0, locked_until = %s
+                            WHERE username = %s
+                            """,
+                            (locked_until, username),
+                        )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return locked_until
+
+    def clear(self, username: str) -> None:
+        ensure_schema()
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM auth_login_attempts WHERE username = %s",
+                    (username,),
+                )
+            conn.commit()
+
+    def purge_stale(self, now: datetime, lockout: timedelta) -> int:
+        ensure_schema()
+        with self._connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        DELETE FROM auth_login_attempts
+                        WHERE last_failed_at < %s
+                          AND (locked_until IS NULL OR locked_until <= %s)
+                        """,
+                        (now - lockout, now),
+                    )
+                    purged = max(cur.rowcount, 0)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return purged
+
+
+class LoginThrottle:
+    """Per-username failed-login counter with a timed lockout."""
+
+    def __init__(
+        self,
+        backend,
+        *,
+        max_attempts: int = 5,
+        lockout_minutes: float = 15,
+        purge_interval: float = 300.0,
+    ):
+        self.backend = backend
+        self.max_attempts = max(1, max_attempts)
+        self.lockout = timedelta(minutes=lockout_minutes)
+        self.purge_interval = purge_interval
+        self._local: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic() + purge_interval
+
+    def locked_until(self, username: str) -> datetime | None:
+        """End of the active lockout for ``username``, if any."""
+        key = _normalize(username)
+        now = _utcnow()
+        with self._lock:
+            until = self._local.get(key)
+            if until is not None and until <= now:
+                del self._local[key]
+                until = None
+        if until is not None:
+            return until
+        until = self.backend.locked_until(key, now)
+        if until is not None:
+            with self._lock:
+                self._local[key] = until
+        return until
+
+    def record_failure(self, username: str) -> datetime | None:
+        """Count a failure; returns the lockout end if this one locks."""
+        key = _normalize(username)
+        now = _utcnow()
+        until = self.backend.record_failure(
+            key,
+            now,
+            max_attempts=self.max_attempts,
+            lockout=self.lockout,
+        )
+        self._purge_if_due(now)
+        if until is not None:
+            logger.warning(
+                "Login locked for %r until %s", key, until.isoformat()
+            )
+            with self._lock:
+                self._local[key] = until
+        return until
+
+    def record_success(self, username: str) -> None:
+        key = _normalize(username)
+        with self._lock:
+            self._local.pop(key, None)
+        self.backend.clear(key)
+
+    def _purge_if_due(self, now: datetime) -> None:
+        with self._lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+        try:
+            purged = self.backend.purge_stale(now, self.lockout)
+        except Exception:
+            logger.exception("Login attempt purge failed")
+            return
+        if purged:
+            logger.info("Purged %s stale login attempt counters", purged)
+
+
+def _default_backend():
+    if os.environ.get("SESSION_BACKEND", "postgres").lower() == "memory":
+        return MemoryAttemptBackend()
+    return PostgresAttemptBackend()
+
+
+login_throttle = LoginThrottle(
+    _default_backend(),
+    max_attempts=int(os.environ.get("MAX_LOGIN_ATTEMPTS", "5")),
+    lockout_minutes=float(os.environ.get("LOGIN_LOCKOUT_MINUTES", "15")),
+    purge_interval=float(
+        os.environ.get("LOGIN_ATTEMPT_PURGE_SECONDS", "300")
+    ),
+)
+
+_LOGIN_MAX_CONCURRENCY = int(os.environ.get("LOGIN_MAX_CONCURRENCY", "8"))
+_LOGIN_QUEUE_TIMEOUT = float(
+    os.environ.get("LOGIN_QUEUE_TIMEOUT_SECONDS", "5")
+)
+_password_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("LOGIN_HASH_WORKERS", "4")),
+    thread_name_prefix="login-verify",
+)
+_password_slots = asyncio.Semaphore(_LOGIN_MAX_CONCURRENCY)
+
+
+async def check_password(verify: Callable[..., Any], *args: Any) -> Any:
+    """Run ``verify(*args)`` on the login pool, off the event loop.
+
+    Raises :class:`LoginBusy` if no slot frees up within the queue
+    timeout.
+    """
+    try:
+        await asyncio.wait_for(
+            _password_slots.acquire(), timeout=_LOGIN_QUEUE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        raise LoginBusy() from None
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_pool, verify, *args)
+    finally:
+        _password_slots.release()
+
+
+def shutdown_password_pool() -> None:
+    _password_pool.shutdown(wait=False)
@@ -1,3 +1,5 @@
+import asyncio
+import logging
 import os
 import time
 import uuid
@@ -10,14 +12,26 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 
 from .api import receipt_verification as receipt_verification_router
+from .audit.partitions import AuditPartitionManager
+from .audit.writer import audit_writer
 from .auth import (
     get_current_user,
     is_auth_exempt_path,
     is_protected_path,
     require_roles,
-    resolve_authenticated_user,
+    resolve_authenticated_user_async,
 )
-from .db import close_all_connections
+from .db import (
+    checkout_owner,
+    close_all_connections,
+    dedicated_connection,
+    get_db,
+    pool_stats,
+)
+from .kpi_snapshots import KpiSnapshotRefresher
+from .login_guard import shutdown_password_pool
+from .matview_refresh import MatviewRefresher
+from .report_cache import report_cache
 from .routers import accounting as accounting_router
 from .routers import (
     bank_audit_reconciliation as bank_audit_reconciliation_router,
@@ -60,11 +74,21 @@ from .routers import vendor_standardization as vendor_standardization_router
 from .audit import router as audit_router
 from .routes import cheque_books as cheque_books_router
 from .routes import received_payments as received_payments_router
+from .schema_catalog import (
+    SchemaChangeListener,
+    notify_schema_changed,
+    schema_catalog,
+)
+from .schema_migrations import ensure_schema
+from .sessions import session_store
 from .settings import get_settings
+from .vendor_clusters import vendor_cluster_job
 
 # Load environment variables from .env before settings resolution.
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 settings = get_settings()
 app = FastAPI(title=settings.app_name)
 # Optional Sentry & OpenTelemetry (env-gated)
@@ -119,7 +143,8 @@ app.add_middleware(
 async def add_correlation_and_timing(request: Request, call_next):
     rid = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
     start = time.time()
-    response = await call_next(request)
+    with checkout_owner(f"{request.method} {request.url.path} rid={rid}"):
+        response = await call_next(request)
     response.headers["X-Request-ID"] = rid
     response.headers["X-Process-Time-ms"] = str(
         int((time.time() - start) * 1000)
@@ -133,7 +158,7 @@ async def require_authenticated_api_user(request: Request, call_next):
     if is_auth_exempt_path(path) or not is_protected_path(path):
         return await call_next(request)
 
-    user = resolve_authenticated_user(request)
+    user = await resolve_authenticated_user_async(request)
     if not user:
         return JSONResponse(
             status_code=401,
@@ -164,9 +189,55 @@ async def health():
     return {"status": "ok"}
 
 
+schema_listener = SchemaChangeListener(schema_catalog, dedicated_connection)
+audit_partitions = AuditPartitionManager(
+    dedicated_connection,
+    years_ahead=int(os.environ.get("AUDIT_PARTITIONS_AHEAD", "1")),
+)
+kpi_snapshots = KpiSnapshotRefresher(
+    dedicated_connection,
+    interval=float(os.environ.get("KPI_SNAPSHOT_INTERVAL", "300")),
+    poll=float(os.environ.get("KPI_SNAPSHOT_POLL", "15")),
+)
+matviews = MatviewRefresher(
+    dedicated_connection,
+    debounce=float(os.environ.get("MATVIEW_REFRESH_DEBOUNCE", "30")),
+    max_delay=float(os.environ.get("MATVIEW_REFRESH_MAX_DELAY", "300")),
+    interval=float(os.environ.get("MATVIEW_REFRESH_INTERVAL", "3600")),
+    poll=float(os.environ.get("MATVIEW_REFRESH_POLL", "10")),
+)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Apply pending migrations, then start the background maintainers."""
+    if os.environ.get("DB_MIGRATE_ON_STARTUP", "1") != "0":
+        try:
+            await asyncio.to_thread(ensure_schema)
+        except Exception:
+            # Handlers retry through ensure_schema() on first use.
+            logger.exception("Schema migrations failed at startup")
+    if os.environ.get("SCHEMA_CATALOG_LISTEN", "1") != "0":
+        schema_listener.start()
+    if os.environ.get("AUDIT_PARTITION_MAINTENANCE", "1") != "0":
+        audit_partitions.start()
+    if os.environ.get("KPI_SNAPSHOTS", "1") != "0":
+        kpi_snapshots.start()
+    if os.environ.get("MATVIEW_REFRESH", "1") != "0":
+        matviews.start()
+    session_store.start()
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown"""
+    schema_listener.stop()
+    audit_partitions.stop()
+    kpi_snapshots.stop()
+    matviews.stop()
+    await asyncio.to_thread(audit_writer.stop)
+    await asyncio.to_thread(session_store.stop)
+    shutdown_password_pool()
     close_all_connections()
 
 
@@ -174,25 +245,48 @@ async def shutdown_event():
 async def db_ping():
     """Test database connectivity by running a simple query."""
     try:
-        from .db import get_connection, return_connection
-
-        conn = get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM banking_transactions")
-            count = cur.fetchone()[0]
-            cur.close()
-            return {
-                "status": "ok",
-                "database": "connected",
-                "banking_transactions_count": count,
-            }
-        finally:
-            return_connection(conn)
+        from .db import async_cursor
+
+        async with async_cursor() as cur:
+            await cur.execute("SELECT COUNT(*) FROM banking_transactions")
+            count = (await cur.fetchone())[0]
+        return {
+            "status": "ok",
+            "database": "connected",
+            "banking_transactions_count": count,
+        }
     except Exception as e:
         return {"status": "error", "database": "disconnected", "error": str(e)}
 
 
+@app.get(
+    "/db-pool",
+    dependencies=[Depends(require_roles("admin", "manager", "super_user"))],
+)
+async def db_pool():
+    """Connection pool, audit writer, session and cache metrics."""
+    return {
+        **pool_stats(),
+        "audit_writer": audit_writer.stats(),
+        "sessions": session_store.stats(),
+        "report_cache": report_cache.stats(),
+        "kpi_snapshots": kpi_snapshots.stats(),
+        "matviews": matviews.stats(),
+        "vendor_clusters": vendor_cluster_job.stats(),
+    }
+
+
+@app.post(
+    "/api/schema-catalog/refresh",
+    dependencies=[Depends(require_roles("admin", "manager", "super_user"))],
+)
+def refresh_schema_catalog(conn=Depends(get_db)):
+    """Drop cached table/column metadata in every worker after manual DDL."""
+    notify_schema_changed(conn)
+    conn.commit()
+    return schema_catalog.stats()
+
+
 # Routers (MUST be included BEFORE mounting static files)
 finance_roles = Depends(
     require_roles("admin", "manager", "super_user", "accountant")
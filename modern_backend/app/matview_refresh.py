@@ -0,0 +1,306 @@
+"""In-app refresh of the materialized views the API reads.
+
+``/api/receipts-simple/vendors`` reads ``mv_vendor_list`` and the receipt
+verification endpoints read ``mv_receipt_verification_*``. The views are
+created by the SQL scripts in ``migrations/``, and used to be refreshed
+only when those scripts ran. :class:`MatviewRefresher` keeps them
+current in a background thread.
+
+Every ``poll`` seconds it reads the data versions of each view's source
+tables (see :mod:`app.report_cache`). Once they have changed and then
+stayed unchanged for ``debounce`` seconds, it refreshes the view. A
+stream of writes that never goes quiet is refreshed after ``max_delay``
+seconds. Every view is also refreshed at least every ``interval``
+seconds. Refreshes use ``CONCURRENTLY``, so readers are never blocked.
+
+``matview_refreshes`` (schema migration 23) records each view's last
+refresh, its duration and whether source writes are pending since. The
+endpoints report that as staleness with :func:`view_status`.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from .report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+_REFRESH_LOCK_KEY = 7_310_023
+
+
+@dataclass(frozen=True)
+class MatView:
+    """A materialized view and the tables it is computed from."""
+
+    name: str
+    source_tables: tuple[str, ...]
+
+
+MATERIALIZED_VIEWS = (
+    MatView("mv_vendor_list", ("receipts",)),
+    MatView("mv_receipt_verification_summary", ("receipts",)),
+    MatView("mv_receipt_verification_by_year", ("receipts",)),
+)
+
+_STATUS_SQL = """
+    SELECT refreshed_at,
+           EXTRACT(EPOCH FROM clock_timestamp() - refreshed_at),
+           duration_ms, pending_since IS NOT NULL
+    FROM matview_refreshes
+    WHERE view_name = %s
+"""
+
+
+def _status(row) -> dict[str, Any]:
+    if row is None or row[0] is None:
+        return {
+            "snapshot_refreshed_at": None,
+            "snapshot_age_seconds": None,
+            "refresh_duration_ms": None,
+            "refresh_pending": None,
+        }
+    refreshed_at, age, duration_ms, pending = row
+    return {
+        "snapshot_refreshed_at": refreshed_at.isoformat(),
+        "snapshot_age_seconds": round(float(age), 1),
+        "refresh_duration_ms": round(float(duration_ms or 0), 1),
+        "refresh_pending": bool(pending),
+    }
+
+
+def view_status(cur, view_name: str) -> dict[str, Any]:
+    """When ``view_name`` was last refreshed, and whether writes since
+    then are waiting for the next refresh. Fields are None until the
+    refresher has run.
+    """
+    cur.execute(_STATUS_SQL, (view_name,))
+    return _status(cur.fetchone())
+
+
+async def view_status_async(cur, view_name: str) -> dict[str, Any]:
+    """:func:`view_status` for an async cursor."""
+    await cur.execute(_STATUS_SQL, (view_name,))
+    return _status(await cur.fetchone())
+
+
+def status_headers(status: dict[str, Any]) -> dict[str, str]:
+    """:func:`view_status` as headers, for endpoints returning lists."""
+    if status["snapshot_refreshed_at"] is None:
+        return {}
+    return {
+        "X-Snapshot-Refreshed-At": status["snapshot_refreshed_at"],
+        "X-Snapshot-Age-Seconds": str(status["snapshot_age_seconds"]),
+        "X-Refresh-Pending": str(status["refresh_pending"]).lower(),
+    }
+
+
+def refresh_view(cur, view_name: str, versions: Any = None) -> float | None:
+    """Refresh ``view_name`` and record it; returns the duration in ms.
+
+    Returns None when the view does not exist. A view that has never
+    been populated is refreshed without ``CONCURRENTLY``, which needs a
+    populated view.
+    """
+    cur.execute(
+        "SELECT ispopulated FROM pg_matviews WHERE matviewname = %s",
+        (view_name,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    concurrently = "CONCURRENTLY " if row[0] else ""
+    started = time.perf_counter()
+    cur.execute(f"REFRESH MATERIALIZED VIEW {concurrently}{view_name}")
+    duration_ms = (time.perf_counter() - started) * 1000
+    cur.execute(
+        """
+        INSERT INTO matview_refreshes
+            (view_name, source_versions, refreshed_at, duration_ms,
+             pending_since)
+        VALUES (%s, %s::jsonb, clock_timestamp(), %s, NULL)
+        ON CONFLICT (view_name) DO UPDATE
+        SET source_versions = EXCLUDED.source_versions,
+            refreshed_at = EXCLUDED.refreshed_at,
+            duration_ms = EXCLUDED.duration_ms,
+            pending_since = NULL
+        """,
+        (view_name, json.dumps(versions), duration_ms),
+    )
+    logger.info("Refreshed %s in %.0f ms", view_name, duration_ms)
+    return duration_ms
+
+
+def _stored_state(cur, view_name: str) -> tuple[Any, float | None, float]:
+    """Stored versions, age in seconds and seconds pending (0 if not)."""
+    cur.execute(
+        """
+        SELECT source_versions,
+               EXTRACT(EPOCH FROM clock_timestamp() - refreshed_at),
+               COALESCE(
+                   EXTRACT(EPOCH FROM clock_timestamp() - pending_since), 0
+               )
+        FROM matview_refreshes
+        WHERE view_name = %s
+        """,
+        (view_name,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None, None, 0.0
+    versions = row[0]
+    if isinstance(versions, str):
+        versions = json.loads(versions)
+    age = float(row[1]) if row[1] is not None else None
+    return versions, age, float(row[2])
+
+
+def _mark_pending(cur, view_name: str) -> None:
+    cur.execute(
+        """
+        INSERT INTO matview_refreshes (view_name, pending_since)
+        VALUES (%s, clock_timestamp())
+        ON CONFLICT (view_name) DO UPDATE
+        SET pending_since = COALESCE(
+            matview_refreshes.pending_since, EXCLUDED.pending_since
+        )
+        """,
+        (view_name,),
+    )
+
+
+class MatviewRefresher:
+    """Refreshes :data:`MATERIALIZED_VIEWS` when their sources change.
+
+    Several workers may run one; an advisory lock per view lets one of
+    them refresh it, and the recorded versions tell the others it is
+    done.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        views: tuple[MatView, ...] = MATERIALIZED_VIEWS,
+        debounce: float = 30.0,
+        max_delay: float = 300.0,
+        interval: float = 3600.0,
+        poll: float = 10.0,
+    ):
+        self._connect = connect
+        self.views = views
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.interval = interval
+        self.poll = poll
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # view -> (versions last seen, monotonic time they first appeared)
+        self._seen: dict[str, tuple[Any, float]] = {}
+        self._refreshes = 0
+        self._failures = 0
+        self._last: dict[str, dict[str, Any]] = {}
+
+    def due(
+        self,
+        view_name: str,
+        versions: Any,
+        stored: tuple[Any, float | None, float],
+        now: float,
+    ) -> bool:
+        """Whether to refresh now, given the state from the table."""
+        stored_versions, age, pending = stored
+        if age is None or age >= self.interval:
+            return True
+        if versions is None or versions == stored_versions:
+            self._seen.pop(view_name, None)
+            return False
+        seen = self._seen.get(view_name)
+        if seen is None or seen[0] != versions:
+            # Still being written to; wait for it to go quiet.
+            self._seen[view_name] = (versions, now)
+            return pending >= self.max_delay
+        return now - seen[1] >= self.debounce or pending >= self.max_delay
+
+    def _refresh_one(self, conn, view: MatView, force: bool) -> bool:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT pg_try_advisory_xact_lock(%s, hashtext(%s))",
+                (_REFRESH_LOCK_KEY, view.name),
+            )
+            if not cur.fetchone()[0]:
+                return False
+            versions = report_cache.versions(cur, view.source_tables)
+            stored = _stored_state(cur, view.name)
+            if not force and not self.due(
+                view.name, versions, stored, time.monotonic()
+            ):
+                if versions is not None and versions != stored[0]:
+                    _mark_pending(cur, view.name)
+                return False
+            duration_ms = refresh_view(cur, view.name, versions)
+        if duration_ms is None:
+            return False
+        self._seen.pop(view.name, None)
+        with self._lock:
+            self._refreshes += 1
+            self._last[view.name] = {
+                "refreshed_at": datetime.now().isoformat(),
+                "duration_ms": round(duration_ms, 1),
+            }
+        return True
+
+    def run_once(self, *, force: bool = False) -> int:
+        """Refresh the views that are due; returns how many were."""
+        refreshed = 0
+        conn = self._connect()
+        try:
+            for view in self.views:
+                try:
+                    if self._refresh_one(conn, view, force):
+                        refreshed += 1
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    with self._lock:
+                        self._failures += 1
+                    logger.exception("Refreshing %s failed", view.name)
+        finally:
+            conn.close()
+        return refreshed
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="matview-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "debounce": self.debounce,
+                "max_delay": self.max_delay,
+                "interval": self.interval,
+                "refreshes": self._refreshes,
+                "failures": self._failures,
+                "views": dict(self._last),
+            }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Materialized view refresh failed")
+            self._stop.wait(self.poll)
@@ -0,0 +1,132 @@
+"""Linked receipt groups, precomputed in ``receipts.link_group_id``.
+
+Receipts belong together (split siblings, a split parent and its
+children, receipts paying one bank transaction) when they share a
+``banking_transaction_id``, ``split_group_id`` or non-blank
+``split_key``, or when one is the other's ``parent_receipt_id``. A
+*link group* is the transitive closure of those links. Its id is the
+lowest ``receipt_id`` in it.
+
+Schema migration 17 adds the column. It fills the column with
+:func:`relink_receipts`, a union-find pass over every receipt. A row
+trigger then keeps the column current. Whenever a receipt is inserted,
+deleted or has a link column changed, the trigger recomputes the groups
+around the old and new links. Expanding a receipt to its linked splits
+is then one indexed ``link_group_id = ANY(...)`` lookup.
+``relink_receipts`` stays available to repair the column after bulk
+loads that ran with triggers disabled.
+"""
+
+import logging
+from collections.abc import Iterable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_RELINK_BATCH = 10_000
+
+# (receipt_id, banking_transaction_id, parent_receipt_id,
+#  split_group_id, split_key)
+LinkRow = tuple[int, Any, Any, Any, Any]
+
+
+class _UnionFind:
+    """Disjoint sets of receipt ids; each root is its set's lowest id."""
+
+    def __init__(self):
+        self.parent: dict[int, int] = {}
+
+    def add(self, item: int) -> None:
+        self.parent.setdefault(item, item)
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            low, high = sorted((root_a, root_b))
+            self.parent[high] = low
+
+
+def link_groups(rows: Iterable[LinkRow]) -> dict[int, int]:
+    """Map each receipt id to its link group id."""
+    sets = _UnionFind()
+    first_by_link: dict[tuple[str, Any], int] = {}
+    parents: list[tuple[int, int]] = []
+    for receipt_id, bank_id, parent_id, group_id, split_key in rows:
+        sets.add(receipt_id)
+        links = [("bank", bank_id), ("group", group_id)]
+        if split_key is not None and str(split_key).strip():
+            links.append(("key", split_key))
+        for link in links:
+            if link[1] is None:
+                continue
+            first = first_by_link.setdefault(link, receipt_id)
+            if first != receipt_id:
+                sets.union(first, receipt_id)
+        if parent_id is not None:
+            parents.append((receipt_id, parent_id))
+    for receipt_id, parent_id in parents:
+        # A parent that no longer exists links nothing.
+        if parent_id in sets.parent:
+            sets.union(receipt_id, parent_id)
+    return {receipt_id: sets.find(receipt_id) for receipt_id in sets.parent}
+
+
+def relink_receipts(cur) -> int:
+    """Recompute ``link_group_id`` for all receipts; returns rows changed."""
+    cur.execute(
+        """
+        SELECT receipt_id, banking_transaction_id, parent_receipt_id,
+               split_group_id, split_key
+        FROM receipts
+        """
+    )
+    groups = link_groups(cur.fetchall())
+    items = sorted(groups.items())
+    changed = 0
+    for start in range(0, len(items), _RELINK_BATCH):
+        batch = items[start:start + _RELINK_BATCH]
+        cur.execute(
+            """
+            UPDATE receipts r
+            SET link_group_id = v.group_id
+            FROM unnest(%s::int[], %s::int[]) AS v(receipt_id, group_id)
+            WHERE r.receipt_id = v.receipt_id
+              AND r.link_group_id IS DISTINCT FROM v.group_id
+            """,
+            ([i for i, _ in batch], [g for _, g in batch]),
+        )
+        changed += max(cur.rowcount, 0)
+    logger.info(
+        "Relinked receipt groups: %s receipts, %s changed",
+        len(items),
+        changed,
+    )
+    return changed
+
+
+def linked_receipt_ids(cur, seed_ids: list[int]) -> set[int]:
+    """``seed_ids`` plus every receipt in the same link groups."""
+    if not seed_ids:
+        return set()
+    cur.execute(
+        """
+        SELECT r.receipt_id
+        FROM receipts r
+        WHERE r.link_group_id = ANY(
+            ARRAY(
+                SELECT link_group_id FROM receipts
+                WHERE receipt_id = ANY(%s) AND link_group_id IS NOT NULL
+            )
+        )
+        """,
+        (list(seed_ids),),
+    )
+    return set(seed_ids) | {row[0] for row in cur.fetchall()}
@@ -0,0 +1,269 @@
+"""Result cache for finance reports, invalidated by data versions.
+
+Finance reports aggregate ``general_ledger``, ``charters``, ``receipts``
+and friends on every request, although those tables change rarely.
+:func:`cached_report` caches a handler's JSON result under a key made of:
+
+- the endpoint name;
+- its normalised query parameters (plus today's date, since default
+  date windows are relative to it);
+- the current data version of every table the report reads.
+
+Versions are maintained by the database. Schema migration 14 adds a
+statement-level trigger on each source table that appends one row to
+``report_data_changes`` per writing statement. Inserts never contend
+with each other, and the row becomes visible exactly when the writing
+transaction commits. The version of a table is the count folded into
+``report_data_versions`` plus its pending change rows, so a committed
+change always yields a new key. Every request therefore returns fresh
+results, with no TTL. Pending rows are folded in now and then by
+:meth:`ReportCache.compact`.
+
+A table without the trigger (created after migration 14 ran) has no
+reliable version, and reports reading it bypass the cache.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from datetime import date
+from typing import Any
+
+from .db import cursor
+
+logger = logging.getLogger(__name__)
+
+VERSION_TRIGGER = "trg_report_data_changed"
+
+# Tables the cached reports and KPI snapshots read; migrations 14 and 21
+# attach the trigger.
+REPORT_SOURCE_TABLES = (
+    "charters",
+    "driver_payroll",
+    "employees",
+    "general_ledger",
+    "income_ledger",
+    "payments",
+    "quotations",
+    "receipts",
+    "vehicles",
+)
+
+_VERSIONS_SQL = """
+    SELECT t.table_name, COALESCE(v.version, 0), COALESCE(c.pending, 0)
+    FROM unnest(%s::text[]) AS t(table_name)
+    LEFT JOIN report_data_versions v USING (table_name)
+    LEFT JOIN (
+        SELECT table_name, COUNT(*) AS pending
+        FROM report_data_changes
+        WHERE table_name = ANY(%s)
+        GROUP BY table_name
+    ) c USING (table_name)
+"""
+
+_COMPACT_SQL = """
+    WITH moved AS (
+        DELETE FROM report_data_changes RETURNING table_name
+    ), counts AS (
+        SELECT table_name, COUNT(*) AS n FROM moved GROUP BY table_name
+    )
+    INSERT INTO report_data_versions (table_name, version)
+    SELECT table_name, n FROM counts
+    ON CONFLICT (table_name) DO UPDATE
+    SET version = report_data_versions.version + EXCLUDED.version,
+        changed_at = NOW()
+"""
+
+# Keeps concurrent compactions from queueing behind each other.
+_COMPACT_LOCK_KEY = 7_310_055
+
+
+class ReportCache:
+    """LRU of report results bounded by entry count and encoded size."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        compact_threshold: int = 1000,
+        trigger_recheck: float = 300.0,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compact_threshold = compact_threshold
+        self.trigger_recheck = trigger_recheck
+        self._entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._versioned: set[str] = set()
+        self._unversioned_checked_at = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._evictions = 0
+
+    # -- data versions -------------------------------------------------
+
+    def _ensure_triggers(self, cur, tables: Sequence[str]) -> bool:
+        missing = [t for t in tables if t not in self._versioned]
+        if not missing:
+            return True
+        now = time.monotonic()
+        if now - self._unversioned_checked_at < self.trigger_recheck:
+            return False
+        cur.execute(
+            """
+            SELECT c.relname
+            FROM pg_trigger tg
+            JOIN pg_class c ON c.oid = tg.tgrelid
+            WHERE tg.tgname = %s AND c.relname = ANY(%s)
+            """,
+            (VERSION_TRIGGER, list(missing)),
+        )
+        found = {row[0] for row in cur.fetchall()}
+        with self._lock:
+            self._versioned |= found
+        unversioned = set(missing) - found
+        if unversioned:
+            logger.info(
+                "Report cache bypassed; no %s on %s",
+                VERSION_TRIGGER,
+                ", ".join(sorted(unversioned)),
+            )
+            self._unversioned_checked_at = now
+            return False
+        return True
+
+    def versions(self, cur, tables: Sequence[str]) -> dict[str, int] | None:
+        """Current data version per table, or None if not all versioned."""
+        if not self._ensure_triggers(cur, tables):
+            return None
+        names = sorted(set(tables))
+        cur.execute(_VERSIONS_SQL, (names, names))
+        versions: dict[str, int] = {}
+        pending = 0
+        for name, folded, changes in cur.fetchall():
+            versions[name] = int(folded) + int(changes)
+            pending += int(changes)
+        if self.compact_threshold and pending >= self.compact_threshold:
+            self.compact(cur)
+        return versions
+
+    def compact(self, cur) -> None:
+        """Fold pending change rows into ``report_data_versions``.
+
+        Versions (folded count plus pending rows) are unchanged by this.
+        """
+        cur.execute(
+            "SELECT pg_try_advisory_xact_lock(%s)", (_COMPACT_LOCK_KEY,)
+        )
+        if cur.fetchone()[0]:
+            cur.execute(_COMPACT_SQL)
+
+    # -- entries ---------------------------------------------------------
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def note_bypass(self) -> None:
+        with self._lock:
+            self._bypassed += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypassed": self._bypassed,
+                "evictions": self._evictions,
+                "versioned_tables": sorted(self._versioned),
+            }
+
+
+report_cache = ReportCache(
+    max_entries=int(os.environ.get("REPORT_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("REPORT_CACHE_MAX_MB", "64")) << 20,
+)
+
+# Request-scoped arguments that are not part of a report's identity.
+_NON_KEY_PARAMS = {"conn", "request", "response", "current_user"}
+
+
+def cached_report(
+    endpoint: str,
+    tables: Sequence[str],
+    *,
+    cache: ReportCache | None = None,
+) -> Callable:
+    """Cache a report handler's JSON result until ``tables`` change.
+
+    Only ``dict``/``list`` results are cached; file and streaming
+    responses pass straight through.
+    """
+
+    def decorate(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            store = cache or report_cache
+            params = {
+                k: v for k, v in kwargs.items() if k not in _NON_KEY_PARAMS
+            }
+            with cursor() as cur:
+                versions = store.versions(cur, tables)
+            if versions is None:
+                store.note_bypass()
+                return handler(*args, **kwargs)
+            key = json.dumps(
+                [endpoint, params, versions, date.today()],
+                sort_keys=True,
+                default=str,
+            )
+            result = store.get(key)
+            if result is not None:
+                return result
+            result = handler(*args, **kwargs)
+            if isinstance(result, (dict, list)):
+                encoded = json.dumps(result, default=str)
+                store.put(key, result, len(encoded))
+            return result
+
+        return wrapper
+
+    return decorate
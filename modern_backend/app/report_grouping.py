@@ -0,0 +1,109 @@
+"""Group and grand totals for list reports, computed in one SQL query.
+
+The list reports (``legacy-ops``, ``aged-receivables``) used to fetch up
+to ``limit`` detail rows and add them up in Python. Their totals were
+then only right while the data fit under the limit. :func:`summarize`
+wraps the report's unpaged detail query in a single
+``GROUP BY GROUPING SETS ((group), ())`` aggregate. One scan returns
+every group plus the grand total, however many rows match, and no
+detail rows are shipped to the app.
+
+A response with both totals and a detail page reads them inside
+:func:`read_snapshot`. Both queries then see the same snapshot, so the
+page is always a slice of the rows behind the totals.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Measure:
+    """``SUM`` of a detail column, reported as ``name``."""
+
+    name: str
+    column: str
+    digits: int = 2
+
+
+@dataclass
+class Summary:
+    totals: dict[str, Any]
+    groups: list[dict[str, Any]]
+
+
+def summary_sql(
+    detail_sql: str,
+    measures: Sequence[Measure],
+    *,
+    group_column: str | None = None,
+    count_name: str = "runs",
+) -> str:
+    """Aggregate of ``detail_sql`` (no ORDER BY / LIMIT) per group and overall.
+
+    The first column flags the grand-total row, which sorts first. Group
+    rows follow in case-insensitive order of their value.
+    """
+    sums = "".join(
+        f",\n               SUM(r.{m.column}) AS {m.name}" for m in measures
+    )
+    if group_column is None:
+        return f"""
+            SELECT true AS is_total, NULL::text AS group_value,
+                   COUNT(*) AS {count_name}{sums}
+            FROM ({detail_sql}) AS r
+        """
+    value = f"COALESCE(r.{group_column}::text, '')"
+    return f"""
+            SELECT GROUPING({value}) = 1 AS is_total,
+                   {value} AS group_value,
+                   COUNT(*) AS {count_name}{sums}
+            FROM ({detail_sql}) AS r
+            GROUP BY GROUPING SETS (({value}), ())
+            ORDER BY 1 DESC, lower({value}), 2
+        """
+
+
+def summarize(
+    conn,
+    detail_sql: str,
+    params: Sequence[Any],
+    measures: Sequence[Measure],
+    *,
+    group_column: str | None = None,
+    count_name: str = "runs",
+) -> Summary:
+    """Grand totals and, with ``group_column``, per-group totals."""
+    sql = summary_sql(
+        detail_sql, measures, group_column=group_column, count_name=count_name
+    )
+    with conn.cursor() as cur:
+        cur.execute(sql, list(params))
+        rows = cur.fetchall()
+
+    totals: dict[str, Any] = {count_name: 0}
+    totals.update({m.name: 0.0 for m in measures})
+    groups: list[dict[str, Any]] = []
+    for is_total, group_value, count, *sums in rows:
+        record = {count_name: int(count or 0)}
+        for measure, value in zip(measures, sums, strict=True):
+            record[measure.name] = round(float(value or 0), measure.digits)
+        if is_total:
+            totals = record
+        else:
+            groups.append({"group_value": group_value, **record})
+    return Summary(totals=totals, groups=groups)
+
+
+def read_snapshot(conn) -> None:
+    """Make the following reads on ``conn`` share one snapshot.
+
+    Ends the open (read-only) transaction and starts a
+    ``REPEATABLE READ READ ONLY`` one in its place.
+    """
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(
+            "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"
+        )
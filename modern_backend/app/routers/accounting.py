@@ -2,11 +2,15 @@
 
 from datetime import date, datetime
 from decimal import Decimal
+from typing import Any
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
-from ..db import get_connection
+from ..db import get_db
+from ..financial_facts import facts_available, month_bounds, source_totals
+from ..kpi_snapshots import ACCOUNTING_STATS_KEY, live_result, read_snapshot
+from ..schema_migrations import ensure_schema
 
 router = APIRouter(prefix="/api/accounting", tags=["accounting"])
 
@@ -27,42 +31,47 @@ class GSTSummary(BaseModel):
     period_end: date
 
 
-@router.get("/stats")
-def get_accounting_stats(month: int | None = None, year: int | None = None):
-    """Get accounting dashboard statistics"""
-    conn = get_connection()
-    cur = conn.cursor()
-
+def compute_accounting_stats(
+    cur, month: int | None = None, year: int | None = None
+) -> dict[str, Any]:
+    """Accounting dashboard statistics for one month."""
     # Default to current month/year
     if month is None:
         month = datetime.now().month
     if year is None:
         year = datetime.now().year
 
-    # Monthly Revenue (from charters)
-    cur.execute(
-        """
-        SELECT COALESCE(SUM(total_amount_due), 0)
-        FROM charters
-        WHERE EXTRACT(MONTH FROM charter_date) = %s
-        AND EXTRACT(YEAR FROM charter_date) = %s
-    """,
-        (month, year),
-    )
-    monthly_revenue = cur.fetchone()[0] or 0
-
-    # Monthly Expenses (from receipts)
-    cur.execute(
-        """
-        SELECT COALESCE(SUM(gross_amount + COALESCE(gst_amount, 0)), 0)
-        FROM receipts
-        WHERE EXTRACT(MONTH FROM receipt_date) = %s
-        AND EXTRACT(YEAR FROM receipt_date) = %s
-        AND category != 'personal'
-    """,
-        (month, year),
-    )
-    monthly_expenses = cur.fetchone()[0] or 0
+    # Monthly revenue (charters) and expenses (receipts)
+    start, end = month_bounds(year, month)
+    if facts_available(cur):
+        cur.execute(
+            """
+            SELECT
+                COALESCE(SUM(revenue) FILTER (WHERE source = 'charters'), 0),
+                COALESCE(SUM(expenses + gst_paid) FILTER (
+                    WHERE source = 'receipts' AND category != 'personal'
+                ), 0)
+            FROM daily_financial_facts
+            WHERE fact_date >= %s AND fact_date < %s
+        """,
+            (start, end),
+        )
+        monthly_revenue, monthly_expenses = cur.fetchone()
+    else:
+        (monthly_revenue,) = source_totals(
+            cur, "charters", ("revenue",), start, end
+        )
+        gross, gst = source_totals(
+            cur,
+            "receipts",
+            ("expenses", "gst_paid"),
+            start,
+            end,
+            exclude_category="personal",
+        )
+        monthly_expenses = gross + gst
+    monthly_revenue = monthly_revenue or 0
+    monthly_expenses = monthly_expenses or 0
 
     # Monthly Profit
     monthly_profit = monthly_revenue - monthly_expenses
@@ -88,9 +97,6 @@ def get_accounting_stats(month: int | None = None, year: int | None = None):
     except Exception:
         gst_owed = 0
 
-    cur.close()
-    conn.close()
-
     return {
         "monthly_revenue": float(monthly_revenue) if monthly_revenue else 0,
         "monthly_expenses": float(monthly_expenses) if monthly_expenses else 0,
@@ -104,14 +110,38 @@ def get_accounting_stats(month: int | None = None, year: int | None = None):
     }
 
 
+@router.get("/stats")
+def get_accounting_stats(
+    month: int | None = None,
+    year: int | None = None,
+    conn=Depends(get_db),
+):
+    """Get accounting dashboard statistics.
+
+    The current month is served from the precomputed KPI snapshot;
+    ``snapshot_age_seconds`` says how old it is.
+    """
+    ensure_schema()
+    now = datetime.now()
+    cur = conn.cursor()
+    try:
+        if month in (None, now.month) and year in (None, now.year):
+            snapshot = read_snapshot(cur, ACCOUNTING_STATS_KEY)
+            if snapshot is not None:
+                return snapshot
+        return live_result(compute_accounting_stats(cur, month, year))
+    finally:
+        cur.close()
+
+
 @router.get("/gst/summary")
 def get_gst_summary(
     period: str = "current",  # current, last, annual
     start_date: date | None = None,
     end_date: date | None = None,
+    conn=Depends(get_db),
 ):
     """Get GST summary for specified period"""
-    conn = get_connection()
     cur = conn.cursor()
 
     # Determine date range
@@ -166,7 +196,6 @@ def get_gst_summary(
     gst_paid = cur.fetchone()[0] or 0
 
     cur.close()
-    conn.close()
 
     return {
         "collected": float(gst_collected),
@@ -178,9 +207,8 @@ def get_gst_summary(
 
 
 @router.get("/chart-of-accounts")
-def list_chart_of_accounts(only_active: bool = True):
+def list_chart_of_accounts(only_active: bool = True, conn=Depends(get_db)):
     """Return chart of accounts codes for selection in UI."""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         query = """
@@ -210,15 +238,15 @@ def list_chart_of_accounts(only_active: bool = True):
         ]
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/reports/profit-loss")
 def get_profit_loss_report(
-    start_date: date | None = None, end_date: date | None = None
+    start_date: date | None = None,
+    end_date: date | None = None,
+    conn=Depends(get_db),
 ):
     """Generate Profit & Loss report"""
-    conn = get_connection()
     cur = conn.cursor()
 
     # Default to current year
@@ -286,7 +314,6 @@ def get_profit_loss_report(
     net_profit = revenue["total_revenue"] - total_expenses
 
     cur.close()
-    conn.close()
 
     return {
         "period_start": start_date,
@@ -302,10 +329,11 @@ def get_profit_loss_report(
 
 @router.get("/reports/cash-flow")
 def get_cash_flow_report(
-    start_date: date | None = None, end_date: date | None = None
+    start_date: date | None = None,
+    end_date: date | None = None,
+    conn=Depends(get_db),
 ):
     """Generate Cash Flow report"""
-    conn = get_connection()
     cur = conn.cursor()
 
     if start_date is None:
@@ -342,7 +370,6 @@ def get_cash_flow_report(
     net_cash_flow = cash_in - cash_out
 
     cur.close()
-    conn.close()
 
     return {
         "period_start": start_date,
@@ -354,9 +381,8 @@ def get_cash_flow_report(
 
 
 @router.get("/reports/ar-aging")
-def get_ar_aging_report():
+def get_ar_aging_report(conn=Depends(get_db)):
     """Generate Accounts Receivable Aging report"""
-    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
@@ -426,7 +452,6 @@ def get_ar_aging_report():
             totals["over_90_days"] += amount
 
     cur.close()
-    conn.close()
 
     return {
         "aging": aging,
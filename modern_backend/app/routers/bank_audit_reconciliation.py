@@ -11,9 +11,10 @@ Endpoints:
 
 import logging
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 
-from ..db import get_connection
+from ..bank_balances import RUNNING_BALANCE_SQL, opening_balances
+from ..db import get_async_connection
 
 router = APIRouter(prefix="/api/bank-audit", tags=["bank-audit"])
 logger = logging.getLogger(__name__)
@@ -32,6 +33,7 @@ class BankTransactionLine:
         self.receipt_total = float(row[6]) if row[6] else None
         self.linked = row[7] is not None
         self.running_balance = 0.0  # Set by caller
+        self.period_total = float(row[8]) if row[8] else 0.0
 
 
 class BankAccountSummary:
@@ -53,12 +55,11 @@ class BankAccountSummary:
 
 
 @router.get("/accounts")
-async def list_bank_accounts():
+async def list_bank_accounts(conn=Depends(get_async_connection)):
     """List all unique bank accounts in the system"""
-    conn = get_connection()
     try:
         cur = conn.cursor()
-        cur.execute("""
+        await cur.execute("""
             SELECT DISTINCT account_number, account_name, institution_name
             FROM banking_transactions
             WHERE account_number IS NOT NULL
@@ -66,7 +67,7 @@ async def list_bank_accounts():
         """)
 
         accounts = []
-        for row in cur.fetchall():
+        for row in await cur.fetchall():
             accounts.append(
                 {
                     "account_number": row[0],
@@ -89,6 +90,7 @@ async def get_account_reconciliation(
     account_number: str | None = Query(
         None, description="Filter by account number"
     ),
+    conn=Depends(get_async_connection),
 ):
     """
     Get bank account reconciliation report with opening/closing balances and
@@ -101,7 +103,6 @@ async def get_account_reconciliation(
     - Receipt linking status
     - Account-level summary statistics
     """
-    conn = get_connection()
     try:
         cur = conn.cursor()
 
@@ -114,7 +115,7 @@ async def get_account_reconciliation(
             account_params = []
 
         # Get distinct accounts
-        cur.execute(
+        await cur.execute(
             f"""
             SELECT DISTINCT account_number, account_name, institution_name
             FROM banking_transactions
@@ -124,7 +125,10 @@ async def get_account_reconciliation(
             account_params,
         )
 
-        accounts = cur.fetchall()
+        accounts = await cur.fetchall()
+        openings = await opening_balances(
+            cur, [acc[0] for acc in accounts if acc[0]], start_date
+        )
         results = []
 
         for acc in accounts:
@@ -134,51 +138,21 @@ async def get_account_reconciliation(
 
             summary = BankAccountSummary(acc_number)
             summary.account_name = acc_name
+            summary.opening_balance = openings.get(acc_number, 0.0)
 
-            # Get opening balance (sum of all transactions BEFORE period)
-            cur.execute(
-                """
-                SELECT COALESCE(SUM(amount), 0)
-                FROM banking_transactions
-                WHERE account_number = %s AND transaction_date < %s
-            """,
-                [acc_number, start_date],
-            )
-
-            opening_bal = cur.fetchone()[0]
-            summary.opening_balance = (
-                float(opening_bal) if opening_bal else 0.0
-            )
-
-            # Get transactions in period with receipt info
-            cur.execute(
-                """
-                SELECT 
-                    bt.transaction_date,
-                    bt.description,
-                    bt.amount,
-                    bt.transaction_id,
-                    r.vendor_name,
-                    r.receipt_id,
-                    r.total_amount,
-                    r.receipt_id  -- Used to determine if linked (not null =
-                    linked)
-                FROM banking_transactions bt
-                LEFT JOIN receipts r ON bt.transaction_id =
-                r.banking_transaction_id
-                WHERE bt.account_number = %s
-                    AND bt.transaction_date BETWEEN %s AND %s
-                ORDER BY bt.transaction_date, bt.transaction_id
-            """,
-                [acc_number, start_date, end_date],
+            # Period transactions with receipt info and running totals
+            await cur.execute(
+                RUNNING_BALANCE_SQL, [acc_number, start_date, end_date]
             )
 
-            transaction_rows = cur.fetchall()
+            transaction_rows = await cur.fetchall()
             running_balance = summary.opening_balance
 
             for row in transaction_rows:
                 trans = BankTransactionLine(row)
-                trans.running_balance = running_balance + trans.amount
+                trans.running_balance = (
+                    summary.opening_balance + trans.period_total
+                )
                 running_balance = trans.running_balance
 
                 summary.transactions.append(trans)
@@ -198,7 +172,7 @@ async def get_account_reconciliation(
             summary.closing_balance = running_balance
 
             # Get actual balance from bank statement (if stored)
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT balance_at_date
                 FROM bank_statement_balances
@@ -207,7 +181,7 @@ async def get_account_reconciliation(
                 [acc_number, end_date],
             )
 
-            stmt_bal = cur.fetchone()
+            stmt_bal = await cur.fetchone()
             if stmt_bal:
                 actual_closing = float(stmt_bal[0])
                 summary.variance = actual_closing - summary.closing_balance
@@ -270,17 +244,17 @@ async def get_account_summary(
     account_number: str = Query(..., description="Bank account number"),
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
+    conn=Depends(get_async_connection),
 ):
     """
     Get summary statistics for a specific bank account in the period.
     Useful for dashboard display and quick audit checks.
     """
-    conn = get_connection()
     try:
         cur = conn.cursor()
 
         # Get account details
-        cur.execute(
+        await cur.execute(
             """
             SELECT account_name, institution_name, account_type
             FROM banking_transactions
@@ -290,26 +264,19 @@ async def get_account_summary(
             [account_number],
         )
 
-        acc_info = cur.fetchone()
+        acc_info = await cur.fetchone()
         if not acc_info:
             return {
                 "error": "Account not found",
                 "account_number": account_number,
             }
 
-        # Opening balance
-        cur.execute(
-            """
-            SELECT COALESCE(SUM(amount), 0)
-            FROM banking_transactions
-            WHERE account_number = %s AND transaction_date < %s
-        """,
-            [account_number, start_date],
-        )
-        opening_bal = float(cur.fetchone()[0]) or 0
+        opening_bal = (
+            await opening_balances(cur, [account_number], start_date)
+        ).get(account_number, 0.0)
 
         # Period transactions
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),
@@ -330,7 +297,7 @@ async def get_account_summary(
             [account_number, start_date, end_date],
         )
 
-        summary_row = cur.fetchone()
+        summary_row = await cur.fetchone()
         credits = float(summary_row[0]) if summary_row[0] else 0
         debits = float(summary_row[1]) if summary_row[1] else 0
         trans_count = summary_row[2] or 0
@@ -3,15 +3,33 @@
 from datetime import date, timedelta
 from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from pydantic import BaseModel
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
+from ..pagination import (
+    CURSOR_HEADER,
+    ESTIMATE_HEADER,
+    Keyset,
+    estimate_count,
+    next_cursor,
+    page_rows,
+)
+from ..utils.amounts import amount_match_sql, to_cents
 
 router = APIRouter(prefix="/api/banking", tags=["banking"])
 
+_TRANSACTION_KEYSET = Keyset("transaction_date", "transaction_id")
+
 
 def _audit_actor(request: Request | None) -> AuditEventActor:
     if request is None:
@@ -60,6 +78,43 @@ def _load_banking_snapshot(conn, transaction_id: int) -> dict | None:
     }
 
 
+def _fetch_transaction_page(
+    cur,
+    response: Response,
+    query: str,
+    params: list,
+    filters: dict,
+    limit: int,
+    offset: int,
+    page_cursor: str | None,
+    estimate_total: bool,
+) -> list:
+    """Run a filtered transaction listing one page at a time.
+
+    ``query`` ends in its WHERE clause. The next-page cursor and the
+    optional planner estimate go out as response headers so the list
+    body stays as older clients expect.
+    """
+    if estimate_total:
+        estimate = estimate_count(cur, query, params)
+        response.headers[ESTIMATE_HEADER] = str(estimate)
+    after_sql, after_params = _TRANSACTION_KEYSET.where(page_cursor, filters)
+    if after_sql:
+        query += f" AND {after_sql}"
+    query += (
+        f" ORDER BY {_TRANSACTION_KEYSET.order_by()} LIMIT %s OFFSET %s"
+    )
+    cur.execute(
+        query,
+        [*params, *after_params, limit + 1, 0 if page_cursor else offset],
+    )
+    rows, has_more = page_rows(cur.fetchall(), limit)
+    token = next_cursor(rows, has_more, 2, 0, filters)
+    if token:
+        response.headers[CURSOR_HEADER] = token
+    return rows
+
+
 class BankingTransactionResponse(BaseModel):
     transaction_id: int
     account_number: str
@@ -80,9 +135,16 @@ def get_banking_transactions(
     category: str | None = None,
     limit: int = 100,
     offset: int = 0,
+    page_cursor: str | None = Query(None, alias="cursor"),
+    estimate_total: bool = False,
+    response: Response = None,
+    conn=Depends(get_db),
 ):
-    """Get banking transactions with filters"""
-    conn = get_connection()
+    """Get banking transactions with filters.
+
+    Follow the ``X-Next-Cursor`` header with ``?cursor=`` for
+    constant-cost paging; ``offset`` is ignored then.
+    """
     cur = conn.cursor()
 
     query = """
@@ -114,16 +176,26 @@ def get_banking_transactions(
         query += " AND category = %s"
         params.append(category)
 
-    query += (
-        " ORDER BY transaction_date DESC, "
-        "transaction_id DESC LIMIT %s OFFSET %s"
+    filters = {
+        "account_number": account_number,
+        "start_date": start_date,
+        "end_date": end_date,
+        "category": category,
+    }
+    rows = _fetch_transaction_page(
+        cur,
+        response,
+        query,
+        params,
+        filters,
+        limit,
+        offset,
+        page_cursor,
+        estimate_total,
     )
-    params.extend([limit, offset])
-
-    cur.execute(query, params)
 
     transactions = []
-    for row in cur.fetchall():
+    for row in rows:
         transactions.append(
             {
                 "transaction_id": row[0],
@@ -139,7 +211,6 @@ def get_banking_transactions(
         )
 
     cur.close()
-    conn.close()
 
     return transactions
 
@@ -152,13 +223,19 @@ def search_banking_transactions(
     end_date: date | None = None,
     limit: int = 50,
     offset: int = 0,
+    page_cursor: str | None = Query(None, alias="cursor"),
+    estimate_total: bool = False,
+    response: Response = None,
+    conn=Depends(get_db),
 ):
-    """Search banking transactions by amount and/or vendor."""
+    """Search banking transactions by amount and/or vendor.
+
+    Paged like :func:`get_banking_transactions`.
+    """
     vendor = (vendor or "").strip()
     if amount is None and not vendor:
         raise HTTPException(status_code=400, detail="Provide amount or vendor")
 
-    conn = get_connection()
     cur = conn.cursor()
 
     query = """
@@ -180,11 +257,8 @@ def search_banking_transactions(
     params = []
 
     if amount is not None:
-        query += (
-            " AND (ABS(debit_amount - %s) < 0.01 "
-            "OR ABS(credit_amount - %s) < 0.01)"
-        )
-        params.extend([amount, amount])
+        query += " AND " + amount_match_sql("debit_amount", "credit_amount")
+        params.extend([to_cents(amount)] * 2)
 
     if vendor:
         query += " AND (description ILIKE %s OR vendor_extracted ILIKE %s)"
@@ -197,16 +271,26 @@ def search_banking_transactions(
         query += " AND transaction_date <= %s"
         params.append(end_date)
 
-    query += (
-        " ORDER BY transaction_date DESC, "
-        "transaction_id DESC LIMIT %s OFFSET %s"
+    filters = {
+        "amount": amount,
+        "vendor": vendor,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    rows = _fetch_transaction_page(
+        cur,
+        response,
+        query,
+        params,
+        filters,
+        limit,
+        offset,
+        page_cursor,
+        estimate_total,
     )
-    params.extend([limit, offset])
-
-    cur.execute(query, params)
 
     transactions = []
-    for row in cur.fetchall():
+    for row in rows:
         transactions.append(
             {
                 "transaction_id": row[0],
@@ -224,15 +308,13 @@ def search_banking_transactions(
         )
 
     cur.close()
-    conn.close()
 
     return transactions
 
 
 @router.get("/accounts")
-def get_bank_accounts():
+def get_bank_accounts(conn=Depends(get_db)):
     """Get list of bank accounts"""
-    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
@@ -257,7 +339,6 @@ def get_bank_accounts():
         )
 
     cur.close()
-    conn.close()
 
     return accounts
 
@@ -267,16 +348,15 @@ def categorize_transaction(
     transaction_id: int,
     category: str,
     request: Request,
+    conn=Depends(get_db),
 ):
     """Categorize a banking transaction"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
         before_snapshot = _load_banking_snapshot(conn, transaction_id)
         if before_snapshot is None:
             cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404, detail="Transaction not found"
             )
@@ -293,7 +373,6 @@ def categorize_transaction(
         if cur.rowcount == 0:
             conn.rollback()
             cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404, detail="Transaction not found"
             )
@@ -321,7 +400,6 @@ def categorize_transaction(
 
         conn.commit()
         cur.close()
-        conn.close()
 
         return {"message": "Transaction categorized successfully"}
 
@@ -330,7 +408,6 @@ def categorize_transaction(
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to categorize: {e!s}"
         )
@@ -347,16 +424,15 @@ def update_banking_transaction(
     transaction_id: int,
     update: BankingTransactionUpdate,
     request: Request,
+    conn=Depends(get_db),
 ):
     """Update a banking transaction (description, category, verified status)"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
         before_snapshot = _load_banking_snapshot(conn, transaction_id)
         if before_snapshot is None:
             cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404, detail="Transaction not found"
             )
@@ -392,7 +468,6 @@ def update_banking_transaction(
         if cur.rowcount == 0:
             conn.rollback()
             cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404, detail="Transaction not found"
             )
@@ -434,7 +509,6 @@ def update_banking_transaction(
         )
         row = cur.fetchone()
         cur.close()
-        conn.close()
 
         return {
             "message": "Transaction updated successfully",
@@ -456,16 +530,14 @@ def update_banking_transaction(
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to update transaction: {e!s}"
         )
 
 
 @router.get("/reconciliation/status")
-def get_reconciliation_status():
+def get_reconciliation_status(conn=Depends(get_db)):
     """Get banking reconciliation status"""
-    conn = get_connection()
     cur = conn.cursor()
 
     # Get unmatched credits (deposits not linked to payments)
@@ -510,7 +582,6 @@ def get_reconciliation_status():
     expense_match = cur.fetchone()
 
     cur.close()
-    conn.close()
 
     return {
         "deposits": {
@@ -1,12 +1,12 @@
 import contextlib
 from datetime import date, timedelta
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel, Field
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/banking", tags=["banking-allocations"])
 
@@ -40,8 +40,7 @@ class AllocationRequest(BaseModel):
 
 
 @router.get("/{transaction_id}/allocations/preview")
-def preview_allocations(transaction_id: int):
-    conn = get_connection()
+def preview_allocations(transaction_id: int, conn=Depends(get_db)):
     try:
         cur = conn.cursor()
         cur.execute(
@@ -79,7 +78,7 @@ def preview_allocations(transaction_id: int):
         }
     finally:
         with contextlib.suppress(Exception):
-            conn.close()
+            pass
 
 
 @router.post("/{transaction_id}/allocate")
@@ -87,8 +86,8 @@ def allocate_banking_to_receipts(
     transaction_id: int,
     req: AllocationRequest,
     request: Request,
+    conn=Depends(get_db),
 ):
-    conn = get_connection()
     try:
         cur = conn.cursor()
 
@@ -203,4 +202,4 @@ def allocate_banking_to_receipts(
         return {"status": "error", "error": str(e)}
     finally:
         with contextlib.suppress(Exception):
-            conn.close()
+            pass
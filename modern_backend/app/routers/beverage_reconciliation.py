@@ -5,7 +5,8 @@ from pydantic import BaseModel, Field
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
+from ..schema_migrations import ensure_schema
 
 router = APIRouter(prefix="/api/beverage", tags=["beverage-reconciliation"])
 
@@ -18,28 +19,6 @@ class BeverageReconciliationUpsert(BaseModel):
     notes: str | None = Field(default=None, max_length=1000)
 
 
-def _ensure_table(conn):
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS beverage_reconciliations (
-                id SERIAL PRIMARY KEY,
-                reconciliation_date DATE NOT NULL,
-                period TEXT NOT NULL,
-                expected_count INTEGER NOT NULL,
-                actual_count INTEGER NOT NULL,
-                notes TEXT,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
-            )
-            """
-        )
-        conn.commit()
-    finally:
-        cur.close()
-
-
 def _status_from_variance(variance: int) -> str:
     if variance == 0:
         return "reconciled"
@@ -60,9 +39,9 @@ def _audit_actor(request: Request) -> AuditEventActor:
 def list_reconciliations(
     date: str | None = Query(default=None),
     status: str | None = Query(default=None),
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         sql = """
@@ -106,9 +85,9 @@ def list_reconciliations(
 def create_reconciliation(
     payload: BeverageReconciliationUpsert,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         ensure_audit_storage(conn)
@@ -166,9 +145,9 @@ def update_reconciliation(
     reconciliation_id: int,
     payload: BeverageReconciliationUpsert,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         ensure_audit_storage(conn)
@@ -6,7 +6,9 @@ from pydantic import BaseModel, Field
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
+from ..schema_catalog import schema_catalog
+from ..schema_migrations import ensure_schema
 
 router = APIRouter(prefix="/api/cash-box", tags=["cash-box"])
 
@@ -70,92 +72,6 @@ class CashBoxTxnUpsert(BaseModel):
     notes: str | None = Field(default=None, max_length=1000)
 
 
-def _ensure_table(conn):
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS cash_box_transactions (
-                id SERIAL PRIMARY KEY,
-                transaction_date DATE NOT NULL,
-                txn_type TEXT NOT NULL,
-                description TEXT NOT NULL,
-                amount NUMERIC(12,2) NOT NULL,
-                reference TEXT,
-                notes TEXT,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
-            )
-            """
-        )
-
-        # Schema drift guard: normalize legacy table variants.
-        cur.execute(
-            """
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'public' AND table_name = 'cash_box_transactions'
-            """
-        )
-        cols = {r[0] for r in cur.fetchall()}
-
-        if "id" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN id BIGSERIAL")
-        if "transaction_date" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN transaction_date DATE")
-            if "date" in cols:
-                cur.execute(
-                    "UPDATE cash_box_transactions SET transaction_date = date WHERE transaction_date IS NULL"
-                )
-        if "txn_type" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN txn_type TEXT")
-            if "type" in cols:
-                cur.execute(
-                    "UPDATE cash_box_transactions SET txn_type = type WHERE txn_type IS NULL"
-                )
-            if "transaction_type" in cols:
-                cur.execute(
-                    "UPDATE cash_box_transactions SET txn_type = transaction_type WHERE txn_type IS NULL"
-                )
-        if "transaction_type" in cols and "txn_type" in cols:
-            cur.execute(
-                "UPDATE cash_box_transactions SET transaction_type = COALESCE(transaction_type, txn_type)"
-            )
-        if "description" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN description TEXT")
-        if "amount" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN amount NUMERIC(12,2) DEFAULT 0")
-        if "reference" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN reference TEXT")
-        if "notes" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN notes TEXT")
-        if "updated_at" not in cols:
-            cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT NOW()")
-
-        conn.commit()
-    finally:
-        cur.close()
-
-
-def _has_column(conn, table_name: str, column_name: str) -> bool:
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            SELECT 1
-            FROM information_schema.columns
-            WHERE table_schema = 'public'
-              AND table_name = %s
-              AND column_name = %s
-            LIMIT 1
-            """,
-            (table_name, column_name),
-        )
-        return cur.fetchone() is not None
-    finally:
-        cur.close()
-
-
 def _resolve_legacy_transaction_type(conn, txn_type: str) -> str:
     """Map canonical cash_in/cash_out to legacy transaction_type enums."""
     default_map = {
@@ -197,9 +113,9 @@ def _resolve_legacy_transaction_type(conn, txn_type: str) -> str:
 def list_transactions(
     date: str | None = Query(default=None),
     type: str | None = Query(default=None),
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         sql = """
@@ -259,12 +175,12 @@ def list_transactions(
 def create_transaction(
     payload: CashBoxTxnUpsert,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
-        use_transaction_type = _has_column(conn, "cash_box_transactions", "transaction_type")
+        use_transaction_type = schema_catalog.has_column(conn, "cash_box_transactions", "transaction_type")
         cols = ["transaction_date", "txn_type", "description", "amount", "reference", "notes"]
         values = [
             payload.date,
@@ -320,16 +236,16 @@ def update_transaction(
     txn_id: int,
     payload: CashBoxTxnUpsert,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         before_snapshot = _load_cash_box_snapshot(conn, txn_id)
         if not before_snapshot:
             raise HTTPException(status_code=404, detail="transaction_not_found")
 
-        use_transaction_type = _has_column(conn, "cash_box_transactions", "transaction_type")
+        use_transaction_type = schema_catalog.has_column(conn, "cash_box_transactions", "transaction_type")
         assignments = [
             "transaction_date = %s",
             "txn_type = %s",
@@ -396,9 +312,9 @@ def update_transaction(
 def delete_transaction(
     txn_id: int,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         before_snapshot = _load_cash_box_snapshot(conn, txn_id)
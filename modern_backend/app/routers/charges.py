@@ -1,12 +1,12 @@
 from datetime import date, timedelta
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import cursor, get_connection
+from ..db import cursor, get_db
 
 router = APIRouter(prefix="/api", tags=["charges"])
 
@@ -220,11 +220,11 @@ def get_charge_catalog(
         None,
         description="Filter by type: base_rate, airport_fee, additional, gst",
     ),
+    conn=Depends(get_db),
 ):
     """Get catalog of available charge line items for selection in booking"
     "form."""
 
-    conn = get_connection()
     cur = conn.cursor()
     try:
         where_clauses = []
@@ -272,15 +272,13 @@ def get_charge_catalog(
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/charges/by-reserve/{reserve_number}")
-def get_charges_by_reserve(reserve_number: str):
+def get_charges_by_reserve(reserve_number: str, conn=Depends(get_db)):
     """Get all charge line items for a booking by reserve_number (business"
     "key)."""
 
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute(
@@ -322,4 +320,3 @@ def get_charges_by_reserve(reserve_number: str):
         )
     finally:
         cur.close()
-        conn.close()
@@ -11,20 +11,19 @@ Returns complete charter sheet with:
 - Balance calculation
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api", tags=["charter-sheet"])
 
 
 @router.get("/charter-sheet/{reserve_number}")
-def get_charter_sheet(reserve_number: str):
+def get_charter_sheet(reserve_number: str, conn=Depends(get_db)):
     """
     Get complete charter sheet for driver/customer printout.
     Matches LMS reservation sheet format.
     """
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -212,4 +211,3 @@ def get_charter_sheet(reserve_number: str):
         )
     finally:
         cur.close()
-        conn.close()
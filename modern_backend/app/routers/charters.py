@@ -2,20 +2,39 @@ from contextlib import contextmanager
 from datetime import date, timedelta
 from typing import Any
 
-from fastapi import APIRouter, Body, HTTPException, Path, Query, Request
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+)
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection, return_connection
+from ..db import get_connection, get_db, return_connection
 from ..models.charter_routes import (
     CharterRoute,
     CharterRouteCreate,
     CharterRouteUpdate,
     CharterWithRoutes,
 )
+from ..pagination import (
+    CURSOR_HEADER,
+    ESTIMATE_HEADER,
+    Keyset,
+    estimate_count,
+    next_cursor,
+    page_rows,
+)
 
 router = APIRouter(prefix="/api", tags=["charters"])
 
+_CHARTER_KEYSET = Keyset("c.charter_date", "c.charter_id")
+
 
 def _audit_actor(request: Request | None) -> AuditEventActor:
     if request is None:
@@ -80,7 +99,15 @@ def list_charters(
     ),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
+    page_cursor: str | None = Query(default=None, alias="cursor"),
+    estimate_total: bool = Query(default=False),
+    response: Response = None,
 ):
+    """List charters, newest first.
+
+    Follow the ``X-Next-Cursor`` header with ``?cursor=`` for
+    constant-cost paging; ``offset`` is ignored then.
+    """
     sql = """
         SELECT c.charter_id, c.charter_date, COALESCE(cl.client_name,
         c.client_id::text) AS client,
@@ -88,23 +115,44 @@ def list_charters(
         FROM charters c
         LEFT JOIN clients cl ON c.client_id = cl.client_id
         {where}
-        ORDER BY c.charter_date DESC, c.charter_id DESC
-        LIMIT %s OFFSET %s
         """
-    where = ""
+    conditions: list[str] = []
     params: list[Any] = []
     if q:
-        where = (
-            "WHERE (c.charter_id::text ILIKE %s"
+        conditions.append(
+            "(c.charter_id::text ILIKE %s"
             " OR COALESCE(cl.client_name,'') ILIKE %s)"
         )
         like = f"%{q}%"
         params.extend([like, like])
-    params.extend([limit, offset])
+    filters = {"q": q}
+    after_sql, after_params = _CHARTER_KEYSET.where(page_cursor, filters)
+    page_conditions = conditions + ([after_sql] if after_sql else [])
     with _db_cursor() as cur:
-        cur.execute(sql.format(where=where), params)
-        rows = cur.fetchall()
+        if estimate_total:
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            estimate = estimate_count(cur, sql.format(where=where), params)
+            response.headers[ESTIMATE_HEADER] = str(estimate)
+        where = (
+            f"WHERE {' AND '.join(page_conditions)}"
+            if page_conditions
+            else ""
+        )
+        cur.execute(
+            sql.format(where=where)
+            + f" ORDER BY {_CHARTER_KEYSET.order_by()} LIMIT %s OFFSET %s",
+            [
+                *params,
+                *after_params,
+                limit + 1,
+                0 if page_cursor else offset,
+            ],
+        )
+        rows, has_more = page_rows(cur.fetchall(), limit)
         cols = [d[0] for d in (cur.description or [])]
+    token = next_cursor(rows, has_more, 1, 0, filters)
+    if token:
+        response.headers[CURSOR_HEADER] = token
     return [dict(zip(cols, r, strict=False)) for r in rows]
 
 
@@ -145,9 +193,8 @@ def search_charters(
 
 
 @router.get("/charters/by-reserve/{reserve_number}")
-def get_charter_by_reserve(reserve_number: str):
+def get_charter_by_reserve(reserve_number: str, conn=Depends(get_db)):
     """Lookup charter by reserve number for receipt linking"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -177,7 +224,6 @@ def get_charter_by_reserve(reserve_number: str):
         }
     finally:
         cur.close()
-        return_connection(conn)
 
 
 @router.get("/charges/{reserve_number}")
@@ -10,9 +10,10 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 
-from ..audit.engine import ensure_audit_storage, record_audit_event
+from ..audit.engine import record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import AsyncConnection, get_async_connection
+from ..schema_migrations import ensure_schema_async
 
 router = APIRouter(
     prefix="/api/continuous-employment", tags=["continuous-employment"]
@@ -49,8 +50,8 @@ VALID_ROE_REASON_CODES = {
 ROE_NOT_FOUND = "ROE record not found"
 
 
-def _load_roe_row(cur, roe_id: int):
-    cur.execute(
+async def _load_roe_row(cur, roe_id: int):
+    await cur.execute(
         """
         SELECT
             id,
@@ -74,7 +75,7 @@ def _load_roe_row(cur, roe_id: int):
         """,
         (roe_id,),
     )
-    return cur.fetchone()
+    return await cur.fetchone()
 
 
 def _row_to_payload(row) -> dict:
@@ -216,34 +217,6 @@ def _validate_roe_payload(row) -> tuple[list[str], list[str], dict]:
     return errors, warnings, payload
 
 
-def _ensure_roe_columns(conn):
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            "ALTER TABLE employee_roe_records ADD COLUMN IF NOT EXISTS"
-            "reason_description TEXT"
-        )
-        cur.execute(
-            "ALTER TABLE employee_roe_records ADD COLUMN IF NOT EXISTS"
-            "roe_status TEXT DEFAULT 'draft'"
-        )
-        cur.execute(
-            "ALTER TABLE employee_roe_records ADD COLUMN IF NOT EXISTS"
-            "submitted_at TIMESTAMP"
-        )
-        cur.execute(
-            "ALTER TABLE employee_roe_records ADD COLUMN IF NOT EXISTS"
-            "submitted_by TEXT"
-        )
-        cur.execute(
-            "ALTER TABLE employee_roe_records ADD COLUMN IF NOT EXISTS"
-            "submission_reference TEXT"
-        )
-        conn.commit()
-    finally:
-        cur.close()
-
-
 def _service_actor() -> AuditEventActor:
     return AuditEventActor(
         actor_type="service",
@@ -254,11 +227,13 @@ def _service_actor() -> AuditEventActor:
 
 
 @router.get("/roe")
-async def list_roe_records(conn: Annotated[object, Depends(get_connection)]):
-    _ensure_roe_columns(conn)
+async def list_roe_records(
+    conn: Annotated[AsyncConnection, Depends(get_async_connection)],
+):
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute("""
+        await cur.execute("""
             SELECT
                 id AS roe_id,
                 roe_number,
@@ -277,7 +252,7 @@ async def list_roe_records(conn: Annotated[object, Depends(get_connection)]):
             FROM employee_roe_records
             ORDER BY created_at DESC, id DESC
             """)
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         out = []
         for r in rows:
             out.append(
@@ -307,12 +282,13 @@ async def list_roe_records(conn: Annotated[object, Depends(get_connection)]):
     "/roe/{roe_id}", responses={404: {"description": "ROE record not found"}}
 )
 async def get_roe_record(
-    roe_id: int, conn: Annotated[object, Depends(get_connection)]
+    roe_id: int,
+    conn: Annotated[AsyncConnection, Depends(get_async_connection)],
 ):
-    _ensure_roe_columns(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT
                 id,
@@ -336,7 +312,7 @@ async def get_roe_record(
             """,
             (roe_id,),
         )
-        row = cur.fetchone()
+        row = await cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail=ROE_NOT_FOUND)
         return {
@@ -366,15 +342,16 @@ async def get_roe_record(
     responses={404: {"description": "ROE record not found"}},
 )
 async def get_roe_readiness(
-    roe_id: int, conn: Annotated[object, Depends(get_connection)]
+    roe_id: int,
+    conn: Annotated[AsyncConnection, Depends(get_async_connection)],
 ):
     """Return strict ROE readiness status and actionable validation"
     "messages."""
 
-    _ensure_roe_columns(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        row = _load_roe_row(cur, roe_id)
+        row = await _load_roe_row(cur, roe_id)
         if not row:
             raise HTTPException(status_code=404, detail=ROE_NOT_FOUND)
 
@@ -395,15 +372,16 @@ async def get_roe_readiness(
     responses={404: {"description": "ROE record not found"}},
 )
 async def export_roe_submission_package(
-    roe_id: int, conn: Annotated[object, Depends(get_connection)]
+    roe_id: int,
+    conn: Annotated[AsyncConnection, Depends(get_async_connection)],
 ):
     """Export an ROE submission package payload for downstream ROE Web filing"
     "workflows."""
 
-    _ensure_roe_columns(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        row = _load_roe_row(cur, roe_id)
+        row = await _load_roe_row(cur, roe_id)
         if not row:
             raise HTTPException(status_code=404, detail=ROE_NOT_FOUND)
 
@@ -438,24 +416,24 @@ async def export_roe_submission_package(
     },
 )
 async def create_roe_record(
-    payload: ROECreateRequest, conn: Annotated[object, Depends(get_connection)]
+    payload: ROECreateRequest,
+    conn: Annotated[AsyncConnection, Depends(get_async_connection)],
 ):
-    _ensure_roe_columns(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        ensure_audit_storage(conn)
-        cur.execute(
+        await cur.execute(
             "SELECT full_name FROM employees WHERE employee_id = %s",
             (payload.employee_id,),
         )
-        emp = cur.fetchone()
+        emp = await cur.fetchone()
         if not emp:
             raise HTTPException(status_code=404, detail="Employee not found")
 
         employee_name = emp[0] or f"EMPLOYEE {payload.employee_id}"
 
         # Use payroll aggregates when available.
-        cur.execute(
+        await cur.execute(
             """
             SELECT
                 COALESCE(SUM(COALESCE(gross_pay, 0)), 0),
@@ -467,11 +445,11 @@ async def create_roe_record(
             """,
             (payload.employee_id, payload.termination_date.year),
         )
-        sums = cur.fetchone() or (0, 0)
+        sums = await cur.fetchone() or (0, 0)
         insurable_earnings = float(sums[0] or 0)
         insurable_hours = float(sums[1] or 0)
 
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO employee_roe_records (
                 employee_id, employee_name, termination_date, last_day_worked,
@@ -499,16 +477,16 @@ async def create_roe_record(
                 "completed",
             ),
         )
-        roe_id = int(cur.fetchone()[0])
+        roe_id = int((await cur.fetchone())[0])
         roe_number = f"ROE-{payload.termination_date.year}-{roe_id:06d}"
 
-        cur.execute(
+        await cur.execute(
             "UPDATE employee_roe_records SET roe_number = %s WHERE id = %s",
             (roe_number, roe_id),
         )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="continuous_employment",
                 entity_type="roe_record",
@@ -531,7 +509,7 @@ async def create_roe_record(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -540,10 +518,10 @@ async def create_roe_record(
             "employee_name": employee_name,
         }
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as exc:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to create ROE: {exc}"
         )
@@ -562,13 +540,12 @@ async def create_roe_record(
 async def submit_roe_record(
     roe_id: int,
     payload: ROESubmitRequest,
-    conn: Annotated[object, Depends(get_connection)],
+    conn: Annotated[AsyncConnection, Depends(get_async_connection)],
 ):
-    _ensure_roe_columns(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        ensure_audit_storage(conn)
-        row = _load_roe_row(cur, roe_id)
+        row = await _load_roe_row(cur, roe_id)
         if not row:
             raise HTTPException(status_code=404, detail=ROE_NOT_FOUND)
 
@@ -589,7 +566,7 @@ async def submit_roe_record(
         extra_notes = (payload.notes or "").strip()
 
         if extra_notes:
-            cur.execute(
+            await cur.execute(
                 """
                 UPDATE employee_roe_records
                 SET roe_status = 'submitted',
@@ -607,7 +584,7 @@ async def submit_roe_record(
                 ),
             )
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 UPDATE employee_roe_records
                 SET roe_status = 'submitted',
@@ -619,8 +596,8 @@ async def submit_roe_record(
                 ((payload.submitted_by or "web_app").strip(), sub_ref, roe_id),
             )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="continuous_employment",
                 entity_type="roe_record",
@@ -642,7 +619,7 @@ async def submit_roe_record(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
         return {
             "success": True,
             "roe_id": roe_id,
@@ -650,10 +627,10 @@ async def submit_roe_record(
             "message": "ROE marked as submitted with audit metadata.",
         }
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as exc:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to submit ROE: {exc}"
         )
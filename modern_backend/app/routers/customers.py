@@ -4,11 +4,11 @@
 from datetime import date, timedelta
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api/customers", tags=["customers"])
 
@@ -56,6 +56,7 @@ def _fetch_client_snapshot(cur, client_id: int) -> dict[str, Any] | None:
 def search_customers(
     q: str = Query("", description="Search term (name or phone)"),
     limit: int = Query(10, ge=1, le=100),
+    conn=Depends(get_db),
 ):
     """Search customers by name or phone for autocomplete.
 
@@ -63,7 +64,6 @@ def search_customers(
     returning fields needed by the LMS booking form.
     """
     q = (q or "").strip()
-    conn = get_connection()
     cur = conn.cursor()
     try:
         if not q:
@@ -97,18 +97,16 @@ def search_customers(
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/")
-def list_all_customers():
+def list_all_customers(conn=Depends(get_db)):
     """List all customers/clients for Customer Management view.
 
     Returns fields:
     - client_id, client_name, client_type, phone, email, company_name
     - is_gst_exempt, last_booking_date
     """
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute("""
@@ -149,11 +147,14 @@ def list_all_customers():
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/")
-def upsert_customer(payload: dict[str, Any], request: Request):
+def upsert_customer(
+    payload: dict[str, Any],
+    request: Request,
+    conn=Depends(get_db),
+):
     """Create a new customer or update an existing one."""
     client_name = (payload.get("client_name") or "").strip()
     if not client_name:
@@ -165,7 +166,6 @@ def upsert_customer(payload: dict[str, Any], request: Request):
     company_name = (payload.get("company_name") or "").strip()
     is_gst_exempt = bool(payload.get("is_gst_exempt", False))
 
-    conn = get_connection()
     cur = conn.cursor()
     try:
         ensure_audit_storage(conn)
@@ -270,4 +270,3 @@ def upsert_customer(payload: dict[str, Any], request: Request):
         )
     finally:
         cur.close()
-        conn.close()
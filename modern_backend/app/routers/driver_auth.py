@@ -5,25 +5,22 @@ Serves login page and handles login for all user types
 Last updated: 2026-02-07 - Added auto-login support for local development
 """
 
+import asyncio
 import os
-import secrets
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Form, HTTPException, Request, Response
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from pydantic import BaseModel
 
-from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..audit.writer import audit_writer
+from ..db import pooled_connection
+from ..login_guard import LoginBusy, check_password, login_throttle
+from ..sessions import SESSION_TIMEOUT, session_store
 
 router = APIRouter(prefix="/auth", tags=["user_auth"])
 
-# Simple in-memory session store (in production, use Redis)
-SESSIONS = {}
-SESSION_TIMEOUT = 30 * 60  # 30 minutes
-
-
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -34,71 +31,68 @@ def verify_user_credentials(username: str, password: str) -> dict:
     try:
         import bcrypt
 
-        conn = get_connection()
-        cur = conn.cursor()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
 
-        # Check users table first (for authenticated access)
-        cur.execute(
-            """
+            # Check users table first (for authenticated access)
+            cur.execute(
+                """
             SELECT user_id, username, email, role, password_hash, permissions,
             status
             FROM users 
             WHERE username = %s
             LIMIT 1
         """,
-            (username,),
-        )
+                (username,),
+            )
 
-        user = cur.fetchone()
-
-        if user:
-            user_id, uname, _email, role, pwd_hash, perms, status = user
-
-            # Check status
-            if status and status.lower() != "active":
-                cur.close()
-                conn.close()
-                return None
-
-            # Verify password with bcrypt
-            if pwd_hash:
-                try:
-                    # Ensure hash is bytes
-                    hash_bytes = (
-                        pwd_hash.encode("utf-8")
-                        if isinstance(pwd_hash, str)
-                        else pwd_hash
-                    )
-                    pwd_bytes = password.encode("utf-8")
-                    if bcrypt.checkpw(pwd_bytes, hash_bytes):
-                        # Parse permissions
-                        import json
-
-                        permissions = {}
-                        if perms:
-                            try:
-                                permissions = (
-                                    json.loads(perms)
-                                    if isinstance(perms, str)
-                                    else perms
-                                )
-                            except Exception:
-                                permissions = {}
-
-                        cur.close()
-                        conn.close()
-                        return {
-                            "employee_id": user_id,
-                            "name": uname,
-                            "role": role or "user",
-                            "permissions": permissions,
-                        }
-                except Exception as pwd_err:
-                    print(f"Password verification error: {pwd_err}")
-                    pass
-
-        cur.close()
-        conn.close()
+            user = cur.fetchone()
+
+            if user:
+                user_id, uname, _email, role, pwd_hash, perms, status = user
+
+                # Check status
+                if status and status.lower() != "active":
+                    cur.close()
+                    return None
+
+                # Verify password with bcrypt
+                if pwd_hash:
+                    try:
+                        # Ensure hash is bytes
+                        hash_bytes = (
+                            pwd_hash.encode("utf-8")
+                            if isinstance(pwd_hash, str)
+                            else pwd_hash
+                        )
+                        pwd_bytes = password.encode("utf-8")
+                        if bcrypt.checkpw(pwd_bytes, hash_bytes):
+                            # Parse permissions
+                            import json
+
+                            permissions = {}
+                            if perms:
+                                try:
+                                    permissions = (
+                                        json.loads(perms)
+                                        if isinstance(perms, str)
+                                        else perms
+                                    )
+                                except Exception:
+                                    permissions = {}
+
+                            cur.close()
+                            return {
+                                "employee_id": user_id,
+                                "name": uname,
+                                "role": role or "user",
+                                "permissions": permissions,
+                            }
+                    except Exception as pwd_err:
+                        print(f"Password verification error: {pwd_err}")
+                        pass
+
+            cur.close()
         return None
     except Exception as e:
         print(f"Auth error: {e}")
@@ -113,37 +107,22 @@ def create_session(
     username: str | None = None,
 ) -> str:
     """Create a session token"""
-    token = secrets.token_urlsafe(32)
-    SESSIONS[token] = {
-        "employee_id": employee_id,
-        "name": employee_name,
-        "username": username or employee_name,
-        "role": role,
-        "permissions": permissions or {},
-        "created_at": datetime.now(),
-        "expires_at": datetime.now() + timedelta(seconds=SESSION_TIMEOUT),
-    }
-    return token
+    return session_store.create(
+        employee_id,
+        employee_name,
+        role=role,
+        permissions=permissions,
+        username=username,
+    )
 
 
 def get_session(token: str) -> dict:
-    """Retrieve session if valid"""
-    if token not in SESSIONS:
-        return None
-
-    session = SESSIONS[token]
-    if datetime.now() > session["expires_at"]:
-        del SESSIONS[token]
-        return None
-
-    # Sliding expiration for active sessions.
-    session["expires_at"] = datetime.now() + timedelta(seconds=SESSION_TIMEOUT)
-    return session
+    """Retrieve session if valid (sliding expiration)"""
+    return session_store.get(token)
 
 
 def revoke_session(token: str | None) -> None:
-    if token and token in SESSIONS:
-        del SESSIONS[token]
+    session_store.revoke(token)
 
 
 def parse_bearer_token(authorization: str | None) -> str | None:
@@ -164,11 +143,8 @@ def _record_auth_event(
     request: Request | None = None,
     note: str | None = None,
 ) -> None:
-    """Best-effort auth audit event write without blocking login flow."""
-    conn = None
+    """Queue an auth audit event; never waits on the database."""
     try:
-        conn = get_connection()
-        ensure_audit_storage(conn)
         actor = AuditEventActor(
             actor_type="user" if username else "service",
             user_id=str(user_id) if user_id is not None else None,
@@ -176,8 +152,7 @@ def _record_auth_event(
             role=role,
         )
         corr = request.headers.get("X-Request-ID") if request else None
-        record_audit_event(
-            conn,
+        audit_writer.submit(
             AuditEvent(
                 module="driver_auth",
                 entity_type="session",
@@ -191,26 +166,80 @@ def _record_auth_event(
                 evidence_links=[],
                 retention_until=datetime(datetime.now().year + 6, 12, 31).date(),
                 note=note,
-            ),
-            ensure_storage=False,
-            commit=True,
+            )
         )
     except Exception:
         # Auth should continue even if audit storage is temporarily unavailable.
         pass
-    finally:
-        if conn is not None:
-            conn.close()
+
+
+async def _authenticate(
+    username: str, password: str, request: Request | None, note: str
+) -> dict:
+    """Check credentials off the event loop, enforcing the lockout."""
+    locked_until = await asyncio.to_thread(
+        login_throttle.locked_until, username
+    )
+    if locked_until is not None:
+        _record_auth_event(
+            action="login_locked",
+            username=username,
+            user_id=None,
+            role=None,
+            request=request,
+            note="Too many failed attempts",
+        )
+        remaining = locked_until - datetime.now(timezone.utc)
+        retry_after = max(1, int(remaining.total_seconds()))
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed login attempts; try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    try:
+        user = await check_password(
+            verify_user_credentials, username, password
+        )
+    except LoginBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Login service busy; try again shortly",
+            headers={"Retry-After": "1"},
+        ) from None
+
+    if not user:
+        await asyncio.to_thread(login_throttle.record_failure, username)
+        _record_auth_event(
+            action="login_failed",
+            username=username,
+            user_id=None,
+            role=None,
+            request=request,
+            note="Invalid credentials",
+        )
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    await asyncio.to_thread(login_throttle.record_success, username)
+    _record_auth_event(
+        action="login_succeeded",
+        username=username,
+        user_id=user.get("employee_id"),
+        role=user.get("role", "user"),
+        request=request,
+        note=note,
+    )
+    return user
 
 
 def get_driver_trips(employee_id: int) -> list:
     """Fetch today's trips for driver"""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
 
-        cur.execute(
-            """
+            cur.execute(
+                """
             SELECT 
                 charter_id,
                 reserve_number,
@@ -225,26 +254,25 @@ def get_driver_trips(employee_id: int) -> list:
               AND DATE(scheduled_date) = CURRENT_DATE
             ORDER BY scheduled_time ASC
         """,
-            (employee_id,),
-        )
-
-        trips = []
-        for row in cur.fetchall():
-            trips.append(
-                {
-                    "charter_id": row[0],
-                    "reserve_number": row[1],
-                    "pickup": row[2],
-                    "dropoff": row[3],
-                    "date": str(row[4]),
-                    "time": str(row[5]),
-                    "passenger": row[6],
-                    "status": row[7],
-                }
+                (employee_id,),
             )
 
-        cur.close()
-        conn.close()
+            trips = []
+            for row in cur.fetchall():
+                trips.append(
+                    {
+                        "charter_id": row[0],
+                        "reserve_number": row[1],
+                        "pickup": row[2],
+                        "dropoff": row[3],
+                        "date": str(row[4]),
+                        "time": str(row[5]),
+                        "passenger": row[6],
+                        "status": row[7],
+                    }
+                )
+
+            cur.close()
         return trips
     except Exception as e:
         print(f"Error fetching trips: {e}")
@@ -406,23 +434,15 @@ async def auto_login_check():
 
 @router.post("/login-submit")
 async def login_submit(
+    request: Request,
     username: str = Form(...),
     password: str = Form(...),
     response: Response = None,
 ):
     """Handle login form submission (HTML form)"""
-    user = verify_user_credentials(username, password)
-    if not user:
-        _record_auth_event(
-            action="login_failed",
-            username=username,
-            user_id=None,
-            role=None,
-            request=request,
-            note="Invalid credentials",
-        )
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    session_token = create_session(
+    user = await _authenticate(username, password, request, "HTML login")
+    session_token = await asyncio.to_thread(
+        create_session,
         user["employee_id"],
         user["name"],
         role=user.get("role", "user"),
@@ -432,19 +452,11 @@ async def login_submit(
     response.set_cookie(
         key="session_token",
         value=session_token,
-        max_age=30 * 60,
+        max_age=SESSION_TIMEOUT,
         httponly=True,
         secure=True,
         samesite="lax",
     )
-    _record_auth_event(
-        action="login_succeeded",
-        username=username,
-        user_id=user.get("employee_id"),
-        role=user.get("role", "user"),
-        request=request,
-        note="HTML login",
-    )
     return {"status": "success", "redirect": "/auth/dashboard"}
 
 
@@ -452,44 +464,23 @@ async def login_submit(
 async def login_json(login_request: LoginRequest, request: Request):
     """Handle JSON login (for Vue frontend)"""
     print(f"[LOGIN] Attempting login for username: {login_request.username}")
-    user = verify_user_credentials(
-        login_request.username, login_request.password
+    user = await _authenticate(
+        login_request.username, login_request.password, request, "JSON login"
     )
-    if not user:
-        print(
-            f"[LOGIN] Failed - invalid credentials for"
-            f"{login_request.username}"
-        )
-        _record_auth_event(
-            action="login_failed",
-            username=login_request.username,
-            user_id=None,
-            role=None,
-            request=request,
-            note="Invalid credentials",
-        )
-        raise HTTPException(status_code=401, detail="Invalid credentials")
 
     print(
         f"[LOGIN] Success - authenticated {login_request.username} as"
         f"{user.get('role')}"
     )
     # Create session token
-    session_token = create_session(
+    session_token = await asyncio.to_thread(
+        create_session,
         user["employee_id"],
         user["name"],
         role=user.get("role", "user"),
         permissions=user.get("permissions", {}),
         username=login_request.username,
     )
-    _record_auth_event(
-        action="login_succeeded",
-        username=login_request.username,
-        user_id=user.get("employee_id"),
-        role=user.get("role", "user"),
-        request=request,
-        note="JSON login",
-    )
 
     # Return JWT-style response for frontend
     return {
@@ -511,7 +502,7 @@ async def validate_token(request: Request):
     """Validate bearer token for SPA route/API guards."""
     authorization = request.headers.get("Authorization")
     token = parse_bearer_token(authorization)
-    session = get_session(token) if token else None
+    session = await session_store.get_async(token)
     if not session:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
@@ -532,7 +523,7 @@ async def validate_token(request: Request):
 async def dashboard(request: Request):
     """User dashboard - shows different content based on role"""
     session_token = request.cookies.get("session_token")
-    session = get_session(session_token)
+    session = await session_store.get_async(session_token)
     if not session:
         return RedirectResponse(url="/login", status_code=302)
 
@@ -540,15 +531,14 @@ async def dashboard(request: Request):
     user_name = session["name"]
 
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT role FROM employees WHERE employee_id = %s", (employee_id,)
-        )
-        role_row = cur.fetchone()
-        user_role = role_row[0] if role_row else "user"
-        cur.close()
-        conn.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT role FROM employees WHERE employee_id = %s", (employee_id,)
+            )
+            role_row = cur.fetchone()
+            user_role = role_row[0] if role_row else "user"
+            cur.close()
     except Exception:
         user_role = "user"
 
@@ -577,8 +567,8 @@ async def logout_json(request: Request):
     """API logout for SPA clients using bearer token."""
     authorization = request.headers.get("Authorization")
     token = parse_bearer_token(authorization)
-    session = get_session(token) if token else None
-    revoke_session(token)
+    session = await session_store.get_async(token)
+    await asyncio.to_thread(revoke_session, token)
     _record_auth_event(
         action="logout",
         username=(session or {}).get("username"),
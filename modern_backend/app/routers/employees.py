@@ -5,11 +5,11 @@ import shutil
 from datetime import date
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api/employees", tags=["employees"])
 
@@ -50,7 +50,7 @@ def _audit_actor(request: Request) -> AuditEventActor:
 
 
 @router.get("/")
-def list_employees():
+def list_employees(conn=Depends(get_db)):
     """Return active employees (drivers and staff) with basic info.
 
     Fields returned:
@@ -60,7 +60,6 @@ def list_employees():
     - display (first + last name)
     - employee_type (driver, staff, etc)
     """
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute("""
@@ -95,16 +94,14 @@ def list_employees():
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/drivers")
-def list_drivers():
+def list_drivers(conn=Depends(get_db)):
     """Return active drivers only for assignment dropdown.
 
     Filters employees where employee_type indicates driver.
     """
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute("""
@@ -139,13 +136,11 @@ def list_drivers():
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/{employee_id}")
-def get_employee(employee_id: int):
+def get_employee(employee_id: int, conn=Depends(get_db)):
     """Get specific employee details"""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute(
@@ -186,13 +181,15 @@ def get_employee(employee_id: int):
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/")
-def create_employee(employee_data: dict, request: Request):
+def create_employee(
+    employee_data: dict,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Create or update employee and auto-create file storage folder."""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         ensure_audit_storage(conn)
@@ -346,4 +343,3 @@ def create_employee(employee_data: dict, request: Request):
         )
     finally:
         cur.close()
-        conn.close()
@@ -6,7 +6,7 @@ eHOS compliance: Inspection forms with digital signatures and timestamps
 import hashlib
 import hmac
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 import jwt
@@ -17,7 +17,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import pooled_connection
 from ..services.inspection_pdf import generate_pre_trip_pdf
 
 router = APIRouter(prefix="/api/inspection-forms", tags=["inspection-forms"])
@@ -88,29 +88,28 @@ def verify_signature(
 def check_authorization(user_id: int, user_role: str, charter_id: int) -> None:
     """Verify user has permission to access this charter's inspection form"""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # Allow: charter driver, dispatch staff, admins
-        if user_role not in ["admin", "dispatch", "dispatcher"]:
-            # Regular users can only access their own charters
-            cur.execute(
-                """
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+
+            # Allow: charter driver, dispatch staff, admins
+            if user_role not in ["admin", "dispatch", "dispatcher"]:
+                # Regular users can only access their own charters
+                cur.execute(
+                    """
                 SELECT employee_id FROM charters
                 WHERE charter_id = %s
             """,
-                (charter_id,),
-            )
-
-            result = cur.fetchone()
-            if not result or result[0] != user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Not authorized to view this inspection form",
+                    (charter_id,),
                 )
 
-        cur.close()
-        conn.close()
+                result = cur.fetchone()
+                if not result or result[0] != user_id:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="Not authorized to view this inspection form",
+                    )
+
+            cur.close()
     except HTTPException:
         raise
     except Exception:
@@ -125,21 +124,20 @@ def audit_log_access(
 ) -> None:
     """Log file access for compliance audit trail"""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
 
-        cur.execute(
-            """
+            cur.execute(
+                """
             INSERT INTO audit_logs (user_id, action, charter_id, ip_address,
             timestamp)
             VALUES (%s, %s, %s, %s, NOW())
         """,
-            (user_id, action, charter_id, ip_address),
-        )
+                (user_id, action, charter_id, ip_address),
+            )
 
-        conn.commit()
-        cur.close()
-        conn.close()
+            conn.commit()
+            cur.close()
     except Exception as e:
         # Non-critical: log but don't fail
         print(f"Audit log error: {e}")
@@ -171,7 +169,7 @@ async def download_pre_trip_blank() -> FastAPIResponse:
 
 
 @router.post("/signed-url/{reserve_number}")
-async def get_signed_url(
+def get_signed_url(
     reserve_number: str,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     expires_in_minutes: int = 30,
@@ -196,17 +194,16 @@ async def get_signed_url(
             )
 
         # 2. Get charter ID from reserve_number
-        conn = get_connection()
-        cur = conn.cursor()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
 
-        cur.execute(
-            "SELECT charter_id FROM charters WHERE reserve_number = %s",
-            (reserve_number,),
-        )
+            cur.execute(
+                "SELECT charter_id FROM charters WHERE reserve_number = %s",
+                (reserve_number,),
+            )
 
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
+            result = cur.fetchone()
+            cur.close()
 
         if not result:
             raise HTTPException(
@@ -238,8 +235,7 @@ async def get_signed_url(
             f"?signature={signature}&expires={expires}"
         )
 
-        conn = get_connection()
-        try:
+        with pooled_connection() as conn:
             ensure_audit_storage(conn)
             record_audit_event(
                 conn,
@@ -264,8 +260,6 @@ async def get_signed_url(
                 ensure_storage=False,
                 commit=True,
             )
-        finally:
-            conn.close()
 
         return {
             "url": signed_url,
@@ -284,7 +278,7 @@ async def get_signed_url(
 
 
 @router.get("/{reserve_number}")
-async def download_inspection_form(
+def download_inspection_form(
     reserve_number: str,
     signature: str | None = None,
     expires: int | None = None,
@@ -326,19 +320,18 @@ async def download_inspection_form(
         verify_signature(reserve_number, int(expires), signature)
 
         # 3. Get charter ID
-        conn = get_connection()
-        cur = conn.cursor()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
 
-        cur.execute(
-            """
+            cur.execute(
+                """
             SELECT charter_id FROM charters WHERE reserve_number = %s
         """,
-            (reserve_number,),
-        )
+                (reserve_number,),
+            )
 
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
+            result = cur.fetchone()
+            cur.close()
 
         if not result:
             raise HTTPException(
@@ -420,7 +413,7 @@ async def download_inspection_form(
 
 
 @router.get("/{reserve_number}/metadata")
-async def get_form_metadata(
+def get_form_metadata(
     reserve_number: str,
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict:
@@ -435,19 +428,18 @@ async def get_form_metadata(
         user_role = payload.get("role", "user")
 
         # 2. Get charter ID
-        conn = get_connection()
-        cur = conn.cursor()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
 
-        cur.execute(
-            """
+            cur.execute(
+                """
             SELECT charter_id FROM charters WHERE reserve_number = %s
         """,
-            (reserve_number,),
-        )
+                (reserve_number,),
+            )
 
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
+            result = cur.fetchone()
+            cur.close()
 
         if not result:
             raise HTTPException(
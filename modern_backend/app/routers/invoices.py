@@ -3,12 +3,12 @@
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api/invoices", tags=["invoices"])
 
@@ -130,9 +130,9 @@ def get_invoices(
     customer_id: int | None = None,
     limit: int = 100,
     offset: int = 0,
+    conn=Depends(get_db),
 ):
     """Get invoices with optional filters"""
-    conn = get_connection()
     cur = conn.cursor()
 
     query = """
@@ -214,15 +214,13 @@ def get_invoices(
         )
 
     cur.close()
-    conn.close()
 
     return invoices
 
 
 @router.get("/{invoice_id}")
-def get_invoice(invoice_id: int):
+def get_invoice(invoice_id: int, conn=Depends(get_db)):
     """Get single invoice details"""
-    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute(
@@ -262,7 +260,6 @@ def get_invoice(invoice_id: int):
     row = cur.fetchone()
     if not row:
         cur.close()
-        conn.close()
         raise HTTPException(status_code=404, detail=ERROR_INVOICE_NOT_FOUND)
 
     invoice = {
@@ -283,15 +280,17 @@ def get_invoice(invoice_id: int):
     }
 
     cur.close()
-    conn.close()
 
     return invoice
 
 
 @router.post("/", status_code=201)
-def create_invoice(invoice: InvoiceCreate, request: Request):
+def create_invoice(
+    invoice: InvoiceCreate,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Create new invoice"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -369,7 +368,6 @@ def create_invoice(invoice: InvoiceCreate, request: Request):
         conn.commit()
 
         cur.close()
-        conn.close()
 
         return {
             "invoice_id": invoice_id,
@@ -379,7 +377,6 @@ def create_invoice(invoice: InvoiceCreate, request: Request):
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to create invoice: {e!s}"
         )
@@ -390,16 +387,15 @@ def update_invoice(
     invoice_id: int,
     invoice: InvoiceUpdate,
     request: Request,
+    conn=Depends(get_db),
 ):
     """Update existing invoice"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
         audit_before = _load_invoice_snapshot(conn, invoice_id)
         if audit_before is None:
             cur.close()
-            conn.close()
             raise HTTPException(status_code=404, detail=ERROR_INVOICE_NOT_FOUND)
 
         updates = []
@@ -448,7 +444,6 @@ def update_invoice(
         if cur.rowcount == 0:
             conn.rollback()
             cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404, detail=ERROR_INVOICE_NOT_FOUND
             )
@@ -475,7 +470,6 @@ def update_invoice(
         )
         conn.commit()
         cur.close()
-        conn.close()
 
         return {"message": "Invoice updated successfully"}
 
@@ -484,7 +478,6 @@ def update_invoice(
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to update invoice: {e!s}"
         )
@@ -495,9 +488,9 @@ def mark_invoice_paid(
     invoice_id: int,
     request: Request,
     paid_date: date | None = None,
+    conn=Depends(get_db),
 ):
     """Mark invoice as paid"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -507,7 +500,6 @@ def mark_invoice_paid(
         before_snapshot = _load_invoice_snapshot(conn, invoice_id)
         if before_snapshot is None:
             cur.close()
-            conn.close()
             raise HTTPException(status_code=404, detail=ERROR_INVOICE_NOT_FOUND)
 
         cur.execute(
@@ -524,7 +516,6 @@ def mark_invoice_paid(
         if cur.rowcount == 0:
             conn.rollback()
             cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404, detail=ERROR_INVOICE_NOT_FOUND
             )
@@ -551,7 +542,6 @@ def mark_invoice_paid(
         )
         conn.commit()
         cur.close()
-        conn.close()
 
         return {"message": "Invoice marked as paid"}
 
@@ -560,23 +550,20 @@ def mark_invoice_paid(
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to mark invoice as paid: {e!s}"
         )
 
 
 @router.delete("/{invoice_id}")
-def delete_invoice(invoice_id: int, request: Request):
+def delete_invoice(invoice_id: int, request: Request, conn=Depends(get_db)):
     """Delete invoice"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
         before_snapshot = _load_invoice_snapshot(conn, invoice_id)
         if before_snapshot is None:
             cur.close()
-            conn.close()
             raise HTTPException(status_code=404, detail=ERROR_INVOICE_NOT_FOUND)
 
         cur.execute(
@@ -586,7 +573,6 @@ def delete_invoice(invoice_id: int, request: Request):
         if cur.rowcount == 0:
             conn.rollback()
             cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404, detail=ERROR_INVOICE_NOT_FOUND
             )
@@ -612,7 +598,6 @@ def delete_invoice(invoice_id: int, request: Request):
         )
         conn.commit()
         cur.close()
-        conn.close()
 
         return {"message": "Invoice deleted successfully"}
 
@@ -621,16 +606,14 @@ def delete_invoice(invoice_id: int, request: Request):
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to delete invoice: {e!s}"
         )
 
 
 @router.get("/stats/summary")
-def get_invoice_stats():
+def get_invoice_stats(conn=Depends(get_db)):
     """Get invoice statistics"""
-    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
@@ -657,6 +640,5 @@ def get_invoice_stats():
     }
 
     cur.close()
-    conn.close()
 
     return stats
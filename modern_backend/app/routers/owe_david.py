@@ -1,16 +1,15 @@
 """Owe David dashboard – reads from david_account_tracking table."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api/owe-david", tags=["owe-david"])
 
 
 @router.get("/transactions")
-def list_owe_david_transactions():
+def list_owe_david_transactions(conn=Depends(get_db)):
     """Return all David account transactions ordered newest first."""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute(
@@ -71,4 +70,3 @@ def list_owe_david_transactions():
         ) from e
     finally:
         cur.close()
-        conn.close()
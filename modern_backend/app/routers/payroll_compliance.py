@@ -10,9 +10,10 @@ from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 
-from ..audit.engine import ensure_audit_storage, record_audit_event
+from ..audit.engine import record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_async_connection
+from ..schema_migrations import ensure_schema_async
 
 router = APIRouter(
     prefix="/api/payroll-compliance", tags=["payroll-compliance"]
@@ -39,26 +40,6 @@ class PD7AUpsertRequest(BaseModel):
     notes: str | None = None
 
 
-def _ensure_pd7a_audit_columns(conn):
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            "ALTER TABLE cra_pd7a_returns ADD COLUMN IF NOT EXISTS "
-            "submission_reference TEXT"
-        )
-        cur.execute(
-            "ALTER TABLE cra_pd7a_returns ADD COLUMN IF NOT EXISTS "
-            "submitted_by TEXT"
-        )
-        cur.execute(
-            "ALTER TABLE cra_pd7a_returns ADD COLUMN IF NOT EXISTS "
-            "filing_method TEXT"
-        )
-        conn.commit()
-    finally:
-        cur.close()
-
-
 def _audit_actor(request: Request) -> AuditEventActor:
     user = getattr(request.state, "current_user", None) or {}
     return AuditEventActor(
@@ -74,13 +55,12 @@ def _audit_actor(request: Request) -> AuditEventActor:
 async def upsert_pd7a(
     payload: PD7AUpsertRequest,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     if payload.month < 1 or payload.month > 12:
         raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
 
-    _ensure_pd7a_audit_columns(conn)
-    ensure_audit_storage(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
         total_due = (
@@ -94,7 +74,7 @@ async def upsert_pd7a(
             else total_due
         )
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT id
             FROM cra_pd7a_returns
@@ -103,10 +83,10 @@ async def upsert_pd7a(
             """,
             (payload.year, payload.month),
         )
-        existing_row = cur.fetchone()
+        existing_row = await cur.fetchone()
 
         if existing_row:
-            cur.execute(
+            await cur.execute(
                 """
                 UPDATE cra_pd7a_returns
                 SET employee_count = %s,
@@ -134,7 +114,7 @@ async def upsert_pd7a(
             )
             action = "pd7a_updated"
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO cra_pd7a_returns (
                     reporting_year,
@@ -193,22 +173,22 @@ async def upsert_pd7a(
             retention_until=date(payload.year + 6, 12, 31),
             note="PD7A row upsert audit record",
         )
-        record_audit_event(conn, event, ensure_storage=False, commit=False)
-        conn.commit()
+        await conn.run_sync(record_audit_event, event, ensure_storage=False, commit=False)
+        await conn.commit()
         return {"success": True, "year": payload.year, "month": payload.month}
     except Exception as exc:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to save PD7A row: {exc}") from exc
     finally:
         cur.close()
 
 
 @router.get("/pd7a")
-async def list_pd7a_all(conn=Depends(get_connection)):
-    _ensure_pd7a_audit_columns(conn)
+async def list_pd7a_all(conn=Depends(get_async_connection)):
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT
                 reporting_year,
@@ -230,7 +210,7 @@ async def list_pd7a_all(conn=Depends(get_connection)):
             ORDER BY reporting_year DESC, reporting_month DESC
             """
         )
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         out = []
         for r in rows:
             out.append(
@@ -264,13 +244,12 @@ async def list_pd7a_all(conn=Depends(get_connection)):
 async def upsert_pd7a(
     payload: PD7AUpsertRequest,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     if payload.month < 1 or payload.month > 12:
         raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
 
-    _ensure_pd7a_audit_columns(conn)
-    ensure_audit_storage(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
         total_due = (
@@ -285,7 +264,7 @@ async def upsert_pd7a(
         )
 
         if row:
-            cur.execute(
+            await cur.execute(
                 """
                 UPDATE cra_pd7a_returns
                 SET employee_count = %s,
@@ -312,7 +291,7 @@ async def upsert_pd7a(
                 ),
             )
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO cra_pd7a_returns (
                     reporting_year,
@@ -344,10 +323,10 @@ async def upsert_pd7a(
                     payload.notes,
                 ),
             )
-        conn.commit()
+        await conn.commit()
         return {"success": True, "year": payload.year, "month": payload.month}
     except Exception as exc:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to save PD7A row: {exc}") from exc
     finally:
         cur.close()
@@ -359,13 +338,12 @@ async def update_pd7a_month(
     tax_month: int,
     payload: PD7AUpsertRequest,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     if tax_month < 1 or tax_month > 12:
         raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
 
-    _ensure_pd7a_audit_columns(conn)
-    ensure_audit_storage(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
         total_due = (
@@ -379,7 +357,7 @@ async def update_pd7a_month(
             else total_due
         )
 
-        cur.execute(
+        await cur.execute(
             """
             UPDATE cra_pd7a_returns
             SET employee_count = %s,
@@ -435,14 +413,14 @@ async def update_pd7a_month(
             retention_until=date(tax_year + 6, 12, 31),
             note="PD7A row update audit record",
         )
-        record_audit_event(conn, event, ensure_storage=False, commit=False)
-        conn.commit()
+        await conn.run_sync(record_audit_event, event, ensure_storage=False, commit=False)
+        await conn.commit()
         return {"success": True, "year": tax_year, "month": tax_month}
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as exc:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update PD7A row: {exc}") from exc
     finally:
         cur.close()
@@ -454,18 +432,17 @@ async def submit_pd7a_month(
     tax_month: int,
     payload: PD7ASubmitRequest,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     if tax_month < 1 or tax_month > 12:
         raise HTTPException(
             status_code=400, detail="Month must be between 1 and 12"
         )
 
-    _ensure_pd7a_audit_columns(conn)
-    ensure_audit_storage(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT id
             FROM cra_pd7a_returns
@@ -473,7 +450,7 @@ async def submit_pd7a_month(
             """,
             (tax_year, tax_month),
         )
-        row = cur.fetchone()
+        row = await cur.fetchone()
         if not row:
             raise HTTPException(
                 status_code=404,
@@ -484,7 +461,7 @@ async def submit_pd7a_month(
             payload.submission_reference or ""
         ).strip() or f"PD7A-{tax_year}{tax_month:02d}"
 
-        cur.execute(
+        await cur.execute(
             """
             UPDATE cra_pd7a_returns
             SET is_submitted = TRUE,
@@ -514,7 +491,7 @@ async def submit_pd7a_month(
             ),
         )
 
-        cur.execute(
+        await cur.execute(
             """
             UPDATE payroll_remittances
             SET status = 'submitted',
@@ -546,9 +523,9 @@ async def submit_pd7a_month(
             retention_until=date(tax_year + 6, 12, 31),
             note="PD7A submission audit record",
         )
-        record_audit_event(conn, event, ensure_storage=False, commit=False)
+        await conn.run_sync(record_audit_event, event, ensure_storage=False, commit=False)
 
-        conn.commit()
+        await conn.commit()
         return {
             "success": True,
             "year": tax_year,
@@ -558,10 +535,10 @@ async def submit_pd7a_month(
             "updated.",
         }
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as exc:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to submit PD7A month: {exc}"
         )
@@ -570,11 +547,11 @@ async def submit_pd7a_month(
 
 
 @router.get("/pd7a/{tax_year}/report.csv")
-async def export_pd7a_year_csv(tax_year: int, conn=Depends(get_connection)):
-    _ensure_pd7a_audit_columns(conn)
+async def export_pd7a_year_csv(tax_year: int, conn=Depends(get_async_connection)):
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT
                 reporting_year,
@@ -598,7 +575,7 @@ async def export_pd7a_year_csv(tax_year: int, conn=Depends(get_connection)):
             """,
             (tax_year,),
         )
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
 
         buf = io.StringIO()
         writer = csv.writer(buf)
@@ -5,7 +5,8 @@ from pydantic import BaseModel, Field
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
+from ..schema_migrations import ensure_schema
 
 router = APIRouter(prefix="/api/payroll", tags=["payroll-entries"])
 
@@ -88,41 +89,9 @@ class PayrollEntryUpsert(BaseModel):
     notes: str | None = Field(default=None, max_length=1000)
 
 
-def _ensure_table(conn):
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS payroll_entries (
-                id SERIAL PRIMARY KEY,
-                employee_id INTEGER NOT NULL,
-                year INTEGER NOT NULL,
-                pay_period TEXT NOT NULL,
-                regular_hours NUMERIC NOT NULL DEFAULT 0,
-                hourly_rate NUMERIC NOT NULL DEFAULT 0,
-                ot_hours NUMERIC NOT NULL DEFAULT 0,
-                ot_rate NUMERIC NOT NULL DEFAULT 0,
-                base_salary NUMERIC NOT NULL DEFAULT 0,
-                bonus NUMERIC NOT NULL DEFAULT 0,
-                gratuity NUMERIC NOT NULL DEFAULT 0,
-                other_benefits NUMERIC NOT NULL DEFAULT 0,
-                cpp NUMERIC NOT NULL DEFAULT 0,
-                ei NUMERIC NOT NULL DEFAULT 0,
-                income_tax NUMERIC NOT NULL DEFAULT 0,
-                notes TEXT,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
-            )
-            """
-        )
-        conn.commit()
-    finally:
-        cur.close()
-
-
 @router.get("/entries")
-def list_entries(year: int | None = Query(default=None), conn=Depends(get_connection)):
-    _ensure_table(conn)
+def list_entries(year: int | None = Query(default=None), conn=Depends(get_db)):
+    ensure_schema()
     cur = conn.cursor()
     try:
         sql = """
@@ -185,9 +154,9 @@ def list_entries(year: int | None = Query(default=None), conn=Depends(get_connec
 def create_entry(
     payload: PayrollEntryUpsert,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         cur.execute(
@@ -255,9 +224,9 @@ def update_entry(
     entry_id: int,
     payload: PayrollEntryUpsert,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         before_snapshot = _load_payroll_entry_snapshot(conn, entry_id)
@@ -344,9 +313,9 @@ def update_entry(
 def delete_entry(
     entry_id: int,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_db),
 ):
-    _ensure_table(conn)
+    ensure_schema()
     cur = conn.cursor()
     try:
         before_snapshot = _load_payroll_entry_snapshot(conn, entry_id)
@@ -16,9 +16,12 @@ from decimal import Decimal
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 
-from ..audit.engine import ensure_audit_storage, record_audit_event
+from ..audit.engine import record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_async_connection
+from ..financial_facts import month_bounds, year_bounds
+from ..schema_catalog import schema_catalog
+from ..schema_migrations import ensure_schema_async
 from ..schemas.common import StatusMessageResponse
 from ..schemas.payroll_tax import T4EntryResponse
 from ..utils.validation import validate_tax_year
@@ -27,26 +30,8 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["payroll-tax"])
 
 
-def _table_exists(conn, table_name: str) -> bool:
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            SELECT EXISTS(
-                SELECT 1
-                FROM information_schema.tables
-                WHERE table_schema = 'public' AND table_name = %s
-            )
-            """,
-            (table_name,),
-        )
-        return bool(cur.fetchone()[0])
-    finally:
-        cur.close()
-
-
 def _using_legacy_t4_entries(conn) -> bool:
-    return _table_exists(conn, "t4_entries")
+    return schema_catalog.has_table(conn, "t4_entries")
 
 
 def _audit_actor(request: Request) -> AuditEventActor:
@@ -110,15 +95,15 @@ class PayrollEntry(BaseModel):
 
 @router.get("/t4/{employee_id}/{tax_year}", response_model=T4EntryResponse)
 async def get_t4_entry(
-    employee_id: int, tax_year: int, conn=Depends(get_connection)
+    employee_id: int, tax_year: int, conn=Depends(get_async_connection)
 ):
     """Retrieve T4 entry with auto-calculated values"""
     try:
         validate_tax_year(tax_year)
         cur = conn.cursor()
 
-        if _using_legacy_t4_entries(conn):
-            cur.execute(
+        if await conn.run_sync(_using_legacy_t4_entries):
+            await cur.execute(
                 """
                 SELECT
                     t4_box_14, t4_box_16, t4_box_18, t4_box_22, t4_box_24,
@@ -129,7 +114,7 @@ async def get_t4_entry(
                 (employee_id, tax_year),
             )
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT
                     box_14_employment_income,
@@ -148,12 +133,12 @@ async def get_t4_entry(
                 (employee_id, tax_year),
             )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
         if not result:
             raise HTTPException(status_code=404, detail="T4 entry not found")
 
         # Get auto-calculated values from payroll
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 COALESCE(
@@ -206,7 +191,7 @@ async def get_t4_entry(
             (employee_id, tax_year),
         )
 
-        auto_result = cur.fetchone()
+        auto_result = await cur.fetchone()
 
         return {
             "employee_id": employee_id,
@@ -241,29 +226,29 @@ async def get_t4_entry(
 
 @router.post("/t4", response_model=StatusMessageResponse)
 async def save_t4_entry(
-    entry: T4Entry, request: Request, conn=Depends(get_connection)
+    entry: T4Entry, request: Request, conn=Depends(get_async_connection)
 ):
     """Save or update T4 entry"""
     try:
         validate_tax_year(entry.tax_year)
         cur = conn.cursor()
 
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
         action = "t4_entry_updated"
 
-        if _using_legacy_t4_entries(conn):
+        if await conn.run_sync(_using_legacy_t4_entries):
             # Check if exists
-            cur.execute(
+            await cur.execute(
                 "SELECT correction_id FROM t4_entries WHERE employee_id = %s"
                 "AND tax_year = %s",
                 (entry.employee_id, entry.tax_year),
             )
 
-            exists = cur.fetchone() is not None
+            exists = await cur.fetchone() is not None
             action = "t4_entry_updated" if exists else "t4_entry_created"
 
             if exists:
-                cur.execute(
+                await cur.execute(
                     """
                     UPDATE t4_entries SET
                         t4_box_14 = %s, t4_box_16 = %s, t4_box_18 = %s,
@@ -289,7 +274,7 @@ async def save_t4_entry(
                     ),
                 )
             else:
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO t4_entries (
                         employee_id, tax_year, t4_box_14, t4_box_16, t4_box_18,
@@ -315,7 +300,7 @@ async def save_t4_entry(
                     ),
                 )
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT t4_id
                 FROM employee_t4_records
@@ -323,11 +308,11 @@ async def save_t4_entry(
                 """,
                 (entry.employee_id, entry.tax_year),
             )
-            row = cur.fetchone()
+            row = await cur.fetchone()
             action = "t4_entry_updated" if row else "t4_entry_created"
 
             if row:
-                cur.execute(
+                await cur.execute(
                     """
                     UPDATE employee_t4_records
                     SET box_14_employment_income = %s,
@@ -358,7 +343,7 @@ async def save_t4_entry(
                     ),
                 )
             else:
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO employee_t4_records (
                         employee_id, tax_year,
@@ -397,8 +382,8 @@ async def save_t4_entry(
                     ),
                 )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="payroll_tax",
                 entity_type="t4_entry",
@@ -429,18 +414,18 @@ async def save_t4_entry(
             commit=False,
         )
 
-        conn.commit()
+        await conn.commit()
         return {"status": "success", "message": "T4 saved"}
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error saving T4: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
 
 @router.get("/t4/{employee_id}/{tax_year}/pdf")
 async def generate_t4_pdf(
-    employee_id: int, tax_year: int, conn=Depends(get_connection)
+    employee_id: int, tax_year: int, conn=Depends(get_async_connection)
 ):
     """Generate T4 PDF"""
     try:
@@ -452,8 +437,8 @@ async def generate_t4_pdf(
 
         cur = conn.cursor()
 
-        if _using_legacy_t4_entries(conn):
-            cur.execute(
+        if await conn.run_sync(_using_legacy_t4_entries):
+            await cur.execute(
                 """
                 SELECT e.full_name, e.street_address, e.city, e.province,
                 e.postal_code,
@@ -468,7 +453,7 @@ async def generate_t4_pdf(
                 (tax_year, employee_id),
             )
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT e.full_name, e.street_address, e.city, e.province,
                 e.postal_code,
@@ -489,7 +474,7 @@ async def generate_t4_pdf(
                 (tax_year, employee_id),
             )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
         if not result:
             raise HTTPException(status_code=404, detail="Employee not found")
 
@@ -547,14 +532,14 @@ async def generate_t4_pdf(
 
 
 @router.get("/t4/{tax_year}/xml")
-async def export_t4_xml(tax_year: int, conn=Depends(get_connection)):
+async def export_t4_xml(tax_year: int, conn=Depends(get_async_connection)):
     """Export CRA-style T4 XML payload from employee_t4_records for a tax"
     "year."""
 
     validate_tax_year(tax_year)
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT
                 e.employee_id,
@@ -579,7 +564,7 @@ async def export_t4_xml(tax_year: int, conn=Depends(get_connection)):
             """,
             (tax_year,),
         )
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         if not rows:
             raise HTTPException(
                 status_code=404, detail=f"No T4 records found for {tax_year}"
@@ -688,13 +673,13 @@ async def export_t4_xml(tax_year: int, conn=Depends(get_connection)):
 
 @router.get("/payroll/{employee_id}/{year}/{period}")
 async def get_payroll_entry(
-    employee_id: int, year: int, period: str, conn=Depends(get_connection)
+    employee_id: int, year: int, period: str, conn=Depends(get_async_connection)
 ):
     """Retrieve payroll entry"""
     try:
         cur = conn.cursor()
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 regular_hours, hourly_rate, ot_hours, ot_rate, base_salary,
@@ -706,7 +691,7 @@ async def get_payroll_entry(
             (employee_id, year, period),
         )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
         if not result:
             raise HTTPException(
                 status_code=404, detail="Payroll entry not found"
@@ -734,27 +719,27 @@ async def get_payroll_entry(
 
 @router.post("/payroll")
 async def save_payroll_entry(
-    entry: PayrollEntry, request: Request, conn=Depends(get_connection)
+    entry: PayrollEntry, request: Request, conn=Depends(get_async_connection)
 ):
     """Save or update payroll entry"""
     try:
         cur = conn.cursor()
 
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
         action = "payroll_entry_created"
 
         # Check if exists
-        cur.execute(
+        await cur.execute(
             "SELECT id FROM payroll_entries WHERE employee_id = %s AND year ="
             "%s AND pay_period = %s",
             (entry.employee_id, entry.year, entry.pay_period),
         )
 
-        exists = cur.fetchone() is not None
+        exists = await cur.fetchone() is not None
         action = "payroll_entry_updated" if exists else "payroll_entry_created"
 
         if exists:
-            cur.execute(
+            await cur.execute(
                 """
                 UPDATE payroll_entries SET
                     regular_hours = %s, hourly_rate = %s, ot_hours = %s,
@@ -784,7 +769,7 @@ async def save_payroll_entry(
                 ),
             )
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO payroll_entries (
                     employee_id, year, pay_period, regular_hours, hourly_rate,
@@ -817,8 +802,8 @@ async def save_payroll_entry(
                 ),
             )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="payroll_tax",
                 entity_type="payroll_entry",
@@ -854,11 +839,11 @@ async def save_payroll_entry(
             commit=False,
         )
 
-        conn.commit()
+        await conn.commit()
         return {"status": "success", "message": "Payroll saved"}
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error saving payroll: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
@@ -870,13 +855,13 @@ async def save_payroll_entry(
 
 @router.get("/employee-work-history/{employee_id}/{year}")
 async def get_employee_work_history(
-    employee_id: int, year: int, conn=Depends(get_connection)
+    employee_id: int, year: int, conn=Depends(get_async_connection)
 ):
     """Get all work history (charters) for an employee in a year"""
     try:
         cur = conn.cursor()
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 ch.charter_id, ch.charter_date, ch.charter_number, 
@@ -890,13 +875,13 @@ async def get_employee_work_history(
             LEFT JOIN driver_payroll dp ON ch.charter_id = dp.charter_id AND
             dp.employee_id = %s
             WHERE ch.assigned_driver_id = %s OR dp.employee_id = %s
-            AND EXTRACT(YEAR FROM ch.charter_date) = %s
+            AND ch.charter_date >= %s AND ch.charter_date < %s
             ORDER BY ch.charter_date DESC
         """,
-            (employee_id, employee_id, employee_id, year),
+            (employee_id, employee_id, employee_id, *year_bounds(year)),
         )
 
-        results = cur.fetchall()
+        results = await cur.fetchall()
         work_history = []
 
         for r in results:
@@ -923,7 +908,7 @@ async def get_employee_work_history(
 
 @router.get("/employee-monthly-summary/{employee_id}/{year}")
 async def get_employee_monthly_summary(
-    employee_id: int, year: int, conn=Depends(get_connection)
+    employee_id: int, year: int, conn=Depends(get_async_connection)
 ):
     """Get monthly payroll summary for employee"""
     try:
@@ -932,7 +917,7 @@ async def get_employee_monthly_summary(
         monthly_data = []
 
         for month in range(1, 13):
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT 
                     COALESCE(SUM(hours), 0) as hours,
@@ -946,13 +931,13 @@ async def get_employee_monthly_summary(
                     COALESCE(SUM(ei), 0) as ei,
                     COALESCE(SUM(income_tax), 0) as tax
                 FROM payroll_entries
-                WHERE employee_id = %s AND year = %s AND EXTRACT(MONTH FROM
-                created_at) = %s
+                WHERE employee_id = %s AND year = %s
+                AND created_at >= %s AND created_at < %s
             """,
-                (employee_id, year, month),
+                (employee_id, year, *month_bounds(year, month)),
             )
 
-            result = cur.fetchone()
+            result = await cur.fetchone()
 
             if result:
                 hours = float(result[0] or 0)
@@ -995,7 +980,7 @@ async def get_employee_monthly_summary(
 
 @router.get("/available-periods/{employee_id}/{year}")
 async def get_available_periods(
-    employee_id: int, year: int, conn=Depends(get_connection)
+    employee_id: int, year: int, conn=Depends(get_async_connection)
 ):
     """Get list of available pay periods"""
     try:
@@ -1020,7 +1005,7 @@ async def get_available_periods(
 
 @router.post("/auto-match-charters")
 async def auto_match_charters(
-    payload: dict, request: Request, conn=Depends(get_connection)
+    payload: dict, request: Request, conn=Depends(get_async_connection)
 ):
     """Auto-match all unmatched charters for the employee in a period"""
     try:
@@ -1033,10 +1018,10 @@ async def auto_match_charters(
                 status_code=400, detail="Missing employee_id or period"
             )
 
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
 
         # Find unmatched charters for employee in period
-        cur.execute(
+        await cur.execute(
             """
             SELECT charter_id, charter_date,
             base_charge + airport_fee + COALESCE(additional_charges, 0)
@@ -1045,17 +1030,17 @@ async def auto_match_charters(
                 SELECT 1 FROM driver_payroll 
                 WHERE charter_id = charters.charter_id AND employee_id = %s
             )
-            AND EXTRACT(YEAR FROM charter_date) = %s
+            AND charter_date >= %s AND charter_date < %s
         """,
-            (employee_id, employee_id, int(period[:4])),
+            (employee_id, employee_id, *year_bounds(int(period[:4]))),
         )
 
-        charters = cur.fetchall()
+        charters = await cur.fetchall()
         matched_count = 0
 
         for charter_id, _charter_date, amount in charters:
             # Create payroll entry linking charter
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO driver_payroll (
                     employee_id, charter_id, hours, gross_pay, created_at
@@ -1066,11 +1051,11 @@ async def auto_match_charters(
             )
             matched_count += 1
 
-        conn.commit()
+        await conn.commit()
         cur.close()
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="payroll_tax",
                 entity_type="driver_payroll",
@@ -1092,7 +1077,7 @@ async def auto_match_charters(
         return {"status": "success", "matched": matched_count}
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error autom matching charters: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
@@ -1102,15 +1087,15 @@ async def match_single_charter(
     charter_id: int,
     employee_id: int,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Link a single charter to an employee"""
     try:
         cur = conn.cursor()
 
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
 
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO driver_payroll (employee_id, charter_id, gross_pay,
             created_at)
@@ -1122,11 +1107,11 @@ async def match_single_charter(
             (employee_id, charter_id),
         )
 
-        conn.commit()
+        await conn.commit()
         cur.close()
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="payroll_tax",
                 entity_type="driver_payroll",
@@ -1148,13 +1133,13 @@ async def match_single_charter(
         return {"status": "success"}
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error matching charter: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
 
 @router.post("/month-end-balance")
-async def month_end_balance(payload: dict, conn=Depends(get_connection)):
+async def month_end_balance(payload: dict, conn=Depends(get_async_connection)):
     """Generate month-end balance report"""
     try:
         cur = conn.cursor()
@@ -1169,7 +1154,7 @@ async def month_end_balance(payload: dict, conn=Depends(get_connection)):
         year, month = period.split("-")
 
         # Get payroll data for the month
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 COALESCE(SUM(hours), 0),
@@ -1181,12 +1166,12 @@ async def month_end_balance(payload: dict, conn=Depends(get_connection)):
                 COALESCE(SUM(income_tax), 0)
             FROM payroll_entries
             WHERE employee_id = %s AND year = %s 
-            AND EXTRACT(MONTH FROM created_at) = %s
+            AND created_at >= %s AND created_at < %s
         """,
-            (employee_id, int(year), int(month)),
+            (employee_id, int(year), *month_bounds(int(year), int(month))),
         )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
 
         charter_hours = float(result[0] or 0) if result else 0
         charter_income = float(result[1] or 0) if result else 0
@@ -1234,14 +1219,14 @@ async def month_end_balance(payload: dict, conn=Depends(get_connection)):
 
 @router.get("/generate-paystub/{employee_id}/{period}")
 async def generate_paystub(
-    employee_id: int, period: str, conn=Depends(get_connection)
+    employee_id: int, period: str, conn=Depends(get_async_connection)
 ):
     """Generate a pay stub for an employee for a period"""
     try:
         cur = conn.cursor()
 
         # Get employee info
-        cur.execute(
+        await cur.execute(
             """
             SELECT full_name, employee_id, t4_sin
             FROM employees WHERE employee_id = %s
@@ -1249,7 +1234,7 @@ async def generate_paystub(
             (employee_id,),
         )
 
-        emp = cur.fetchone()
+        emp = await cur.fetchone()
         if not emp:
             raise HTTPException(status_code=404, detail="Employee not found")
 
@@ -1258,20 +1243,20 @@ async def generate_paystub(
             period.split("-") if "-" in period else (period[:4], period[4:6])
         )
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 regular_hours, hourly_rate, bonus, gratuity,
                 base_salary, cpp, ei, income_tax, pay_period
             FROM payroll_entries
             WHERE employee_id = %s AND year = %s 
-            AND EXTRACT(MONTH FROM created_at) = %s
+            AND created_at >= %s AND created_at < %s
             LIMIT 1
         """,
-            (employee_id, int(year), int(month)),
+            (employee_id, int(year), *month_bounds(int(year), int(month))),
         )
 
-        payroll = cur.fetchone()
+        payroll = await cur.fetchone()
 
         if not payroll:
             raise HTTPException(
@@ -14,7 +14,8 @@ from pypdf import PdfReader, PdfWriter
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import cursor, get_connection
+from ..db import cursor, pooled_connection
+from ..schema_catalog import schema_catalog
 from ..services.pdf_generator import (
     generate_charter_pdf,
     generate_confirmation_letter_pdf,
@@ -33,39 +34,35 @@ router = APIRouter(prefix="/api", tags=["pdf"])
 
 
 def _record_pdf_event(action: str, after: dict[str, Any], note: str) -> None:
-    conn = None
     try:
-        conn = get_connection()
-        ensure_audit_storage(conn)
-        record_audit_event(
-            conn,
-            AuditEvent(
-                module="pdf",
-                entity_type="pdf_layout_settings",
-                entity_id="global",
-                action=action,
-                source="api",
-                correlation_id=None,
-                actor=AuditEventActor(
-                    actor_type="service",
-                    user_id=None,
-                    username="pdf_api",
-                    role="service",
+        with pooled_connection() as conn:
+            ensure_audit_storage(conn)
+            record_audit_event(
+                conn,
+                AuditEvent(
+                    module="pdf",
+                    entity_type="pdf_layout_settings",
+                    entity_id="global",
+                    action=action,
+                    source="api",
+                    correlation_id=None,
+                    actor=AuditEventActor(
+                        actor_type="service",
+                        user_id=None,
+                        username="pdf_api",
+                        role="service",
+                    ),
+                    before=None,
+                    after=after,
+                    evidence_links=[],
+                    retention_until=date(date.today().year + 6, 12, 31),
+                    note=note,
                 ),
-                before=None,
-                after=after,
-                evidence_links=[],
-                retention_until=date(date.today().year + 6, 12, 31),
-                note=note,
-            ),
-            ensure_storage=False,
-            commit=True,
-        )
+                ensure_storage=False,
+                commit=True,
+            )
     except Exception:
         pass
-    finally:
-        if conn is not None:
-            conn.close()
 
 
 @router.get("/pdf-layout-settings")
@@ -523,37 +520,24 @@ def _build_run_sheet_payload(payload: dict[str, Any]) -> dict[str, Any]:
     return _apply_pdf_field_aliases(charter_data)
 
 
-def _column_exists(cur, table_name: str, column_name: str) -> bool:
-    cur.execute(
-        """
-        SELECT 1
-        FROM information_schema.columns
-        WHERE table_schema = 'public'
-          AND table_name = %s
-          AND column_name = %s
-        LIMIT 1
-        """,
-        (table_name, column_name),
-    )
-    return cur.fetchone() is not None
-
-
 def _load_charter_pdf_data(charter_id: int) -> dict:
     """Load the richer charter data needed for the run sheet PDF."""
     with cursor() as cur:
         exchange_details_select = (
             "c.exchange_of_services_details"
-            if _column_exists(cur, "charters", "exchange_of_services_details")
+            if schema_catalog.has_column(
+                cur.connection, "charters", "exchange_of_services_details"
+            )
             else "NULL::jsonb AS exchange_of_services_details"
         )
         payment_method_select = (
             "c.payment_method"
-            if _column_exists(cur, "charters", "payment_method")
+            if schema_catalog.has_column(cur.connection, "charters", "payment_method")
             else "NULL::text AS payment_method"
         )
         payment_deleted_filter = (
             "AND deleted_at IS NULL"
-            if _column_exists(cur, "payments", "deleted_at")
+            if schema_catalog.has_column(cur.connection, "payments", "deleted_at")
             else ""
         )
 
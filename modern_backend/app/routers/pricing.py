@@ -12,12 +12,12 @@ split run)
 from datetime import date
 from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api/pricing", tags=["pricing"])
 
@@ -57,9 +57,8 @@ class QuoteOption(BaseModel):
 
 
 @router.get("/defaults")
-def get_all_pricing_defaults():
+def get_all_pricing_defaults(conn=Depends(get_db)):
     """Get all vehicle pricing defaults"""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute("""
@@ -97,13 +96,11 @@ def get_all_pricing_defaults():
         ) from e
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/by-vehicle/{vehicle_type}")
-def get_pricing_by_vehicle(vehicle_type: str):
+def get_pricing_by_vehicle(vehicle_type: str, conn=Depends(get_db)):
     """Get pricing defaults for specific vehicle type"""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute(
@@ -149,11 +146,14 @@ def get_pricing_by_vehicle(vehicle_type: str):
         ) from e
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/calculate-quotes")
-def calculate_quotes(request: QuoteRequest, http_request: Request):
+def calculate_quotes(
+    request: QuoteRequest,
+    http_request: Request,
+    conn=Depends(get_db),
+):
     """
     Calculate 3 quote options for a charter:
     1. Hourly rate (e.g., $195/hr x 6 hours = $1170)
@@ -161,7 +161,6 @@ def calculate_quotes(request: QuoteRequest, http_request: Request):
     3. Split run (e.g., 1.5hr before + 1.5hr after = 3hr free,
     OR 3hr standby @ $25/hr)
     """
-    conn = get_connection()
     cur = conn.cursor()
     try:
         ensure_audit_storage(conn)
@@ -369,13 +368,11 @@ def calculate_quotes(request: QuoteRequest, http_request: Request):
         ) from e
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/charter-types")
-def get_charter_types():
+def get_charter_types(conn=Depends(get_db)):
     """Get all available charter types"""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute("""
@@ -404,4 +401,3 @@ def get_charter_types():
         ) from e
     finally:
         cur.close()
-        conn.close()
@@ -5,12 +5,12 @@ from datetime import datetime as dt_datetime
 from datetime import timedelta
 from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api/receipts", tags=["receipts"])
 
@@ -126,9 +126,8 @@ class ExpenseSummary(BaseModel):
 
 
 @router.get("/vendors")
-def get_vendors():
+def get_vendors(conn=Depends(get_db)):
     """Get distinct list of vendor names for autocomplete"""
-    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
@@ -141,7 +140,6 @@ def get_vendors():
     vendors = [row[0] for row in cur.fetchall()]
 
     cur.close()
-    conn.close()
 
     return vendors
 
@@ -178,9 +176,9 @@ def get_receipts(
     category: str | None = None,
     limit: int = 100,
     offset: int = 0,
+    conn=Depends(get_db),
 ):
     """Get receipts with optional filters"""
-    conn = get_connection()
     cur = conn.cursor()
 
     query = """
@@ -231,15 +229,13 @@ def get_receipts(
         )
 
     cur.close()
-    conn.close()
 
     return receipts
 
 
 @router.get("/{receipt_id}")
-def get_receipt(receipt_id: int):
+def get_receipt(receipt_id: int, conn=Depends(get_db)):
     """Get single receipt"""
-    conn = get_connection()
     cur = conn.cursor()
 
     # Get receipt
@@ -258,7 +254,6 @@ def get_receipt(receipt_id: int):
     row = cur.fetchone()
     if not row:
         cur.close()
-        conn.close()
         raise HTTPException(status_code=404, detail="Receipt not found")
 
     receipt = {
@@ -277,15 +272,17 @@ def get_receipt(receipt_id: int):
     }
 
     cur.close()
-    conn.close()
 
     return receipt
 
 
 @router.post("/", status_code=201)
-def create_receipt(receipt: ReceiptCreate, request: Request):
+def create_receipt(
+    receipt: ReceiptCreate,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Create new receipt"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -340,7 +337,6 @@ def create_receipt(receipt: ReceiptCreate, request: Request):
         )
         conn.commit()
         cur.close()
-        conn.close()
 
         return {
             "receipt_id": receipt_id,
@@ -350,23 +346,25 @@ def create_receipt(receipt: ReceiptCreate, request: Request):
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to create receipt: {e!s}"
         )
 
 
 @router.put("/{receipt_id}")
-def update_receipt(receipt_id: int, receipt: ReceiptUpdate, request: Request):
+def update_receipt(
+    receipt_id: int,
+    receipt: ReceiptUpdate,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Update existing receipt"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
         before_snapshot = _load_receipt_snapshot(conn, receipt_id)
         if before_snapshot is None:
             cur.close()
-            conn.close()
             raise HTTPException(status_code=404, detail="Receipt not found")
 
         # Build dynamic update query
@@ -457,7 +455,6 @@ def update_receipt(receipt_id: int, receipt: ReceiptUpdate, request: Request):
         if cur.rowcount == 0:
             conn.rollback()
             cur.close()
-            conn.close()
             raise HTTPException(status_code=404, detail="Receipt not found")
 
         ensure_audit_storage(conn)
@@ -482,7 +479,6 @@ def update_receipt(receipt_id: int, receipt: ReceiptUpdate, request: Request):
         )
         conn.commit()
         cur.close()
-        conn.close()
 
         paper_status = (
             "paper-verified" if receipt.is_paper_verified else "data-verified"
@@ -494,23 +490,20 @@ def update_receipt(receipt_id: int, receipt: ReceiptUpdate, request: Request):
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to update receipt: {e!s}"
         )
 
 
 @router.delete("/{receipt_id}")
-def delete_receipt(receipt_id: int, request: Request):
+def delete_receipt(receipt_id: int, request: Request, conn=Depends(get_db)):
     """Delete receipt"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
         before_snapshot = _load_receipt_snapshot(conn, receipt_id)
         if before_snapshot is None:
             cur.close()
-            conn.close()
             raise HTTPException(status_code=404, detail="Receipt not found")
 
         # Delete receipt
@@ -521,7 +514,6 @@ def delete_receipt(receipt_id: int, request: Request):
         if cur.rowcount == 0:
             conn.rollback()
             cur.close()
-            conn.close()
             raise HTTPException(status_code=404, detail="Receipt not found")
 
         ensure_audit_storage(conn)
@@ -545,7 +537,6 @@ def delete_receipt(receipt_id: int, request: Request):
         )
         conn.commit()
         cur.close()
-        conn.close()
 
         return {"message": "Receipt deleted successfully"}
 
@@ -554,7 +545,6 @@ def delete_receipt(receipt_id: int, request: Request):
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to delete receipt: {e!s}"
         )
@@ -562,10 +552,11 @@ def delete_receipt(receipt_id: int, request: Request):
 
 @router.get("/summary/by-category")
 def get_expense_summary(
-    start_date: dt_date | None = None, end_date: dt_date | None = None
+    start_date: dt_date | None = None,
+    end_date: dt_date | None = None,
+    conn=Depends(get_db),
 ):
     """Get expense summary grouped by category"""
-    conn = get_connection()
     cur = conn.cursor()
 
     query = """
@@ -602,6 +593,5 @@ def get_expense_summary(
         )
 
     cur.close()
-    conn.close()
 
     return summary
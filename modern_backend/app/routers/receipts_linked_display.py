@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 """
 API endpoint to retrieve linked split receipts for display
-Returns all receipts that share the same banking_transaction_id or
-parent_receipt_id
+Returns all receipts in the same link group (receipts.link_group_id):
+shared banking_transaction_id, split group or key, or parent_receipt_id
 """
 
 from datetime import date as date_type
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/api/receipts-split", tags=["receipts-split"])
 
@@ -44,6 +44,7 @@ class SplitReceiptDetail(BaseModel):
     parent_receipt_id: int | None
     split_group_id: int | None = None
     split_key: str | None = None
+    link_group_id: int | None = None
     gl_account_code: str | None
     is_personal: bool
     is_paper_verified: bool | None = False
@@ -52,13 +53,12 @@ class SplitReceiptDetail(BaseModel):
 
 
 @router.get("/linked/{receipt_id}")
-def get_linked_split_receipts(receipt_id: int):
-    """Get all receipts linked to the same split (by banking transaction or
-    parent receipt).
+def get_linked_split_receipts(receipt_id: int, conn=Depends(get_db)):
+    """Get all receipts in the same link group (banking transaction, split
+    group/key or parent receipt).
 
     Returns a list of related receipts that should be displayed together.
     """
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -71,7 +71,8 @@ def get_linked_split_receipts(receipt_id: int):
                    banking_transaction_id, parent_receipt_id, gl_account_code,
                    split_group_id, split_key,
                    COALESCE(owner_personal_amount, 0) > 0 as is_personal,
-                   is_paper_verified, COALESCE(is_split_receipt, FALSE)
+                   is_paper_verified, COALESCE(is_split_receipt, FALSE),
+                   link_group_id
             FROM receipts
             WHERE receipt_id = %s
             """,
@@ -84,19 +85,12 @@ def get_linked_split_receipts(receipt_id: int):
                 status_code=404, detail=f"Receipt {receipt_id} not found"
             )
 
-        banking_id = base_receipt[9]  # banking_transaction_id
-        parent_id = base_receipt[10]  # parent_receipt_id
-        split_group_id = base_receipt[12]
-        split_key = base_receipt[13]
-
-        # Find all related receipts:
-        # 1. Same banking transaction
-        # 2. Same parent receipt ID (if marked as split parent)
-        # 3. This receipt is the parent for others
-
+        # Every receipt in the same link group: shared banking
+        # transaction, split group or split key, and parent/child links,
+        # followed transitively (see app/receipt_groups.py).
         cur.execute(
             """
-            SELECT DISTINCT r.receipt_id, r.receipt_date, r.vendor_name,
+            SELECT r.receipt_id, r.receipt_date, r.vendor_name,
             r.canonical_vendor,
                    r.gross_amount, r.gst_amount, r.description, r.vehicle_id,
                    r.fuel_amount,
@@ -105,42 +99,13 @@ def get_linked_split_receipts(receipt_id: int):
                    r.split_group_id, r.split_key,
                    COALESCE(r.owner_personal_amount, 0) > 0 as is_personal,
                    v.vehicle_number, r.is_paper_verified,
-                   COALESCE(r.is_split_receipt, FALSE)
+                   COALESCE(r.is_split_receipt, FALSE), r.link_group_id
             FROM receipts r
             LEFT JOIN vehicles v ON r.vehicle_id = v.vehicle_id
-            WHERE 
-                (r.banking_transaction_id = %s AND r.banking_transaction_id IS
-                NOT NULL)
-                OR (r.parent_receipt_id = %s AND r.parent_receipt_id IS NOT
-                NULL)
-                OR (r.split_group_id = %s AND r.split_group_id IS NOT NULL)
-                OR (COALESCE(%s, '') <> '' AND r.split_key = %s)
-                OR (r.receipt_id = %s AND (
-                    EXISTS (SELECT 1 FROM receipts r2 WHERE
-                    r2.parent_receipt_id = r.receipt_id)
-                    OR EXISTS (SELECT 1 FROM receipts r2 WHERE
-                    r2.banking_transaction_id = r.banking_transaction_id)
-                    OR EXISTS (SELECT 1 FROM receipts r2 WHERE
-                    r2.split_group_id = r.split_group_id AND r.split_group_id
-                    IS NOT NULL)
-                    OR (
-                        COALESCE(r.split_key, '') <> ''
-                        AND EXISTS (
-                            SELECT 1 FROM receipts r2
-                            WHERE r2.split_key = r.split_key
-                        )
-                    )
-                ))
+            WHERE r.link_group_id = %s OR r.receipt_id = %s
             ORDER BY r.gross_amount DESC, r.receipt_date ASC
             """,
-            (
-                banking_id,
-                parent_id,
-                split_group_id,
-                split_key,
-                split_key,
-                receipt_id,
-            ),
+            (base_receipt[17], receipt_id),
         )
 
         receipts = []
@@ -179,6 +144,7 @@ def get_linked_split_receipts(receipt_id: int):
                     "gl_account_code": row[11],
                     "split_group_id": row_split_group_id,
                     "split_key": row_split_key,
+                    "link_group_id": row[18],
                     "is_personal": bool(row[14]),
                     "is_paper_verified": (
                         bool(row[16]) if row[16] is not None else False
@@ -192,7 +158,6 @@ def get_linked_split_receipts(receipt_id: int):
             total_gst += gst
 
         cur.close()
-        conn.close()
 
         return {
             "count": len(receipts),
@@ -208,16 +173,17 @@ def get_linked_split_receipts(receipt_id: int):
         raise
     except Exception as e:
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to fetch linked receipts: {e!s}"
         )
 
 
 @router.get("/by-banking/{transaction_id}")
-def get_receipts_by_banking_transaction(transaction_id: int):
+def get_receipts_by_banking_transaction(
+    transaction_id: int,
+    conn=Depends(get_db),
+):
     """Get all receipts linked to a specific banking transaction."""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -232,7 +198,7 @@ def get_receipts_by_banking_transaction(transaction_id: int):
                  r.split_group_id, r.split_key,
                  COALESCE(r.owner_personal_amount, 0) > 0 as is_personal,
                  v.vehicle_number, r.is_paper_verified,
-                 COALESCE(r.is_split_receipt, FALSE)
+                 COALESCE(r.is_split_receipt, FALSE), r.link_group_id
             FROM receipts r
             LEFT JOIN vehicles v ON r.vehicle_id = v.vehicle_id
             WHERE r.banking_transaction_id = %s
@@ -277,6 +243,7 @@ def get_receipts_by_banking_transaction(transaction_id: int):
                     "parent_receipt_id": row_parent_receipt_id,
                     "split_group_id": row_split_group_id,
                     "split_key": row_split_key,
+                    "link_group_id": row[18],
                     "is_personal": bool(row[14]),
                     "is_paper_verified": (
                         bool(row[16]) if row[16] is not None else False
@@ -290,7 +257,6 @@ def get_receipts_by_banking_transaction(transaction_id: int):
             total_gst += gst
 
         cur.close()
-        conn.close()
 
         return {
             "count": len(receipts),
@@ -304,7 +270,6 @@ def get_receipts_by_banking_transaction(transaction_id: int):
 
     except Exception as e:
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to fetch receipts: {e!s}"
         )
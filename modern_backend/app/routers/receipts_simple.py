@@ -3,13 +3,25 @@
 from datetime import date
 from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
+from ..matview_refresh import status_headers, view_status
+from ..pagination import (
+    CURSOR_HEADER,
+    ESTIMATE_HEADER,
+    Keyset,
+    estimate_count,
+    next_cursor,
+    page_rows,
+)
+from ..receipt_groups import linked_receipt_ids
+from ..schema_migrations import ensure_schema
+from ..utils.amounts import amount_match_sql, cents_sql, to_cents
 
 router = APIRouter(prefix="/api/receipts-simple", tags=["receipts-simple"])
 
@@ -35,6 +47,29 @@ GST_EXEMPT_GL_CODES = {
 }
 
 
+# Exact amounts are compared in whole cents so the expression indexes
+# from schema migration 16 serve them (see app/utils/amounts.py).
+_BANK_AMOUNT_MATCH = amount_match_sql("bt.debit_amount", "bt.credit_amount")
+
+_RECEIPT_KEYSET = Keyset("receipt_date", "receipt_id")
+
+_DUPLICATE_SEED_SQL = f"""
+    SELECT receipt_id, receipt_date, vendor_name, gross_amount,
+           gst_amount, category, description, banking_transaction_id,
+           parent_receipt_id, split_group_id, split_key,
+           COALESCE(is_split_receipt, FALSE) AS is_split_receipt
+    FROM receipts
+    WHERE vendor_name ILIKE %s
+      AND {cents_sql('gross_amount')} = %s
+      AND receipt_date
+      BETWEEN %s - INTERVAL '%s days' AND %s + INTERVAL '%s days'
+      AND is_voided IS NOT TRUE
+      AND exclude_from_reports IS NOT TRUE
+    ORDER BY receipt_date DESC
+    LIMIT 10
+"""
+
+
 def _audit_actor(request: Request) -> AuditEventActor:
     user = getattr(request.state, "current_user", None) or {}
     return AuditEventActor(
@@ -51,7 +86,10 @@ def _linked_group_key(
     parent_receipt_id: int | None,
     split_group_id: int | None,
     split_key: str | None,
+    link_group_id: int | None = None,
 ) -> str:
+    if link_group_id is not None:
+        return f"link:{link_group_id}"
     if split_group_id is not None:
         return f"group:{split_group_id}"
     if split_key and str(split_key).strip():
@@ -67,39 +105,6 @@ def _split_marker(is_split: bool) -> str | None:
     return "✂" if is_split else None
 
 
-def _expand_linked_split_receipt_ids(cur, seed_ids: list[int]) -> set[int]:
-    linked_ids: set[int] = set(seed_ids)
-    for seed_id in seed_ids:
-        cur.execute(
-            """
-            WITH base AS (
-                SELECT receipt_id, banking_transaction_id, parent_receipt_id,
-                       split_group_id, split_key
-                FROM receipts
-                WHERE receipt_id = %s
-            )
-            SELECT DISTINCT r.receipt_id
-            FROM receipts r
-            CROSS JOIN base b
-            WHERE r.receipt_id = b.receipt_id
-               OR (b.banking_transaction_id IS NOT NULL
-                   AND r.banking_transaction_id = b.banking_transaction_id)
-               OR (b.split_group_id IS NOT NULL
-                   AND r.split_group_id = b.split_group_id)
-               OR (COALESCE(b.split_key, '') <> ''
-                   AND r.split_key = b.split_key)
-               OR (b.parent_receipt_id IS NOT NULL
-                   AND (r.parent_receipt_id = b.parent_receipt_id
-                        OR r.receipt_id = b.parent_receipt_id))
-               OR (b.parent_receipt_id IS NULL
-                   AND r.parent_receipt_id = b.receipt_id)
-            """,
-            (seed_id,),
-        )
-        linked_ids.update(r[0] for r in cur.fetchall())
-    return linked_ids
-
-
 def determine_receipt_type(desc: str, trans_type: str) -> tuple[str, str]:
     """Determine receipt_type and notes from banking description and
     transaction type
@@ -200,12 +205,14 @@ class SimpleReceiptResponse(BaseModel):
 
 
 @router.get("/vendors")
-def get_vendors():
+def get_vendors(conn=Depends(get_db)):
     """Get distinct list of vendor names for autocomplete with standardization
 
-    Cached for 1 hour since vendor list changes infrequently
+    Served from ``mv_vendor_list``, which the materialized view refresher
+    updates shortly after receipts change. ``X-Snapshot-Age-Seconds`` says
+    how old it is; ``X-Refresh-Pending`` whether newer writes are queued.
     """
-    conn = get_connection()
+    ensure_schema()
     cur = conn.cursor()
 
     # Use materialized view for better performance
@@ -220,26 +227,25 @@ def get_vendors():
         vendors.append(
             {"name": row[0], "canonical": row[1] if row[1] else row[0]}
         )
+    status = view_status(cur, "mv_vendor_list")
 
     cur.close()
-    conn.close()
 
-    # Return with cache headers (1 hour cache)
+    # Short client cache: the view itself is kept fresh in the background.
     return JSONResponse(
         content=vendors,
         headers={
-            "Cache-Control": "public, max-age=3600",
-            "X-Cache-Info": "Vendor list cached for 1 hour",
+            "Cache-Control": "public, max-age=60",
+            **status_headers(status),
         },
     )
 
 
 @router.get("/vendor-profile")
-def get_vendor_profile(vendor: str):
+def get_vendor_profile(vendor: str, conn=Depends(get_db)):
     """Return canonical vendor, most common category, and gst_code for this"
     "vendor."""
 
-    conn = get_connection()
     cur = conn.cursor()
 
     canonical = None
@@ -274,7 +280,6 @@ def get_vendor_profile(vendor: str):
     top = cur.fetchone()
 
     cur.close()
-    conn.close()
 
     return {
         "canonical_vendor": canonical or vendor.strip().upper(),
@@ -285,44 +290,39 @@ def get_vendor_profile(vendor: str):
 
 @router.get("/check-duplicates")
 def check_duplicate_receipts(
-    vendor: str, amount: float, date: date, days_window: int = 7
+    vendor: str,
+    amount: float,
+    date: date,
+    days_window: int = 7,
+    conn=Depends(get_db),
 ):
     """Check for existing receipts matching vendor, amount, and date range.
 
     Split siblings are included even when they are not linked by
-    banking_transaction_id,
-    by following split_group_id, split_key, and parent/child relationships.
+    banking_transaction_id: every receipt in the matches' link groups
+    (split_group_id, split_key and parent/child links) is returned.
     """
-    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute(
-        """
-        SELECT receipt_id, receipt_date, vendor_name, gross_amount,
-               gst_amount, category, description, banking_transaction_id,
-               parent_receipt_id, split_group_id, split_key,
-               COALESCE(is_split_receipt, FALSE) AS is_split_receipt
-        FROM receipts
-        WHERE vendor_name ILIKE %s
-          AND ABS(gross_amount - %s) < 0.01
-          AND receipt_date
-          BETWEEN %s - INTERVAL '%s days' AND %s + INTERVAL '%s days'
-          AND is_voided IS NOT TRUE
-          AND exclude_from_reports IS NOT TRUE
-        ORDER BY receipt_date DESC
-        LIMIT 10
-    """,
-        (f"%{vendor}%", amount, date, days_window, date, days_window),
+        _DUPLICATE_SEED_SQL,
+        (
+            f"%{vendor}%",
+            to_cents(amount),
+            date,
+            days_window,
+            date,
+            days_window,
+        ),
     )
 
     seed_rows = cur.fetchall()
     if not seed_rows:
         cur.close()
-        conn.close()
         return []
 
     seed_ids = [row[0] for row in seed_rows]
-    linked_ids = _expand_linked_split_receipt_ids(cur, seed_ids)
+    linked_ids = linked_receipt_ids(cur, seed_ids)
 
     placeholders = ", ".join(["%s"] * len(linked_ids))
     cur.execute(
@@ -330,7 +330,8 @@ def check_duplicate_receipts(
         SELECT receipt_id, receipt_date, vendor_name, gross_amount,
                gst_amount, category, description, banking_transaction_id,
                parent_receipt_id, split_group_id, split_key,
-               COALESCE(is_split_receipt, FALSE) AS is_split_receipt
+               COALESCE(is_split_receipt, FALSE) AS is_split_receipt,
+               link_group_id
         FROM receipts
         WHERE receipt_id IN ({placeholders})
           AND is_voided IS NOT TRUE
@@ -359,6 +360,7 @@ def check_duplicate_receipts(
             parent_receipt_id=parent_receipt_id,
             split_group_id=split_group_id,
             split_key=split_key,
+            link_group_id=row[12],
         )
 
         duplicates.append(
@@ -378,6 +380,7 @@ def check_duplicate_receipts(
                 "is_split": is_split,
                 "split_marker": _split_marker(is_split),
                 "linked_group_key": linked_group_key,
+                "link_group_id": row[12],
             }
         )
 
@@ -400,7 +403,6 @@ def check_duplicate_receipts(
         item["group_count"] = int(meta["group_count"])
 
     cur.close()
-    conn.close()
 
     return duplicates
 
@@ -412,6 +414,7 @@ def match_to_banking(
     vendor: str | None = None,
     days_window: int = 7,
     direction: str = "both",  # Changed default from 'after' to 'both'
+    conn=Depends(get_db),
 ):
     """Find potential banking transaction matches for a receipt.
 
@@ -423,7 +426,6 @@ def match_to_banking(
     - direction: 'after' (default), 'both', or 'before' indicating
       whether to search after the purchase date, both sides, or before.
     """
-    conn = get_connection()
     cur = conn.cursor()
 
     # Search banking transactions by amount and date range
@@ -432,43 +434,40 @@ def match_to_banking(
     if direction not in {"after", "both", "before"}:
         direction = "after"
 
+    # Whole cents, to probe the amount indexes (schema migration 16).
+    cents = to_cents(amount)
+
     if direction == "after":
-        query = """
+        query = f"""
             SELECT bt.transaction_id, bt.transaction_date, bt.description,
                    bt.debit_amount, bt.credit_amount, bt.account_number,
                    bt.receipt_id
             FROM banking_transactions bt
-            WHERE (
-                ABS(bt.debit_amount - %s) < 0.01
-                OR ABS(bt.credit_amount - %s) < 0.01)
+            WHERE {_BANK_AMOUNT_MATCH}
             AND bt.transaction_date BETWEEN %s AND %s + INTERVAL '%s days'
         """
-        params = [amount, amount, date, date, days_window]
+        params = [cents, cents, date, date, days_window]
     elif direction == "before":
-        query = """
+        query = f"""
             SELECT bt.transaction_id, bt.transaction_date, bt.description,
                    bt.debit_amount, bt.credit_amount, bt.account_number,
                    bt.receipt_id
             FROM banking_transactions bt
-            WHERE (
-                ABS(bt.debit_amount - %s) < 0.01
-                OR ABS(bt.credit_amount - %s) < 0.01)
+            WHERE {_BANK_AMOUNT_MATCH}
             AND bt.transaction_date BETWEEN %s - INTERVAL '%s days' AND %s
         """
-        params = [amount, amount, date, days_window, date]
+        params = [cents, cents, date, days_window, date]
     else:  # both
-        query = """
+        query = f"""
             SELECT bt.transaction_id, bt.transaction_date, bt.description,
                    bt.debit_amount, bt.credit_amount, bt.account_number,
                    bt.receipt_id
             FROM banking_transactions bt
-            WHERE (
-                ABS(bt.debit_amount - %s) < 0.01
-                OR ABS(bt.credit_amount - %s) < 0.01)
+            WHERE {_BANK_AMOUNT_MATCH}
             AND bt.transaction_date
             BETWEEN %s - INTERVAL '%s days' AND %s + INTERVAL '%s days'
         """
-        params = [amount, amount, date, days_window, date, days_window]
+        params = [cents, cents, date, days_window, date, days_window]
 
     if vendor:
         query += " AND bt.description ILIKE %s"
@@ -494,17 +493,18 @@ def match_to_banking(
         )
 
     cur.close()
-    conn.close()
 
     return matches
 
 
 @router.post("/{receipt_id}/link-banking/{transaction_id}")
 def link_receipt_to_banking(
-    receipt_id: int, transaction_id: int, request: Request
+    receipt_id: int,
+    transaction_id: int,
+    request: Request,
+    conn=Depends(get_db),
 ):
     """Link a receipt to a banking transaction and populate audit fields"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -599,7 +599,6 @@ def link_receipt_to_banking(
 
         conn.commit()
         cur.close()
-        conn.close()
 
         return {
             "message": "Receipt linked to banking transaction successfully",
@@ -610,14 +609,16 @@ def link_receipt_to_banking(
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Failed to link: {e!s}")  # noqa: B904
 
 
 @router.post("/", status_code=201)
-def create_receipt(receipt: SimpleReceiptCreate, request: Request):
+def create_receipt(
+    receipt: SimpleReceiptCreate,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Create new receipt"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -765,7 +766,6 @@ def create_receipt(receipt: SimpleReceiptCreate, request: Request):
 
         row = cur.fetchone()
         cur.close()
-        conn.close()
 
         return {
             "receipt_id": row[0],
@@ -792,7 +792,6 @@ def create_receipt(receipt: SimpleReceiptCreate, request: Request):
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to create receipt: {e!s}"
         )
@@ -804,9 +803,15 @@ def get_receipts(
     end_date: date | None = None,
     vendor: str | None = None,
     limit: int = 100,
+    page_cursor: str | None = Query(None, alias="cursor"),
+    estimate_total: bool = False,
+    response: Response = None,
+    conn=Depends(get_db),
 ):
-    """Get recent receipts"""
-    conn = get_connection()
+    """Get recent receipts.
+
+    Follow the ``X-Next-Cursor`` header with ``?cursor=`` for older pages.
+    """
     cur = conn.cursor()
 
     query = """
@@ -830,13 +835,27 @@ def get_receipts(
         query += " AND vendor_name ILIKE %s"
         params.append(f"%{vendor}%")
 
-    query += " ORDER BY receipt_date DESC, receipt_id DESC LIMIT %s"
-    params.append(limit)
+    if estimate_total:
+        estimate = estimate_count(cur, query, params)
+        response.headers[ESTIMATE_HEADER] = str(estimate)
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "vendor": vendor,
+    }
+    after_sql, after_params = _RECEIPT_KEYSET.where(page_cursor, filters)
+    if after_sql:
+        query += f" AND {after_sql}"
+    query += f" ORDER BY {_RECEIPT_KEYSET.order_by()} LIMIT %s"
 
-    cur.execute(query, params)
+    cur.execute(query, [*params, *after_params, limit + 1])
+    rows, has_more = page_rows(cur.fetchall(), limit)
+    token = next_cursor(rows, has_more, 1, 0, filters)
+    if token:
+        response.headers[CURSOR_HEADER] = token
 
     receipts = []
-    for row in cur.fetchall():
+    for row in rows:
         receipts.append(
             {
                 "receipt_id": row[0],
@@ -859,15 +878,13 @@ def get_receipts(
         )
 
     cur.close()
-    conn.close()
 
     return receipts
 
 
 @router.get("/{receipt_id}")
-def get_receipt(receipt_id: int):
+def get_receipt(receipt_id: int, conn=Depends(get_db)):
     """Get a single receipt by ID"""
-    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute(
@@ -887,7 +904,6 @@ def get_receipt(receipt_id: int):
 
     row = cur.fetchone()
     cur.close()
-    conn.close()
 
     if not row:
         raise HTTPException(status_code=404, detail="Receipt not found")
@@ -919,10 +935,12 @@ def get_receipt(receipt_id: int):
 
 @router.put("/{receipt_id}")
 def update_receipt(
-    receipt_id: int, receipt: SimpleReceiptCreate, request: Request
+    receipt_id: int,
+    receipt: SimpleReceiptCreate,
+    request: Request,
+    conn=Depends(get_db),
 ):
     """Update an existing receipt"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -1090,7 +1108,6 @@ def update_receipt(
 
         row = cur.fetchone()
         cur.close()
-        conn.close()
 
         return {
             "receipt_id": row[0],
@@ -1123,7 +1140,6 @@ def update_receipt(
     except Exception as e:
         conn.rollback()
         cur.close()
-        conn.close()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Failed to update receipt: {e!s}"
         )
@@ -1,12 +1,12 @@
 import contextlib
 from datetime import date
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
 
 router = APIRouter(prefix="/receipts", tags=["receipts-split"])
 
@@ -35,8 +35,12 @@ def _audit_actor(request: Request) -> AuditEventActor:
 
 
 @router.post("/{receipt_id}/auto-split")
-def auto_split_receipt(receipt_id: int, req: SplitRequest, request: Request):
-    conn = get_connection()
+def auto_split_receipt(
+    receipt_id: int,
+    req: SplitRequest,
+    request: Request,
+    conn=Depends(get_db),
+):
     try:
         cur = conn.cursor()
         ensure_audit_storage(conn)
@@ -148,10 +152,16 @@ def auto_split_receipt(receipt_id: int, req: SplitRequest, request: Request):
         # Update parent amount column to base AND mark as split
         # (parent_receipt_id points to itself)
         cur.execute(
-            f"UPDATE receipts SET {amt_col}=%s, parent_receipt_id=%s WHERE"
+            f"UPDATE receipts SET {amt_col}=%s, parent_receipt_id=%s WHERE "
             f"receipt_id=%s",
             (base, receipt_id, receipt_id),
         )
+        # Kept current by trg_receipts_link_group (schema migration 17).
+        cur.execute(
+            "SELECT link_group_id FROM receipts WHERE receipt_id=%s",
+            (receipt_id,),
+        )
+        link_group_id = cur.fetchone()[0]
 
         record_audit_event(
             conn,
@@ -169,6 +179,7 @@ def auto_split_receipt(receipt_id: int, req: SplitRequest, request: Request):
                     "fee": fee,
                     "fee_receipt_id": fee_id,
                     "amount_column": amt_col,
+                    "link_group_id": link_group_id,
                 },
                 evidence_links=[f"receipts:{receipt_id}"]
                 + ([f"receipts:{fee_id}"] if fee_id else []),
@@ -186,10 +197,11 @@ def auto_split_receipt(receipt_id: int, req: SplitRequest, request: Request):
             "fee": fee,
             "fee_receipt_id": fee_id,
             "amount_column": amt_col,
+            "link_group_id": link_group_id,
         }
     except Exception as e:
         conn.rollback()
         return {"status": "error", "error": str(e)}
     finally:
         with contextlib.suppress(Exception):
-            conn.close()
+            pass
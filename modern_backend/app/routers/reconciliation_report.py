@@ -9,9 +9,11 @@ from datetime import date, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 
-from ..audit.engine import ensure_audit_storage, record_audit_event
+from ..audit.engine import record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_async_connection
+from ..schema_catalog import schema_catalog
+from ..schema_migrations import ensure_schema_async
 
 router = APIRouter(prefix="/api/reconciliation", tags=["reconciliation"])
 logger = logging.getLogger(__name__)
@@ -73,7 +75,7 @@ async def get_banking_receipt_reconciliation(
     start_date: str = Query(..., description="YYYY-MM-DD"),
     end_date: str = Query(..., description="YYYY-MM-DD"),
     unlinked_only: bool = False,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """
     Get comprehensive reconciliation report:
@@ -83,12 +85,9 @@ async def get_banking_receipt_reconciliation(
     try:
         cur = conn.cursor()
 
-        cur.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'public' AND table_name = 'receipts'
-            """)
-        receipt_cols = {row[0] for row in cur.fetchall()}
+        receipt_cols = await conn.run_sync(
+            schema_catalog.column_set, "receipts"
+        )
         receipt_total_expr = (
             "r.gross_amount" if "gross_amount" in receipt_cols else "r.amount"
         )
@@ -135,8 +134,8 @@ async def get_banking_receipt_reconciliation(
 
         query += " ORDER BY bt.transaction_date DESC, bt.transaction_id"
 
-        cur.execute(query, params)
-        rows = cur.fetchall()
+        await cur.execute(query, params)
+        rows = await cur.fetchall()
 
         lines = []
         total_banking = 0
@@ -213,14 +212,14 @@ async def link_banking_to_receipt(
     banking_id: int,
     receipt_id: int,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Link a banking transaction to a receipt"""
     try:
         cur = conn.cursor()
 
         # Update receipt with banking link
-        cur.execute(
+        await cur.execute(
             """
             UPDATE receipts
             SET banking_transaction_id = %s
@@ -229,9 +228,9 @@ async def link_banking_to_receipt(
             (banking_id, receipt_id),
         )
 
-        ensure_audit_storage(conn)
-        record_audit_event(
-            conn,
+        await ensure_schema_async()
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="reconciliation_report",
                 entity_type="receipt",
@@ -252,7 +251,7 @@ async def link_banking_to_receipt(
             commit=False,
         )
 
-        conn.commit()
+        await conn.commit()
         cur.close()
 
         return {
@@ -262,7 +261,7 @@ async def link_banking_to_receipt(
         }
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error linking banking to receipt: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
@@ -273,7 +272,7 @@ async def update_receipt_field(
     field: str,
     value: str,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Update a receipt field inline from report"""
     try:
@@ -301,11 +300,11 @@ async def update_receipt_field(
             WHERE receipt_id = %s
         """
 
-        cur.execute(update_sql, (value, receipt_id))
+        await cur.execute(update_sql, (value, receipt_id))
 
-        ensure_audit_storage(conn)
-        record_audit_event(
-            conn,
+        await ensure_schema_async()
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="reconciliation_report",
                 entity_type="receipt",
@@ -327,13 +326,13 @@ async def update_receipt_field(
             commit=False,
         )
 
-        conn.commit()
+        await conn.commit()
         cur.close()
 
         return {"status": "success", "message": f"Updated {field} to {value}"}
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error updating receipt: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
@@ -342,13 +341,13 @@ async def update_receipt_field(
 async def get_unlinked_banking(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Get all unlinked banking transactions"""
     try:
         cur = conn.cursor()
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 transaction_id,
@@ -370,7 +369,7 @@ async def get_unlinked_banking(
             (start_date, end_date),
         )
 
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         cur.close()
 
         results = [
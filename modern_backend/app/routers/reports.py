@@ -1,21 +1,46 @@
-import csv
-import io
 import tempfile
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query, Request, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import cursor, get_connection
+from ..bank_matching import suggest_matches
+from ..db import cursor, get_db
+from ..export_stream import (
+    EXPORT_MEDIA_TYPES,
+    QueryExport,
+    export_response,
+    iter_query,
+    zip_query_exports,
+)
+from ..kpi_snapshots import (
+    company_snapshot_key,
+    live_result,
+)
+from ..kpi_snapshots import (
+    read_snapshot as read_kpi_snapshot,
+)
+from ..ledger_rollups import (
+    LEDGER_PERIOD_SQL,
+    check_rollups,
+    ledger_period_params,
+)
+from ..pagination import Keyset, estimate_count, next_cursor, page_rows
+from ..report_cache import cached_report
+from ..report_grouping import Measure, read_snapshot, summarize
+from ..schema_catalog import schema_catalog
+from ..schema_migrations import ensure_schema
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
+_JOURNAL_KEYSET = Keyset("date", "id", descending=False)
+
 
 class AccountingRuleUpsert(BaseModel):
     rule_name: str = Field(min_length=2, max_length=120)
@@ -39,34 +64,6 @@ class LedgerReclassifyRequest(BaseModel):
     account_type: str | None = Field(default=None, max_length=64)
 
 
-def _ensure_accounting_rules_table(conn) -> None:
-    """Create accounting rules table lazily so CRUD endpoints are usable."""
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS accounting_gl_rules (
-                rule_id SERIAL PRIMARY KEY,
-                rule_name TEXT UNIQUE NOT NULL,
-                match_field TEXT NOT NULL,
-                match_pattern TEXT NOT NULL,
-                gl_code TEXT NOT NULL,
-                account_type TEXT NULL,
-                sort_order INTEGER NOT NULL DEFAULT 100,
-                is_active BOOLEAN NOT NULL DEFAULT TRUE,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_accounting_gl_rules_sort
-            ON accounting_gl_rules (is_active, sort_order, rule_id)
-            """
-        )
-    conn.commit()
-
-
 def _validate_rule_field(match_field: str) -> None:
     allowed = {
         "name",
@@ -160,42 +157,22 @@ def export(
     end = parse_date(end_date) or datetime.now()
     start = parse_date(start_date) or (end - timedelta(days=365))
 
-    with cursor() as cur:
-        if type == "booking-trends":
-            cur.execute(
-                """
-                SELECT DATE_TRUNC('month', charter_date) AS period,
-                       COUNT(*) AS bookings
-                FROM charters
-                WHERE charter_date BETWEEN %s AND %s
-                GROUP BY 1
-                ORDER BY 1
-                """,
-                (start, end),
-            )
-            headers = ["period", "bookings"]
-        else:
-            raise HTTPException(status_code=400, detail="unknown_report_type")
-        rows = cur.fetchall()
+    if type == "booking-trends":
+        sql = """
+            SELECT DATE_TRUNC('month', charter_date) AS period,
+                   COUNT(*) AS bookings
+            FROM charters
+            WHERE charter_date BETWEEN %s AND %s
+            GROUP BY 1
+            ORDER BY 1
+        """
+    else:
+        raise HTTPException(status_code=400, detail="unknown_report_type")
 
-    buf = io.StringIO()
-    w = csv.writer(buf)
-    w.writerow(headers)
-    for r in rows:
-        w.writerow(
-            [c.isoformat() if hasattr(c, "isoformat") else c for c in r]
-        )
-    data = buf.getvalue()
-    buf.close()
-    return Response(
-        content=data,
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": (
-                f"attachment; filename="
-                f'"{type}_{int(datetime.now().timestamp())}.csv"'
-            )
-        },
+    return export_response(
+        QueryExport(sql, (start, end)),
+        "csv",
+        f"{type}_{int(datetime.now().timestamp())}",
     )
 
 
@@ -213,32 +190,6 @@ def _parse_iso_date(
         ) from exc
 
 
-def _has_column(conn, table: str, column: str) -> bool:
-    """Check if a column exists before building dynamic queries."""
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT 1 FROM information_schema.columns
-            WHERE table_schema = 'public'
-              AND table_name = %s
-              AND column_name = %s
-            LIMIT 1
-            """,
-            (table, column),
-        )
-        return cur.fetchone() is not None
-
-
-def _first_existing_column(
-    conn, table: str, candidates: list[str]
-) -> str | None:
-    """Return first existing column name from candidates, else None."""
-    for col in candidates:
-        if _has_column(conn, table, col):
-            return col
-    return None
-
-
 def _charter_text_expr(col_name: str | None, fallback: str = "") -> str:
     if col_name:
         return f"COALESCE(c.{col_name}::text, '')"
@@ -253,77 +204,79 @@ def _charter_numeric_expr(col_name: str | None, fallback: str = "0") -> str:
 
 def _build_legacy_ops_select(conn) -> tuple[str, str | None]:
     """Build a schema-tolerant SELECT for legacy ops style report rows."""
-    reserve_col = _first_existing_column(
+    reserve_col = schema_catalog.first_existing_column(
         conn, "charters", ["reserve_number", "reserve_no", "order_number"]
     )
-    date_col = _first_existing_column(
+    date_col = schema_catalog.first_existing_column(
         conn,
         "charters",
         ["pickup_date", "charter_date", "order_date", "created_at"],
     )
-    amount_col = _first_existing_column(
+    amount_col = schema_catalog.first_existing_column(
         conn,
         "charters",
         ["total_amount_due", "amount", "total", "quoted_amount"],
     )
-    paid_col = _first_existing_column(
+    paid_col = schema_catalog.first_existing_column(
         conn, "charters", ["paid_amount", "total_paid"]
     )
 
-    destination_col = _first_existing_column(
+    destination_col = schema_catalog.first_existing_column(
         conn,
         "charters",
         ["dropoff_address", "destination"],
     )
-    passenger_col = _first_existing_column(
+    passenger_col = schema_catalog.first_existing_column(
         conn,
         "charters",
         ["client_display_name", "passenger_name", "client_name"],
     )
-    bill_to_col = _first_existing_column(
+    bill_to_col = schema_catalog.first_existing_column(
         conn,
         "charters",
         ["bill_to", "client_display_name", "client_name"],
     )
-    account_number_col = _first_existing_column(
+    account_number_col = schema_catalog.first_existing_column(
         conn, "charters", ["account_number"]
     )
-    account_type_col = _first_existing_column(
+    account_type_col = schema_catalog.first_existing_column(
         conn, "charters", ["account_type"]
     )
-    agency_number_col = _first_existing_column(
+    agency_number_col = schema_catalog.first_existing_column(
         conn, "charters", ["agency_number"]
     )
-    payment_type_col = _first_existing_column(
+    payment_type_col = schema_catalog.first_existing_column(
         conn, "charters", ["payment_type", "payment_method"]
     )
-    profit_center_col = _first_existing_column(
+    profit_center_col = schema_catalog.first_existing_column(
         conn, "charters", ["profit_center"]
     )
-    driver_col = _first_existing_column(
+    driver_col = schema_catalog.first_existing_column(
         conn, "charters", ["driver_name", "driver"]
     )
-    vehicle_col = _first_existing_column(
+    vehicle_col = schema_catalog.first_existing_column(
         conn, "charters", ["vehicle", "vehicle_number"]
     )
-    vehicle_type_col = _first_existing_column(
+    vehicle_type_col = schema_catalog.first_existing_column(
         conn,
         "charters",
         ["vehicle_type_requested", "vehicle_type", "vehicle_description"],
     )
-    run_type_col = _first_existing_column(
+    run_type_col = schema_catalog.first_existing_column(
         conn, "charters", ["run_type", "charter_type"]
     )
-    status_col = _first_existing_column(conn, "charters", ["status"])
-    sales_person_col = _first_existing_column(
+    status_col = schema_catalog.first_existing_column(
+        conn, "charters", ["status"]
+    )
+    sales_person_col = schema_catalog.first_existing_column(
         conn,
         "charters",
         ["sales_person", "taken_by", "booked_by", "created_by"],
     )
-    taken_by_col = _first_existing_column(
+    taken_by_col = schema_catalog.first_existing_column(
         conn, "charters", ["taken_by", "booked_by", "created_by"]
     )
-    group_number_col = _first_existing_column(
+    group_number_col = schema_catalog.first_existing_column(
         conn, "charters", ["group_number", "group_no"]
     )
     _date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
@@ -359,21 +312,54 @@ def _build_legacy_ops_select(conn) -> tuple[str, str | None]:
 
 
 def _to_csv_response(rows: list[dict[str, Any]], filename: str) -> Response:
-    headers = [] if not rows else list(rows[0].keys())
+    return export_response(rows, "csv", filename.removesuffix(".csv"))
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    if headers:
-        writer.writerow(headers)
-        for row in rows:
-            writer.writerow([row.get(h, "") for h in headers])
-    data = buffer.getvalue()
-    buffer.close()
-    return Response(
-        content=data,
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+
+def _report_record(*numeric: str, integer: tuple[str, ...] = ()):
+    """Row transform: ISO dates, floats for ``numeric``, ints for ``integer``."""
+
+    def convert(rec: dict[str, Any]) -> dict[str, Any]:
+        for key, value in rec.items():
+            if isinstance(value, (date, datetime)):
+                rec[key] = value.isoformat()
+        for f in numeric:
+            rec[f] = float(rec.get(f) or 0)
+        for f in integer:
+            rec[f] = int(rec.get(f) or 0)
+        return rec
+
+    return convert
+
+
+# Crystal group_by names -> columns of the legacy ops select.
+LEGACY_OPS_GROUP_COLUMNS: dict[str, str | None] = {
+    "none": None,
+    "account_number": "account_number",
+    "account_type": "account_type",
+    "agency_number": "agency_number",
+    "bill_to": "bill_to",
+    "destination": "destination",
+    "driver": "driver",
+    "group_number": "group_number",
+    "order_date": "order_date",
+    "order_number": "order_number",
+    "passenger_name": "passenger_name",
+    "payment_type": "payment_type",
+    "pickup_date": "order_date",
+    "profit_center": "profit_center",
+    "run_type": "run_type",
+    "sales_person": "sales_person",
+    "status": "status",
+    "taken_by": "taken_by",
+    "vehicle": "vehicle",
+    "vehicle_type": "vehicle_type",
+}
+
+_RECEIVABLE_MEASURES = (
+    Measure("total_amount", "amount"),
+    Measure("total_paid", "paid_amount"),
+    Measure("total_balance", "balance"),
+)
 
 
 @router.get("/legacy-ops")
@@ -397,12 +383,17 @@ def legacy_ops_report(
     include_cancelled: bool = True,
     limit: int = Query(2000, ge=1, le=50000),
     offset: int = Query(0, ge=0),
-    format: str = Query("json", regex="^(json|csv)$"),
+    summary_only: bool = False,
+    format: str = Query("json", regex="^(json|csv|ndjson)$"),
+    conn=Depends(get_db),
 ):
     """Schema-tolerant dataset endpoint for legacy Crystal ops reports.
 
     This endpoint is intentionally generic so many Crystal variants can be
     reproduced by changing report_family + group_by without duplicating code.
+
+    ``totals`` and ``groups`` cover every matching charter; ``items`` is
+    the ``limit``/``offset`` page of them (none with ``summary_only``).
     """
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = (
@@ -411,127 +402,79 @@ def legacy_ops_report(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        select_sql, date_col = _build_legacy_ops_select(conn)
-
-        conditions = []
-        params: list[Any] = []
-        if date_col:
-            conditions.append(f"c.{date_col}::date BETWEEN %s AND %s")
-            params.extend([start_dt.date(), end_dt.date()])
-
-        cancelled_col = _first_existing_column(conn, "charters", ["cancelled"])
-        if not include_cancelled and cancelled_col:
-            conditions.append(f"COALESCE(c.{cancelled_col}, false) = false")
+    select_sql, date_col = _build_legacy_ops_select(conn)
 
-        where_sql = ""
-        if conditions:
-            where_sql = " WHERE " + " AND ".join(conditions)
+    conditions = []
+    params: list[Any] = []
+    if date_col:
+        conditions.append(f"c.{date_col}::date BETWEEN %s AND %s")
+        params.extend([start_dt.date(), end_dt.date()])
 
-        sql = (
-            select_sql
-            + where_sql
-            + " ORDER BY order_date NULLS LAST, order_number"
-            + " LIMIT %s OFFSET %s"
+    cancelled_col = schema_catalog.first_existing_column(
+        conn, "charters", ["cancelled"]
+    )
+    if not include_cancelled and cancelled_col:
+        conditions.append(f"COALESCE(c.{cancelled_col}, false) = false")
+
+    where_sql = ""
+    if conditions:
+        where_sql = " WHERE " + " AND ".join(conditions)
+
+    base_sql = select_sql + where_sql
+    sql = (
+        base_sql
+        + " ORDER BY order_date NULLS LAST, order_number"
+        + " LIMIT %s OFFSET %s"
+    )
+    filename = (
+        f"{report_family}_{group_by}_{start_dt.date()}_{end_dt.date()}"
+    )
+    to_record = _report_record("amount", "paid_amount", "balance")
+    if format != "json" and group_by == "none":
+        return export_response(
+            QueryExport(sql, [*params, limit, offset], transform=to_record),
+            format,
+            filename,
         )
-        params.extend([limit, offset])
-
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-            col_names = [d[0] for d in cur.description]
-
-        items: list[dict[str, Any]] = []
-        for row in rows:
-            record = dict(zip(col_names, row, strict=False))
-            if hasattr(record.get("order_date"), "isoformat"):
-                record["order_date"] = record["order_date"].isoformat()
-            record["amount"] = float(record.get("amount") or 0)
-            record["paid_amount"] = float(record.get("paid_amount") or 0)
-            record["balance"] = float(record.get("balance") or 0)
-            items.append(record)
-
-        # Map Crystal naming to canonical item keys.
-        group_key_map = {
-            "pickup_date": "order_date",
-            "order_number": "order_number",
-            "order_date": "order_date",
-            "group_number": "group_number",
-            "account_number": "account_number",
-            "account_type": "account_type",
-            "agency_number": "agency_number",
-            "bill_to": "bill_to",
-            "destination": "destination",
-            "driver": "driver",
-            "passenger_name": "passenger_name",
-            "payment_type": "payment_type",
-            "profit_center": "profit_center",
-            "run_type": "run_type",
-            "sales_person": "sales_person",
-            "status": "status",
-            "taken_by": "taken_by",
-            "vehicle": "vehicle",
-            "vehicle_type": "vehicle_type",
-            "none": "",
-        }
-
-        grouped_rows: list[dict[str, Any]] = []
-        if group_by != "none":
-            key = group_key_map[group_by]
-            agg: dict[str, dict[str, Any]] = defaultdict(
-                lambda: {
-                    "group_value": "",
-                    "runs": 0,
-                    "total_amount": 0.0,
-                    "total_paid": 0.0,
-                    "total_balance": 0.0,
-                }
-            )
-            for item in items:
-                group_value = str(item.get(key) or "")
-                row = agg[group_value]
-                row["group_value"] = group_value
-                row["runs"] += 1
-                row["total_amount"] += float(item.get("amount") or 0)
-                row["total_paid"] += float(item.get("paid_amount") or 0)
-                row["total_balance"] += float(item.get("balance") or 0)
-            grouped_rows = list(agg.values())
-            grouped_rows.sort(key=lambda r: (r["group_value"] or "").lower())
-
-        totals = {
-            "runs": len(items),
-            "total_amount": round(sum(i["amount"] for i in items), 2),
-            "total_paid": round(sum(i["paid_amount"] for i in items), 2),
-            "total_balance": round(sum(i["balance"] for i in items), 2),
-        }
 
-        if format == "csv":
-            csv_rows = grouped_rows if group_by != "none" else items
-            filename = (
-                f"{report_family}_{group_by}_"
-                f"{start_dt.date()}_{end_dt.date()}.csv"
+    group_column = LEGACY_OPS_GROUP_COLUMNS[group_by]
+    items: list[dict[str, Any]] = []
+    if format == "json" and not summary_only:
+        read_snapshot(conn)
+        items = list(
+            iter_query(
+                conn, sql, [*params, limit, offset], transform=to_record
             )
-            return _to_csv_response(csv_rows, filename)
+        )
+    summary = summarize(
+        conn,
+        base_sql,
+        params,
+        _RECEIVABLE_MEASURES,
+        group_column=group_column,
+    )
+    if format != "json":
+        return export_response(summary.groups, format, filename)
 
-        return {
-            "report_family": report_family,
-            "group_by": group_by,
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "count": len(items),
-            "group_count": len(grouped_rows),
-            "totals": totals,
-            "items": items,
-            "groups": grouped_rows,
-            "notes": {
-                "schema_tolerant": True,
-                "date_column_used": date_col,
-                "csv_available": True,
-            },
-        }
-    finally:
-        conn.close()
+    return {
+        "report_family": report_family,
+        "group_by": group_by,
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "count": len(items),
+        "total_count": summary.totals["runs"],
+        "offset": offset,
+        "has_more": offset + len(items) < summary.totals["runs"],
+        "group_count": len(summary.groups),
+        "totals": summary.totals,
+        "items": items,
+        "groups": summary.groups,
+        "notes": {
+            "schema_tolerant": True,
+            "date_column_used": date_col,
+            "csv_available": True,
+        },
+    }
 
 
 # ── Phase 2 endpoints ────────────────────────────────────────────────────────
@@ -545,41 +488,40 @@ def long_trip_report(
     ),
     include_cancelled: bool = True,
     limit: int = Query(2000, ge=1, le=50000),
-    format: str = Query("json", regex="^(json|csv)$"),
+    format: str = Query("json", regex="^(json|csv|ndjson)$"),
+    conn=Depends(get_db),
 ):
     """Long-trip report -- charters with is_out_of_town or total_kms > 0."""
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = _parse_iso_date(start_date, end_dt - timedelta(days=365))
 
-    conn = get_connection()
-    try:
-        def fc(candidates):
-            return _first_existing_column(conn, "charters", candidates)
-
-        date_col = fc(["charter_date", "pickup_date", "created_at"])
-        reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
-        amount_col = fc(["total_amount_due", "amount", "total"])
-        paid_col = fc(["paid_amount", "total_paid"])
-        cancel_col = fc(["cancelled"])
-        oot_col = fc(["is_out_of_town"])
-        kms_col = fc(["total_kms"])
-        _pass_col = fc(["client_display_name", "client_name"])
-        _pick_col = fc(["pickup_address"])
-        _drop_col = fc(["dropoff_address", "destination"])
-        _drv_col = fc(["driver", "driver_name"])
-        _veh_col = fc(["vehicle"])
-        _odo_s_col = fc(["odometer_start"])
-        _odo_e_col = fc(["odometer_end"])
-        _stat_col = fc(["status"])
-        _date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
-
-        def t(col):
-            return f"COALESCE(c.{col}::text,'')" if col else "''"
-
-        def n(col):
-            return f"COALESCE(c.{col}::numeric,0)" if col else "0"
-
-        sel = f"""
+    def fc(candidates):
+        return schema_catalog.first_existing_column(conn, "charters", candidates)
+
+    date_col = fc(["charter_date", "pickup_date", "created_at"])
+    reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
+    amount_col = fc(["total_amount_due", "amount", "total"])
+    paid_col = fc(["paid_amount", "total_paid"])
+    cancel_col = fc(["cancelled"])
+    oot_col = fc(["is_out_of_town"])
+    kms_col = fc(["total_kms"])
+    _pass_col = fc(["client_display_name", "client_name"])
+    _pick_col = fc(["pickup_address"])
+    _drop_col = fc(["dropoff_address", "destination"])
+    _drv_col = fc(["driver", "driver_name"])
+    _veh_col = fc(["vehicle"])
+    _odo_s_col = fc(["odometer_start"])
+    _odo_e_col = fc(["odometer_end"])
+    _stat_col = fc(["status"])
+    _date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
+
+    def t(col):
+        return f"COALESCE(c.{col}::text,'')" if col else "''"
+
+    def n(col):
+        return f"COALESCE(c.{col}::numeric,0)" if col else "0"
+
+    sel = f"""
             SELECT
                 {t(reserve_col)} AS order_number,
                 {_date_expr} AS order_date,
@@ -597,95 +539,87 @@ def long_trip_report(
                 {t(_stat_col)} AS status
             FROM charters c
         """
-        conds: list[str] = []
-        params: list[Any] = []
-        if date_col:
-            conds.append(f"c.{date_col}::date BETWEEN %s AND %s")
-            params.extend([start_dt.date(), end_dt.date()])
-        trip_conds: list[str] = []
-        if oot_col:
-            trip_conds.append(f"COALESCE(c.{oot_col},false)=true")
-        if kms_col:
-            trip_conds.append(f"COALESCE(c.{kms_col},0)>0")
-        if trip_conds:
-            conds.append("(" + " OR ".join(trip_conds) + ")")
-        if not include_cancelled and cancel_col:
-            conds.append(f"COALESCE(c.{cancel_col},false)=false")
-        where = (" WHERE " + " AND ".join(conds)) if conds else ""
-        sql = (
-            sel
-            + where
-            + " ORDER BY order_date NULLS LAST,order_number LIMIT %s"
-        )
-        params.append(limit)
+    conds: list[str] = []
+    params: list[Any] = []
+    if date_col:
+        conds.append(f"c.{date_col}::date BETWEEN %s AND %s")
+        params.extend([start_dt.date(), end_dt.date()])
+    trip_conds: list[str] = []
+    if oot_col:
+        trip_conds.append(f"COALESCE(c.{oot_col},false)=true")
+    if kms_col:
+        trip_conds.append(f"COALESCE(c.{kms_col},0)>0")
+    if trip_conds:
+        conds.append("(" + " OR ".join(trip_conds) + ")")
+    if not include_cancelled and cancel_col:
+        conds.append(f"COALESCE(c.{cancel_col},false)=false")
+    where = (" WHERE " + " AND ".join(conds)) if conds else ""
+    sql = (
+        sel
+        + where
+        + " ORDER BY order_date NULLS LAST,order_number LIMIT %s"
+    )
+    params.append(limit)
+
+    filename = f"long_trip_{start_dt.date()}_{end_dt.date()}"
+    to_record = _report_record(
+        "amount",
+        "paid_amount",
+        "balance",
+        "total_kms",
+        "odometer_start",
+        "odometer_end",
+    )
+    if format != "json" and group_by == "none":
+        return export_response(
+            QueryExport(sql, params, transform=to_record), format, filename
+        )
+    # Grouped exports fold the streamed rows into groups as they arrive.
+    records = iter_query(conn, sql, params, transform=to_record)
+    items = list(records) if format == "json" else records
 
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-            col_names = [d[0] for d in cur.description]
-
-        items: list[dict[str, Any]] = []
-        for row in rows:
-            rec = dict(zip(col_names, row, strict=False))
-            if hasattr(rec.get("order_date"), "isoformat"):
-                rec["order_date"] = rec["order_date"].isoformat()
-            for f in (
-                "amount",
-                "paid_amount",
-                "balance",
-                "total_kms",
-                "odometer_start",
-                "odometer_end",
-            ):
-                rec[f] = float(rec.get(f) or 0)
-            items.append(rec)
-
-        totals = {
-            "runs": len(items),
-            "total_amount": round(sum(i["amount"] for i in items), 2),
-            "total_paid": round(sum(i["paid_amount"] for i in items), 2),
-            "total_balance": round(sum(i["balance"] for i in items), 2),
-            "total_kms": round(sum(i["total_kms"] for i in items), 1),
-        }
+    grouped: list[dict[str, Any]] = []
+    if group_by != "none":
+        agg: dict[str, Any] = defaultdict(
+            lambda: {
+                "group_value": "",
+                "runs": 0,
+                "total_amount": 0.0,
+                "total_paid": 0.0,
+                "total_balance": 0.0,
+                "total_kms": 0.0,
+            }
+        )
+        for item in items:
+            gv = str(item.get(group_by) or "")
+            r = agg[gv]
+            r["group_value"] = gv
+            r["runs"] += 1
+            r["total_amount"] += item["amount"]
+            r["total_paid"] += item["paid_amount"]
+            r["total_balance"] += item["balance"]
+            r["total_kms"] += item["total_kms"]
+        grouped = sorted(
+            agg.values(), key=lambda x: (x["group_value"] or "").lower()
+        )
 
-        grouped: list[dict[str, Any]] = []
-        if group_by != "none":
-            agg: dict[str, Any] = defaultdict(
-                lambda: {
-                    "group_value": "",
-                    "runs": 0,
-                    "total_amount": 0.0,
-                    "total_paid": 0.0,
-                    "total_balance": 0.0,
-                    "total_kms": 0.0,
-                }
-            )
-            for item in items:
-                gv = str(item.get(group_by) or "")
-                r = agg[gv]
-                r["group_value"] = gv
-                r["runs"] += 1
-                r["total_amount"] += item["amount"]
-                r["total_paid"] += item["paid_amount"]
-                r["total_balance"] += item["balance"]
-                r["total_kms"] += item["total_kms"]
-            grouped = sorted(
-                agg.values(), key=lambda x: (x["group_value"] or "").lower()
-            )
+    if format != "json":
+        return export_response(grouped, format, filename)
 
-        if format == "csv":
-            return _to_csv_response(
-                grouped if group_by != "none" else items,
-                f"long_trip_{start_dt.date()}_{end_dt.date()}.csv",
-            )
-        return {
-            "count": len(items),
-            "totals": totals,
-            "groups": grouped,
-            "items": items,
-        }
-    finally:
-        conn.close()
+    totals = {
+        "runs": len(items),
+        "total_amount": round(sum(i["amount"] for i in items), 2),
+        "total_paid": round(sum(i["paid_amount"] for i in items), 2),
+        "total_balance": round(sum(i["balance"] for i in items), 2),
+        "total_kms": round(sum(i["total_kms"] for i in items), 1),
+    }
+
+    return {
+        "count": len(items),
+        "totals": totals,
+        "groups": grouped,
+        "items": items,
+    }
 
 
 @router.get("/invoiced-charges")
@@ -698,24 +632,23 @@ def invoiced_charges_report(
     ),
     limit: int = Query(5000, ge=1, le=100000),
     format: str = Query("json", regex="^(json|csv)$"),
+    conn=Depends(get_db),
 ):
     """Charter charges detail report (charter_charges JOIN charters)."""
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = _parse_iso_date(start_date, end_dt - timedelta(days=365))
 
-    conn = get_connection()
-    try:
-        def fc(candidates):
-            return _first_existing_column(conn, "charters", candidates)
+    def fc(candidates):
+        return schema_catalog.first_existing_column(conn, "charters", candidates)
 
-        date_col = fc(["charter_date", "pickup_date", "created_at"])
-        client_col = fc(["client_display_name", "client_name"])
-        date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
-        client_expr = (
-            f"COALESCE(c.{client_col}::text,'')" if client_col else "''"
-        )
+    date_col = fc(["charter_date", "pickup_date", "created_at"])
+    client_col = fc(["client_display_name", "client_name"])
+    date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
+    client_expr = (
+        f"COALESCE(c.{client_col}::text,'')" if client_col else "''"
+    )
 
-        sql = f"""
+    sql = f"""
             SELECT cc.reserve_number,
                    {date_expr} AS charter_date,
                    {client_expr} AS client_name,
@@ -732,60 +665,58 @@ def invoiced_charges_report(
             ORDER BY charter_date NULLS LAST,cc.reserve_number
             LIMIT %s
         """
-        with conn.cursor() as cur:
-            cur.execute(sql, [start_dt.date(), end_dt.date(), limit])
-            rows = cur.fetchall()
-            col_names = [d[0] for d in cur.description]
-
-        items: list[dict[str, Any]] = []
-        for row in rows:
-            rec = dict(zip(col_names, row, strict=False))
-            if hasattr(rec.get("charter_date"), "isoformat"):
-                rec["charter_date"] = rec["charter_date"].isoformat()
-            for f in ("rate", "amount", "gst_amount"):
-                rec[f] = float(rec.get(f) or 0)
-            items.append(rec)
-
-        totals = {
-            "lines": len(items),
-            "total_amount": round(sum(i["amount"] for i in items), 2),
-            "total_gst": round(sum(i["gst_amount"] for i in items), 2),
-        }
+    with conn.cursor() as cur:
+        cur.execute(sql, [start_dt.date(), end_dt.date(), limit])
+        rows = cur.fetchall()
+        col_names = [d[0] for d in cur.description]
 
-        grouped: list[dict[str, Any]] = []
-        if group_by != "none":
-            agg: dict[str, Any] = defaultdict(
-                lambda: {
-                    "group_value": "",
-                    "runs": 0,
-                    "total_amount": 0.0,
-                    "total_gst": 0.0,
-                }
-            )
-            for item in items:
-                gv = str(item.get(group_by) or "")
-                r = agg[gv]
-                r["group_value"] = gv
-                r["runs"] += 1
-                r["total_amount"] += item["amount"]
-                r["total_gst"] += item["gst_amount"]
-            grouped = sorted(
-                agg.values(), key=lambda x: (x["group_value"] or "").lower()
-            )
+    items: list[dict[str, Any]] = []
+    for row in rows:
+        rec = dict(zip(col_names, row, strict=False))
+        if hasattr(rec.get("charter_date"), "isoformat"):
+            rec["charter_date"] = rec["charter_date"].isoformat()
+        for f in ("rate", "amount", "gst_amount"):
+            rec[f] = float(rec.get(f) or 0)
+        items.append(rec)
 
-        if format == "csv":
-            return _to_csv_response(
-                grouped if group_by != "none" else items,
-                f"invoiced_charges_{start_dt.date()}_{end_dt.date()}.csv",
-            )
-        return {
-            "count": len(items),
-            "totals": totals,
-            "groups": grouped,
-            "items": items,
-        }
-    finally:
-        conn.close()
+    totals = {
+        "lines": len(items),
+        "total_amount": round(sum(i["amount"] for i in items), 2),
+        "total_gst": round(sum(i["gst_amount"] for i in items), 2),
+    }
+
+    grouped: list[dict[str, Any]] = []
+    if group_by != "none":
+        agg: dict[str, Any] = defaultdict(
+            lambda: {
+                "group_value": "",
+                "runs": 0,
+                "total_amount": 0.0,
+                "total_gst": 0.0,
+            }
+        )
+        for item in items:
+            gv = str(item.get(group_by) or "")
+            r = agg[gv]
+            r["group_value"] = gv
+            r["runs"] += 1
+            r["total_amount"] += item["amount"]
+            r["total_gst"] += item["gst_amount"]
+        grouped = sorted(
+            agg.values(), key=lambda x: (x["group_value"] or "").lower()
+        )
+
+    if format == "csv":
+        return _to_csv_response(
+            grouped if group_by != "none" else items,
+            f"invoiced_charges_{start_dt.date()}_{end_dt.date()}.csv",
+        )
+    return {
+        "count": len(items),
+        "totals": totals,
+        "groups": grouped,
+        "items": items,
+    }
 
 
 @router.get("/driver-pay")
@@ -798,36 +729,35 @@ def driver_pay_report(
     ),
     limit: int = Query(2000, ge=1, le=50000),
     format: str = Query("json", regex="^(json|csv)$"),
+    conn=Depends(get_db),
 ):
     """Driver pay report from charter pay columns."""
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = _parse_iso_date(start_date, end_dt - timedelta(days=365))
 
-    conn = get_connection()
-    try:
-        def fc(candidates):
-            return _first_existing_column(conn, "charters", candidates)
+    def fc(candidates):
+        return schema_catalog.first_existing_column(conn, "charters", candidates)
 
-        date_col = fc(["charter_date", "pickup_date", "created_at"])
-        reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
-        base_col = fc(["driver_base_pay"])
-        grat_col = fc(["driver_gratuity"])
-        total_col = fc(["driver_total_expense"])
-        hours_col = fc(["driver_hours_worked"])
-        rate_col = fc(["driver_hourly_rate"])
-        paid_col = fc(["driver_paid"])
-        ctype_col = fc(["charter_type", "run_type"])
+    date_col = fc(["charter_date", "pickup_date", "created_at"])
+    reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
+    base_col = fc(["driver_base_pay"])
+    grat_col = fc(["driver_gratuity"])
+    total_col = fc(["driver_total_expense"])
+    hours_col = fc(["driver_hours_worked"])
+    rate_col = fc(["driver_hourly_rate"])
+    paid_col = fc(["driver_paid"])
+    ctype_col = fc(["charter_type", "run_type"])
 
-        def t(col):
-            return f"COALESCE(c.{col}::text,'')" if col else "''"
+    def t(col):
+        return f"COALESCE(c.{col}::text,'')" if col else "''"
 
-        def n(col):
-            return f"COALESCE(c.{col}::numeric,0)" if col else "0"
+    def n(col):
+        return f"COALESCE(c.{col}::numeric,0)" if col else "0"
 
-        date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
-        paid_expr = f"COALESCE(c.{paid_col}::text,'')" if paid_col else "''"
+    date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
+    paid_expr = f"COALESCE(c.{paid_col}::text,'')" if paid_col else "''"
 
-        sql = f"""
+    sql = f"""
             SELECT
                 {t(reserve_col)} AS order_number,
                 {date_expr} AS order_date,
@@ -846,76 +776,74 @@ def driver_pay_report(
             ORDER BY order_date NULLS LAST,driver
             LIMIT %s
         """
-        with conn.cursor() as cur:
-            cur.execute(sql, [start_dt.date(), end_dt.date(), limit])
-            rows = cur.fetchall()
-            col_names = [d[0] for d in cur.description]
-
-        items: list[dict[str, Any]] = []
-        for row in rows:
-            rec = dict(zip(col_names, row, strict=False))
-            if hasattr(rec.get("order_date"), "isoformat"):
-                rec["order_date"] = rec["order_date"].isoformat()
-            for f in (
-                "driver_hours_worked",
-                "driver_hourly_rate",
-                "driver_base_pay",
-                "driver_gratuity",
-                "driver_total_expense",
-            ):
-                rec[f] = float(rec.get(f) or 0)
-            items.append(rec)
-
-        _tp_base = round(sum(i["driver_base_pay"] for i in items), 2)
-        _tp_grat = round(sum(i["driver_gratuity"] for i in items), 2)
-        _tp_pay = round(sum(i["driver_total_expense"] for i in items), 2)
-        _tp_hrs = round(sum(i["driver_hours_worked"] for i in items), 2)
-        totals = {
-            "runs": len(items),
-            "total_base_pay": _tp_base,
-            "total_gratuity": _tp_grat,
-            "total_pay": _tp_pay,
-            "total_hours": _tp_hrs,
-        }
+    with conn.cursor() as cur:
+        cur.execute(sql, [start_dt.date(), end_dt.date(), limit])
+        rows = cur.fetchall()
+        col_names = [d[0] for d in cur.description]
 
-        grouped: list[dict[str, Any]] = []
-        if group_by != "none":
-            agg: dict[str, Any] = defaultdict(
-                lambda: {
-                    "group_value": "",
-                    "runs": 0,
-                    "total_base_pay": 0.0,
-                    "total_gratuity": 0.0,
-                    "total_pay": 0.0,
-                    "total_hours": 0.0,
-                }
-            )
-            for item in items:
-                gv = str(item.get(group_by) or "")
-                r = agg[gv]
-                r["group_value"] = gv
-                r["runs"] += 1
-                r["total_base_pay"] += item["driver_base_pay"]
-                r["total_gratuity"] += item["driver_gratuity"]
-                r["total_pay"] += item["driver_total_expense"]
-                r["total_hours"] += item["driver_hours_worked"]
-            grouped = sorted(
-                agg.values(), key=lambda x: (x["group_value"] or "").lower()
-            )
+    items: list[dict[str, Any]] = []
+    for row in rows:
+        rec = dict(zip(col_names, row, strict=False))
+        if hasattr(rec.get("order_date"), "isoformat"):
+            rec["order_date"] = rec["order_date"].isoformat()
+        for f in (
+            "driver_hours_worked",
+            "driver_hourly_rate",
+            "driver_base_pay",
+            "driver_gratuity",
+            "driver_total_expense",
+        ):
+            rec[f] = float(rec.get(f) or 0)
+        items.append(rec)
 
-        if format == "csv":
-            return _to_csv_response(
-                grouped if group_by != "none" else items,
-                f"driver_pay_{start_dt.date()}_{end_dt.date()}.csv",
-            )
-        return {
-            "count": len(items),
-            "totals": totals,
-            "groups": grouped,
-            "items": items,
-        }
-    finally:
-        conn.close()
+    _tp_base = round(sum(i["driver_base_pay"] for i in items), 2)
+    _tp_grat = round(sum(i["driver_gratuity"] for i in items), 2)
+    _tp_pay = round(sum(i["driver_total_expense"] for i in items), 2)
+    _tp_hrs = round(sum(i["driver_hours_worked"] for i in items), 2)
+    totals = {
+        "runs": len(items),
+        "total_base_pay": _tp_base,
+        "total_gratuity": _tp_grat,
+        "total_pay": _tp_pay,
+        "total_hours": _tp_hrs,
+    }
+
+    grouped: list[dict[str, Any]] = []
+    if group_by != "none":
+        agg: dict[str, Any] = defaultdict(
+            lambda: {
+                "group_value": "",
+                "runs": 0,
+                "total_base_pay": 0.0,
+                "total_gratuity": 0.0,
+                "total_pay": 0.0,
+                "total_hours": 0.0,
+            }
+        )
+        for item in items:
+            gv = str(item.get(group_by) or "")
+            r = agg[gv]
+            r["group_value"] = gv
+            r["runs"] += 1
+            r["total_base_pay"] += item["driver_base_pay"]
+            r["total_gratuity"] += item["driver_gratuity"]
+            r["total_pay"] += item["driver_total_expense"]
+            r["total_hours"] += item["driver_hours_worked"]
+        grouped = sorted(
+            agg.values(), key=lambda x: (x["group_value"] or "").lower()
+        )
+
+    if format == "csv":
+        return _to_csv_response(
+            grouped if group_by != "none" else items,
+            f"driver_pay_{start_dt.date()}_{end_dt.date()}.csv",
+        )
+    return {
+        "count": len(items),
+        "totals": totals,
+        "groups": grouped,
+        "items": items,
+    }
 
 
 @router.get("/fleet")
@@ -992,56 +920,55 @@ def client_activity_report(
     ),
     include_cancelled: bool = True,
     limit: int = Query(5000, ge=1, le=50000),
-    format: str = Query("json", regex="^(json|csv)$"),
+    format: str = Query("json", regex="^(json|csv|ndjson)$"),
+    conn=Depends(get_db),
 ):
     """Charter activity per client/account (charters LEFT JOIN clients)."""
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = _parse_iso_date(start_date, end_dt - timedelta(days=365))
 
-    conn = get_connection()
-    try:
-        def fc(tbl, candidates):
-            return _first_existing_column(conn, tbl, candidates)
-
-        date_col = fc(
-            "charters", ["charter_date", "pickup_date", "created_at"]
-        )
-        reserve_col = fc(
-            "charters", ["reserve_number", "reserve_no", "order_number"]
-        )
-        amount_col = fc("charters", ["total_amount_due", "amount", "total"])
-        paid_col = fc("charters", ["paid_amount", "total_paid"])
-        cancel_col = fc("charters", ["cancelled"])
-        acct_col = fc("charters", ["account_number"])
-        client_col = fc("charters", ["client_display_name", "client_name"])
-        ctype_col = fc("charters", ["charter_type", "run_type"])
-        acct_cl = fc("clients",  ["account_number"])
-        company_col = fc("clients",  ["company_name", "client_name", "name"])
-
-        def t(tbl, col):
-            return f"COALESCE({tbl}.{col}::text,'')" if col else "''"
+    def fc(tbl, candidates):
+        return schema_catalog.first_existing_column(conn, tbl, candidates)
 
-        def n(col):
-            return f"COALESCE(c.{col}::numeric,0)" if col else "0"
+    date_col = fc(
+        "charters", ["charter_date", "pickup_date", "created_at"]
+    )
+    reserve_col = fc(
+        "charters", ["reserve_number", "reserve_no", "order_number"]
+    )
+    amount_col = fc("charters", ["total_amount_due", "amount", "total"])
+    paid_col = fc("charters", ["paid_amount", "total_paid"])
+    cancel_col = fc("charters", ["cancelled"])
+    acct_col = fc("charters", ["account_number"])
+    client_col = fc("charters", ["client_display_name", "client_name"])
+    ctype_col = fc("charters", ["charter_type", "run_type"])
+    acct_cl = fc("clients",  ["account_number"])
+    company_col = fc("clients",  ["company_name", "client_name", "name"])
+
+    def t(tbl, col):
+        return f"COALESCE({tbl}.{col}::text,'')" if col else "''"
+
+    def n(col):
+        return f"COALESCE(c.{col}::numeric,0)" if col else "0"
+
+    date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
+    company_expr = (
+        f"COALESCE(cl.{company_col}::text,'')" if company_col else "''"
+    )
+    acct_join = (
+        f"c.{acct_col}=cl.{acct_cl}" if acct_col and acct_cl else "false"
+    )
 
-        date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
-        company_expr = (
-            f"COALESCE(cl.{company_col}::text,'')" if company_col else "''"
-        )
-        acct_join = (
-            f"c.{acct_col}=cl.{acct_cl}" if acct_col and acct_cl else "false"
-        )
+    conds: list[str] = []
+    params: list[Any] = []
+    if date_col:
+        conds.append(f"c.{date_col}::date BETWEEN %s AND %s")
+        params.extend([start_dt.date(), end_dt.date()])
+    if not include_cancelled and cancel_col:
+        conds.append(f"COALESCE(c.{cancel_col},false)=false")
+    where = (" WHERE " + " AND ".join(conds)) if conds else ""
 
-        conds: list[str] = []
-        params: list[Any] = []
-        if date_col:
-            conds.append(f"c.{date_col}::date BETWEEN %s AND %s")
-            params.extend([start_dt.date(), end_dt.date()])
-        if not include_cancelled and cancel_col:
-            conds.append(f"COALESCE(c.{cancel_col},false)=false")
-        where = (" WHERE " + " AND ".join(conds)) if conds else ""
-
-        sql = f"""
+    sql = f"""
             SELECT {t('c', reserve_col)} AS order_number,
                    {date_expr} AS order_date,
                    {t('c', acct_col)} AS account_number,
@@ -1056,83 +983,74 @@ def client_activity_report(
             ORDER BY account_number, order_date
             LIMIT %s
         """
-        params.append(limit)
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-            col_names = [d[0] for d in cur.description]
-
-        items: list[dict[str, Any]] = []
-        for row in rows:
-            rec = dict(zip(col_names, row, strict=False))
-            if hasattr(rec.get("order_date"), "isoformat"):
-                rec["order_date"] = rec["order_date"].isoformat()
-            for f in ("amount", "paid_amount", "balance"):
-                rec[f] = float(rec.get(f) or 0)
-            items.append(rec)
-
-        totals = {
-            "runs": len(items),
-            "total_amount": round(sum(i["amount"] for i in items), 2),
-            "total_paid": round(sum(i["paid_amount"] for i in items), 2),
-            "total_balance": round(sum(i["balance"] for i in items), 2),
-        }
-        grouped: list[dict[str, Any]] = []
-        if group_by != "none":
-            agg: dict[str, Any] = defaultdict(
-                lambda: {
-                    "group_value": "",
-                    "company_name": "",
-                    "runs": 0,
-                    "total_amount": 0.0,
-                    "total_paid": 0.0,
-                    "total_balance": 0.0,
-                }
-            )
-            for item in items:
-                gv = str(item.get(group_by) or "")
-                r = agg[gv]
-                r["group_value"] = gv
-                r["company_name"] = item.get("company_name", "")
-                r["runs"] += 1
-                r["total_amount"] += item["amount"]
-                r["total_paid"] += item["paid_amount"]
-                r["total_balance"] += item["balance"]
-            grouped = sorted(
-                agg.values(), key=lambda x: (x["group_value"] or "").lower()
-            )
-
-        if format == "csv":
-            return _to_csv_response(
-                grouped if group_by != "none" else items,
-                f"client_activity_{start_dt.date()}_{end_dt.date()}.csv",
-            )
-        return {
-            "count": len(items),
-            "totals": totals,
-            "groups": grouped,
-            "items": items,
-        }
-    finally:
-        conn.close()
-
+    params.append(limit)
+    filename = f"client_activity_{start_dt.date()}_{end_dt.date()}"
+    to_record = _report_record("amount", "paid_amount", "balance")
+    if format != "json" and group_by == "none":
+        return export_response(
+            QueryExport(sql, params, transform=to_record), format, filename
+        )
+    # Grouped exports fold the streamed rows into groups as they arrive.
+    records = iter_query(conn, sql, params, transform=to_record)
+    items = list(records) if format == "json" else records
 
-@router.get("/payment-list")
-def payment_list_report(
-    start_date: str | None = None,
-    end_date: str | None = None,
+    grouped: list[dict[str, Any]] = []
+    if group_by != "none":
+        agg: dict[str, Any] = defaultdict(
+            lambda: {
+                "group_value": "",
+                "company_name": "",
+                "runs": 0,
+                "total_amount": 0.0,
+                "total_paid": 0.0,
+                "total_balance": 0.0,
+            }
+        )
+        for item in items:
+            gv = str(item.get(group_by) or "")
+            r = agg[gv]
+            r["group_value"] = gv
+            r["company_name"] = item.get("company_name", "")
+            r["runs"] += 1
+            r["total_amount"] += item["amount"]
+            r["total_paid"] += item["paid_amount"]
+            r["total_balance"] += item["balance"]
+        grouped = sorted(
+            agg.values(), key=lambda x: (x["group_value"] or "").lower()
+        )
+
+    if format != "json":
+        return export_response(grouped, format, filename)
+
+    totals = {
+        "runs": len(items),
+        "total_amount": round(sum(i["amount"] for i in items), 2),
+        "total_paid": round(sum(i["paid_amount"] for i in items), 2),
+        "total_balance": round(sum(i["balance"] for i in items), 2),
+    }
+    return {
+        "count": len(items),
+        "totals": totals,
+        "groups": grouped,
+        "items": items,
+    }
+
+
+@router.get("/payment-list")
+def payment_list_report(
+    start_date: str | None = None,
+    end_date: str | None = None,
     group_by: str = Query(
         "none", regex="^(none|payment_method|source|client_name)$"
     ),
     limit: int = Query(10000, ge=1, le=100000),
-    format: str = Query("json", regex="^(json|csv)$"),
+    format: str = Query("json", regex="^(json|csv|ndjson)$"),
 ):
     """All charter payments within a date range (charter_payments table)."""
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = _parse_iso_date(start_date, end_dt - timedelta(days=365))
 
-    with cursor() as cur:
-        cur.execute("""
+    sql = """
             SELECT payment_date,
                    COALESCE(client_name,'') AS client_name,
                    COALESCE(charter_id::text,'') AS charter_id,
@@ -1144,22 +1062,15 @@ def payment_list_report(
             WHERE payment_date BETWEEN %s AND %s
             ORDER BY payment_date, client_name
             LIMIT %s
-        """, [start_dt.date(), end_dt.date(), limit])
-        rows = cur.fetchall()
-        col_names = [d[0] for d in cur.description]
-
-    items: list[dict[str, Any]] = []
-    for row in rows:
-        rec = dict(zip(col_names, row, strict=False))
-        if hasattr(rec.get("payment_date"), "isoformat"):
-            rec["payment_date"] = rec["payment_date"].isoformat()
-        rec["amount"] = float(rec.get("amount") or 0)
-        items.append(rec)
+        """
+    params = [start_dt.date(), end_dt.date(), limit]
+    filename = f"payments_{start_dt.date()}_{end_dt.date()}"
+    records = QueryExport(sql, params, transform=_report_record("amount"))
+    if format != "json" and group_by == "none":
+        return export_response(records, format, filename)
+    # Grouped exports fold the streamed rows into groups as they arrive.
+    items = list(records) if format == "json" else records
 
-    totals = {
-        "runs": len(items),
-        "total_amount": round(sum(i["amount"] for i in items), 2),
-    }
     grouped: list[dict[str, Any]] = []
     if group_by != "none":
         agg: dict[str, Any] = defaultdict(
@@ -1175,11 +1086,13 @@ def payment_list_report(
             agg.values(), key=lambda x: (x["group_value"] or "").lower()
         )
 
-    if format == "csv":
-        return _to_csv_response(
-            grouped if group_by != "none" else items,
-            f"payments_{start_dt.date()}_{end_dt.date()}.csv",
-        )
+    if format != "json":
+        return export_response(grouped, format, filename)
+
+    totals = {
+        "runs": len(items),
+        "total_amount": round(sum(i["amount"] for i in items), 2),
+    }
     return {
         "count": len(items),
         "totals": totals,
@@ -1195,38 +1108,43 @@ def aged_receivables_report(
     ),
     include_cancelled: bool = True,
     limit: int = Query(5000, ge=1, le=50000),
-    format: str = Query("json", regex="^(json|csv)$"),
+    offset: int = Query(0, ge=0),
+    summary_only: bool = False,
+    format: str = Query("json", regex="^(json|csv|ndjson)$"),
+    conn=Depends(get_db),
 ):
-    """Unpaid charters, aging brackets — all-time, no date filter."""
-    conn = get_connection()
-    try:
-        def fc(candidates):
-            return _first_existing_column(conn, "charters", candidates)
+    """Unpaid charters, aging brackets — all-time, no date filter.
+
+    ``totals`` and ``groups`` cover every unpaid charter; ``items`` is the
+    ``limit``/``offset`` page of them (none with ``summary_only``).
+    """
+    def fc(candidates):
+        return schema_catalog.first_existing_column(conn, "charters", candidates)
 
-        date_col = fc(["charter_date", "pickup_date", "created_at"])
-        reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
-        amount_col = fc(["total_amount_due", "amount", "total"])
-        paid_col = fc(["paid_amount", "total_paid"])
-        cancel_col = fc(["cancelled"])
-        acct_col = fc(["account_number"])
-        client_col = fc(["client_display_name", "client_name"])
-        driver_col = fc(["driver", "driver_name"])
+    date_col = fc(["charter_date", "pickup_date", "created_at"])
+    reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
+    amount_col = fc(["total_amount_due", "amount", "total"])
+    paid_col = fc(["paid_amount", "total_paid"])
+    cancel_col = fc(["cancelled"])
+    acct_col = fc(["account_number"])
+    client_col = fc(["client_display_name", "client_name"])
+    driver_col = fc(["driver", "driver_name"])
 
-        def t(col):
-            return f"COALESCE(c.{col}::text,'')" if col else "''"
+    def t(col):
+        return f"COALESCE(c.{col}::text,'')" if col else "''"
 
-        def n(col):
-            return f"COALESCE(c.{col}::numeric,0)" if col else "0"
+    def n(col):
+        return f"COALESCE(c.{col}::numeric,0)" if col else "0"
 
-        date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
+    date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
 
-        conds: list[str] = []
-        params: list[Any] = []
-        if not include_cancelled and cancel_col:
-            conds.append(f"COALESCE(c.{cancel_col},false)=false")
-        extra = (" AND " + " AND ".join(conds)) if conds else ""
+    conds: list[str] = []
+    params: list[Any] = []
+    if not include_cancelled and cancel_col:
+        conds.append(f"COALESCE(c.{cancel_col},false)=false")
+    extra = (" AND " + " AND ".join(conds)) if conds else ""
 
-        sql = f"""
+    base_sql = f"""
             SELECT {t(reserve_col)} AS order_number,
                    {date_expr} AS order_date,
                    {t(client_col)} AS passenger_name,
@@ -1249,68 +1167,53 @@ def aged_receivables_report(
                    END AS age_bracket
             FROM charters c
             WHERE ({n(amount_col)}-{n(paid_col)})>0{extra}
-            ORDER BY order_date NULLS LAST
-            LIMIT %s
         """
-        params.append(limit)
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-            col_names = [d[0] for d in cur.description]
-
-        items: list[dict[str, Any]] = []
-        for row in rows:
-            rec = dict(zip(col_names, row, strict=False))
-            if hasattr(rec.get("order_date"), "isoformat"):
-                rec["order_date"] = rec["order_date"].isoformat()
-            for f in ("amount", "paid_amount", "balance"):
-                rec[f] = float(rec.get(f) or 0)
-            rec["days_outstanding"] = int(rec.get("days_outstanding") or 0)
-            items.append(rec)
-
-        totals = {
-            "runs": len(items),
-            "total_amount": round(sum(i["amount"] for i in items), 2),
-            "total_paid": round(sum(i["paid_amount"] for i in items), 2),
-            "total_balance": round(sum(i["balance"] for i in items), 2),
-        }
-        grouped: list[dict[str, Any]] = []
-        if group_by != "none":
-            agg: dict[str, Any] = defaultdict(
-                lambda: {
-                    "group_value": "",
-                    "runs": 0,
-                    "total_amount": 0.0,
-                    "total_balance": 0.0,
-                }
-            )
-            for item in items:
-                gv = str(item.get(group_by) or "")
-                r = agg[gv]
-                r["group_value"] = gv
-                r["runs"] += 1
-                r["total_amount"] += item["amount"]
-                r["total_balance"] += item["balance"]
-            grouped = sorted(
-                agg.values(), key=lambda x: (x["group_value"] or "").lower()
-            )
+    sql = base_sql + " ORDER BY order_date NULLS LAST LIMIT %s OFFSET %s"
+    filename = "aged_receivables"
+    to_record = _report_record(
+        "amount",
+        "paid_amount",
+        "balance",
+        integer=("days_outstanding",),
+    )
+    if format != "json" and group_by == "none":
+        return export_response(
+            QueryExport(sql, [*params, limit, offset], transform=to_record),
+            format,
+            filename,
+        )
 
-        if format == "csv":
-            return _to_csv_response(
-                grouped if group_by != "none" else items,
-                "aged_receivables.csv",
+    items: list[dict[str, Any]] = []
+    if format == "json" and not summary_only:
+        read_snapshot(conn)
+        items = list(
+            iter_query(
+                conn, sql, [*params, limit, offset], transform=to_record
             )
-        return {
-            "count": len(items),
-            "totals": totals,
-            "groups": grouped,
-            "items": items,
-        }
-    finally:
-        conn.close()
+        )
+    summary = summarize(
+        conn,
+        base_sql,
+        params,
+        _RECEIVABLE_MEASURES,
+        group_column=None if group_by == "none" else group_by,
+    )
+    if format != "json":
+        return export_response(summary.groups, format, filename)
+
+    return {
+        "count": len(items),
+        "total_count": summary.totals["runs"],
+        "offset": offset,
+        "has_more": offset + len(items) < summary.totals["runs"],
+        "totals": summary.totals,
+        "groups": summary.groups,
+        "items": items,
+    }
 
 
 @router.get("/income-summary")
+@cached_report("income-summary", tables=("income_ledger",))
 def income_summary_report(
     start_date: str | None = None,
     end_date: str | None = None,
@@ -1411,51 +1314,50 @@ def short_trip_report(
     ),
     include_cancelled: bool = True,
     limit: int = Query(5000, ge=1, le=50000),
-    format: str = Query("json", regex="^(json|csv)$"),
+    format: str = Query("json", regex="^(json|csv|ndjson)$"),
+    conn=Depends(get_db),
 ):
     """Short/local trips (is_out_of_town=false AND total_kms=0)."""
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = _parse_iso_date(start_date, end_dt - timedelta(days=365))
 
-    conn = get_connection()
-    try:
-        def fc(candidates):
-            return _first_existing_column(conn, "charters", candidates)
-
-        date_col = fc(["charter_date", "pickup_date", "created_at"])
-        reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
-        amount_col = fc(["total_amount_due", "amount", "total"])
-        paid_col = fc(["paid_amount", "total_paid"])
-        cancel_col = fc(["cancelled"])
-        oot_col = fc(["is_out_of_town"])
-        kms_col = fc(["total_kms"])
-        _pass_col = fc(["client_display_name", "client_name"])
-
-        def t(col):
-            return f"COALESCE(c.{col}::text,'')" if col else "''"
-
-        def n(col):
-            return f"COALESCE(c.{col}::numeric,0)" if col else "0"
-
-        date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
-
-        conds: list[str] = []
-        params: list[Any] = []
-        if date_col:
-            conds.append(f"c.{date_col}::date BETWEEN %s AND %s")
-            params.extend([start_dt.date(), end_dt.date()])
-        short_conds: list[str] = []
-        if oot_col:
-            short_conds.append(f"COALESCE(c.{oot_col},false)=false")
-        if kms_col:
-            short_conds.append(f"COALESCE(c.{kms_col},0)=0")
-        if short_conds:
-            conds.append("(" + " AND ".join(short_conds) + ")")
-        if not include_cancelled and cancel_col:
-            conds.append(f"COALESCE(c.{cancel_col},false)=false")
-        where = (" WHERE " + " AND ".join(conds)) if conds else ""
-
-        sql = f"""
+    def fc(candidates):
+        return schema_catalog.first_existing_column(conn, "charters", candidates)
+
+    date_col = fc(["charter_date", "pickup_date", "created_at"])
+    reserve_col = fc(["reserve_number", "reserve_no", "order_number"])
+    amount_col = fc(["total_amount_due", "amount", "total"])
+    paid_col = fc(["paid_amount", "total_paid"])
+    cancel_col = fc(["cancelled"])
+    oot_col = fc(["is_out_of_town"])
+    kms_col = fc(["total_kms"])
+    _pass_col = fc(["client_display_name", "client_name"])
+
+    def t(col):
+        return f"COALESCE(c.{col}::text,'')" if col else "''"
+
+    def n(col):
+        return f"COALESCE(c.{col}::numeric,0)" if col else "0"
+
+    date_expr = f"c.{date_col}::date" if date_col else "NULL::date"
+
+    conds: list[str] = []
+    params: list[Any] = []
+    if date_col:
+        conds.append(f"c.{date_col}::date BETWEEN %s AND %s")
+        params.extend([start_dt.date(), end_dt.date()])
+    short_conds: list[str] = []
+    if oot_col:
+        short_conds.append(f"COALESCE(c.{oot_col},false)=false")
+    if kms_col:
+        short_conds.append(f"COALESCE(c.{kms_col},0)=0")
+    if short_conds:
+        conds.append("(" + " AND ".join(short_conds) + ")")
+    if not include_cancelled and cancel_col:
+        conds.append(f"COALESCE(c.{cancel_col},false)=false")
+    where = (" WHERE " + " AND ".join(conds)) if conds else ""
+
+    sql = f"""
             SELECT {t(reserve_col)} AS order_number,
                    {date_expr} AS order_date,
                    {t(_pass_col)} AS passenger_name,
@@ -1473,72 +1375,66 @@ def short_trip_report(
             ORDER BY order_date NULLS LAST, order_number
             LIMIT %s
         """
-        params.append(limit)
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-            col_names = [d[0] for d in cur.description]
-
-        items: list[dict[str, Any]] = []
-        for row in rows:
-            rec = dict(zip(col_names, row, strict=False))
-            if hasattr(rec.get("order_date"), "isoformat"):
-                rec["order_date"] = rec["order_date"].isoformat()
-            for f in ("amount", "paid_amount", "balance"):
-                rec[f] = float(rec.get(f) or 0)
-            items.append(rec)
-
-        totals = {
-            "runs": len(items),
-            "total_amount": round(sum(i["amount"] for i in items), 2),
-            "total_paid": round(sum(i["paid_amount"] for i in items), 2),
-            "total_balance": round(sum(i["balance"] for i in items), 2),
-        }
-        grouped: list[dict[str, Any]] = []
-        if group_by != "none":
-            agg: dict[str, Any] = defaultdict(
-                lambda: {
-                    "group_value": "",
-                    "runs": 0,
-                    "total_amount": 0.0,
-                    "total_paid": 0.0,
-                    "total_balance": 0.0,
-                }
-            )
-            for item in items:
-                gv = str(item.get(group_by) or "")
-                r = agg[gv]
-                r["group_value"] = gv
-                r["runs"] += 1
-                r["total_amount"] += item["amount"]
-                r["total_paid"] += item["paid_amount"]
-                r["total_balance"] += item["balance"]
-            grouped = sorted(
-                agg.values(), key=lambda x: (x["group_value"] or "").lower()
-            )
+    params.append(limit)
+    filename = f"short_trip_{start_dt.date()}_{end_dt.date()}"
+    to_record = _report_record("amount", "paid_amount", "balance")
+    if format != "json" and group_by == "none":
+        return export_response(
+            QueryExport(sql, params, transform=to_record), format, filename
+        )
+    # Grouped exports fold the streamed rows into groups as they arrive.
+    records = iter_query(conn, sql, params, transform=to_record)
+    items = list(records) if format == "json" else records
 
-        if format == "csv":
-            return _to_csv_response(
-                grouped if group_by != "none" else items,
-                f"short_trip_{start_dt.date()}_{end_dt.date()}.csv",
-            )
-        return {
-            "count": len(items),
-            "totals": totals,
-            "groups": grouped,
-            "items": items,
-        }
-    finally:
-        conn.close()
+    grouped: list[dict[str, Any]] = []
+    if group_by != "none":
+        agg: dict[str, Any] = defaultdict(
+            lambda: {
+                "group_value": "",
+                "runs": 0,
+                "total_amount": 0.0,
+                "total_paid": 0.0,
+                "total_balance": 0.0,
+            }
+        )
+        for item in items:
+            gv = str(item.get(group_by) or "")
+            r = agg[gv]
+            r["group_value"] = gv
+            r["runs"] += 1
+            r["total_amount"] += item["amount"]
+            r["total_paid"] += item["paid_amount"]
+            r["total_balance"] += item["balance"]
+        grouped = sorted(
+            agg.values(), key=lambda x: (x["group_value"] or "").lower()
+        )
+
+    if format != "json":
+        return export_response(grouped, format, filename)
+
+    totals = {
+        "runs": len(items),
+        "total_amount": round(sum(i["amount"] for i in items), 2),
+        "total_paid": round(sum(i["paid_amount"] for i in items), 2),
+        "total_balance": round(sum(i["balance"] for i in items), 2),
+    }
+    return {
+        "count": len(items),
+        "totals": totals,
+        "groups": grouped,
+        "items": items,
+    }
 
 
 @router.get("/trial-balance")
+@cached_report("trial-balance", tables=("general_ledger",))
 def trial_balance(as_of: str | None = None):
     """Return trial balance as of a date, aggregated by account."""
     as_of_date = _parse_iso_date(as_of, datetime.now()).date()
+    ensure_schema()
     with cursor() as cur:
         cur.execute(
-            """
+            f"""
             SELECT
                 account_name,
                 account,
@@ -1546,13 +1442,12 @@ def trial_balance(as_of: str | None = None):
                 COALESCE(SUM(debit), 0) AS total_debit,
                 COALESCE(SUM(credit), 0) AS total_credit,
                 COALESCE(SUM(debit), 0) - COALESCE(SUM(credit), 0) AS balance
-            FROM general_ledger
-            WHERE date <= %s
+            FROM ({LEDGER_PERIOD_SQL}) gl
             GROUP BY account_name, account, account_type
             HAVING COALESCE(SUM(debit), 0) - COALESCE(SUM(credit), 0) != 0
             ORDER BY account_name
             """,
-            (as_of_date,),
+            ledger_period_params(None, as_of_date),
         )
         rows = cur.fetchall()
 
@@ -1577,6 +1472,14 @@ def trial_balance(as_of: str | None = None):
     return {"as_o": str(as_of_date), "accounts": accounts, "totals": totals}
 
 
+@router.get("/gl-rollups/check")
+def gl_rollups_check(limit: int = Query(100, ge=1, le=1000)):
+    """Compare the monthly ledger rollups with a full recompute."""
+    ensure_schema()
+    with cursor() as cur:
+        return check_rollups(cur, limit=limit)
+
+
 @router.get("/journals")
 def journals(
     start_date: str | None = None,
@@ -1588,8 +1491,14 @@ def journals(
     customer: str | None = None,
     limit: int = Query(200, ge=1, le=2000),
     offset: int = Query(0, ge=0),
+    page_cursor: str | None = Query(None, alias="cursor"),
+    estimate_total: bool = False,
 ):
-    """Paged journal listing from general_ledger with common filters."""
+    """Paged journal listing from general_ledger with common filters.
+
+    Pass ``next_cursor`` back as ``cursor`` for constant-cost paging;
+    ``offset`` is ignored then.
+    """
     end_dt = _parse_iso_date(end_date, datetime.now())
     start_dt = (
         _parse_iso_date(start_date, end_dt - timedelta(days=365))
@@ -1617,6 +1526,17 @@ def journals(
         params.append(f"%{customer}%")
 
     where_clause = " AND ".join(conditions)
+    filters = {
+        "start_date": params[0],
+        "end_date": params[1],
+        "account": account,
+        "name": name,
+        "supplier": supplier,
+        "employee": employee,
+        "customer": customer,
+    }
+    after_sql, after_params = _JOURNAL_KEYSET.where(page_cursor, filters)
+    page_where = where_clause + (f" AND {after_sql}" if after_sql else "")
 
     with cursor() as cur:
         cur.execute(
@@ -1626,13 +1546,27 @@ def journals(
                 account_name, account, memo_description, account_full_name,
                 debit, credit, balance, supplier, employee, customer
             FROM general_ledger
-            WHERE {where_clause}
-            ORDER BY date, id
+            WHERE {page_where}
+            ORDER BY {_JOURNAL_KEYSET.order_by()}
             LIMIT %s OFFSET %s
             """,
-            [*params, limit, offset],
+            [
+                *params,
+                *after_params,
+                limit + 1,
+                0 if page_cursor else offset,
+            ],
+        )
+        rows, has_more = page_rows(cur.fetchall(), limit)
+        total_estimate = (
+            estimate_count(
+                cur,
+                f"SELECT 1 FROM general_ledger WHERE {where_clause}",
+                params,
+            )
+            if estimate_total
+            else None
         )
-        rows = cur.fetchall()
 
     journals = [
         {
@@ -1659,6 +1593,8 @@ def journals(
         "end_date": str(params[1]),
         "count": len(journals),
         "items": journals,
+        "next_cursor": next_cursor(rows, has_more, 1, 0, filters),
+        "total_estimate": total_estimate,
     }
 
 
@@ -1733,6 +1669,7 @@ def bank_reconciliation(
 
 
 @router.get("/pl-summary")
+@cached_report("pl-summary", tables=("general_ledger",))
 def pl_summary(
     granularity: str = Query("month", regex="^(year|quarter|month)$"),
     start_date: str | None = None,
@@ -1746,23 +1683,26 @@ def pl_summary(
         else datetime.now() - timedelta(days=365)
     )
 
+    ensure_schema()
     with cursor() as cur:
         cur.execute(
-            """
+            f"""
             SELECT
                 DATE_TRUNC(%s, date) AS period,
                  SUM(CASE WHEN account_type ILIKE 'income%%'
-                     THEN credit - debit ELSE 0 END) AS revenue,
+                     THEN net_credit ELSE 0 END) AS revenue,
                  SUM(CASE WHEN account_type ILIKE 'revenue%%'
-                     THEN credit - debit ELSE 0 END) AS revenue_alt,
+                     THEN net_credit ELSE 0 END) AS revenue_alt,
                  SUM(CASE WHEN account_type ILIKE 'expense%%'
-                     THEN debit - credit ELSE 0 END) AS expenses
-            FROM general_ledger
-            WHERE date BETWEEN %s AND %s
+                     THEN -net_credit ELSE 0 END) AS expenses
+            FROM ({LEDGER_PERIOD_SQL}) gl
             GROUP BY 1
             ORDER BY 1
             """,
-            (granularity, start_dt.date(), end_dt.date()),
+            [
+                granularity,
+                *ledger_period_params(start_dt.date(), end_dt.date()),
+            ],
         )
         rows = cur.fetchall()
 
@@ -1797,9 +1737,13 @@ def pl_summary(
 
 
 @router.get("/vehicle-performance")
+@cached_report(
+    "vehicle-performance", tables=("charters", "receipts", "vehicles")
+)
 def vehicle_performance(
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
     """Vehicle revenue vs expenses with trip count and cost split."""
     end_dt = _parse_iso_date(end_date, datetime.now())
@@ -1809,33 +1753,31 @@ def vehicle_performance(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        has_charter_vehicle = _has_column(conn, "charters", "vehicle_id")
-        charter_date_col = (
-            "pickup_date"
-            if _has_column(conn, "charters", "pickup_date")
-            else "charter_date"
-            if _has_column(conn, "charters", "charter_date")
-            else None
-        )
+    has_charter_vehicle = schema_catalog.has_column(conn, "charters", "vehicle_id")
+    charter_date_col = (
+        "pickup_date"
+        if schema_catalog.has_column(conn, "charters", "pickup_date")
+        else "charter_date"
+        if schema_catalog.has_column(conn, "charters", "charter_date")
+        else None
+    )
 
-        has_receipt_vehicle = _has_column(conn, "receipts", "vehicle_id")
-        receipt_date_col = (
-            "receipt_date"
-            if _has_column(conn, "receipts", "receipt_date")
-            else "date"
-            if _has_column(conn, "receipts", "date")
-            else None
-        )
+    has_receipt_vehicle = schema_catalog.has_column(conn, "receipts", "vehicle_id")
+    receipt_date_col = (
+        "receipt_date"
+        if schema_catalog.has_column(conn, "receipts", "receipt_date")
+        else "date"
+        if schema_catalog.has_column(conn, "receipts", "date")
+        else None
+    )
 
-        revenue_by_vehicle: dict[int, dict[str, Any]] = {}
-        expense_by_vehicle: dict[int, dict[str, float]] = {}
+    revenue_by_vehicle: dict[int, dict[str, Any]] = {}
+    expense_by_vehicle: dict[int, dict[str, float]] = {}
 
-        if has_charter_vehicle and charter_date_col:
-            with conn.cursor() as cur:
-                cur.execute(
-                    f"""
+    if has_charter_vehicle and charter_date_col:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
                     SELECT vehicle_id,
                            COUNT(*) AS trips,
                            COALESCE(SUM(gross_amount), 0) AS revenue
@@ -1843,18 +1785,18 @@ def vehicle_performance(
                     WHERE {charter_date_col} BETWEEN %s AND %s
                     GROUP BY vehicle_id
                     """,
-                    (start_dt.date(), end_dt.date()),
-                )
-                for vid, trips, revenue in cur.fetchall():
-                    revenue_by_vehicle[int(vid or 0)] = {
-                        "trips": int(trips or 0),
-                        "revenue": float(revenue or 0),
-                    }
+                (start_dt.date(), end_dt.date()),
+            )
+            for vid, trips, revenue in cur.fetchall():
+                revenue_by_vehicle[int(vid or 0)] = {
+                    "trips": int(trips or 0),
+                    "revenue": float(revenue or 0),
+                }
 
-        if has_receipt_vehicle and receipt_date_col:
-            with conn.cursor() as cur:
-                cur.execute(
-                    f"""
+    if has_receipt_vehicle and receipt_date_col:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
                     SELECT vehicle_id,
                            COALESCE(SUM(gross_amount), 0) AS total_expense,
                            COALESCE(SUM(
@@ -1871,83 +1813,82 @@ def vehicle_performance(
                     WHERE {receipt_date_col} BETWEEN %s AND %s
                     GROUP BY vehicle_id
                     """,
-                    (start_dt.date(), end_dt.date()),
-                )
-                for vid, total_exp, maint, ins in cur.fetchall():
-                    expense_by_vehicle[int(vid or 0)] = {
-                        "expense": float(total_exp or 0),
-                        "maintenance": float(maint or 0),
-                        "insurance": float(ins or 0),
-                    }
+                (start_dt.date(), end_dt.date()),
+            )
+            for vid, total_exp, maint, ins in cur.fetchall():
+                expense_by_vehicle[int(vid or 0)] = {
+                    "expense": float(total_exp or 0),
+                    "maintenance": float(maint or 0),
+                    "insurance": float(ins or 0),
+                }
 
-        # Vehicles master
-        vehicles: list[dict[str, Any]] = []
-        with conn.cursor() as cur:
-            cur.execute(
-                """
+    # Vehicles master
+    vehicles: list[dict[str, Any]] = []
+    with conn.cursor() as cur:
+        cur.execute(
+            """
                 SELECT vehicle_id, vehicle_number, make, model, year
                 FROM vehicles
                 ORDER BY vehicle_number
                 """
+        )
+        for vid, num, make, model, year in cur.fetchall():
+            rev = revenue_by_vehicle.get(
+                int(vid or 0), {"revenue": 0.0, "trips": 0}
+            )
+            exp = expense_by_vehicle.get(
+                int(vid or 0),
+                {"expense": 0.0, "maintenance": 0.0, "insurance": 0.0},
+            )
+            profit = rev.get("revenue", 0.0) - exp.get("expense", 0.0)
+            vehicles.append(
+                {
+                    "vehicle_id": int(vid or 0),
+                    "vehicle_number": num,
+                    "make": make,
+                    "model": model,
+                    "year": year,
+                    "trips": rev.get("trips", 0),
+                    "revenue": round(rev.get("revenue", 0.0), 2),
+                    "expense": round(exp.get("expense", 0.0), 2),
+                    "maintenance": round(exp.get("maintenance", 0.0), 2),
+                    "insurance": round(exp.get("insurance", 0.0), 2),
+                    "profit": round(profit, 2),
+                    "margin_pct": round(
+                        (profit / rev.get("revenue", 1)) * 100, 2
+                    )
+                    if rev.get("revenue", 0)
+                    else 0.0,
+                }
             )
-            for vid, num, make, model, year in cur.fetchall():
-                rev = revenue_by_vehicle.get(
-                    int(vid or 0), {"revenue": 0.0, "trips": 0}
-                )
-                exp = expense_by_vehicle.get(
-                    int(vid or 0),
-                    {"expense": 0.0, "maintenance": 0.0, "insurance": 0.0},
-                )
-                profit = rev.get("revenue", 0.0) - exp.get("expense", 0.0)
-                vehicles.append(
-                    {
-                        "vehicle_id": int(vid or 0),
-                        "vehicle_number": num,
-                        "make": make,
-                        "model": model,
-                        "year": year,
-                        "trips": rev.get("trips", 0),
-                        "revenue": round(rev.get("revenue", 0.0), 2),
-                        "expense": round(exp.get("expense", 0.0), 2),
-                        "maintenance": round(exp.get("maintenance", 0.0), 2),
-                        "insurance": round(exp.get("insurance", 0.0), 2),
-                        "profit": round(profit, 2),
-                        "margin_pct": round(
-                            (profit / rev.get("revenue", 1)) * 100, 2
-                        )
-                        if rev.get("revenue", 0)
-                        else 0.0,
-                    }
-                )
 
-        totals = {
-            "revenue": round(sum(v["revenue"] for v in vehicles), 2),
-            "expense": round(sum(v["expense"] for v in vehicles), 2),
-            "maintenance": round(sum(v["maintenance"] for v in vehicles), 2),
-            "insurance": round(sum(v["insurance"] for v in vehicles), 2),
-        }
-        totals["profit"] = round(totals["revenue"] - totals["expense"], 2)
+    totals = {
+        "revenue": round(sum(v["revenue"] for v in vehicles), 2),
+        "expense": round(sum(v["expense"] for v in vehicles), 2),
+        "maintenance": round(sum(v["maintenance"] for v in vehicles), 2),
+        "insurance": round(sum(v["insurance"] for v in vehicles), 2),
+    }
+    totals["profit"] = round(totals["revenue"] - totals["expense"], 2)
 
-        return {
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "vehicles": vehicles,
-            "totals": totals,
-            "notes": {
-                "charter_vehicle_join": has_charter_vehicle,
-                "receipt_vehicle_join": has_receipt_vehicle,
-                "charter_date_column": charter_date_col,
-                "receipt_date_column": receipt_date_col,
-            },
-        }
-    finally:
-        conn.close()
+    return {
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "vehicles": vehicles,
+        "totals": totals,
+        "notes": {
+            "charter_vehicle_join": has_charter_vehicle,
+            "receipt_vehicle_join": has_receipt_vehicle,
+            "charter_date_column": charter_date_col,
+            "receipt_date_column": receipt_date_col,
+        },
+    }
 
 
 @router.get("/driver-costs")
 def driver_costs(
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
     """Driver payroll cost summary grouped by driver for a period."""
     end_dt = _parse_iso_date(end_date, datetime.now())
@@ -1957,49 +1898,40 @@ def driver_costs(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        has_pay_date = _has_column(conn, "driver_payroll", "pay_date")
-        if not has_pay_date:
-            raise HTTPException(
-                status_code=400, detail="driver_payroll_missing_pay_date"
-            )
+    has_pay_date = schema_catalog.has_column(conn, "driver_payroll", "pay_date")
+    if not has_pay_date:
+        raise HTTPException(
+            status_code=400, detail="driver_payroll_missing_pay_date"
+        )
 
-        columns = []
-        if _has_column(conn, "driver_payroll", "employee_id"):
-            columns.append("employee_id")
-        if _has_column(conn, "driver_payroll", "driver_id"):
-            columns.append("driver_id")
+    columns = []
+    if schema_catalog.has_column(conn, "driver_payroll", "employee_id"):
+        columns.append("employee_id")
+    if schema_catalog.has_column(conn, "driver_payroll", "driver_id"):
+        columns.append("driver_id")
 
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'driver_payroll'
-                """
-            )
-            payroll_cols = [r[0] for r in cur.fetchall()]
+    payroll_cols = schema_catalog.column_set(conn, "driver_payroll")
 
-        has_net = "net_pay" in payroll_cols
-        has_gross = "gross_pay" in payroll_cols
-        _net_col = "net_pay" if has_net else "gross_pay"
-        _gross_col = "gross_pay" if has_gross else "net_pay"
+    has_net = "net_pay" in payroll_cols
+    has_gross = "gross_pay" in payroll_cols
+    _net_col = "net_pay" if has_net else "gross_pay"
+    _gross_col = "gross_pay" if has_gross else "net_pay"
 
-        id_col = columns[0] if columns else None
-        name_join = (
-            """LEFT JOIN employees e ON e.employee_id = dp.employee_id"""
-            if id_col == "employee_id"
-            else ""
-        )
+    id_col = columns[0] if columns else None
+    name_join = (
+        """LEFT JOIN employees e ON e.employee_id = dp.employee_id"""
+        if id_col == "employee_id"
+        else ""
+    )
 
-        if not id_col:
-            raise HTTPException(
-                status_code=400, detail="driver_payroll_missing_driver_id"
-            )
+    if not id_col:
+        raise HTTPException(
+            status_code=400, detail="driver_payroll_missing_driver_id"
+        )
 
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
                 SELECT {id_col}, COALESCE(e.full_name, '') AS name,
                        COUNT(*) AS payruns,
                        COALESCE(SUM({_net_col}), 0) AS total_cost,
@@ -2010,39 +1942,38 @@ def driver_costs(
                 GROUP BY {id_col}, name
                 ORDER BY total_cost DESC
                 """,
-                (start_dt.date(), end_dt.date()),
-            )
-            rows = cur.fetchall()
-
-        drivers = [
-            {
-                "driver_id": r[0],
-                "name": r[1] or "",
-                "payruns": int(r[2] or 0),
-                "total_cost": round(float(r[3] or 0), 2),
-                "gross_total": round(float(r[4] or 0), 2),
-            }
-            for r in rows
-        ]
+            (start_dt.date(), end_dt.date()),
+        )
+        rows = cur.fetchall()
 
-        totals = {
-            "total_cost": round(sum(d["total_cost"] for d in drivers), 2),
-            "payruns": sum(d["payruns"] for d in drivers),
-        }
-        return {
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "drivers": drivers,
-            "totals": totals,
+    drivers = [
+        {
+            "driver_id": r[0],
+            "name": r[1] or "",
+            "payruns": int(r[2] or 0),
+            "total_cost": round(float(r[3] or 0), 2),
+            "gross_total": round(float(r[4] or 0), 2),
         }
-    finally:
-        conn.close()
+        for r in rows
+    ]
+
+    totals = {
+        "total_cost": round(sum(d["total_cost"] for d in drivers), 2),
+        "payruns": sum(d["payruns"] for d in drivers),
+    }
+    return {
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "drivers": drivers,
+        "totals": totals,
+    }
 
 
 @router.get("/driver-monthly-costs")
 def driver_monthly_costs(
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
     """Driver payroll cost grouped by driver and month."""
     end_dt = _parse_iso_date(end_date, datetime.now())
@@ -2052,28 +1983,26 @@ def driver_monthly_costs(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        if not _has_column(conn, "driver_payroll", "pay_date"):
-            raise HTTPException(
-                status_code=400, detail="driver_payroll_missing_pay_date"
-            )
+    if not schema_catalog.has_column(conn, "driver_payroll", "pay_date"):
+        raise HTTPException(
+            status_code=400, detail="driver_payroll_missing_pay_date"
+        )
 
-        id_col = (
-            "employee_id"
-            if _has_column(conn, "driver_payroll", "employee_id")
-            else "driver_id"
-            if _has_column(conn, "driver_payroll", "driver_id")
-            else None
+    id_col = (
+        "employee_id"
+        if schema_catalog.has_column(conn, "driver_payroll", "employee_id")
+        else "driver_id"
+        if schema_catalog.has_column(conn, "driver_payroll", "driver_id")
+        else None
+    )
+    if not id_col:
+        raise HTTPException(
+            status_code=400, detail="driver_payroll_missing_driver_id"
         )
-        if not id_col:
-            raise HTTPException(
-                status_code=400, detail="driver_payroll_missing_driver_id"
-            )
 
-        with conn.cursor() as cur:
-            cur.execute(
-                """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
                 SELECT DATE_TRUNC('month', pay_date) AS period,
                        {id_col},
                        COALESCE(e.full_name, '') AS name,
@@ -2086,54 +2015,53 @@ def driver_monthly_costs(
                 GROUP BY period, {id_col}, name
                 ORDER BY period, name
                 """,
-                (start_dt.date(), end_dt.date()),
-            )
-            rows = cur.fetchall()
+            (start_dt.date(), end_dt.date()),
+        )
+        rows = cur.fetchall()
 
-        periods: dict[str, list[dict[str, Any]]] = {}
-        for period, did, name, payruns, total_cost, gross_total in rows:
-            key = (
-                period.date().isoformat() if hasattr(period, "date")
-                else str(period)
-            )
-            periods.setdefault(key, []).append(
-                {
-                    "driver_id": did,
-                    "name": name,
-                    "payruns": int(payruns or 0),
-                    "total_cost": round(float(total_cost or 0), 2),
-                    "gross_total": round(float(gross_total or 0), 2),
-                }
-            )
+    periods: dict[str, list[dict[str, Any]]] = {}
+    for period, did, name, payruns, total_cost, gross_total in rows:
+        key = (
+            period.date().isoformat() if hasattr(period, "date")
+            else str(period)
+        )
+        periods.setdefault(key, []).append(
+            {
+                "driver_id": did,
+                "name": name,
+                "payruns": int(payruns or 0),
+                "total_cost": round(float(total_cost or 0), 2),
+                "gross_total": round(float(gross_total or 0), 2),
+            }
+        )
 
-        return {
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "periods": periods,
-        }
-    finally:
-        conn.close()
+    return {
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "periods": periods,
+    }
 
 
 @router.get("/vehicle-insurance-yearly")
-def vehicle_insurance_yearly(years: int = Query(5, ge=1, le=15)):
+def vehicle_insurance_yearly(
+    years: int = Query(5, ge=1, le=15),
+    conn=Depends(get_db),
+):
     """Insurance cost per vehicle per year (description ~ 'insur%')."""
     end_dt = datetime.now().date()
     start_dt = end_dt.replace(year=end_dt.year - years + 1, month=1, day=1)
 
-    conn = get_connection()
-    try:
-        _has_rdate = _has_column(conn, "receipts", "receipt_date")
-        _has_date = _has_column(conn, "receipts", "date")
-        if not _has_rdate and not _has_date:
-            raise HTTPException(
-                status_code=400, detail="receipts_missing_date"
-            )
-        date_col = "receipt_date" if _has_rdate else "date"
+    _has_rdate = schema_catalog.has_column(conn, "receipts", "receipt_date")
+    _has_date = schema_catalog.has_column(conn, "receipts", "date")
+    if not _has_rdate and not _has_date:
+        raise HTTPException(
+            status_code=400, detail="receipts_missing_date"
+        )
+    date_col = "receipt_date" if _has_rdate else "date"
 
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
                 SELECT vehicle_id,
                        EXTRACT(YEAR FROM {date_col}) AS yr,
                        COALESCE(
@@ -2146,32 +2074,31 @@ def vehicle_insurance_yearly(years: int = Query(5, ge=1, le=15)):
                 GROUP BY vehicle_id, yr
                 ORDER BY yr DESC, vehicle_id
                 """,
-                (start_dt, end_dt),
-            )
-            rows = cur.fetchall()
+            (start_dt, end_dt),
+        )
+        rows = cur.fetchall()
 
-        data = [
-            {
-                "vehicle_id": r[0],
-                "year": int(r[1]) if r[1] is not None else None,
-                "insurance_cost": round(float(r[2] or 0), 2),
-            }
-            for r in rows
-        ]
-        return {
-            "start_year": int(start_dt.year),
-            "end_year": int(end_dt.year),
-            "years": years,
-            "items": data,
+    data = [
+        {
+            "vehicle_id": r[0],
+            "year": int(r[1]) if r[1] is not None else None,
+            "insurance_cost": round(float(r[2] or 0), 2),
         }
-    finally:
-        conn.close()
+        for r in rows
+    ]
+    return {
+        "start_year": int(start_dt.year),
+        "end_year": int(end_dt.year),
+        "years": years,
+        "items": data,
+    }
 
 
 @router.get("/vehicle-damage-summary")
 def vehicle_damage_summary(
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
     """Damage/claim cost count and totals per vehicle."""
     end_dt = _parse_iso_date(end_date, datetime.now())
@@ -2181,23 +2108,21 @@ def vehicle_damage_summary(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        date_col = (
-            "receipt_date"
-            if _has_column(conn, "receipts", "receipt_date")
-            else "date"
-            if _has_column(conn, "receipts", "date")
-            else None
+    date_col = (
+        "receipt_date"
+        if schema_catalog.has_column(conn, "receipts", "receipt_date")
+        else "date"
+        if schema_catalog.has_column(conn, "receipts", "date")
+        else None
+    )
+    if not date_col:
+        raise HTTPException(
+            status_code=400, detail="receipts_missing_date"
         )
-        if not date_col:
-            raise HTTPException(
-                status_code=400, detail="receipts_missing_date"
-            )
 
-        with conn.cursor() as cur:
-            cur.execute(
-                """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
                 SELECT vehicle_id,
                        COUNT(*) AS damage_count,
                        COALESCE(SUM(gross_amount), 0) AS damage_total
@@ -2210,34 +2135,33 @@ def vehicle_damage_summary(
                 GROUP BY vehicle_id
                 ORDER BY damage_total DESC
                 """,
-                (start_dt.date(), end_dt.date()),
-            )
-            rows = cur.fetchall()
-
-        data = [
-            {
-                "vehicle_id": r[0],
-                "damage_count": int(r[1] or 0),
-                "damage_total": round(float(r[2] or 0), 2),
-            }
-            for r in rows
-        ]
+            (start_dt.date(), end_dt.date()),
+        )
+        rows = cur.fetchall()
 
-        totals = {
-            "damage_count": sum(d["damage_count"] for d in data),
-            "damage_total": round(sum(d["damage_total"] for d in data), 2),
-        }
-        return {
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "items": data,
-            "totals": totals,
+    data = [
+        {
+            "vehicle_id": r[0],
+            "damage_count": int(r[1] or 0),
+            "damage_total": round(float(r[2] or 0), 2),
         }
-    finally:
-        conn.close()
+        for r in rows
+    ]
+
+    totals = {
+        "damage_count": sum(d["damage_count"] for d in data),
+        "damage_total": round(sum(d["damage_total"] for d in data), 2),
+    }
+    return {
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "items": data,
+        "totals": totals,
+    }
 
 
 @router.get("/pl-categories")
+@cached_report("pl-categories", tables=("general_ledger",))
 def pl_categories(
     start_date: str | None = None,
     end_date: str | None = None,
@@ -2251,20 +2175,23 @@ def pl_categories(
         else datetime.now() - timedelta(days=365)
     )
 
+    ensure_schema()
     with cursor() as cur:
         cur.execute(
-            """
+            f"""
             SELECT DATE_TRUNC(%s, date) AS period,
                    account_type,
                    account_name,
-                   SUM(credit - debit) AS net
-            FROM general_ledger
-            WHERE date BETWEEN %s AND %s
-              AND account_type IS NOT NULL
+                   SUM(net_credit) AS net
+            FROM ({LEDGER_PERIOD_SQL}) gl
+            WHERE account_type IS NOT NULL
             GROUP BY 1, account_type, account_name
             ORDER BY 1, account_type, account_name
             """,
-            (granularity, start_dt.date(), end_dt.date()),
+            [
+                granularity,
+                *ledger_period_params(start_dt.date(), end_dt.date()),
+            ],
         )
         rows = cur.fetchall()
 
@@ -2315,6 +2242,7 @@ def pl_categories(
 def vehicle_revenue(
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
     """Revenue and trip counts per vehicle from charters (defensive joins)."""
     end_dt = _parse_iso_date(end_date, datetime.now())
@@ -2324,29 +2252,27 @@ def vehicle_revenue(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        if not _has_column(conn, "charters", "vehicle_id"):
-            raise HTTPException(
-                status_code=400, detail="charters_missing_vehicle_id"
-            )
+    if not schema_catalog.has_column(conn, "charters", "vehicle_id"):
+        raise HTTPException(
+            status_code=400, detail="charters_missing_vehicle_id"
+        )
 
-        # Prefer pickup_date; fallback to charter_date
-        charter_date_col = (
-            "pickup_date"
-            if _has_column(conn, "charters", "pickup_date")
-            else "charter_date"
-            if _has_column(conn, "charters", "charter_date")
-            else None
+    # Prefer pickup_date; fallback to charter_date
+    charter_date_col = (
+        "pickup_date"
+        if schema_catalog.has_column(conn, "charters", "pickup_date")
+        else "charter_date"
+        if schema_catalog.has_column(conn, "charters", "charter_date")
+        else None
+    )
+    if not charter_date_col:
+        raise HTTPException(
+            status_code=400, detail="charters_missing_date"
         )
-        if not charter_date_col:
-            raise HTTPException(
-                status_code=400, detail="charters_missing_date"
-            )
 
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
                 SELECT vehicle_id,
                        COUNT(*) AS trips,
                        COALESCE(SUM(gross_amount), 0) AS revenue
@@ -2355,36 +2281,38 @@ def vehicle_revenue(
                 GROUP BY vehicle_id
                 ORDER BY revenue DESC
                 """,
-                (start_dt.date(), end_dt.date()),
-            )
-            rows = cur.fetchall()
+            (start_dt.date(), end_dt.date()),
+        )
+        rows = cur.fetchall()
 
-        data = [
-            {
-                "vehicle_id": r[0],
-                "trips": int(r[1] or 0),
-                "revenue": round(float(r[2] or 0), 2),
-            }
-            for r in rows
-        ]
-        totals = {
-            "trips": sum(d["trips"] for d in data),
-            "revenue": round(sum(d["revenue"] for d in data), 2),
-        }
-        return {
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "vehicles": data,
-            "totals": totals,
+    data = [
+        {
+            "vehicle_id": r[0],
+            "trips": int(r[1] or 0),
+            "revenue": round(float(r[2] or 0), 2),
         }
-    finally:
-        conn.close()
+        for r in rows
+    ]
+    totals = {
+        "trips": sum(d["trips"] for d in data),
+        "revenue": round(sum(d["revenue"] for d in data), 2),
+    }
+    return {
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "vehicles": data,
+        "totals": totals,
+    }
 
 
 @router.get("/driver-revenue-vs-pay")
+@cached_report(
+    "driver-revenue-vs-pay", tables=("charters", "driver_payroll")
+)
 def driver_revenue_vs_pay(
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
     """Driver revenue (charters) vs payroll cost (driver_payroll)."""
     end_dt = _parse_iso_date(end_date, datetime.now())
@@ -2394,36 +2322,34 @@ def driver_revenue_vs_pay(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        # Determine driver key
-        driver_col = (
-            "driver_id"
-            if _has_column(conn, "charters", "driver_id")
-            else "employee_id"
-            if _has_column(conn, "charters", "employee_id")
-            else None
+    # Determine driver key
+    driver_col = (
+        "driver_id"
+        if schema_catalog.has_column(conn, "charters", "driver_id")
+        else "employee_id"
+        if schema_catalog.has_column(conn, "charters", "employee_id")
+        else None
+    )
+    if not driver_col:
+        raise HTTPException(
+            status_code=400, detail="charters_missing_driver"
         )
-        if not driver_col:
-            raise HTTPException(
-                status_code=400, detail="charters_missing_driver"
-            )
 
-        date_col = (
-            "pickup_date"
-            if _has_column(conn, "charters", "pickup_date")
-            else "charter_date"
-            if _has_column(conn, "charters", "charter_date")
-            else None
+    date_col = (
+        "pickup_date"
+        if schema_catalog.has_column(conn, "charters", "pickup_date")
+        else "charter_date"
+        if schema_catalog.has_column(conn, "charters", "charter_date")
+        else None
+    )
+    if not date_col:
+        raise HTTPException(
+            status_code=400, detail="charters_missing_date"
         )
-        if not date_col:
-            raise HTTPException(
-                status_code=400, detail="charters_missing_date"
-            )
 
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
                   SELECT {driver_col},
                       COALESCE(SUM(gross_amount), 0) AS revenue,
                       COUNT(*) AS trips
@@ -2431,38 +2357,38 @@ def driver_revenue_vs_pay(
                 WHERE {date_col} BETWEEN %s AND %s
                 GROUP BY {driver_col}
                 """,
-                (start_dt.date(), end_dt.date()),
-            )
-            rev_rows = cur.fetchall()
+            (start_dt.date(), end_dt.date()),
+        )
+        rev_rows = cur.fetchall()
 
-        revenue_map = {
-            int(r[0] or 0): {
-                "revenue": float(r[1] or 0),
-                "trips": int(r[2] or 0),
-            }
-            for r in rev_rows
+    revenue_map = {
+        int(r[0] or 0): {
+            "revenue": float(r[1] or 0),
+            "trips": int(r[2] or 0),
         }
+        for r in rev_rows
+    }
 
-        # Payroll
-        if not _has_column(conn, "driver_payroll", "pay_date"):
-            raise HTTPException(
-                status_code=400, detail="driver_payroll_missing_pay_date"
-            )
-        pay_driver_col = (
-            "employee_id"
-            if _has_column(conn, "driver_payroll", "employee_id")
-            else "driver_id"
-            if _has_column(conn, "driver_payroll", "driver_id")
-            else None
+    # Payroll
+    if not schema_catalog.has_column(conn, "driver_payroll", "pay_date"):
+        raise HTTPException(
+            status_code=400, detail="driver_payroll_missing_pay_date"
+        )
+    pay_driver_col = (
+        "employee_id"
+        if schema_catalog.has_column(conn, "driver_payroll", "employee_id")
+        else "driver_id"
+        if schema_catalog.has_column(conn, "driver_payroll", "driver_id")
+        else None
+    )
+    if not pay_driver_col:
+        raise HTTPException(
+            status_code=400, detail="driver_payroll_missing_driver_id"
         )
-        if not pay_driver_col:
-            raise HTTPException(
-                status_code=400, detail="driver_payroll_missing_driver_id"
-            )
 
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
                 SELECT {pay_driver_col},
                        COALESCE(SUM(net_pay), 0) AS net_cost,
                        COALESCE(SUM(gross_pay), 0) AS gross_cost,
@@ -2471,65 +2397,63 @@ def driver_revenue_vs_pay(
                 WHERE pay_date BETWEEN %s AND %s
                 GROUP BY {pay_driver_col}
                 """,
-                (start_dt.date(), end_dt.date()),
-            )
-            pay_rows = cur.fetchall()
-
-        data = []
-        for did, net_cost, gross_cost, payruns in pay_rows:
-            rid = int(did or 0)
-            rev = revenue_map.pop(rid, {"revenue": 0.0, "trips": 0})
-            profit = rev.get("revenue", 0.0) - float(net_cost or 0)
-            data.append(
-                {
-                    "driver_id": rid,
-                    "revenue": round(rev.get("revenue", 0.0), 2),
-                    "trips": rev.get("trips", 0),
-                    "net_pay": round(float(net_cost or 0), 2),
-                    "gross_pay": round(float(gross_cost or 0), 2),
-                    "payruns": int(payruns or 0),
-                    "profit_after_pay": round(profit, 2),
-                    "margin_pct": (
-                        round(
-                            (profit / rev.get("revenue", 1)) * 100, 2
-                        )
-                        if rev.get("revenue", 0)
-                        else 0.0
-                    ),
-                }
-            )
-
-        # Drivers with revenue but no payroll rows
-        for rid, rev in revenue_map.items():
-            profit = rev.get("revenue", 0.0)
-            data.append(
-                {
-                    "driver_id": rid,
-                    "revenue": round(rev.get("revenue", 0.0), 2),
-                    "trips": rev.get("trips", 0),
-                    "net_pay": 0.0,
-                    "gross_pay": 0.0,
-                    "payruns": 0,
-                    "profit_after_pay": round(profit, 2),
-                    "margin_pct": 100.0,
-                }
-            )
+            (start_dt.date(), end_dt.date()),
+        )
+        pay_rows = cur.fetchall()
+
+    data = []
+    for did, net_cost, gross_cost, payruns in pay_rows:
+        rid = int(did or 0)
+        rev = revenue_map.pop(rid, {"revenue": 0.0, "trips": 0})
+        profit = rev.get("revenue", 0.0) - float(net_cost or 0)
+        data.append(
+            {
+                "driver_id": rid,
+                "revenue": round(rev.get("revenue", 0.0), 2),
+                "trips": rev.get("trips", 0),
+                "net_pay": round(float(net_cost or 0), 2),
+                "gross_pay": round(float(gross_cost or 0), 2),
+                "payruns": int(payruns or 0),
+                "profit_after_pay": round(profit, 2),
+                "margin_pct": (
+                    round(
+                        (profit / rev.get("revenue", 1)) * 100, 2
+                    )
+                    if rev.get("revenue", 0)
+                    else 0.0
+                ),
+            }
+        )
 
-        totals = {
-            "revenue": round(sum(d["revenue"] for d in data), 2),
-            "net_pay": round(sum(d["net_pay"] for d in data), 2),
-            "profit_after_pay": round(
-                sum(d["profit_after_pay"] for d in data), 2
-            ),
-        }
-        return {
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "drivers": data,
-            "totals": totals,
-        }
-    finally:
-        conn.close()
+    # Drivers with revenue but no payroll rows
+    for rid, rev in revenue_map.items():
+        profit = rev.get("revenue", 0.0)
+        data.append(
+            {
+                "driver_id": rid,
+                "revenue": round(rev.get("revenue", 0.0), 2),
+                "trips": rev.get("trips", 0),
+                "net_pay": 0.0,
+                "gross_pay": 0.0,
+                "payruns": 0,
+                "profit_after_pay": round(profit, 2),
+                "margin_pct": 100.0,
+            }
+        )
+
+    totals = {
+        "revenue": round(sum(d["revenue"] for d in data), 2),
+        "net_pay": round(sum(d["net_pay"] for d in data), 2),
+        "profit_after_pay": round(
+            sum(d["profit_after_pay"] for d in data), 2
+        ),
+    }
+    return {
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "drivers": data,
+        "totals": totals,
+    }
 
 
 @router.get("/bank-reconciliation-suggestions")
@@ -2537,80 +2461,40 @@ def bank_reconciliation_suggestions(
     bank_id: int,
     window_days: int = Query(1, ge=0, le=7),
     max_results: int = Query(200, ge=1, le=1000),
+    whole_account: bool = False,
+    candidates: int = Query(5, ge=1, le=20),
+    conn=Depends(get_db),
 ):
-    """Suggest receipt matches for unreconciled banking transactions
-    by amount/date proximity.
-    """
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT transaction_id, trans_date, trans_description,
-                       COALESCE(debit_amount, 0)
-                       - COALESCE(credit_amount, 0) AS amount
-                FROM banking_transactions
-                WHERE bank_id = %s
-                  AND (reconciliation_status IS NULL
-                   OR reconciliation_status IN ('unreconciled','ignored'))
-                ORDER BY trans_date DESC
-                LIMIT %s
-                """,
-                (bank_id, max_results),
-            )
-            bank_rows = cur.fetchall()
+    """Suggest receipt matches for unreconciled banking transactions.
 
-        suggestions = []
-        with conn.cursor() as cur:
-            for txn_id, tdate, desc, amt in bank_rows:
-                amt = float(amt or 0)
-                # Match receipts with same amount (abs) within window
-                cur.execute(
-                    """
-                    SELECT receipt_id, receipt_date, description, gross_amount
-                    FROM receipts
-                    WHERE ABS(gross_amount) = ABS(%s)
-                      AND receipt_date BETWEEN %s AND %s
-                    LIMIT 5
-                    """,
-                    (
-                        amt,
-                        tdate - timedelta(days=window_days),
-                        tdate + timedelta(days=window_days),
-                    ),
-                )
-                recs = cur.fetchall()
-                if recs:
-                    suggestions.append(
-                        {
-                            "transaction_id": txn_id,
-                            "transaction_date": str(tdate),
-                            "amount": round(amt, 2),
-                            "description": desc,
-                            "candidates": [
-                                {
-                                    "receipt_id": r[0],
-                                    "receipt_date": str(r[1]),
-                                    "description": r[2],
-                                    "gross_amount": float(r[3] or 0),
-                                }
-                                for r in recs
-                            ],
-                        }
-                    )
-        return {
-            "bank_id": bank_id,
-            "window_days": window_days,
-            "items": suggestions,
-        }
-    finally:
-        conn.close()
+    Candidates share the transaction's amount, fall within
+    ``window_days`` of it and are ranked by ``confidence``.
+    ``whole_account`` considers every unreconciled transaction, not only
+    the newest ``max_results``.
+    """
+    suggestions = list(
+        suggest_matches(
+            conn,
+            bank_id,
+            window_days=window_days,
+            max_results=None if whole_account else max_results,
+            candidates=candidates,
+        )
+    )
+    return {
+        "bank_id": bank_id,
+        "window_days": window_days,
+        "count": len(suggestions),
+        "items": suggestions,
+    }
 
 
 @router.get("/fleet-maintenance-summary")
+@cached_report("fleet-maintenance-summary", tables=("receipts",))
 def fleet_maintenance_summary(
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
     """Maintenance and insurance cost breakdown per vehicle."""
     end_dt = _parse_iso_date(end_date, datetime.now())
@@ -2620,24 +2504,22 @@ def fleet_maintenance_summary(
         else datetime.now() - timedelta(days=365)
     )
 
-    conn = get_connection()
-    try:
-        has_vehicle = _has_column(conn, "receipts", "vehicle_id")
-        receipt_date_col = (
-            "receipt_date"
-            if _has_column(conn, "receipts", "receipt_date")
-            else "date"
-            if _has_column(conn, "receipts", "date")
-            else None
+    has_vehicle = schema_catalog.has_column(conn, "receipts", "vehicle_id")
+    receipt_date_col = (
+        "receipt_date"
+        if schema_catalog.has_column(conn, "receipts", "receipt_date")
+        else "date"
+        if schema_catalog.has_column(conn, "receipts", "date")
+        else None
+    )
+    if not has_vehicle or not receipt_date_col:
+        raise HTTPException(
+            status_code=400, detail="receipts_missing_vehicle_or_date"
         )
-        if not has_vehicle or not receipt_date_col:
-            raise HTTPException(
-                status_code=400, detail="receipts_missing_vehicle_or_date"
-            )
 
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
                 SELECT vehicle_id,
                        COALESCE(SUM(gross_amount), 0) AS total_expense,
                        COALESCE(SUM(
@@ -2663,38 +2545,36 @@ def fleet_maintenance_summary(
                 WHERE {receipt_date_col} BETWEEN %s AND %s
                 GROUP BY vehicle_id
                 """,
-                (start_dt.date(), end_dt.date()),
-            )
-            rows = cur.fetchall()
+            (start_dt.date(), end_dt.date()),
+        )
+        rows = cur.fetchall()
 
-        data = [
-            {
-                "vehicle_id": r[0],
-                "total_expense": round(float(r[1] or 0), 2),
-                "maintenance": round(float(r[2] or 0), 2),
-                "repairs": round(float(r[3] or 0), 2),
-                "insurance": round(float(r[4] or 0), 2),
-                "damage": round(float(r[5] or 0), 2),
-            }
-            for r in rows
-        ]
-
-        totals = {
-            "total_expense": round(sum(d["total_expense"] for d in data), 2),
-            "maintenance": round(sum(d["maintenance"] for d in data), 2),
-            "repairs": round(sum(d["repairs"] for d in data), 2),
-            "insurance": round(sum(d["insurance"] for d in data), 2),
-            "damage": round(sum(d["damage"] for d in data), 2),
+    data = [
+        {
+            "vehicle_id": r[0],
+            "total_expense": round(float(r[1] or 0), 2),
+            "maintenance": round(float(r[2] or 0), 2),
+            "repairs": round(float(r[3] or 0), 2),
+            "insurance": round(float(r[4] or 0), 2),
+            "damage": round(float(r[5] or 0), 2),
         }
+        for r in rows
+    ]
 
-        return {
-            "start_date": str(start_dt.date()),
-            "end_date": str(end_dt.date()),
-            "vehicles": data,
-            "totals": totals,
-        }
-    finally:
-        conn.close()
+    totals = {
+        "total_expense": round(sum(d["total_expense"] for d in data), 2),
+        "maintenance": round(sum(d["maintenance"] for d in data), 2),
+        "repairs": round(sum(d["repairs"] for d in data), 2),
+        "insurance": round(sum(d["insurance"] for d in data), 2),
+        "damage": round(sum(d["damage"] for d in data), 2),
+    }
+
+    return {
+        "start_date": str(start_dt.date()),
+        "end_date": str(end_dt.date()),
+        "vehicles": data,
+        "totals": totals,
+    }
 
 
 @router.get("/cra-audit-export")
@@ -2702,6 +2582,7 @@ def cra_audit_export(
     start_date: str | None = None,
     end_date: str | None = None,
     export_type: str = "full",
+    conn=Depends(get_db),
 ):
     """
     Generate CRA audit format export from database
@@ -2729,7 +2610,6 @@ def cra_audit_export(
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="  ")
 
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -3117,26 +2997,15 @@ Generated via Arrow Limousine Reports Dashboard
 
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/accounting/views")
-def get_accounting_export_views():
+def get_accounting_export_views(conn=Depends(get_db)):
     """Get list of available accounting export views with record counts."""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         # Check if accounting export views exist
-        cur.execute(
-            """
-            SELECT table_name
-            FROM information_schema.views
-            WHERE table_schema = 'public'
-            AND table_name LIKE 'qb_export_%'
-            ORDER BY table_name
-        """
-        )
-        views = [row[0] for row in cur.fetchall()]
+        views = schema_catalog.views(conn, prefix="qb_export_")
 
         if not views:
             return {
@@ -3191,7 +3060,6 @@ def get_accounting_export_views():
 
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/quickbooks/views")
@@ -3203,108 +3071,77 @@ def deprecated_quickbooks_views():
     )
 
 
+def _accounting_view_query(
+    conn, view_name: str, start_date: str | None, end_date: str | None
+) -> tuple[str, list[Any]]:
+    """``SELECT`` for an export view, date-filtered if it has "Date"."""
+    # Build query with optional date filtering
+    query = f"SELECT * FROM {view_name}"
+    params: list[Any] = []
+
+    # Check if view has a "Date" column
+    has_date_column = schema_catalog.has_column(conn, view_name, "Date")
+
+    if has_date_column and (start_date or end_date):
+        conditions = []
+        if start_date:
+            conditions.append('"Date" >= %s')
+            params.append(start_date)
+        if end_date:
+            conditions.append('"Date" <= %s')
+            params.append(end_date)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+    return query, params
+
+
 @router.get("/accounting/export/{view_name}")
 def export_accounting_view(
     view_name: str,
     format: str = "csv",
     start_date: str | None = None,
     end_date: str | None = None,
+    conn=Depends(get_db),
 ):
-    """Export a specific accounting view to CSV format."""
-    conn = get_connection()
-    cur = conn.cursor()
-
-    try:
-        # Validate view name (security)
-        if not view_name.startswith("qb_export_"):
-            return Response(
-                status_code=400,
-                content="Invalid view name. Must start with 'qb_export_'",
-            )
-
-        # Check if view exists
-        cur.execute(
-            """
-            SELECT EXISTS(
-                SELECT 1 FROM information_schema.views
-                WHERE table_schema = 'public'
-                AND table_name = %s)
-        """,
-            (view_name,),
-        )
-
-        if not cur.fetchone()[0]:
-            return Response(
-                status_code=404,
-                content=f"View '{view_name}' not found",
-            )
+    """Stream a specific accounting view as CSV (or NDJSON)."""
+    # Validate view name (security)
+    if not view_name.startswith("qb_export_"):
+        return Response(
+            status_code=400,
+            content="Invalid view name. Must start with 'qb_export_'",
+        )
 
-        # Build query with optional date filtering
-        query = f"SELECT * FROM {view_name}"
-        params = []
+    # Check if view exists
+    if not schema_catalog.has_view(conn, view_name):
+        return Response(
+            status_code=404,
+            content=f"View '{view_name}' not found",
+        )
 
-        # Check if view has a "Date" column
-        cur.execute(
-            "SELECT column_name FROM information_schema.columns"
-            " WHERE table_name = %s AND column_name = 'Date'",
-            (view_name,),
-        )
-        has_date_column = cur.fetchone() is not None
-
-        if has_date_column and (start_date or end_date):
-            conditions = []
-            if start_date:
-                conditions.append('"Date" >= %s')
-                params.append(start_date)
-            if end_date:
-                conditions.append('"Date" <= %s')
-                params.append(end_date)
-
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-
-        # Execute query
-        cur.execute(query, params)
-        rows = cur.fetchall()
-        columns = [desc[0] for desc in cur.description]
-
-        if format.lower() == "csv":
-            # Generate CSV
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(columns)
-            writer.writerows(rows)
-
-            # Create filename
-            date_suffix = ""
-            if start_date and end_date:
-                date_suffix = f"_{start_date}_to_{end_date}"
-            elif start_date:
-                date_suffix = f"_from_{start_date}"
-            elif end_date:
-                date_suffix = f"_to_{end_date}"
-
-            filename = f"{view_name}{date_suffix}.csv"
-
-            return Response(
-                content=output.getvalue(),
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": (
-                        f'attachment; filename="{filename}"'
-                    )
-                },
-            )
+    query, params = _accounting_view_query(
+        conn, view_name, start_date, end_date
+    )
 
-        else:
-            return Response(
-                status_code=400,
-                content="Only CSV format is currently supported",
-            )
+    if format.lower() not in EXPORT_MEDIA_TYPES:
+        return Response(
+            status_code=400,
+            content="Only CSV and NDJSON formats are supported",
+        )
 
-    finally:
-        cur.close()
-        conn.close()
+    # Create filename
+    date_suffix = ""
+    if start_date and end_date:
+        date_suffix = f"_{start_date}_to_{end_date}"
+    elif start_date:
+        date_suffix = f"_from_{start_date}"
+    elif end_date:
+        date_suffix = f"_to_{end_date}"
+
+    return export_response(
+        QueryExport(query, params), format, f"{view_name}{date_suffix}"
+    )
 
 
 @router.get("/quickbooks/export/{view_name}")
@@ -3321,88 +3158,40 @@ def deprecated_quickbooks_export(view_name: str):
 
 @router.get("/accounting/export-all")
 def export_all_accounting_views(
-    start_date: str | None = None, end_date: str | None = None
+    start_date: str | None = None,
+    end_date: str | None = None,
+    conn=Depends(get_db),
 ):
-    """Export all accounting views to a single ZIP file."""
-    import zipfile
-
-    conn = get_connection()
-    cur = conn.cursor()
-
-    try:
-        # Get all accounting export views
-        cur.execute(
-            """
-            SELECT table_name
-            FROM information_schema.views
-            WHERE table_schema = 'public'
-            AND table_name LIKE 'qb_export_%'
-            ORDER BY table_name
-        """
+    """Stream all accounting views as one ZIP, exported in parallel."""
+    # Get all accounting export views
+    views = schema_catalog.views(conn, prefix="qb_export_")
+
+    if not views:
+        return Response(
+            status_code=404,
+            content="No accounting export views found",
         )
-        views = [row[0] for row in cur.fetchall()]
-
-        if not views:
-            return Response(
-                status_code=404,
-                content="No accounting export views found",
-            )
-
-        # Create temporary directory
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
 
-            # Export each view to CSV
-            for view_name in views:
-                # Build query with optional date filtering
-                query = f"SELECT * FROM {view_name}"
-                params = []
-
-                # Check if view has a "Date" column
-                cur.execute(
-                    "SELECT column_name FROM information_schema.columns"
-                    " WHERE table_name = %s AND column_name = 'Date'",
-                    (view_name,),
-                )
-                has_date_column = cur.fetchone() is not None
-
-                if has_date_column and (start_date or end_date):
-                    conditions = []
-                    if start_date:
-                        conditions.append('"Date" >= %s')
-                        params.append(start_date)
-                    if end_date:
-                        conditions.append('"Date" <= %s')
-                        params.append(end_date)
-
-                    if conditions:
-                        query += " WHERE " + " AND ".join(conditions)
-
-                # Execute query
-                cur.execute(query, params)
-                rows = cur.fetchall()
-                columns = [desc[0] for desc in cur.description]
-
-                # Write to CSV
-                csv_filename = f"{view_name}.csv"
-                csv_path = tmppath / csv_filename
-
-                with open(csv_path, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(columns)
-                    writer.writerows(rows)
+    members = [
+        (
+            f"{view_name}.csv",
+            *_accounting_view_query(conn, view_name, start_date, end_date),
+        )
+        for view_name in views
+    ]
 
-            # Create README
-            if start_date and end_date:
-                date_range_text = f"\nDate Range: {start_date} to {end_date}"
-            elif start_date:
-                date_range_text = f"\nDate Range: From {start_date}"
-            elif end_date:
-                date_range_text = f"\nDate Range: Up to {end_date}"
-            else:
-                date_range_text = ""
-
-            readme = f"""ACCOUNTING EXPORT FROM ALMSDATA DATABASE
+    # Create README
+    if start_date and end_date:
+        date_range_text = f"\nDate Range: {start_date} to {end_date}"
+    elif start_date:
+        date_range_text = f"\nDate Range: From {start_date}"
+    elif end_date:
+        date_range_text = f"\nDate Range: Up to {end_date}"
+    else:
+        date_range_text = ""
+
+    def readme(counts: dict[str, int]) -> str:
+        text = f"""ACCOUNTING EXPORT FROM ALMSDATA DATABASE
 {'=' * 70}
 
 Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -3413,21 +3202,21 @@ Export Type: Accounting CSV Import Format{date_range_text}
 EXPORTED FILES
 {'=' * 70}
 """
-            for view_name in views:
-                cur.execute(f"SELECT COUNT(*) FROM {view_name}")
-                count = cur.fetchone()[0]
-                friendly_name = (
-                    view_name
-                    .replace("qb_export_", "")
-                    .replace("_", " ")
-                    .title()
-                )
-                readme += (
-                    f"✓ {view_name}.csv - "
-                    f"{friendly_name} ({count:,} records)\n"
-                )
+        for view_name in views:
+            # Rows actually written to the file, not a second COUNT(*).
+            count = counts.get(f"{view_name}.csv", 0)
+            friendly_name = (
+                view_name
+                .replace("qb_export_", "")
+                .replace("_", " ")
+                .title()
+            )
+            text += (
+                f"✓ {view_name}.csv - "
+                f"{friendly_name} ({count:,} records)\n"
+            )
 
-            readme += """
+        text += f"""
 {'=' * 70}
 
 IMPORT INSTRUCTIONS
@@ -3443,38 +3232,24 @@ Start with Chart of Accounts, then Customers/Vendors, then Transactions.
 
 Generated via Arrow Limousine Accounting Export Dashboard
 """
+        return text
 
-            with open(
-                tmppath / "README.txt", "w", encoding="utf-8"
-            ) as f:
-                f.write(readme)
-
-            # Create ZIP file
-            date_suffix = ""
-            if start_date and end_date:
-                date_suffix = f"_{start_date}_to_{end_date}"
-
-            zip_filename = (
-                f"Accounting_Export_"
-                f"{datetime.now().strftime('%Y%m%d_%H%M%S')}{date_suffix}.zip"
-            )
-            zip_path = tmppath / zip_filename
-
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for file in tmppath.glob("*.csv"):
-                    zipf.write(file, file.name)
-                zipf.write(tmppath / "README.txt", "README.txt")
+    date_suffix = ""
+    if start_date and end_date:
+        date_suffix = f"_{start_date}_to_{end_date}"
 
-            # Return ZIP file
-            return FileResponse(
-                path=str(zip_path),
-                media_type="application/zip",
-                filename=zip_filename,
-            )
+    zip_filename = (
+        f"Accounting_Export_"
+        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}{date_suffix}.zip"
+    )
 
-    finally:
-        cur.close()
-        conn.close()
+    return StreamingResponse(
+        zip_query_exports(members, readme=readme),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{zip_filename}"'
+        },
+    )
 
 
 @router.get("/quickbooks/export-all")
@@ -3487,54 +3262,53 @@ def deprecated_quickbooks_export_all():
 
 
 @router.get("/accounting/rules")
-def list_accounting_rules():
+def list_accounting_rules(conn=Depends(get_db)):
     """List accounting classification rules used to organize GL data."""
-    conn = get_connection()
-    try:
-        _ensure_accounting_rules_table(conn)
-        with conn.cursor() as cur:
-            cur.execute(
-                """
+    ensure_schema()
+    with conn.cursor() as cur:
+        cur.execute(
+            """
                 SELECT rule_id, rule_name, match_field, match_pattern,
                        gl_code, account_type, sort_order, is_active,
                        created_at, updated_at
                 FROM accounting_gl_rules
                 ORDER BY is_active DESC, sort_order, rule_id
                 """
-            )
-            rows = cur.fetchall()
+        )
+        rows = cur.fetchall()
 
-        items = [
-            {
-                "rule_id": r[0],
-                "rule_name": r[1],
-                "match_field": r[2],
-                "match_pattern": r[3],
-                "gl_code": r[4],
-                "account_type": r[5],
-                "sort_order": int(r[6] or 0),
-                "is_active": bool(r[7]),
-                "created_at": (
-                    r[8].isoformat() if hasattr(r[8], "isoformat") else None
-                ),
-                "updated_at": (
-                    r[9].isoformat() if hasattr(r[9], "isoformat") else None
-                ),
-            }
-            for r in rows
-        ]
-        return {"count": len(items), "items": items}
-    finally:
-        conn.close()
+    items = [
+        {
+            "rule_id": r[0],
+            "rule_name": r[1],
+            "match_field": r[2],
+            "match_pattern": r[3],
+            "gl_code": r[4],
+            "account_type": r[5],
+            "sort_order": int(r[6] or 0),
+            "is_active": bool(r[7]),
+            "created_at": (
+                r[8].isoformat() if hasattr(r[8], "isoformat") else None
+            ),
+            "updated_at": (
+                r[9].isoformat() if hasattr(r[9], "isoformat") else None
+            ),
+        }
+        for r in rows
+    ]
+    return {"count": len(items), "items": items}
 
 
 @router.post("/accounting/rules")
-def create_accounting_rule(payload: AccountingRuleUpsert, request: Request):
+def create_accounting_rule(
+    payload: AccountingRuleUpsert,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Create a new accounting classification rule."""
     _validate_rule_field(payload.match_field)
-    conn = get_connection()
     try:
-        _ensure_accounting_rules_table(conn)
+        ensure_schema()
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -3587,8 +3361,6 @@ def create_accounting_rule(payload: AccountingRuleUpsert, request: Request):
             status_code=400,
             detail=f"failed_to_create_rule: {exc}",
         ) from exc
-    finally:
-        conn.close()
 
 
 @router.put("/accounting/rules/{rule_id}")
@@ -3596,12 +3368,12 @@ def update_accounting_rule(
     rule_id: int,
     payload: AccountingRuleUpsert,
     request: Request,
+    conn=Depends(get_db),
 ):
     """Update an existing accounting classification rule."""
     _validate_rule_field(payload.match_field)
-    conn = get_connection()
     try:
-        _ensure_accounting_rules_table(conn)
+        ensure_schema()
         before_snapshot = _load_rule_snapshot(conn, rule_id)
         if not before_snapshot:
             raise HTTPException(status_code=404, detail="rule_not_found")
@@ -3669,16 +3441,17 @@ def update_accounting_rule(
             status_code=400,
             detail=f"failed_to_update_rule: {exc}",
         ) from exc
-    finally:
-        conn.close()
 
 
 @router.delete("/accounting/rules/{rule_id}")
-def delete_accounting_rule(rule_id: int, request: Request):
+def delete_accounting_rule(
+    rule_id: int,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Delete accounting classification rule."""
-    conn = get_connection()
     try:
-        _ensure_accounting_rules_table(conn)
+        ensure_schema()
         before_snapshot = _load_rule_snapshot(conn, rule_id)
         if not before_snapshot:
             raise HTTPException(status_code=404, detail="rule_not_found")
@@ -3716,20 +3489,21 @@ def delete_accounting_rule(rule_id: int, request: Request):
     except HTTPException:
         conn.rollback()
         raise
-    finally:
-        conn.close()
 
 
 @router.post("/accounting/reclassify/receipts")
-def reclassify_receipts_gl(payload: ReceiptGLReclassifyRequest, request: Request):
+def reclassify_receipts_gl(
+    payload: ReceiptGLReclassifyRequest,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Bulk update GL code for selected receipts."""
-    conn = get_connection()
     try:
         id_col = (
             "receipt_id"
-            if _has_column(conn, "receipts", "receipt_id")
+            if schema_catalog.has_column(conn, "receipts", "receipt_id")
             else "id"
-            if _has_column(conn, "receipts", "id")
+            if schema_catalog.has_column(conn, "receipts", "id")
             else None
         )
         if not id_col:
@@ -3739,9 +3513,9 @@ def reclassify_receipts_gl(payload: ReceiptGLReclassifyRequest, request: Request
             )
 
         gl_cols: list[str] = []
-        if _has_column(conn, "receipts", "gl_account_code"):
+        if schema_catalog.has_column(conn, "receipts", "gl_account_code"):
             gl_cols.append("gl_account_code = %s")
-        if _has_column(conn, "receipts", "gl_code"):
+        if schema_catalog.has_column(conn, "receipts", "gl_code"):
             gl_cols.append("gl_code = %s")
 
         if not gl_cols:
@@ -3797,12 +3571,14 @@ def reclassify_receipts_gl(payload: ReceiptGLReclassifyRequest, request: Request
     except HTTPException:
         conn.rollback()
         raise
-    finally:
-        conn.close()
 
 
 @router.post("/accounting/reclassify/ledger")
-def reclassify_ledger_rows(payload: LedgerReclassifyRequest, request: Request):
+def reclassify_ledger_rows(
+    payload: LedgerReclassifyRequest,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Bulk update account metadata for selected general_ledger rows."""
     if not any([payload.gl_code, payload.account_name, payload.account_type]):
         raise HTTPException(
@@ -3810,9 +3586,8 @@ def reclassify_ledger_rows(payload: LedgerReclassifyRequest, request: Request):
             detail="at_least_one_field_required",
         )
 
-    conn = get_connection()
     try:
-        if not _has_column(conn, "general_ledger", "id"):
+        if not schema_catalog.has_column(conn, "general_ledger", "id"):
             raise HTTPException(
                 status_code=400,
                 detail="general_ledger_missing_id",
@@ -3821,17 +3596,17 @@ def reclassify_ledger_rows(payload: LedgerReclassifyRequest, request: Request):
         updates: list[str] = []
         params: list[Any] = []
 
-        if payload.gl_code is not None and _has_column(
+        if payload.gl_code is not None and schema_catalog.has_column(
             conn, "general_ledger", "account"
         ):
             updates.append("account = %s")
             params.append(payload.gl_code)
-        if payload.account_name is not None and _has_column(
+        if payload.account_name is not None and schema_catalog.has_column(
             conn, "general_ledger", "account_name"
         ):
             updates.append("account_name = %s")
             params.append(payload.account_name)
-        if payload.account_type is not None and _has_column(
+        if payload.account_type is not None and schema_catalog.has_column(
             conn, "general_ledger", "account_type"
         ):
             updates.append("account_type = %s")
@@ -3888,109 +3663,129 @@ def reclassify_ledger_rows(payload: LedgerReclassifyRequest, request: Request):
     except HTTPException:
         conn.rollback()
         raise
-    finally:
-        conn.close()
 
 
-@router.get("/company-snapshot")
-def get_company_snapshot(
-    date_range: str = "mtd",
+def compute_company_snapshot(
+    cur,
+    date_range: str,
     start_date: str | None = None,
     end_date: str | None = None,
-):
-    """Get company financial snapshot with live data from database."""
-    from datetime import datetime, timedelta
-
-    with cursor() as cur:
-        # Calculate date range
-        end_dt = datetime.now()
-        if date_range == "today":
-            start_dt = end_dt.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-        elif date_range == "wtd":
-            start_dt = end_dt - timedelta(days=end_dt.weekday())
-        elif date_range == "mtd":
-            start_dt = end_dt.replace(day=1)
-        elif date_range == "ytd":
-            start_dt = end_dt.replace(month=1, day=1)
-        elif (
-            date_range == "custom"
-            and start_date
-            and end_date
-        ):
-            start_dt = datetime.fromisoformat(start_date)
-            end_dt = datetime.fromisoformat(end_date)
-        else:
-            start_dt = datetime(2000, 1, 1)
-
-        # Get revenue from charters (paid_amount + balance = gross_amount)
-        cur.execute(
-            """
-            SELECT
-                COUNT(*) as charter_count,
-                COALESCE(SUM(grand_total), 0) as total_revenue,
-                COALESCE(SUM(paid_amount), 0) as paid_revenue,
-                COALESCE(SUM(balance_owing), 0) as outstanding_revenue
-            FROM charters
-            WHERE charter_date BETWEEN %s AND %s
-        """,
-            (start_dt.date(), end_dt.date()),
+) -> dict[str, Any]:
+    """Company financial snapshot for one ``date_range``."""
+    # Calculate date range
+    end_dt = datetime.now()
+    if date_range == "today":
+        start_dt = end_dt.replace(
+            hour=0, minute=0, second=0, microsecond=0
         )
-        revenue_data = cur.fetchone()
+    elif date_range == "wtd":
+        start_dt = end_dt - timedelta(days=end_dt.weekday())
+    elif date_range == "mtd":
+        start_dt = end_dt.replace(day=1)
+    elif date_range == "ytd":
+        start_dt = end_dt.replace(month=1, day=1)
+    elif (
+        date_range == "custom"
+        and start_date
+        and end_date
+    ):
+        start_dt = datetime.fromisoformat(start_date)
+        end_dt = datetime.fromisoformat(end_date)
+    else:
+        start_dt = datetime(2000, 1, 1)
+
+    # Get revenue from charters (paid_amount + balance = gross_amount)
+    cur.execute(
+        """
+        SELECT
+            COUNT(*) as charter_count,
+            COALESCE(SUM(grand_total), 0) as total_revenue,
+            COALESCE(SUM(paid_amount), 0) as paid_revenue,
+            COALESCE(SUM(balance_owing), 0) as outstanding_revenue
+        FROM charters
+        WHERE charter_date BETWEEN %s AND %s
+    """,
+        (start_dt.date(), end_dt.date()),
+    )
+    revenue_data = cur.fetchone()
 
-        # Get expenses from receipts
-        cur.execute(
-            """
-            SELECT
-                COUNT(*) as receipt_count,
-                COALESCE(SUM(gross_amount), 0) as total_expenses
-            FROM receipts
-            WHERE receipt_date BETWEEN %s AND %s
-        """,
-            (start_dt.date(), end_dt.date()),
-        )
-        expense_data = cur.fetchone()
+    # Get expenses from receipts
+    cur.execute(
+        """
+        SELECT
+            COUNT(*) as receipt_count,
+            COALESCE(SUM(gross_amount), 0) as total_expenses
+        FROM receipts
+        WHERE receipt_date BETWEEN %s AND %s
+    """,
+        (start_dt.date(), end_dt.date()),
+    )
+    expense_data = cur.fetchone()
 
-        # Get active vehicles
-        cur.execute(
-            """
-            SELECT COUNT(*) as active_vehicles
-            FROM vehicles
-            WHERE status = 'active' OR status IS NULL
+    # Get active vehicles
+    cur.execute(
         """
-        )
-        vehicle_data = cur.fetchone()
+        SELECT COUNT(*) as active_vehicles
+        FROM vehicles
+        WHERE status = 'active' OR status IS NULL
+    """
+    )
+    vehicle_data = cur.fetchone()
+
+    # Calculate totals
+    total_revenue = float(revenue_data[1] or 0)
+    total_expenses = float(expense_data[1] or 0)
+    profit = total_revenue - total_expenses
+    profit_margin = (
+        (profit / total_revenue * 100) if total_revenue > 0 else 0
+    )
+    charter_count = int(revenue_data[0] or 0)
+    active_vehicles = int(vehicle_data[0] or 0)
 
-        # Calculate totals
-        total_revenue = float(revenue_data[1] or 0)
-        total_expenses = float(expense_data[1] or 0)
-        profit = total_revenue - total_expenses
-        profit_margin = (
-            (profit / total_revenue * 100) if total_revenue > 0 else 0
-        )
-        charter_count = int(revenue_data[0] or 0)
-        active_vehicles = int(vehicle_data[0] or 0)
+    return {
+        "sections": [],  # Optional detailed breakdown sections.
+        "grandTotals": {
+            "name": "NET PROFIT",
+            "amount": round(profit, 2),
+            "count": charter_count,
+            "percent": 100,
+            "avgAmount": round(profit / charter_count, 2)
+            if charter_count > 0
+            else 0,
+        },
+        "totals": {
+            "revenue": round(total_revenue, 2),
+            "expenses": round(total_expenses, 2),
+            "profit": round(profit, 2),
+            "profitMargin": round(profit_margin, 2),
+            "revenueChange": 0,  # Needs historical comparison.
+            "expensesChange": 0,  # Needs historical comparison.
+            "charters": charter_count,
+            "activeVehicles": active_vehicles,
+        },
+    }
 
-        return {
-            "sections": [],  # Optional detailed breakdown sections.
-            "grandTotals": {
-                "name": "NET PROFIT",
-                "amount": round(profit, 2),
-                "count": charter_count,
-                "percent": 100,
-                "avgAmount": round(profit / charter_count, 2)
-                if charter_count > 0
-                else 0,
-            },
-            "totals": {
-                "revenue": round(total_revenue, 2),
-                "expenses": round(total_expenses, 2),
-                "profit": round(profit, 2),
-                "profitMargin": round(profit_margin, 2),
-                "revenueChange": 0,  # Needs historical comparison.
-                "expensesChange": 0,  # Needs historical comparison.
-                "charters": charter_count,
-                "activeVehicles": active_vehicles,
-            },
-        }
+
+@router.get("/company-snapshot")
+def get_company_snapshot(
+    date_range: str = "mtd",
+    start_date: str | None = None,
+    end_date: str | None = None,
+):
+    """Get company financial snapshot.
+
+    Served from the precomputed KPI snapshot unless ``date_range`` is
+    ``custom``; ``snapshot_age_seconds`` says how old it is.
+    """
+    ensure_schema()
+    custom = date_range == "custom" and start_date and end_date
+    with cursor() as cur:
+        if not custom:
+            snapshot = read_kpi_snapshot(
+                cur, company_snapshot_key(date_range)
+            )
+            if snapshot is not None:
+                return snapshot
+        return live_result(
+            compute_company_snapshot(cur, date_range, start_date, end_date)
+        )
\ No newline at end of file
@@ -8,9 +8,10 @@ from datetime import date, datetime
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 
-from ..audit.engine import ensure_audit_storage, record_audit_event
+from ..audit.engine import record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_async_connection
+from ..schema_migrations import ensure_schema_async
 
 router = APIRouter(prefix="/api/t2", tags=["T2 Corporate Tax"])
 
@@ -202,39 +203,17 @@ class T2AdjustmentCreate(BaseModel):
     changed_by: str = "web_app"
 
 
-def _ensure_t2_adjustment_table(conn):
-    cur = conn.cursor()
-    try:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS t2_return_adjustments (
-                adjustment_id BIGSERIAL PRIMARY KEY,
-                return_id BIGINT NOT NULL REFERENCES
-                t2_return_metadata(return_id) ON DELETE CASCADE,
-                adjustment_type TEXT NOT NULL,
-                line_reference TEXT,
-                old_amount NUMERIC,
-                new_amount NUMERIC,
-                notes TEXT,
-                changed_by TEXT,
-                changed_at TIMESTAMP NOT NULL DEFAULT NOW()
-            )
-            """)
-        conn.commit()
-    finally:
-        cur.close()
-
-
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
 
 
 @router.get("/tax-rates", response_model=list[TaxRatesResponse])
-async def get_tax_rates(conn=Depends(get_connection)):
+async def get_tax_rates(conn=Depends(get_async_connection)):
     """Get corporate tax rates for all years (2007-2025)"""
     cur = conn.cursor()
     try:
-        cur.execute("""
+        await cur.execute("""
             SELECT tax_year, federal_small_business_rate, federal_general_rate,
                    alberta_small_business_rate, alberta_general_rate,
                    small_business_limit, gst_rate, notes
@@ -243,7 +222,7 @@ async def get_tax_rates(conn=Depends(get_connection)):
         """)
 
         rates = []
-        for row in cur.fetchall():
+        for row in await cur.fetchall():
             rates.append(
                 TaxRatesResponse(
                     tax_year=row[0],
@@ -263,11 +242,11 @@ async def get_tax_rates(conn=Depends(get_connection)):
 
 
 @router.get("/tax-rates/{tax_year}", response_model=TaxRatesResponse)
-async def get_tax_rate_by_year(tax_year: int, conn=Depends(get_connection)):
+async def get_tax_rate_by_year(tax_year: int, conn=Depends(get_async_connection)):
     """Get tax rates for a specific year"""
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT tax_year, federal_small_business_rate, federal_general_rate,
                    alberta_small_business_rate, alberta_general_rate,
@@ -278,7 +257,7 @@ async def get_tax_rate_by_year(tax_year: int, conn=Depends(get_connection)):
             (tax_year,),
         )
 
-        row = cur.fetchone()
+        row = await cur.fetchone()
         if not row:
             raise HTTPException(
                 status_code=404, detail=f"Tax rates not found for {tax_year}"
@@ -300,27 +279,27 @@ async def get_tax_rate_by_year(tax_year: int, conn=Depends(get_connection)):
 
 @router.post("/returns", response_model=T2ReturnMetadata)
 async def create_t2_return(
-    data: T2ReturnCreate, request: Request, conn=Depends(get_connection)
+    data: T2ReturnCreate, request: Request, conn=Depends(get_async_connection)
 ):
     """Create a new T2 return for a tax year"""
     cur = conn.cursor()
     try:
-        ensure_audit_storage(conn)
-        _ensure_tax_rate_for_year(conn, data.tax_year)
+        await ensure_schema_async()
+        await conn.run_sync(_ensure_tax_rate_for_year, data.tax_year)
 
         # Check if return already exists
-        cur.execute(
+        await cur.execute(
             "SELECT return_id FROM t2_return_metadata WHERE tax_year = %s",
             (data.tax_year,),
         )
-        if cur.fetchone():
+        if await cur.fetchone():
             raise HTTPException(
                 status_code=400,
                 detail=f"T2 return for {data.tax_year} already exists",
             )
 
         # Create new return
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO t2_return_metadata (
                 tax_year, corporation_name, business_number, fiscal_year_end,
@@ -342,10 +321,10 @@ async def create_t2_return(
             ),
         )
 
-        row = cur.fetchone()
+        row = await cur.fetchone()
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="t2_returns",
                 entity_type="t2_return",
@@ -368,7 +347,7 @@ async def create_t2_return(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
 
         return T2ReturnMetadata(
             return_id=row[0],
@@ -388,21 +367,21 @@ async def create_t2_return(
             updated_at=row[14],
         )
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
         cur.close()
 
 
 @router.get("/returns/{tax_year}", response_model=T2ReturnMetadata | None)
-async def get_t2_return(tax_year: int, conn=Depends(get_connection)):
+async def get_t2_return(tax_year: int, conn=Depends(get_async_connection)):
     """Get T2 return for a specific tax year"""
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT return_id, tax_year, corporation_name, business_number,
             fiscal_year_end,
@@ -416,7 +395,7 @@ async def get_t2_return(tax_year: int, conn=Depends(get_connection)):
             (tax_year,),
         )
 
-        row = cur.fetchone()
+        row = await cur.fetchone()
         if not row:
             return None
 
@@ -443,12 +422,12 @@ async def get_t2_return(tax_year: int, conn=Depends(get_connection)):
 
 @router.post("/schedule125")
 async def save_schedule_125(
-    data: Schedule125Data, request: Request, conn=Depends(get_connection)
+    data: Schedule125Data, request: Request, conn=Depends(get_async_connection)
 ):
     """Save Schedule 125 (Income Statement) data"""
     cur = conn.cursor()
     try:
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
 
         # Calculate totals
         total_revenue = data.charter_revenue + data.other_revenue
@@ -491,7 +470,7 @@ async def save_schedule_125(
         ]
 
         for schedule, line_num, desc, amount in lines:
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO t2_schedule_data (return_id, schedule_number,
                 line_number, line_description, amount)
@@ -503,7 +482,7 @@ async def save_schedule_125(
             )
 
         # Update metadata
-        cur.execute(
+        await cur.execute(
             """
             UPDATE t2_return_metadata
             SET total_revenue = %s, total_expenses = %s, net_income = %s,
@@ -513,8 +492,8 @@ async def save_schedule_125(
             (total_revenue, total_expenses, net_income, data.return_id),
         )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="t2_returns",
                 entity_type="t2_return",
@@ -537,7 +516,7 @@ async def save_schedule_125(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -546,18 +525,18 @@ async def save_schedule_125(
             "net_income": net_income,
         }
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
         cur.close()
 
 
 @router.get("/schedule125/{return_id}")
-async def get_schedule_125(return_id: int, conn=Depends(get_connection)):
+async def get_schedule_125(return_id: int, conn=Depends(get_async_connection)):
     """Get Schedule 125 data"""
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT line_number, amount
             FROM t2_schedule_data
@@ -566,7 +545,7 @@ async def get_schedule_125(return_id: int, conn=Depends(get_connection)):
             (return_id,),
         )
 
-        data = {row[0]: float(row[1]) for row in cur.fetchall()}
+        data = {row[0]: float(row[1]) for row in await cur.fetchall()}
 
         return {
             "charter_revenue": data.get("8000", 0),
@@ -592,12 +571,12 @@ async def get_schedule_125(return_id: int, conn=Depends(get_connection)):
 
 @router.post("/schedule100")
 async def save_schedule_100(
-    data: Schedule100Data, request: Request, conn=Depends(get_connection)
+    data: Schedule100Data, request: Request, conn=Depends(get_async_connection)
 ):
     """Save Schedule 100 (Balance Sheet) data"""
     cur = conn.cursor()
     try:
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
         lines = [
             ("100", "1000-B", "Cash - Beginning", data.cash_begin),
             ("100", "1000-E", "Cash - Ending", data.cash_end),
@@ -631,7 +610,7 @@ async def save_schedule_100(
         ]
 
         for schedule, line_num, desc, amount in lines:
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO t2_schedule_data (return_id, schedule_number,
                 line_number, line_description, amount)
@@ -642,8 +621,8 @@ async def save_schedule_100(
                 (data.return_id, schedule, line_num, desc, amount),
             )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="t2_returns",
                 entity_type="t2_return",
@@ -661,21 +640,21 @@ async def save_schedule_100(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
         return {"success": True}
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
         cur.close()
 
 
 @router.get("/schedule100/{return_id}")
-async def get_schedule_100(return_id: int, conn=Depends(get_connection)):
+async def get_schedule_100(return_id: int, conn=Depends(get_async_connection)):
     """Get Schedule 100 data"""
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT line_number, amount
             FROM t2_schedule_data
@@ -684,7 +663,7 @@ async def get_schedule_100(return_id: int, conn=Depends(get_connection)):
             (return_id,),
         )
 
-        data = {row[0]: float(row[1]) for row in cur.fetchall()}
+        data = {row[0]: float(row[1]) for row in await cur.fetchall()}
 
         return {
             "cash_begin": data.get("1000-B", 0),
@@ -708,26 +687,26 @@ async def get_schedule_100(return_id: int, conn=Depends(get_connection)):
 
 @router.post("/calculate-tax")
 async def calculate_tax(
-    data: TaxCalculation, request: Request, conn=Depends(get_connection)
+    data: TaxCalculation, request: Request, conn=Depends(get_async_connection)
 ):
     """Calculate federal and provincial tax"""
     cur = conn.cursor()
     try:
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
 
         # Get return to find tax year
-        cur.execute(
+        await cur.execute(
             "SELECT tax_year FROM t2_return_metadata WHERE return_id = %s",
             (data.return_id,),
         )
-        row = cur.fetchone()
+        row = await cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Return not found")
 
         tax_year = row[0]
 
         # Get tax rates
-        cur.execute(
+        await cur.execute(
             """
             SELECT federal_small_business_rate, federal_general_rate,
                    alberta_small_business_rate, alberta_general_rate,
@@ -738,7 +717,7 @@ async def calculate_tax(
             (tax_year,),
         )
 
-        rates = cur.fetchone()
+        rates = await cur.fetchone()
         if not rates:
             raise HTTPException(
                 status_code=404, detail=f"Tax rates not found for {tax_year}"
@@ -762,7 +741,7 @@ async def calculate_tax(
         total_tax = total_federal + total_provincial
 
         # Update return metadata
-        cur.execute(
+        await cur.execute(
             """
             UPDATE t2_return_metadata
             SET taxable_income = %s,
@@ -782,8 +761,8 @@ async def calculate_tax(
             ),
         )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="t2_returns",
                 entity_type="t2_return",
@@ -805,7 +784,7 @@ async def calculate_tax(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -821,10 +800,10 @@ async def calculate_tax(
             "total_tax": total_tax,
         }
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
         cur.close()
@@ -835,12 +814,12 @@ async def update_t2_return(
     return_id: int,
     data: T2ReturnUpdate,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Update T2 return status or filing information"""
     cur = conn.cursor()
     try:
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
         updates = []
         params = []
 
@@ -866,10 +845,10 @@ async def update_t2_return(
             "UPDATE t2_return_metadata SET "
             f"{', '.join(updates)} WHERE return_id = %s"
         )
-        cur.execute(query, params)
+        await cur.execute(query, params)
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="t2_returns",
                 entity_type="t2_return",
@@ -891,10 +870,10 @@ async def update_t2_return(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
         return {"success": True, "message": "T2 return updated"}
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
         cur.close()
@@ -905,7 +884,7 @@ async def transition_t2_status(
     return_id: int,
     data: T2StatusTransition,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Apply a controlled T2 status transition and write adjustment-history"
     "audit row."""
@@ -918,15 +897,14 @@ async def transition_t2_status(
             detail="Invalid status. Use draft, ready, filed, or amended",
         )
 
-    ensure_audit_storage(conn)
-    _ensure_t2_adjustment_table(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             "SELECT status FROM t2_return_metadata WHERE return_id = %s",
             (return_id,),
         )
-        row = cur.fetchone()
+        row = await cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="T2 return not found")
 
@@ -953,13 +931,13 @@ async def transition_t2_status(
             params.append(data.filed_date or date.today())
         params.append(return_id)
 
-        cur.execute(
+        await cur.execute(
             f"UPDATE t2_return_metadata SET {', '.join(updates)} WHERE"
             f"return_id = %s",
             params,
         )
 
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO t2_return_adjustments (
                 return_id, adjustment_type, line_reference, old_amount,
@@ -978,8 +956,8 @@ async def transition_t2_status(
             ),
         )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="t2_returns",
                 entity_type="t2_return",
@@ -997,7 +975,7 @@ async def transition_t2_status(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
         return {
             "success": True,
             "return_id": return_id,
@@ -1005,10 +983,10 @@ async def transition_t2_status(
             "to_status": new_status,
         }
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
         cur.close()
@@ -1019,23 +997,22 @@ async def add_t2_adjustment(
     return_id: int,
     data: T2AdjustmentCreate,
     request: Request,
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Record an amendment/adjustment row with optional notes and line"
     "reference."""
 
-    ensure_audit_storage(conn)
-    _ensure_t2_adjustment_table(conn)
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             "SELECT return_id FROM t2_return_metadata WHERE return_id = %s",
             (return_id,),
         )
-        if not cur.fetchone():
+        if not await cur.fetchone():
             raise HTTPException(status_code=404, detail="T2 return not found")
 
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO t2_return_adjustments (
                 return_id,
@@ -1059,9 +1036,9 @@ async def add_t2_adjustment(
                 (data.changed_by or "web_app").strip(),
             ),
         )
-        created = cur.fetchone()
+        created = await cur.fetchone()
 
-        cur.execute(
+        await cur.execute(
             """
             UPDATE t2_return_metadata
             SET status = CASE WHEN status = 'filed'
@@ -1072,8 +1049,8 @@ async def add_t2_adjustment(
             (return_id,),
         )
 
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="t2_returns",
                 entity_type="t2_adjustment",
@@ -1097,7 +1074,7 @@ async def add_t2_adjustment(
             ensure_storage=False,
             commit=False,
         )
-        conn.commit()
+        await conn.commit()
         return {
             "success": True,
             "adjustment_id": int(created[0]),
@@ -1106,21 +1083,21 @@ async def add_t2_adjustment(
             ),
         }
     except HTTPException:
-        conn.rollback()
+        await conn.rollback()
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
         cur.close()
 
 
 @router.get("/returns/{return_id}/adjustments")
-async def list_t2_adjustments(return_id: int, conn=Depends(get_connection)):
-    _ensure_t2_adjustment_table(conn)
+async def list_t2_adjustments(return_id: int, conn=Depends(get_async_connection)):
+    await ensure_schema_async()
     cur = conn.cursor()
     try:
-        cur.execute(
+        await cur.execute(
             """
             SELECT adjustment_id, adjustment_type, line_reference, old_amount,
             new_amount,
@@ -1131,7 +1108,7 @@ async def list_t2_adjustments(return_id: int, conn=Depends(get_connection)):
             """,
             (return_id,),
         )
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         return [
             {
                 "adjustment_id": int(r[0]),
@@ -5,12 +5,12 @@ Provides CRUD endpoints for master data tables
 
 from datetime import date
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import cursor, get_connection
+from ..db import cursor, get_db
 
 router = APIRouter(prefix="/api/table-management", tags=["table-management"])
 
@@ -134,9 +134,11 @@ def get_chart_of_accounts():
 
 
 @router.post("/chart-of-accounts")
-def save_chart_of_accounts(data: list[ChartOfAccountRow]):
+def save_chart_of_accounts(
+    data: list[ChartOfAccountRow],
+    conn=Depends(get_db),
+):
     """Save chart of accounts (upsert)"""
-    conn = get_connection()
     try:
         ensure_audit_storage(conn)
         with conn.cursor() as cur:
@@ -219,9 +221,11 @@ def get_receipt_categories():
 
 
 @router.post("/receipt-categories")
-def save_receipt_categories(data: list[ReceiptCategoryRow]):
+def save_receipt_categories(
+    data: list[ReceiptCategoryRow],
+    conn=Depends(get_db),
+):
     """Save receipt categories (upsert)"""
-    conn = get_connection()
     try:
         ensure_audit_storage(conn)
         with conn.cursor() as cur:
@@ -293,9 +297,8 @@ def get_charter_types():
 
 
 @router.post("/charter-types")
-def save_charter_types(data: list[CharterTypeRow]):
+def save_charter_types(data: list[CharterTypeRow], conn=Depends(get_db)):
     """Save charter types (upsert)"""
-    conn = get_connection()
     try:
         ensure_audit_storage(conn)
         with conn.cursor() as cur:
@@ -363,9 +366,8 @@ def get_vehicle_pricing():
 
 
 @router.post("/vehicle-pricing")
-def save_vehicle_pricing(data: list[VehiclePricingRow]):
+def save_vehicle_pricing(data: list[VehiclePricingRow], conn=Depends(get_db)):
     """Save vehicle pricing defaults (upsert)"""
-    conn = get_connection()
     try:
         ensure_audit_storage(conn)
         with conn.cursor() as cur:
@@ -444,9 +446,8 @@ def get_beverages():
 
 
 @router.post("/beverages")
-def save_beverages(data: list[BeverageRow]):
+def save_beverages(data: list[BeverageRow], conn=Depends(get_db)):
     """Save beverages to beverage_products (upsert)"""
-    conn = get_connection()
     try:
         ensure_audit_storage(conn)
         with conn.cursor() as cur:
@@ -5,11 +5,12 @@ import shutil
 from datetime import date
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
+from ..schema_catalog import schema_catalog
 
 router = APIRouter(prefix="/api/vehicles", tags=["vehicles"])
 
@@ -17,42 +18,6 @@ router = APIRouter(prefix="/api/vehicles", tags=["vehicles"])
 FILE_STORAGE_ROOT = Path(os.environ.get("FILE_STORAGE_ROOT", "Z:/limo_files"))
 
 
-def _has_column(conn, table_name: str, column_name: str) -> bool:
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            SELECT 1
-            FROM information_schema.columns
-            WHERE table_schema = 'public'
-              AND table_name = %s
-              AND column_name = %s
-            LIMIT 1
-            """,
-            (table_name, column_name),
-        )
-        return cur.fetchone() is not None
-    finally:
-        cur.close()
-
-
-def _get_table_columns(conn, table_name: str) -> set[str]:
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'public'
-              AND table_name = %s
-            """,
-            (table_name,),
-        )
-        return {row[0] for row in cur.fetchall()}
-    finally:
-        cur.close()
-
-
 def _pick_column_expr(columns: set[str], candidates: list[str], default: str = "NULL") -> str:
     for name in candidates:
         if name in columns:
@@ -93,7 +58,7 @@ def _audit_actor(request: Request) -> AuditEventActor:
 
 
 @router.get("/", responses={500: {"description": "Failed to list vehicles"}})
-def list_vehicles():
+def list_vehicles(conn=Depends(get_db)):
     """Return active vehicles with all display fields for Vehicle Management
     view.
 
@@ -103,10 +68,9 @@ def list_vehicles():
     - display (vehicle_number + plate)
     - is_active
     """
-    conn = get_connection()
     cur = conn.cursor()
     try:
-        columns = _get_table_columns(conn, "vehicles")
+        columns = schema_catalog.column_set(conn, "vehicles")
         vehicle_type_expr = _pick_column_expr(columns, ["type", "vehicle_type"])
         op_status_expr = _pick_column_expr(columns, ["operational_status", "status"])
         next_service_expr = _pick_column_expr(
@@ -167,13 +131,11 @@ def list_vehicles():
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/", responses={500: {"description": "Failed to create vehicle"}})
-def create_vehicle(vehicle_data: dict, request: Request):
+def create_vehicle(vehicle_data: dict, request: Request, conn=Depends(get_db)):
     """Create new vehicle and auto-create file storage folder."""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         ensure_audit_storage(conn)
@@ -235,13 +197,16 @@ def create_vehicle(vehicle_data: dict, request: Request):
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.put("/{vehicle_id}", responses={500: {"description": "Failed to update vehicle"}})
-def update_vehicle(vehicle_id: int, vehicle_data: dict, request: Request):
+def update_vehicle(
+    vehicle_id: int,
+    vehicle_data: dict,
+    request: Request,
+    conn=Depends(get_db),
+):
     """Update an existing vehicle core fields with audit logging."""
-    conn = get_connection()
     cur = conn.cursor()
     try:
         ensure_audit_storage(conn)
@@ -314,4 +279,3 @@ def update_vehicle(vehicle_id: int, vehicle_data: dict, request: Request):
         )
     finally:
         cur.close()
-        conn.close()
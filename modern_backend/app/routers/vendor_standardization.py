@@ -1,20 +1,25 @@
 """
 Vendor Standardization Tool - identify and clean up vendor names
 - List all vendors with counts
+- Suggest fuzzy merge clusters
 - Merge mistyped vendors
 - Auto-capitalize all vendor names
 - Track standardization history
 """
 
+import asyncio
 from datetime import date
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 
-from ..audit.engine import ensure_audit_storage, record_audit_event
+from ..audit.engine import record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_async_connection
+from ..schema_migrations import ensure_schema_async
+from ..vendor_clusters import receipt_versions, vendor_cluster_job
+from ..vendor_merge import apply_mapping, build_mapping
 
 router = APIRouter(prefix="/api/vendors", tags=["vendors"])
 logger = logging.getLogger(__name__)
@@ -48,13 +53,13 @@ class VendorMerge(BaseModel):
 
 @router.get("/list-all")
 async def get_all_vendors(
-    min_receipts: int = Query(1, ge=1), conn=Depends(get_connection)
+    min_receipts: int = Query(1, ge=1), conn=Depends(get_async_connection)
 ):
     """Get list of all vendors with receipt counts, sorted by frequency"""
     try:
         cur = conn.cursor()
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 vendor_name,
@@ -70,7 +75,7 @@ async def get_all_vendors(
             (min_receipts,),
         )
 
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         cur.close()
 
         vendors = [
@@ -95,7 +100,7 @@ async def find_vendor_variations(
     vendor_prefix: str = Query(
         ..., min_length=3, description="First few chars"
     ),
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """Find all vendor name variations starting with prefix"
     "(case-insensitive)"""
@@ -103,7 +108,7 @@ async def find_vendor_variations(
     try:
         cur = conn.cursor()
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT DISTINCT vendor_name
             FROM receipts
@@ -113,7 +118,7 @@ async def find_vendor_variations(
             (f"{vendor_prefix}%",),
         )
 
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         cur.close()
 
         variations = [r[0] for r in rows]
@@ -129,9 +134,52 @@ async def find_vendor_variations(
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
 
+@router.get("/clusters")
+async def get_vendor_clusters(
+    response: Response,
+    min_similarity: float = Query(0.6, ge=0.3, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+    refresh: bool = Query(False),
+):
+    """
+    Suggest merge clusters of vendor names that look alike, ranked by the
+    receipts a merge would change.
+
+    Clusters are computed in the background and kept until receipts
+    change. Until they are ready the response is 202 with
+    status "running"; poll again without ``refresh``, which discards
+    the kept clusters and starts a new run.
+    """
+    try:
+        versions = await asyncio.to_thread(receipt_versions)
+        result = (
+            None
+            if refresh
+            else vendor_cluster_job.result(versions, min_similarity)
+        )
+        if result is None:
+            vendor_cluster_job.start(versions, min_similarity, replace=refresh)
+            response.status_code = 202
+            return {
+                "status": "running",
+                "last_error": vendor_cluster_job.stats()["last_error"],
+            }
+
+        return {
+            "status": "ready",
+            **result,
+            "cluster_count": len(result["clusters"]),
+            "clusters": result["clusters"][:limit],
+        }
+
+    except Exception as e:
+        logger.error(f"Error clustering vendors: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/merge-vendors")
 async def merge_vendor_names(
-    merge_request: VendorMerge, conn=Depends(get_connection)
+    merge_request: VendorMerge, conn=Depends(get_async_connection)
 ):
     """
     Merge multiple vendor names into one canonical name.
@@ -143,48 +191,21 @@ async def merge_vendor_names(
     Result: All receipts with any source vendor name → "SHELL CANADA"
     """
     try:
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
         if not merge_request.source_vendors or not merge_request.target_vendor:
             raise ValueError("Must provide source_vendors and target_vendor")
 
         # Capitalize target vendor name
         canonical_name = merge_request.target_vendor.upper()
 
-        cur = conn.cursor()
-
-        # Update all receipts with any of the source vendor names
-        placeholders = ",".join(["%s"] * len(merge_request.source_vendors))
-
-        cur.execute(
-            f"""
-            UPDATE receipts
-            SET vendor_name = %s
-            WHERE LOWER(vendor_name) IN ({placeholders})
-        """,
-            [canonical_name]
-            + [v.lower() for v in merge_request.source_vendors],
+        mapping, _ = build_mapping(
+            (v, canonical_name) for v in merge_request.source_vendors
         )
+        by_source = await conn.run_sync(apply_mapping, mapping)
+        affected_rows = sum(r["receipts"] for r in by_source)
 
-        affected_rows = cur.rowcount
-        conn.commit()
-
-        # Log this standardization
-        for old_vendor in merge_request.source_vendors:
-            cur.execute(
-                """
-                INSERT INTO vendor_standardization_log (old_name, new_name,
-                affected_count, standardized_by)
-                VALUES (%s, %s, %s, 'admin')
-            """,
-                (
-                    old_vendor,
-                    canonical_name,
-                    affected_rows // len(merge_request.source_vendors),
-                ),
-            )
-
-        record_audit_event(
-            conn,
+        await conn.run_sync(
+            record_audit_event,
             AuditEvent(
                 module="vendor_standardization",
                 entity_type="vendor_name",
@@ -207,8 +228,7 @@ async def merge_vendor_names(
             commit=False,
         )
 
-        conn.commit()
-        cur.close()
+        await conn.commit()
 
         logger.info(
             f"Merged {len(merge_request.source_vendors)} vendor names →"
@@ -221,17 +241,18 @@ async def merge_vendor_names(
             "names to '{canonical_name}'",
             "affected_receipts": affected_rows,
             "canonical_name": canonical_name,
+            "by_source": by_source,
         }
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error merging vendors: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
 
 @router.post("/capitalize-all")
 async def capitalize_all_vendors(
-    dry_run: bool = Query(True), conn=Depends(get_connection)
+    dry_run: bool = Query(True), conn=Depends(get_async_connection)
 ):
     """
     Capitalize all vendor names (UPPER CASE).
@@ -240,52 +261,43 @@ async def capitalize_all_vendors(
     Example: "shell canada" → "SHELL CANADA"
     """
     try:
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
         cur = conn.cursor()
 
-        if dry_run:
-            # Preview what will change
-            cur.execute("""
-                SELECT vendor_name, UPPER(vendor_name) as capitalized
-                FROM receipts
-                WHERE vendor_name IS NOT NULL 
-                  AND vendor_name != ''
-                  AND vendor_name != UPPER(vendor_name)
-                ORDER BY vendor_name
-            """)
-
-            rows = cur.fetchall()
-            cur.close()
-
-            changes = [
-                {
-                    "current": r[0],
-                    "will_become": r[1],
-                    "receipts": None,  # Would need another query to count
-                }
-                for r in rows
-            ]
+        await cur.execute("""
+            SELECT DISTINCT vendor_name
+            FROM receipts
+            WHERE vendor_name IS NOT NULL 
+              AND vendor_name != ''
+              AND vendor_name != UPPER(vendor_name)
+        """)
+        names = [r[0] for r in await cur.fetchall()]
+        cur.close()
 
+        mapping, _ = build_mapping((name, name.upper()) for name in names)
+        changes = await conn.run_sync(
+            apply_mapping, mapping, dry_run=dry_run
+        )
+
+        if dry_run:
             return {
                 "dry_run": True,
                 "changes_to_apply": len(changes),
-                "preview": changes[:20],  # Show first 20
+                "preview": [
+                    {
+                        "current": c["old_name"],
+                        "will_become": c["new_name"],
+                        "receipts": c["receipts"],
+                    }
+                    for c in changes[:20]  # Show first 20
+                ],
             }
 
         else:
-            # Apply capitalization
-            cur.execute("""
-                UPDATE receipts
-                SET vendor_name = UPPER(vendor_name)
-                WHERE vendor_name IS NOT NULL 
-                  AND vendor_name != ''
-                  AND vendor_name != UPPER(vendor_name)
-            """)
-
-            affected = cur.rowcount
-
-            record_audit_event(
-                conn,
+            affected = sum(c["receipts"] for c in changes)
+
+            await conn.run_sync(
+                record_audit_event,
                 AuditEvent(
                     module="vendor_standardization",
                     entity_type="vendor_name",
@@ -304,8 +316,7 @@ async def capitalize_all_vendors(
                 commit=False,
             )
 
-            conn.commit()
-            cur.close()
+            await conn.commit()
 
             logger.info(f"Capitalized {affected} vendor names")
 
@@ -319,20 +330,20 @@ async def capitalize_all_vendors(
             }
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error capitalizing vendors: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
 
 @router.get("/standardization-log")
 async def get_standardization_log(
-    limit: int = Query(100, ge=1, le=1000), conn=Depends(get_connection)
+    limit: int = Query(100, ge=1, le=1000), conn=Depends(get_async_connection)
 ):
     """Get history of vendor name standardization changes"""
     try:
         cur = conn.cursor()
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 id,
@@ -348,7 +359,7 @@ async def get_standardization_log(
             (limit,),
         )
 
-        rows = cur.fetchall()
+        rows = await cur.fetchall()
         cur.close()
 
         log = [
@@ -374,7 +385,7 @@ async def get_standardization_log(
 async def bulk_standardize_vendors(
     corrections: list[VendorMerge],
     dry_run: bool = Query(True),
-    conn=Depends(get_connection),
+    conn=Depends(get_async_connection),
 ):
     """
     Apply multiple vendor standardizations at once.
@@ -389,75 +400,59 @@ async def bulk_standardize_vendors(
     ]
     """
     try:
-        ensure_audit_storage(conn)
+        await ensure_schema_async()
+
+        # One mapping for every correction, applied in one statement.
+        mapping, conflicts = build_mapping(
+            (source, correction.target_vendor.upper())
+            for correction in corrections
+            for source in correction.source_vendors
+        )
+        counts = {
+            c["old_name"].lower(): c["receipts"]
+            for c in await conn.run_sync(
+                apply_mapping, mapping, dry_run=dry_run
+            )
+        }
+        conflicting = {c["source"].lower() for c in conflicts}
+
         total_affected = 0
         applied = []
         errors = []
-
-        cur = conn.cursor()
-
+        count_key = "would_affect" if dry_run else "affected"
         for correction in corrections:
-            try:
-                canonical_name = correction.target_vendor.upper()
-                placeholders = ",".join(
-                    ["%s"] * len(correction.source_vendors)
-                )
-
-                if dry_run:
-                    # Count what would change
-                    cur.execute(
-                        f"""
-                        SELECT COUNT(*)
-                        FROM receipts
-                        WHERE LOWER(vendor_name) IN ({placeholders})
-                    """,
-                        [v.lower() for v in correction.source_vendors],
-                    )
-
-                    count = cur.fetchone()[0]
-                    applied.append(
-                        {
-                            "source": correction.source_vendors,
-                            "target": canonical_name,
-                            "would_affect": count,
-                        }
-                    )
-                    total_affected += count
-
-                else:
-                    # Actually apply
-                    cur.execute(
-                        f"""
-                        UPDATE receipts
-                        SET vendor_name = %s
-                        WHERE LOWER(vendor_name) IN ({placeholders})
-                    """,
-                        [canonical_name]
-                        + [v.lower() for v in correction.source_vendors],
-                    )
-
-                    count = cur.rowcount
-                    applied.append(
-                        {
-                            "source": correction.source_vendors,
-                            "target": canonical_name,
-                            "affected": count,
-                        }
-                    )
-                    total_affected += count
-
-            except Exception as ce:
+            canonical_name = correction.target_vendor.upper()
+            clashes = [
+                v
+                for v in correction.source_vendors
+                if v.strip().lower() in conflicting
+            ]
+            if clashes:
                 errors.append(
                     {
                         "source": correction.source_vendors,
                         "target": correction.target_vendor,
-                        "error": str(ce),
+                        "error": "mapped to several targets: "
+                        + ", ".join(clashes),
                     }
                 )
+            # A name listed in several corrections is counted once.
+            count = sum(
+                counts.pop(v.strip().lower(), 0)
+                for v in correction.source_vendors
+            )
+            applied.append(
+                {
+                    "source": correction.source_vendors,
+                    "target": canonical_name,
+                    count_key: count,
+                }
+            )
+            total_affected += count
 
         if not dry_run:
-            record_audit_event(
-                conn,
+            await conn.run_sync(
+                record_audit_event,
                 AuditEvent(
                     module="vendor_standardization",
                     entity_type="vendor_name",
@@ -480,9 +475,7 @@ async def bulk_standardize_vendors(
                 ensure_storage=False,
                 commit=False,
             )
-            conn.commit()
-
-        cur.close()
+            await conn.commit()
 
         return {
             "dry_run": dry_run,
@@ -494,6 +487,6 @@ async def bulk_standardize_vendors(
         }
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         logger.error(f"Error bulk standardizing vendors: {e}")
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
@@ -2,12 +2,15 @@ from datetime import date, datetime
 import json
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 
 from ..audit.engine import ensure_audit_storage, record_audit_event
 from ..audit.schemas import AuditEvent, AuditEventActor
-from ..db import get_connection
+from ..db import get_db
+from ..financial_facts import facts_available, source_totals, year_bounds
+from ..schema_catalog import schema_catalog
+from ..schema_migrations import ensure_schema
 
 router = APIRouter(prefix="/api/year-end", tags=["year_end_close"])
 
@@ -25,134 +28,38 @@ class YearEndCloseRequest(BaseModel):
     notes: str | None = Field(default=None, max_length=1000)
 
 
-def _ensure_tables(conn) -> None:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS year_end_closes (
-                close_id SERIAL PRIMARY KEY,
-                fiscal_year INTEGER UNIQUE NOT NULL,
-                status TEXT NOT NULL DEFAULT 'closed',
-                total_revenue NUMERIC NOT NULL DEFAULT 0,
-                total_expenses NUMERIC NOT NULL DEFAULT 0,
-                net_income NUMERIC NOT NULL DEFAULT 0,
-                retained_earnings_rollover NUMERIC NOT NULL DEFAULT 0,
-                capital_gains NUMERIC NOT NULL DEFAULT 0,
-                notes TEXT,
-                executed_by TEXT,
-                closed_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                summary_json JSONB
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS year_end_checklist (
-                fiscal_year INTEGER NOT NULL,
-                item_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                completed BOOLEAN NOT NULL DEFAULT FALSE,
-                updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                PRIMARY KEY (fiscal_year, item_id)
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS year_end_rollovers (
-                rollover_id SERIAL PRIMARY KEY,
-                fiscal_year INTEGER NOT NULL,
-                account_code TEXT,
-                account_name TEXT,
-                amount NUMERIC NOT NULL,
-                direction TEXT NOT NULL,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                metadata JSONB
-            )
-            """
-        )
-    conn.commit()
-
-
-def _has_column(conn, table: str, column: str) -> bool:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT 1
-            FROM information_schema.columns
-            WHERE table_schema = 'public'
-              AND table_name = %s
-              AND column_name = %s
-            LIMIT 1
-            """,
-            (table, column),
-        )
-        return cur.fetchone() is not None
-
-
 def _date_bounds(fiscal_year: int) -> tuple[date, date]:
     return date(fiscal_year, 1, 1), date(fiscal_year, 12, 31)
 
 
 def _compute_summary(conn, fiscal_year: int) -> dict[str, float]:
-    start_date, end_date = _date_bounds(fiscal_year)
-
-    charter_date_col = (
-        "charter_date"
-        if _has_column(conn, "charters", "charter_date")
-        else "pickup_date"
-        if _has_column(conn, "charters", "pickup_date")
-        else None
-    )
-    revenue_col = (
-        "grand_total"
-        if _has_column(conn, "charters", "grand_total")
-        else "total_amount_due"
-        if _has_column(conn, "charters", "total_amount_due")
-        else None
-    )
-
-    total_revenue = 0.0
-    if charter_date_col and revenue_col:
-        with conn.cursor() as cur:
+    start_date, end_date = year_bounds(fiscal_year)
+    with conn.cursor() as cur:
+        if facts_available(cur):
             cur.execute(
-                f"""
-                SELECT COALESCE(SUM({revenue_col}), 0)
-                FROM charters
-                WHERE {charter_date_col} BETWEEN %s AND %s
+                """
+                SELECT
+                    COALESCE(SUM(revenue) FILTER (
+                        WHERE source = 'charters'
+                    ), 0),
+                    COALESCE(SUM(expenses) FILTER (
+                        WHERE source = 'receipts'
+                    ), 0)
+                FROM daily_financial_facts
+                WHERE fact_date >= %s AND fact_date < %s
                 """,
                 (start_date, end_date),
             )
-            total_revenue = float(cur.fetchone()[0] or 0.0)
-
-    receipt_date_col = (
-        "receipt_date"
-        if _has_column(conn, "receipts", "receipt_date")
-        else "date"
-        if _has_column(conn, "receipts", "date")
-        else None
-    )
-    expense_col = (
-        "gross_amount"
-        if _has_column(conn, "receipts", "gross_amount")
-        else "amount"
-        if _has_column(conn, "receipts", "amount")
-        else None
-    )
-
-    total_expenses = 0.0
-    if receipt_date_col and expense_col:
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
-                SELECT COALESCE(SUM({expense_col}), 0)
-                FROM receipts
-                WHERE {receipt_date_col} BETWEEN %s AND %s
-                """,
-                (start_date, end_date),
+            revenue, expenses = cur.fetchone()
+        else:
+            (revenue,) = source_totals(
+                cur, "charters", ("revenue",), start_date, end_date
             )
-            total_expenses = float(cur.fetchone()[0] or 0.0)
+            (expenses,) = source_totals(
+                cur, "receipts", ("expenses",), start_date, end_date
+            )
+    total_revenue = float(revenue or 0.0)
+    total_expenses = float(expenses or 0.0)
 
     net_income = total_revenue - total_expenses
     return {
@@ -168,9 +75,8 @@ def _compute_capital_gains(conn, fiscal_year: int) -> dict[str, Any]:
     total = 0.0
     items: list[dict[str, Any]] = []
 
-    if _has_column(conn, "fixed_assets", "sold_date") and _has_column(
-        conn, "fixed_assets", "sale_price"
-    ) and _has_column(conn, "fixed_assets", "cost_basis"):
+    asset_cols = schema_catalog.column_set(conn, "fixed_assets")
+    if {"sold_date", "sale_price", "cost_basis"} <= asset_cols:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -198,20 +104,11 @@ def _compute_capital_gains(conn, fiscal_year: int) -> dict[str, Any]:
         return {"capital_gains": round(total, 2), "items": items}
 
     # Fallback on general ledger signal words.
-    if _has_column(conn, "general_ledger", "date") and _has_column(
-        conn, "general_ledger", "credit"
-    ) and _has_column(conn, "general_ledger", "debit"):
-        memo_col = (
-            "memo_description"
-            if _has_column(conn, "general_ledger", "memo_description")
-            else None
-        )
-        acct_name_col = (
-            "account_name"
-            if _has_column(conn, "general_ledger", "account_name")
-            else None
-        )
-        name_col = "name" if _has_column(conn, "general_ledger", "name") else None
+    gl_cols = schema_catalog.column_set(conn, "general_ledger")
+    if {"date", "credit", "debit"} <= gl_cols:
+        memo_col = "memo_description" if "memo_description" in gl_cols else None
+        acct_name_col = "account_name" if "account_name" in gl_cols else None
+        name_col = "name" if "name" in gl_cols else None
 
         predicates = []
         if memo_col:
@@ -315,12 +212,12 @@ def _insert_rollover_marker(conn, fiscal_year: int, net_income: float) -> dict[s
 
     # Best-effort mirror entry in general_ledger if schema supports it.
     required_cols = [
-        _has_column(conn, "general_ledger", "date"),
-        _has_column(conn, "general_ledger", "transaction_type"),
-        _has_column(conn, "general_ledger", "account"),
-        _has_column(conn, "general_ledger", "account_name"),
-        _has_column(conn, "general_ledger", "debit"),
-        _has_column(conn, "general_ledger", "credit"),
+        schema_catalog.has_column(conn, "general_ledger", "date"),
+        schema_catalog.has_column(conn, "general_ledger", "transaction_type"),
+        schema_catalog.has_column(conn, "general_ledger", "account"),
+        schema_catalog.has_column(conn, "general_ledger", "account_name"),
+        schema_catalog.has_column(conn, "general_ledger", "debit"),
+        schema_catalog.has_column(conn, "general_ledger", "credit"),
     ]
     if all(required_cols):
         debit_val = amount if direction == "debit" else 0.0
@@ -335,7 +232,7 @@ def _insert_rollover_marker(conn, fiscal_year: int, net_income: float) -> dict[s
             "account_full_name": "Equity:Retained Earnings",
         }
         for col, value in optional.items():
-            if _has_column(conn, "general_ledger", col):
+            if schema_catalog.has_column(conn, "general_ledger", col):
                 cols.append(col)
                 vals.append(value)
 
@@ -365,49 +262,40 @@ def _audit_actor(request: Request) -> AuditEventActor:
 
 
 @router.get("/summary/{fiscal_year}")
-def get_year_end_summary(fiscal_year: int):
-    conn = get_connection()
-    try:
-        _ensure_tables(conn)
-        return {
-            "fiscal_year": fiscal_year,
-            **_compute_summary(conn, fiscal_year),
-        }
-    finally:
-        conn.close()
+def get_year_end_summary(fiscal_year: int, conn=Depends(get_db)):
+    ensure_schema()
+    return {
+        "fiscal_year": fiscal_year,
+        **_compute_summary(conn, fiscal_year),
+    }
 
 
 @router.get("/capital-gains/{fiscal_year}")
-def get_capital_gains(fiscal_year: int):
-    conn = get_connection()
-    try:
-        _ensure_tables(conn)
-        data = _compute_capital_gains(conn, fiscal_year)
-        return {"fiscal_year": fiscal_year, **data}
-    finally:
-        conn.close()
+def get_capital_gains(fiscal_year: int, conn=Depends(get_db)):
+    ensure_schema()
+    data = _compute_capital_gains(conn, fiscal_year)
+    return {"fiscal_year": fiscal_year, **data}
 
 
 @router.get("/checklist/{fiscal_year}")
-def get_year_end_checklist(fiscal_year: int):
-    conn = get_connection()
-    try:
-        _ensure_tables(conn)
-        items = _get_checklist(conn, fiscal_year)
-        return {
-            "fiscal_year": fiscal_year,
-            "items": items,
-            "summary": _checklist_summary(items),
-        }
-    finally:
-        conn.close()
+def get_year_end_checklist(fiscal_year: int, conn=Depends(get_db)):
+    ensure_schema()
+    items = _get_checklist(conn, fiscal_year)
+    return {
+        "fiscal_year": fiscal_year,
+        "items": items,
+        "summary": _checklist_summary(items),
+    }
 
 
 @router.post("/checklist/{fiscal_year}")
-def upsert_year_end_checklist_item(fiscal_year: int, item: YearEndChecklistItem):
-    conn = get_connection()
+def upsert_year_end_checklist_item(
+    fiscal_year: int,
+    item: YearEndChecklistItem,
+    conn=Depends(get_db),
+):
     try:
-        _ensure_tables(conn)
+        ensure_schema()
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -435,68 +323,65 @@ def upsert_year_end_checklist_item(fiscal_year: int, item: YearEndChecklistItem)
     except Exception as exc:
         conn.rollback()
         raise HTTPException(status_code=400, detail=f"failed_to_save_checklist_item: {exc}") from exc
-    finally:
-        conn.close()
 
 
 @router.get("/status/{fiscal_year}")
-def get_year_end_status(fiscal_year: int):
-    conn = get_connection()
-    try:
-        _ensure_tables(conn)
-        summary = _compute_summary(conn, fiscal_year)
-        gains = _compute_capital_gains(conn, fiscal_year)
-        checklist_items = _get_checklist(conn, fiscal_year)
-        checklist = _checklist_summary(checklist_items)
+def get_year_end_status(fiscal_year: int, conn=Depends(get_db)):
+    ensure_schema()
+    summary = _compute_summary(conn, fiscal_year)
+    gains = _compute_capital_gains(conn, fiscal_year)
+    checklist_items = _get_checklist(conn, fiscal_year)
+    checklist = _checklist_summary(checklist_items)
 
-        with conn.cursor() as cur:
-            cur.execute(
-                """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
                 SELECT close_id, closed_at, total_revenue, total_expenses,
                        net_income, retained_earnings_rollover, capital_gains
                 FROM year_end_closes
                 WHERE fiscal_year = %s
                 """,
-                (fiscal_year,),
-            )
-            row = cur.fetchone()
-
-        if row:
-            return {
-                "fiscal_year": fiscal_year,
-                "status": "closed",
-                "message": f"Fiscal year {fiscal_year} is closed.",
-                "summary": {
-                    "total_revenue": float(row[2] or 0.0),
-                    "total_expenses": float(row[3] or 0.0),
-                    "net_income": float(row[4] or 0.0),
-                    "retained_earnings_rollover": float(row[5] or 0.0),
-                    "capital_gains": float(row[6] or 0.0),
-                    "closed_at": row[1].isoformat() if hasattr(row[1], "isoformat") else None,
-                },
-                "checklist": checklist,
-            }
+            (fiscal_year,),
+        )
+        row = cur.fetchone()
 
+    if row:
         return {
             "fiscal_year": fiscal_year,
-            "status": "open",
-            "message": f"Fiscal year {fiscal_year} is open.",
+            "status": "closed",
+            "message": f"Fiscal year {fiscal_year} is closed.",
             "summary": {
-                **summary,
-                "capital_gains": gains["capital_gains"],
-                "closed_at": None,
+                "total_revenue": float(row[2] or 0.0),
+                "total_expenses": float(row[3] or 0.0),
+                "net_income": float(row[4] or 0.0),
+                "retained_earnings_rollover": float(row[5] or 0.0),
+                "capital_gains": float(row[6] or 0.0),
+                "closed_at": row[1].isoformat() if hasattr(row[1], "isoformat") else None,
             },
             "checklist": checklist,
         }
-    finally:
-        conn.close()
+
+    return {
+        "fiscal_year": fiscal_year,
+        "status": "open",
+        "message": f"Fiscal year {fiscal_year} is open.",
+        "summary": {
+            **summary,
+            "capital_gains": gains["capital_gains"],
+            "closed_at": None,
+        },
+        "checklist": checklist,
+    }
 
 
 @router.post("/close")
-def execute_year_end_close(payload: YearEndCloseRequest, request: Request):
-    conn = get_connection()
+def execute_year_end_close(
+    payload: YearEndCloseRequest,
+    request: Request,
+    conn=Depends(get_db),
+):
     try:
-        _ensure_tables(conn)
+        ensure_schema()
         ensure_audit_storage(conn)
         fiscal_year = payload.fiscal_year
 
@@ -607,73 +492,67 @@ def execute_year_end_close(payload: YearEndCloseRequest, request: Request):
     except Exception as exc:
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"year_end_close_failed: {exc}") from exc
-    finally:
-        conn.close()
 
 
 @router.get("/report/{fiscal_year}")
-def get_year_end_report(fiscal_year: int):
-    conn = get_connection()
-    try:
-        _ensure_tables(conn)
-        summary = _compute_summary(conn, fiscal_year)
-        gains = _compute_capital_gains(conn, fiscal_year)
-        checklist_items = _get_checklist(conn, fiscal_year)
-        checklist = _checklist_summary(checklist_items)
+def get_year_end_report(fiscal_year: int, conn=Depends(get_db)):
+    ensure_schema()
+    summary = _compute_summary(conn, fiscal_year)
+    gains = _compute_capital_gains(conn, fiscal_year)
+    checklist_items = _get_checklist(conn, fiscal_year)
+    checklist = _checklist_summary(checklist_items)
 
-        with conn.cursor() as cur:
-            cur.execute(
-                """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
                 SELECT close_id, status, notes, executed_by, closed_at
                 FROM year_end_closes
                 WHERE fiscal_year = %s
                 """,
-                (fiscal_year,),
-            )
-            close_row = cur.fetchone()
+            (fiscal_year,),
+        )
+        close_row = cur.fetchone()
 
-            cur.execute(
-                """
+        cur.execute(
+            """
                 SELECT rollover_id, account_code, account_name,
                        amount, direction, created_at, metadata
                 FROM year_end_rollovers
                 WHERE fiscal_year = %s
                 ORDER BY rollover_id
                 """,
-                (fiscal_year,),
-            )
-            rollover_rows = cur.fetchall()
-
-        rollovers = [
-            {
-                "rollover_id": r[0],
-                "account_code": r[1],
-                "account_name": r[2],
-                "amount": float(r[3] or 0.0),
-                "direction": r[4],
-                "created_at": r[5].isoformat() if hasattr(r[5], "isoformat") else None,
-                "metadata": r[6],
-            }
-            for r in rollover_rows
-        ]
+            (fiscal_year,),
+        )
+        rollover_rows = cur.fetchall()
 
-        return {
-            "fiscal_year": fiscal_year,
-            "status": close_row[1] if close_row else "open",
-            "closed": close_row is not None,
-            "notes": close_row[2] if close_row else None,
-            "executed_by": close_row[3] if close_row else None,
-            "closed_at": close_row[4].isoformat() if close_row and hasattr(close_row[4], "isoformat") else None,
-            "summary": {
-                **summary,
-                "capital_gains": gains["capital_gains"],
-            },
-            "capital_gains": gains,
-            "checklist": {
-                "summary": checklist,
-                "items": checklist_items,
-            },
-            "rollovers": rollovers,
+    rollovers = [
+        {
+            "rollover_id": r[0],
+            "account_code": r[1],
+            "account_name": r[2],
+            "amount": float(r[3] or 0.0),
+            "direction": r[4],
+            "created_at": r[5].isoformat() if hasattr(r[5], "isoformat") else None,
+            "metadata": r[6],
         }
-    finally:
-        conn.close()
+        for r in rollover_rows
+    ]
+
+    return {
+        "fiscal_year": fiscal_year,
+        "status": close_row[1] if close_row else "open",
+        "closed": close_row is not None,
+        "notes": close_row[2] if close_row else None,
+        "executed_by": close_row[3] if close_row else None,
+        "closed_at": close_row[4].isoformat() if close_row and hasattr(close_row[4], "isoformat") else None,
+        "summary": {
+            **summary,
+            "capital_gains": gains["capital_gains"],
+        },
+        "capital_gains": gains,
+        "checklist": {
+            "summary": checklist,
+            "items": checklist_items,
+        },
+        "rollovers": rollovers,
+    }
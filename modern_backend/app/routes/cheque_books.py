@@ -7,10 +7,10 @@ cleared, etc.)
 from datetime import date
 
 import psycopg2.extras
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 
-from ..db import get_connection
+from ..db import get_async_connection
 
 router = APIRouter(prefix="/api/cheque-books", tags=["Cheque Books"])
 
@@ -71,13 +71,12 @@ class ChequeBookSummary(BaseModel):
 
 
 @router.get("/summary", response_model=list[ChequeBookSummary])
-async def get_cheque_books_summary():
+async def get_cheque_books_summary(conn=Depends(get_async_connection)):
     """Get summary of all cheque books by bank account"""
-    conn = get_connection()
     cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
     try:
-        cur.execute("""
+        await cur.execute("""
             SELECT 
                 account_number,
                 CASE 
@@ -112,7 +111,7 @@ async def get_cheque_books_summary():
             ORDER BY bank_name, account_number
         """)
 
-        results = cur.fetchall()
+        results = await cur.fetchall()
 
         summaries = []
         for row in results:
@@ -139,15 +138,15 @@ async def get_cheque_books_summary():
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}")  # noqa: B904
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/search", response_model=list[ChequeResponse])
-async def search_cheques(search: ChequeSearchRequest):
+async def search_cheques(
+    search: ChequeSearchRequest, conn=Depends(get_async_connection)
+):
     """Search for cheques by number, amount, payee, bank, status, or date"
     "range"""
 
-    conn = get_connection()
     cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
     try:
@@ -241,8 +240,8 @@ async def search_cheques(search: ChequeSearchRequest):
             LIMIT 1000
         """
 
-        cur.execute(query, params)
-        results = cur.fetchall()
+        await cur.execute(query, params)
+        results = await cur.fetchall()
 
         cheques = []
         for row in results:
@@ -275,13 +274,15 @@ async def search_cheques(search: ChequeSearchRequest):
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}")  # noqa: B904
     finally:
         cur.close()
-        conn.close()
 
 
 @router.put("/{transaction_id}", response_model=dict)
-async def update_cheque(transaction_id: int, update: ChequeUpdateRequest):
+async def update_cheque(
+    transaction_id: int,
+    update: ChequeUpdateRequest,
+    conn=Depends(get_async_connection),
+):
     """Update cheque information (payee, status, GL code, notes)"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -328,8 +329,8 @@ async def update_cheque(transaction_id: int, update: ChequeUpdateRequest):
             RETURNING transaction_id, check_recipient, category, gl_code
         """
 
-        cur.execute(update_sql, params)
-        result = cur.fetchone()
+        await cur.execute(update_sql, params)
+        result = await cur.fetchone()
 
         if not result:
             raise HTTPException(
@@ -337,7 +338,7 @@ async def update_cheque(transaction_id: int, update: ChequeUpdateRequest):
                 detail=f"Cheque transaction {transaction_id} not found",
             )
 
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -351,17 +352,17 @@ async def update_cheque(transaction_id: int, update: ChequeUpdateRequest):
     except HTTPException:
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}")  # noqa: B904
     finally:
         cur.close()
-        conn.close()
 
 
 @router.post("/bulk-update", response_model=dict)
-async def bulk_update_cheques(updates: list[ChequeUpdateRequest]):
+async def bulk_update_cheques(
+    updates: list[ChequeUpdateRequest], conn=Depends(get_async_connection)
+):
     """Bulk update multiple cheques at once"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -371,7 +372,7 @@ async def bulk_update_cheques(updates: list[ChequeUpdateRequest]):
         for update in updates:
             try:
                 # Find transaction by cheque number
-                cur.execute(
+                await cur.execute(
                     """
                     SELECT transaction_id
                     FROM banking_transactions
@@ -381,7 +382,7 @@ async def bulk_update_cheques(updates: list[ChequeUpdateRequest]):
                     (f"%CHEQUE #{update.cheque_number}%",),
                 )
 
-                result = cur.fetchone()
+                result = await cur.fetchone()
                 if not result:
                     errors.append(f"Cheque #{update.cheque_number} not found")
                     continue
@@ -427,13 +428,13 @@ async def bulk_update_cheques(updates: list[ChequeUpdateRequest]):
                         WHERE transaction_id = %s
                     """
 
-                    cur.execute(update_sql, params)
+                    await cur.execute(update_sql, params)
                     updated_count += cur.rowcount
 
             except Exception as e:
                 errors.append(f"Cheque #{update.cheque_number}: {e!s}")
 
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -443,13 +444,12 @@ async def bulk_update_cheques(updates: list[ChequeUpdateRequest]):
         }
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(  # noqa: B904
             status_code=500, detail=f"Bulk update failed: {e!s}"
         )
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/by-bank/{account_number}", response_model=list[ChequeResponse])
@@ -457,7 +457,8 @@ async def get_cheques_by_bank(
     account_number: str,
     limit: int = Query(100, le=1000),
     offset: int = Query(0, ge=0),
+    conn=Depends(get_async_connection),
 ):
     """Get all cheques for a specific bank account"""
     search = ChequeSearchRequest(bank_account=account_number)
-    return await search_cheques(search)
+    return await search_cheques(search, conn)
@@ -7,10 +7,10 @@ Links to charters/invoices or records as unallocated revenue
 from datetime import date, datetime
 
 import psycopg2.extras
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 
-from ..db import get_connection
+from ..db import get_async_connection
 
 router = APIRouter(prefix="/api/received-payments", tags=["Received Payments"])
 
@@ -100,28 +100,29 @@ class PaymentSearchRequest(BaseModel):
 
 
 @router.post("/", response_model=dict, status_code=201)
-async def record_received_payment(payment: ReceivedPaymentCreate):
+async def record_received_payment(
+    payment: ReceivedPaymentCreate, conn=Depends(get_async_connection)
+):
     """Record a payment received from customer (cheque, cash, e-transfer,"
     "etc.)"""
 
-    conn = get_connection()
     cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
     try:
         # Validate charter exists if provided
         if payment.charter_id:
-            cur.execute(
+            await cur.execute(
                 "SELECT charter_id FROM charters WHERE charter_id = %s",
                 (payment.charter_id,),
             )
-            if not cur.fetchone():
+            if not await cur.fetchone():
                 raise HTTPException(
                     status_code=404,
                     detail=f"Charter {payment.charter_id} not found",
                 )
 
         # Insert payment
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO payments (
                 charter_id,
@@ -146,7 +147,7 @@ async def record_received_payment(payment: ReceivedPaymentCreate):
             ),
         )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
         payment_id = result["payment_id"]
         created_at = result["created_at"]
 
@@ -156,7 +157,7 @@ async def record_received_payment(payment: ReceivedPaymentCreate):
             payment.payment_method.lower() == "cheque"
             and payment.cheque_number
         ):
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO banking_transactions (
                     transaction_date,
@@ -186,7 +187,7 @@ async def record_received_payment(payment: ReceivedPaymentCreate):
                 ),
             )
 
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -200,11 +201,10 @@ async def record_received_payment(payment: ReceivedPaymentCreate):
     except HTTPException:
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}")  # noqa: B904
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/search", response_model=list[ReceivedPaymentResponse])
@@ -218,9 +218,9 @@ async def search_received_payments(
     payment_method: str | None = None,
     unallocated_only: bool = False,
     limit: int = 100,
+    conn=Depends(get_async_connection),
 ):
     """Search for received payments"""
-    conn = get_connection()
     cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
     try:
@@ -285,8 +285,8 @@ async def search_received_payments(
             LIMIT %s
         """
 
-        cur.execute(query, params)
-        results = cur.fetchall()
+        await cur.execute(query, params)
+        results = await cur.fetchall()
 
         payments = []
         for row in results:
@@ -329,21 +329,21 @@ async def search_received_payments(
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}")  # noqa: B904
     finally:
         cur.close()
-        conn.close()
 
 
 @router.get("/unallocated", response_model=list[ReceivedPaymentResponse])
-async def get_unallocated_payments():
+async def get_unallocated_payments(conn=Depends(get_async_connection)):
     """Get all payments not linked to a charter (need allocation)"""
-    return await search_received_payments(unallocated_only=True)
+    return await search_received_payments(unallocated_only=True, conn=conn)
 
 
 @router.put("/{payment_id}", response_model=dict)
 async def update_received_payment(
-    payment_id: int, update: ReceivedPaymentUpdate
+    payment_id: int,
+    update: ReceivedPaymentUpdate,
+    conn=Depends(get_async_connection),
 ):
     """Update a received payment"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
@@ -389,15 +389,15 @@ async def update_received_payment(
             RETURNING payment_id, amount, payment_date, payment_method
         """
 
-        cur.execute(update_sql, params)
-        result = cur.fetchone()
+        await cur.execute(update_sql, params)
+        result = await cur.fetchone()
 
         if not result:
             raise HTTPException(
                 status_code=404, detail=f"Payment {payment_id} not found"
             )
 
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -411,21 +411,21 @@ async def update_received_payment(
     except HTTPException:
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}")  # noqa: B904
     finally:
         cur.close()
-        conn.close()
 
 
 @router.delete("/{payment_id}", response_model=dict)
-async def delete_received_payment(payment_id: int):
+async def delete_received_payment(
+    payment_id: int, conn=Depends(get_async_connection)
+):
     """Delete a received payment (use cautiously)"""
-    conn = get_connection()
     cur = conn.cursor()
 
     try:
-        cur.execute(
+        await cur.execute(
             """
             DELETE FROM payments
             WHERE payment_id = %s
@@ -434,14 +434,14 @@ async def delete_received_payment(payment_id: int):
             (payment_id,),
         )
 
-        result = cur.fetchone()
+        result = await cur.fetchone()
 
         if not result:
             raise HTTPException(
                 status_code=404, detail=f"Payment {payment_id} not found"
             )
 
-        conn.commit()
+        await conn.commit()
 
         return {
             "success": True,
@@ -450,11 +450,10 @@ async def delete_received_payment(payment_id: int):
         }
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}")  # noqa: B904
     finally:
         cur.close()
-        conn.close()
 
 
 # ============================================================================
@@ -0,0 +1,219 @@
+"""Process-wide cache of table, view and column metadata.
+
+Schema-tolerant routers probe for optional tables and columns before
+building their SQL. ``SchemaCatalog`` loads the whole ``public`` schema from
+``pg_catalog`` in one query and answers those probes from memory.
+
+The snapshot is dropped when:
+- a ``schema_catalog`` notification arrives (sent by the DDL event trigger in
+  ``migrations/006_schema_catalog_notify.sql`` and by ``POST
+  /schema-catalog/refresh``), or
+- it is older than ``SCHEMA_CATALOG_TTL_SECONDS`` (default 300), as a
+  backstop for databases where the event trigger cannot be installed.
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import suppress
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "schema_catalog"
+
+_CATALOG_SQL = """
+    SELECT c.relname, c.relkind, a.attname
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_attribute a
+      ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    WHERE n.nspname = %s
+      AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+    ORDER BY c.relname, a.attnum
+"""
+
+
+class _Snapshot:
+    __slots__ = ("column_sets", "columns", "loaded_at", "views")
+
+    def __init__(self, rows: Iterable[tuple[str, str, str | None]]):
+        self.columns: dict[str, tuple[str, ...]] = {}
+        self.views: set[str] = set()
+        ordered: dict[str, list[str]] = {}
+        for relname, relkind, attname in rows:
+            cols = ordered.setdefault(relname, [])
+            if attname is not None:
+                cols.append(attname)
+            if relkind == "v":
+                self.views.add(relname)
+        self.columns = {name: tuple(cols) for name, cols in ordered.items()}
+        self.column_sets = {
+            name: frozenset(cols) for name, cols in self.columns.items()
+        }
+        self.loaded_at = time.monotonic()
+
+
+class SchemaCatalog:
+    """In-memory answers for ``information_schema`` existence probes.
+
+    Lookups take the caller's connection only so the first lookup after an
+    invalidation can reload the snapshot on it; warm lookups never touch
+    the database.
+    """
+
+    def __init__(self, schema: str = "public", ttl: float = 300.0):
+        self.schema = schema
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        self._invalidations = 0
+        self._loads = 0
+
+    def _current(self, conn) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and (
+            self.ttl <= 0 or time.monotonic() - snapshot.loaded_at < self.ttl
+        ):
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and (
+                self.ttl <= 0
+                or time.monotonic() - snapshot.loaded_at < self.ttl
+            ):
+                return snapshot
+            # Loading under the lock makes concurrent cold lookups share one
+            # query and orders invalidate() after any in-flight load.
+            with conn.cursor() as cur:
+                cur.execute(_CATALOG_SQL, (self.schema,))
+                snapshot = _Snapshot(cur.fetchall())
+            self._loads += 1
+            self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next lookup reloads it."""
+        with self._lock:
+            self._invalidations += 1
+            self._snapshot = None
+
+    def has_table(self, conn, table: str) -> bool:
+        """True for tables, partitioned tables, views and matviews."""
+        return table in self._current(conn).columns
+
+    def has_view(self, conn, view: str) -> bool:
+        return view in self._current(conn).views
+
+    def has_column(self, conn, table: str, column: str) -> bool:
+        return column in self._current(conn).column_sets.get(table, ())
+
+    def columns(self, conn, table: str) -> tuple[str, ...]:
+        """Column names of ``table`` in ordinal order (empty if missing)."""
+        return self._current(conn).columns.get(table, ())
+
+    def column_set(self, conn, table: str) -> frozenset[str]:
+        return self._current(conn).column_sets.get(table, frozenset())
+
+    def first_existing_column(
+        self, conn, table: str, candidates: Iterable[str]
+    ) -> str | None:
+        """Return the first candidate present on ``table``, else None."""
+        present = self.column_set(conn, table)
+        for candidate in candidates:
+            if candidate in present:
+                return candidate
+        return None
+
+    def views(self, conn, prefix: str = "") -> list[str]:
+        """Sorted names of plain views, optionally filtered by prefix."""
+        return sorted(
+            name
+            for name in self._current(conn).views
+            if name.startswith(prefix)
+        )
+
+    def stats(self) -> dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "relations": len(snapshot.columns) if snapshot else 0,
+            "age_s": (
+                round(time.monotonic() - snapshot.loaded_at, 1)
+                if snapshot
+                else None
+            ),
+            "loads": self._loads,
+            "invalidations": self._invalidations,
+        }
+
+
+schema_catalog = SchemaCatalog(
+    ttl=float(os.environ.get("SCHEMA_CATALOG_TTL_SECONDS", "300"))
+)
+
+
+def notify_schema_changed(conn) -> None:
+    """Invalidate this process's catalog and tell the other workers."""
+    schema_catalog.invalidate()
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_notify(%s, 'refresh')", (NOTIFY_CHANNEL,))
+
+
+class SchemaChangeListener:
+    """Background ``LISTEN schema_catalog`` loop on a dedicated connection."""
+
+    def __init__(
+        self, catalog: SchemaCatalog, connect, poll_seconds: float = 5.0
+    ):
+        self.catalog = catalog
+        self._connect = connect
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="schema-catalog-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # Anything sent while we were disconnected is lost.
+                self.catalog.invalidate()
+                self._listen(conn)
+            except Exception:
+                logger.warning(
+                    "Schema catalog listener disconnected; retrying",
+                    exc_info=True,
+                )
+                self._stop.wait(self.poll_seconds)
+            finally:
+                if conn is not None:
+                    with suppress(Exception):
+                        conn.close()
+
+    def _listen(self, conn) -> None:
+        while not self._stop.is_set():
+            ready, _, _ = select.select([conn], [], [], self.poll_seconds)
+            if not ready:
+                continue
+            conn.poll()
+            if conn.notifies:
+                conn.notifies.clear()
+                self.catalog.invalidate()
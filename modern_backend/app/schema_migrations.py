@@ -0,0 +1,1579 @@
+"""Versioned, run-once DDL for the tables the API owns.
+
+Routers used to run ``CREATE TABLE IF NOT EXISTS`` (and, for the audit
+store, ``DROP TRIGGER``/``CREATE TRIGGER``) on every request, which takes
+an ACCESS EXCLUSIVE lock and serialises writers. The same statements now
+live here as numbered migrations. They are applied once per database, at
+API startup or with::
+
+    python -m modern_backend.app.schema_migrations [status|upgrade]
+
+Applied versions are recorded in ``schema_migrations``. Request handlers
+call :func:`ensure_schema`, which is a flag check once this process has
+seen the schema up to date.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections.abc import Callable, Sequence
+from contextlib import suppress
+
+from .db import dedicated_connection
+from .schema_catalog import notify_schema_changed
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key shared by every worker and the CLI, so concurrent
+# startups apply each migration exactly once.
+_ADVISORY_LOCK_KEY = 7_310_052
+
+_LEDGER_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+
+Step = str | Callable[..., None]
+
+
+class Migration:
+    """One schema version: ordered SQL strings or ``fn(cursor)`` steps.
+
+    ``requires`` names tables created outside this module. While any of
+    them is missing the migration is skipped and left unrecorded, so a
+    later run picks it up.
+    """
+
+    __slots__ = ("name", "requires", "steps", "version")
+
+    def __init__(
+        self,
+        version: int,
+        name: str,
+        steps: Sequence[Step],
+        requires: Sequence[str] = (),
+    ):
+        self.version = version
+        self.name = name
+        self.steps = tuple(steps)
+        self.requires = tuple(requires)
+
+    def apply(self, cur) -> None:
+        for step in self.steps:
+            if callable(step):
+                step(cur)
+            else:
+                cur.execute(step)
+
+
+def _normalize_cash_box_columns(cur) -> None:
+    """Bring legacy ``cash_box_transactions`` variants up to date."""
+    cur.execute(
+        """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'cash_box_transactions'
+        """
+    )
+    cols = {r[0] for r in cur.fetchall()}
+
+    if "id" not in cols:
+        cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN id BIGSERIAL")
+    if "transaction_date" not in cols:
+        cur.execute(
+            "ALTER TABLE cash_box_transactions ADD COLUMN transaction_date DATE"
+        )
+        if "date" in cols:
+            cur.execute(
+                "UPDATE cash_box_transactions SET transaction_date = date "
+                "WHERE transaction_date IS NULL"
+            )
+    if "txn_type" not in cols:
+        cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN txn_type TEXT")
+        if "type" in cols:
+            cur.execute(
+                "UPDATE cash_box_transactions SET txn_type = type "
+                "WHERE txn_type IS NULL"
+            )
+        if "transaction_type" in cols:
+            cur.execute(
+                "UPDATE cash_box_transactions SET txn_type = transaction_type "
+                "WHERE txn_type IS NULL"
+            )
+    if "transaction_type" in cols and "txn_type" in cols:
+        cur.execute(
+            "UPDATE cash_box_transactions "
+            "SET transaction_type = COALESCE(transaction_type, txn_type)"
+        )
+    if "description" not in cols:
+        cur.execute(
+            "ALTER TABLE cash_box_transactions ADD COLUMN description TEXT"
+        )
+    if "amount" not in cols:
+        cur.execute(
+            "ALTER TABLE cash_box_transactions "
+            "ADD COLUMN amount NUMERIC(12,2) DEFAULT 0"
+        )
+    if "reference" not in cols:
+        cur.execute(
+            "ALTER TABLE cash_box_transactions ADD COLUMN reference TEXT"
+        )
+    if "notes" not in cols:
+        cur.execute("ALTER TABLE cash_box_transactions ADD COLUMN notes TEXT")
+    if "updated_at" not in cols:
+        cur.execute(
+            "ALTER TABLE cash_box_transactions "
+            "ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT NOW()"
+        )
+
+
+_AUDIT_EVENT_COLUMNS = """
+    event_id, occurred_at, module, entity_type, entity_id, action, source,
+    correlation_id, actor_json, before_json, after_json, evidence_links,
+    retention_until, note, prev_hash, event_hash, created_at
+"""
+
+
+def _move_audit_events_to_partitions(cur) -> None:
+    """Copy the legacy ``audit_events`` chain into yearly partitions."""
+    from .audit.partitions import (
+        AUDIT_EVENTS_TABLE,
+        DEFAULT_PARTITION,
+        create_year_partition,
+    )
+
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {AUDIT_EVENTS_TABLE} (
+            audit_event_pk BIGINT GENERATED ALWAYS AS IDENTITY,
+            event_id TEXT NOT NULL,
+            occurred_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            module TEXT NOT NULL,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            source TEXT NOT NULL,
+            correlation_id TEXT,
+            actor_json JSONB NOT NULL,
+            before_json JSONB,
+            after_json JSONB,
+            evidence_links JSONB NOT NULL DEFAULT '[]'::jsonb,
+            retention_until DATE NOT NULL,
+            note TEXT,
+            prev_hash TEXT,
+            event_hash TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (audit_event_pk, occurred_at)
+        ) PARTITION BY RANGE (occurred_at)
+        """
+    )
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+        f"PARTITION OF {AUDIT_EVENTS_TABLE} DEFAULT"
+    )
+    # Writers still on the old code block here instead of appending to a
+    # table that is being copied.
+    cur.execute("LOCK TABLE audit_events IN EXCLUSIVE MODE")
+    cur.execute(
+        """
+        SELECT EXTRACT(YEAR FROM MIN(occurred_at))::int,
+               EXTRACT(YEAR FROM MAX(occurred_at))::int,
+               EXTRACT(YEAR FROM NOW())::int
+        FROM audit_events
+        """
+    )
+    first, last, current = cur.fetchone()
+    start = min(first or current, current)
+    end = max(last or current, current + 1)
+    for year in range(start, end + 1):
+        create_year_partition(cur, year)
+
+    cur.execute(
+        f"""
+        INSERT INTO {AUDIT_EVENTS_TABLE}
+            (audit_event_pk, {_AUDIT_EVENT_COLUMNS})
+        OVERRIDING SYSTEM VALUE
+        SELECT a.audit_event_pk, {_AUDIT_EVENT_COLUMNS}
+        FROM audit_events a
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {AUDIT_EVENTS_TABLE} p
+            WHERE p.event_id = a.event_id AND p.occurred_at = a.occurred_at
+        )
+        ORDER BY a.audit_event_pk
+        """
+    )
+    # New rows continue the legacy pk sequence, keeping pk order equal to
+    # chain order.
+    cur.execute(
+        f"""
+        SELECT setval(
+            pg_get_serial_sequence('{AUDIT_EVENTS_TABLE}', 'audit_event_pk'),
+            COALESCE(MAX(audit_event_pk), 0) + 1,
+            false
+        )
+        FROM {AUDIT_EVENTS_TABLE}
+        """
+    )
+
+
+def _attach_report_version_triggers(cur) -> None:
+    """Bump ``report_data_changes`` on every write to a report source."""
+    from .report_cache import REPORT_SOURCE_TABLES, VERSION_TRIGGER
+
+    for table in REPORT_SOURCE_TABLES:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        if not cur.fetchone()[0]:
+            logger.warning(
+                "Report cache: %s does not exist; its reports stay uncached",
+                table,
+            )
+            continue
+        cur.execute(f"DROP TRIGGER IF EXISTS {VERSION_TRIGGER} ON {table}")
+        cur.execute(
+            f"""
+            CREATE TRIGGER {VERSION_TRIGGER}
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION report_data_changed()
+            """
+        )
+
+
+# (index, table, amount column, date column) probed by exact-amount
+# lookups; see app/utils/amounts.py.
+AMOUNT_CENTS_INDEXES = (
+    (
+        "idx_banking_transactions_debit_cents",
+        "banking_transactions",
+        "debit_amount",
+        "transaction_date",
+    ),
+    (
+        "idx_banking_transactions_credit_cents",
+        "banking_transactions",
+        "credit_amount",
+        "transaction_date",
+    ),
+    (
+        "idx_receipts_gross_cents_date",
+        "receipts",
+        "gross_amount",
+        "receipt_date",
+    ),
+)
+
+
+def _create_amount_cents_indexes(cur) -> None:
+    """Index whole-cent amounts (plus date) for exact-amount lookups."""
+    from .utils.amounts import cents_sql
+
+    for name, table, amount_col, date_col in AMOUNT_CENTS_INDEXES:
+        cur.execute(
+            """
+            SELECT COUNT(*) FROM pg_attribute
+            WHERE attrelid = to_regclass(%s)
+              AND attname = ANY(%s) AND NOT attisdropped
+            """,
+            (table, [amount_col, date_col]),
+        )
+        if cur.fetchone()[0] < 2:
+            logger.warning(
+                "Skipping %s: %s lacks %s or %s",
+                name,
+                table,
+                amount_col,
+                date_col,
+            )
+            continue
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON {table} ({cents_sql(amount_col)}, {date_col})"
+        )
+
+
+def _backfill_receipt_link_groups(cur) -> None:
+    from .receipt_groups import relink_receipts
+
+    relink_receipts(cur)
+
+
+_BANK_CHECKPOINT_TRIGGERS = (
+    "DROP TRIGGER IF EXISTS trg_bank_balance_checkpoints_insert "
+    "ON banking_transactions",
+    "DROP TRIGGER IF EXISTS trg_bank_balance_checkpoints_update "
+    "ON banking_transactions",
+    "DROP TRIGGER IF EXISTS trg_bank_balance_checkpoints_delete "
+    "ON banking_transactions",
+    """
+    CREATE TRIGGER trg_bank_balance_checkpoints_insert
+    AFTER INSERT ON banking_transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bank_balance_checkpoints_sync()
+    """,
+    """
+    CREATE TRIGGER trg_bank_balance_checkpoints_update
+    AFTER UPDATE ON banking_transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bank_balance_checkpoints_sync()
+    """,
+    """
+    CREATE TRIGGER trg_bank_balance_checkpoints_delete
+    AFTER DELETE ON banking_transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bank_balance_checkpoints_sync()
+    """,
+)
+
+
+def _install_bank_balance_checkpoints(cur) -> None:
+    from .bank_balances import CHECKPOINT_COLUMNS, rebuild_checkpoints
+
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM pg_attribute
+        WHERE attrelid = to_regclass('banking_transactions')
+          AND attname = ANY(%s) AND NOT attisdropped
+        """,
+        (list(CHECKPOINT_COLUMNS),),
+    )
+    if cur.fetchone()[0] < len(CHECKPOINT_COLUMNS):
+        logger.warning(
+            "Skipping bank balance checkpoints: banking_transactions "
+            "lacks one of %s",
+            ", ".join(CHECKPOINT_COLUMNS),
+        )
+        return
+    for statement in _BANK_CHECKPOINT_TRIGGERS:
+        cur.execute(statement)
+    # The triggers hold off concurrent writers until commit, so the
+    # backfill sees every transaction the triggers will not.
+    rebuild_checkpoints(cur)
+
+
+def _backfill_gl_period_balances(cur) -> None:
+    from .ledger_rollups import rebuild_rollups
+
+    rebuild_rollups(cur)
+
+
+def _install_financial_facts(cur) -> None:
+    from .financial_facts import install_fact_triggers, rebuild_facts
+
+    install_fact_triggers(cur)
+    rebuild_facts(cur)
+
+
+# (index, table, sort column, id column, index it supersedes)
+KEYSET_INDEXES = (
+    (
+        "idx_general_ledger_date_id",
+        "general_ledger",
+        "date",
+        "id",
+        "idx_general_ledger_date",
+    ),
+    (
+        "idx_banking_transactions_date_id",
+        "banking_transactions",
+        "transaction_date",
+        "transaction_id",
+        None,
+    ),
+    (
+        "idx_receipts_date_id",
+        "receipts",
+        "receipt_date",
+        "receipt_id",
+        None,
+    ),
+    (
+        "idx_charters_date_id",
+        "charters",
+        "charter_date",
+        "charter_id",
+        None,
+    ),
+    (
+        "idx_audit_events_partitioned_occurred_pk",
+        "audit_events_partitioned",
+        "occurred_at",
+        "audit_event_pk",
+        "idx_audit_events_partitioned_occurred_at",
+    ),
+)
+
+
+def _create_keyset_indexes(cur) -> None:
+    """Index ``(sort column, id)`` pairs for keyset pagination."""
+    for name, table, sort_col, id_col, superseded in KEYSET_INDEXES:
+        cur.execute(
+            """
+            SELECT COUNT(*) FROM pg_attribute
+            WHERE attrelid = to_regclass(%s)
+              AND attname = ANY(%s) AND NOT attisdropped
+            """,
+            (table, [sort_col, id_col]),
+        )
+        if cur.fetchone()[0] < 2:
+            logger.warning(
+                "Skipping %s: %s lacks %s or %s",
+                name,
+                table,
+                sort_col,
+                id_col,
+            )
+            continue
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON {table} ({sort_col}, {id_col})"
+        )
+        if superseded:
+            cur.execute(f"DROP INDEX IF EXISTS {superseded}")
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "audit_storage",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS audit_events (
+                audit_event_pk BIGSERIAL PRIMARY KEY,
+                event_id TEXT UNIQUE NOT NULL,
+                occurred_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                module TEXT NOT NULL,
+                entity_type TEXT NOT NULL,
+                entity_id TEXT NOT NULL,
+                action TEXT NOT NULL,
+                source TEXT NOT NULL,
+                correlation_id TEXT,
+                actor_json JSONB NOT NULL,
+                before_json JSONB,
+                after_json JSONB,
+                evidence_links JSONB NOT NULL DEFAULT '[]'::jsonb,
+                retention_until DATE NOT NULL,
+                note TEXT,
+                prev_hash TEXT,
+                event_hash TEXT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS audit_package_runs (
+                package_run_id BIGSERIAL PRIMARY KEY,
+                package_id TEXT UNIQUE NOT NULL,
+                package_name TEXT NOT NULL,
+                package_mode TEXT NOT NULL,
+                fiscal_year INTEGER NOT NULL,
+                date_from DATE,
+                date_to DATE,
+                generated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                generated_by TEXT NOT NULL,
+                generated_by_name TEXT,
+                correlation_id TEXT,
+                retention_policy TEXT NOT NULL DEFAULT '6+ years',
+                overall_status TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                zip_path TEXT NOT NULL,
+                notes_path TEXT NOT NULL,
+                manifest_json JSONB NOT NULL,
+                checks_json JSONB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'ready'
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS audit_check_runs (
+                audit_check_run_id BIGSERIAL PRIMARY KEY,
+                run_id TEXT UNIQUE NOT NULL,
+                fiscal_year INTEGER NOT NULL,
+                generated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                generated_by TEXT NOT NULL,
+                correlation_id TEXT,
+                overall_status TEXT NOT NULL,
+                summary_json JSONB NOT NULL,
+                findings_json JSONB NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_occurred_at
+            ON audit_events (occurred_at DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_module_action_time
+            ON audit_events (module, action, occurred_at DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_entity
+            ON audit_events (entity_type, entity_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_username
+            ON audit_events ((actor_json->>'username'))
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_correlation_id
+            ON audit_events (correlation_id)
+            WHERE correlation_id IS NOT NULL
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_package_runs_fiscal_year_generated
+            ON audit_package_runs (fiscal_year, generated_at DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_check_runs_fiscal_year_generated
+            ON audit_check_runs (fiscal_year, generated_at DESC)
+            """,
+            """
+            CREATE OR REPLACE FUNCTION prevent_audit_event_mutation()
+            RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'audit_events is append-only';
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            "DROP TRIGGER IF EXISTS trg_audit_events_immutable ON audit_events",
+            """
+            CREATE TRIGGER trg_audit_events_immutable
+            BEFORE UPDATE OR DELETE ON audit_events
+            FOR EACH ROW EXECUTE FUNCTION prevent_audit_event_mutation()
+            """,
+        ],
+    ),
+    Migration(
+        2,
+        "cash_box_transactions",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS cash_box_transactions (
+                id SERIAL PRIMARY KEY,
+                transaction_date DATE NOT NULL,
+                txn_type TEXT NOT NULL,
+                description TEXT NOT NULL,
+                amount NUMERIC(12,2) NOT NULL,
+                reference TEXT,
+                notes TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+            """,
+            _normalize_cash_box_columns,
+        ],
+    ),
+    Migration(
+        3,
+        "payroll_entries",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS payroll_entries (
+                id SERIAL PRIMARY KEY,
+                employee_id INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                pay_period TEXT NOT NULL,
+                regular_hours NUMERIC NOT NULL DEFAULT 0,
+                hourly_rate NUMERIC NOT NULL DEFAULT 0,
+                ot_hours NUMERIC NOT NULL DEFAULT 0,
+                ot_rate NUMERIC NOT NULL DEFAULT 0,
+                base_salary NUMERIC NOT NULL DEFAULT 0,
+                bonus NUMERIC NOT NULL DEFAULT 0,
+                gratuity NUMERIC NOT NULL DEFAULT 0,
+                other_benefits NUMERIC NOT NULL DEFAULT 0,
+                cpp NUMERIC NOT NULL DEFAULT 0,
+                ei NUMERIC NOT NULL DEFAULT 0,
+                income_tax NUMERIC NOT NULL DEFAULT 0,
+                notes TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+            """,
+        ],
+    ),
+    Migration(
+        4,
+        "beverage_reconciliations",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS beverage_reconciliations (
+                id SERIAL PRIMARY KEY,
+                reconciliation_date DATE NOT NULL,
+                period TEXT NOT NULL,
+                expected_count INTEGER NOT NULL,
+                actual_count INTEGER NOT NULL,
+                notes TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+            """,
+        ],
+    ),
+    Migration(
+        5,
+        "year_end_tables",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS year_end_closes (
+                close_id SERIAL PRIMARY KEY,
+                fiscal_year INTEGER UNIQUE NOT NULL,
+                status TEXT NOT NULL DEFAULT 'closed',
+                total_revenue NUMERIC NOT NULL DEFAULT 0,
+                total_expenses NUMERIC NOT NULL DEFAULT 0,
+                net_income NUMERIC NOT NULL DEFAULT 0,
+                retained_earnings_rollover NUMERIC NOT NULL DEFAULT 0,
+                capital_gains NUMERIC NOT NULL DEFAULT 0,
+                notes TEXT,
+                executed_by TEXT,
+                closed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                summary_json JSONB
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS year_end_checklist (
+                fiscal_year INTEGER NOT NULL,
+                item_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT,
+                completed BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (fiscal_year, item_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS year_end_rollovers (
+                rollover_id SERIAL PRIMARY KEY,
+                fiscal_year INTEGER NOT NULL,
+                account_code TEXT,
+                account_name TEXT,
+                amount NUMERIC NOT NULL,
+                direction TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                metadata JSONB
+            )
+            """,
+        ],
+    ),
+    Migration(
+        6,
+        "accounting_gl_rules",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS accounting_gl_rules (
+                rule_id SERIAL PRIMARY KEY,
+                rule_name TEXT UNIQUE NOT NULL,
+                match_field TEXT NOT NULL,
+                match_pattern TEXT NOT NULL,
+                gl_code TEXT NOT NULL,
+                account_type TEXT NULL,
+                sort_order INTEGER NOT NULL DEFAULT 100,
+                is_active BOOLEAN NOT NULL DEFAULT TRUE,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_accounting_gl_rules_sort
+            ON accounting_gl_rules (is_active, sort_order, rule_id)
+            """,
+        ],
+    ),
+    Migration(
+        7,
+        "t2_return_adjustments",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS t2_return_adjustments (
+                adjustment_id BIGSERIAL PRIMARY KEY,
+                return_id BIGINT NOT NULL REFERENCES
+                t2_return_metadata(return_id) ON DELETE CASCADE,
+                adjustment_type TEXT NOT NULL,
+                line_reference TEXT,
+                old_amount NUMERIC,
+                new_amount NUMERIC,
+                notes TEXT,
+                changed_by TEXT,
+                changed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+            """,
+        ],
+        requires=["t2_return_metadata"],
+    ),
+    Migration(
+        8,
+        "employee_roe_submission_columns",
+        [
+            "ALTER TABLE employee_roe_records "
+            "ADD COLUMN IF NOT EXISTS reason_description TEXT",
+            "ALTER TABLE employee_roe_records "
+            "ADD COLUMN IF NOT EXISTS roe_status TEXT DEFAULT 'draft'",
+            "ALTER TABLE employee_roe_records "
+            "ADD COLUMN IF NOT EXISTS submitted_at TIMESTAMP",
+            "ALTER TABLE employee_roe_records "
+            "ADD COLUMN IF NOT EXISTS submitted_by TEXT",
+            "ALTER TABLE employee_roe_records "
+            "ADD COLUMN IF NOT EXISTS submission_reference TEXT",
+        ],
+        requires=["employee_roe_records"],
+    ),
+    Migration(
+        9,
+        "cra_pd7a_audit_columns",
+        [
+            "ALTER TABLE cra_pd7a_returns "
+            "ADD COLUMN IF NOT EXISTS submission_reference TEXT",
+            "ALTER TABLE cra_pd7a_returns "
+            "ADD COLUMN IF NOT EXISTS submitted_by TEXT",
+            "ALTER TABLE cra_pd7a_returns "
+            "ADD COLUMN IF NOT EXISTS filing_method TEXT",
+        ],
+        requires=["cra_pd7a_returns"],
+    ),
+    Migration(
+        10,
+        "audit_events_partitioned",
+        [
+            _move_audit_events_to_partitions,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS
+                uq_audit_events_partitioned_event_id_occurred
+            ON audit_events_partitioned (event_id, occurred_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_partitioned_occurred_at
+            ON audit_events_partitioned (occurred_at DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS
+                idx_audit_events_partitioned_module_action_time
+            ON audit_events_partitioned (module, action, occurred_at DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_partitioned_entity
+            ON audit_events_partitioned (entity_type, entity_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_partitioned_username
+            ON audit_events_partitioned ((actor_json->>'username'))
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_events_partitioned_correlation
+            ON audit_events_partitioned (correlation_id)
+            WHERE correlation_id IS NOT NULL
+            """,
+            """
+            DROP TRIGGER IF EXISTS trg_audit_events_partitioned_immutable
+            ON audit_events_partitioned
+            """,
+            """
+            CREATE TRIGGER trg_audit_events_partitioned_immutable
+            BEFORE UPDATE OR DELETE ON audit_events_partitioned
+            FOR EACH ROW EXECUTE FUNCTION prevent_audit_event_mutation()
+            """,
+            # Superseded by audit.partitions, which detaches expired years
+            # instead of dropping them.
+            "DROP FUNCTION IF EXISTS rotate_audit_event_partitions(INT)",
+        ],
+    ),
+    Migration(
+        11,
+        "audit_chain_checkpoints",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS audit_chain_checkpoints (
+                checkpoint_id BIGSERIAL PRIMARY KEY,
+                verified_through_pk BIGINT NOT NULL,
+                event_hash TEXT,
+                events_verified BIGINT NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                detail JSONB NOT NULL DEFAULT '{}'::jsonb,
+                verified_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_chain_checkpoints_ok
+            ON audit_chain_checkpoints (verified_through_pk DESC)
+            WHERE status = 'ok'
+            """,
+        ],
+    ),
+    Migration(
+        12,
+        "auth_sessions",
+        [
+            # UNLOGGED: sessions are cheap to lose on a crash (users log in
+            # again) and skip WAL on every login and expiry write-back.
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS auth_sessions (
+                token_hash TEXT PRIMARY KEY,
+                employee_id INTEGER,
+                payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                expires_at TIMESTAMPTZ NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_auth_sessions_expires_at
+            ON auth_sessions (expires_at)
+            """,
+        ],
+    ),
+    Migration(
+        13,
+        "auth_login_attempts",
+        [
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS auth_login_attempts (
+                username TEXT PRIMARY KEY,
+                failures INTEGER NOT NULL DEFAULT 0,
+                last_failed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                locked_until TIMESTAMPTZ
+            )
+            """,
+        ],
+    ),
+    Migration(
+        14,
+        "report_data_versions",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS report_data_versions (
+                table_name TEXT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0,
+                changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            # Append-only, so concurrent writers never wait on each other;
+            # ReportCache.compact folds the rows into report_data_versions.
+            """
+            CREATE TABLE IF NOT EXISTS report_data_changes (
+                change_id BIGSERIAL PRIMARY KEY,
+                table_name TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_report_data_changes_table
+            ON report_data_changes (table_name)
+            """,
+            """
+            CREATE OR REPLACE FUNCTION report_data_changed()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                INSERT INTO report_data_changes (table_name)
+                VALUES (TG_TABLE_NAME);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            _attach_report_version_triggers,
+        ],
+    ),
+    Migration(
+        15,
+        "receipts_amount_date_index",
+        [
+            # Bank reconciliation suggestions probe receipts by exact
+            # amount within a few days of the bank transaction.
+            """
+            CREATE INDEX IF NOT EXISTS idx_receipts_gross_amount_date
+            ON receipts (gross_amount, receipt_date)
+            """,
+        ],
+        requires=["receipts"],
+    ),
+    Migration(
+        16,
+        "amount_cents_indexes",
+        [
+            _create_amount_cents_indexes,
+            # Superseded by idx_receipts_gross_cents_date.
+            "DROP INDEX IF EXISTS idx_receipts_gross_amount_date",
+        ],
+        requires=["banking_transactions", "receipts"],
+    ),
+    Migration(
+        17,
+        "receipt_link_groups",
+        [
+            "ALTER TABLE receipts "
+            "ADD COLUMN IF NOT EXISTS link_group_id INTEGER",
+            """
+            CREATE INDEX IF NOT EXISTS idx_receipts_link_group_id
+            ON receipts (link_group_id)
+            """,
+            # Each link the group refresh follows is an index probe.
+            """
+            CREATE INDEX IF NOT EXISTS idx_receipts_banking_transaction_id
+            ON receipts (banking_transaction_id)
+            WHERE banking_transaction_id IS NOT NULL
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_receipts_parent_receipt_id
+            ON receipts (parent_receipt_id)
+            WHERE parent_receipt_id IS NOT NULL
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_receipts_split_group_id
+            ON receipts (split_group_id)
+            WHERE split_group_id IS NOT NULL
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_receipts_split_key
+            ON receipts (split_key)
+            """,
+            # Recompute the link group of each seed; see app/receipt_groups.py.
+            """
+            CREATE OR REPLACE FUNCTION refresh_receipt_link_groups(
+                seeds INTEGER[]
+            ) RETURNS VOID AS $$
+            DECLARE
+                seed INTEGER;
+                done INTEGER[] := '{}';
+                members INTEGER[];
+            BEGIN
+                FOREACH seed IN ARRAY COALESCE(seeds, '{}') LOOP
+                    CONTINUE WHEN seed = ANY(done);
+                    WITH RECURSIVE component(receipt_id) AS (
+                        SELECT receipt_id FROM receipts
+                        WHERE receipt_id = seed
+                      UNION
+                        SELECT n.receipt_id
+                        FROM component c
+                        JOIN receipts s ON s.receipt_id = c.receipt_id
+                        CROSS JOIN LATERAL (
+                            SELECT r.receipt_id FROM receipts r
+                            WHERE r.banking_transaction_id
+                                  = s.banking_transaction_id
+                            UNION ALL
+                            SELECT r.receipt_id FROM receipts r
+                            WHERE r.split_group_id = s.split_group_id
+                            UNION ALL
+                            SELECT r.receipt_id FROM receipts r
+                            WHERE btrim(s.split_key) <> ''
+                              AND r.split_key = s.split_key
+                            UNION ALL
+                            SELECT r.receipt_id FROM receipts r
+                            WHERE r.parent_receipt_id = s.receipt_id
+                            UNION ALL
+                            SELECT r.receipt_id FROM receipts r
+                            WHERE r.receipt_id = s.parent_receipt_id
+                        ) n
+                    )
+                    SELECT array_agg(receipt_id) INTO members FROM component;
+                    CONTINUE WHEN members IS NULL;
+                    UPDATE receipts
+                    SET link_group_id = (SELECT min(m) FROM unnest(members) m)
+                    WHERE receipt_id = ANY(members)
+                      AND link_group_id IS DISTINCT FROM (
+                          SELECT min(m) FROM unnest(members) m
+                      );
+                    done := done || members;
+                END LOOP;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION receipts_link_group_sync()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE')
+                   AND OLD.link_group_id IS NOT NULL THEN
+                    -- The old group may have split apart.
+                    PERFORM refresh_receipt_link_groups(ARRAY(
+                        SELECT receipt_id FROM receipts
+                        WHERE link_group_id = OLD.link_group_id
+                          AND receipt_id <> OLD.receipt_id
+                    ));
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM refresh_receipt_link_groups(
+                        ARRAY[NEW.receipt_id]
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            "DROP TRIGGER IF EXISTS trg_receipts_link_group ON receipts",
+            """
+            CREATE TRIGGER trg_receipts_link_group
+            AFTER INSERT OR DELETE OR UPDATE OF banking_transaction_id,
+                parent_receipt_id, split_group_id, split_key
+            ON receipts
+            FOR EACH ROW EXECUTE FUNCTION receipts_link_group_sync()
+            """,
+            _backfill_receipt_link_groups,
+        ],
+        requires=["receipts"],
+    ),
+    Migration(
+        18,
+        "bank_balance_checkpoints",
+        [
+            # Closing balance per account and month; see
+            # app/bank_balances.py.
+            """
+            CREATE TABLE IF NOT EXISTS bank_balance_checkpoints (
+                account_number TEXT NOT NULL,
+                month DATE NOT NULL,
+                closing_balance NUMERIC NOT NULL DEFAULT 0,
+                PRIMARY KEY (account_number, month)
+            )
+            """,
+            """
+            CREATE OR REPLACE FUNCTION bank_balance_checkpoints_apply(
+                accounts TEXT[], dates DATE[], amounts NUMERIC[]
+            ) RETURNS VOID AS $$
+            DECLARE
+                d RECORD;
+            BEGIN
+                FOR d IN
+                    SELECT c.account_number,
+                           date_trunc('month', c.transaction_date)::date
+                               AS month,
+                           SUM(c.amount) AS delta
+                    FROM unnest(accounts, dates, amounts)
+                         AS c(account_number, transaction_date, amount)
+                    WHERE c.account_number IS NOT NULL
+                      AND c.transaction_date IS NOT NULL
+                    GROUP BY 1, 2
+                    HAVING SUM(c.amount) <> 0
+                    ORDER BY 1, 2
+                LOOP
+                    -- Serialise writers per account so a new month is
+                    -- seeded from a committed previous closing balance.
+                    PERFORM pg_advisory_xact_lock(
+                        hashtext('bank_balance_checkpoints'),
+                        hashtext(d.account_number)
+                    );
+                    INSERT INTO bank_balance_checkpoints
+                        (account_number, month, closing_balance)
+                    SELECT d.account_number, d.month, COALESCE((
+                        SELECT closing_balance
+                        FROM bank_balance_checkpoints
+                        WHERE account_number = d.account_number
+                          AND month < d.month
+                        ORDER BY month DESC
+                        LIMIT 1
+                    ), 0)
+                    ON CONFLICT (account_number, month) DO NOTHING;
+                    UPDATE bank_balance_checkpoints
+                    SET closing_balance = closing_balance + d.delta
+                    WHERE account_number = d.account_number
+                      AND month >= d.month;
+                END LOOP;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            # Transition tables rule out one trigger for several events
+            # and UPDATE OF column lists, so the function branches on
+            # TG_OP and updates that leave amounts alone net to zero.
+            """
+            CREATE OR REPLACE FUNCTION bank_balance_checkpoints_sync()
+            RETURNS TRIGGER AS $$
+            DECLARE
+                accounts TEXT[];
+                dates DATE[];
+                amounts NUMERIC[];
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    SELECT array_agg(account_number::text),
+                           array_agg(transaction_date), array_agg(amount)
+                    INTO accounts, dates, amounts
+                    FROM new_rows;
+                ELSIF TG_OP = 'DELETE' THEN
+                    SELECT array_agg(account_number::text),
+                           array_agg(transaction_date), array_agg(-amount)
+                    INTO accounts, dates, amounts
+                    FROM old_rows;
+                ELSE
+                    SELECT array_agg(c.account_number),
+                           array_agg(c.transaction_date), array_agg(c.amount)
+                    INTO accounts, dates, amounts
+                    FROM (
+                        SELECT account_number::text, transaction_date, amount
+                        FROM new_rows
+                        UNION ALL
+                        SELECT account_number::text, transaction_date, -amount
+                        FROM old_rows
+                    ) c;
+                END IF;
+                PERFORM bank_balance_checkpoints_apply(
+                    accounts, dates, amounts
+                );
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            # Triggers and backfill, when banking_transactions has the
+            # columns they read.
+            _install_bank_balance_checkpoints,
+        ],
+        requires=["banking_transactions"],
+    ),
+    Migration(
+        19,
+        "gl_period_balances",
+        [
+            # Monthly ledger rollups; see app/ledger_rollups.py.
+            """
+            CREATE TABLE IF NOT EXISTS gl_period_balances (
+                month DATE NOT NULL,
+                account TEXT,
+                account_name TEXT,
+                account_type TEXT,
+                debit NUMERIC NOT NULL DEFAULT 0,
+                credit NUMERIC NOT NULL DEFAULT 0,
+                net_credit NUMERIC NOT NULL DEFAULT 0,
+                row_count BIGINT NOT NULL DEFAULT 0
+            )
+            """,
+            # NULL and '' are different accounts, as in GROUP BY.
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_gl_period_balances_key
+            ON gl_period_balances (
+                month, (account IS NULL), COALESCE(account, ''),
+                (account_name IS NULL), COALESCE(account_name, ''),
+                (account_type IS NULL), COALESCE(account_type, '')
+            )
+            """,
+            # Partial months at the ends of a report range.
+            """
+            CREATE INDEX IF NOT EXISTS idx_general_ledger_date
+            ON general_ledger (date)
+            """,
+            """
+            CREATE OR REPLACE FUNCTION gl_period_balances_apply(
+                dates DATE[], accounts TEXT[], names TEXT[], types TEXT[],
+                debits NUMERIC[], credits NUMERIC[], signs INTEGER[]
+            ) RETURNS VOID AS $$
+            DECLARE
+                d RECORD;
+                remaining BIGINT;
+            BEGIN
+                FOR d IN
+                    SELECT date_trunc('month', c.entry_date)::date AS month,
+                           c.account, c.account_name, c.account_type,
+                           COALESCE(SUM(c.debit * c.sign), 0) AS debit,
+                           COALESCE(SUM(c.credit * c.sign), 0) AS credit,
+                           COALESCE(SUM((c.credit - c.debit) * c.sign), 0)
+                               AS net_credit,
+                           SUM(c.sign) AS row_count
+                    FROM unnest(
+                        dates, accounts, names, types, debits, credits, signs
+                    ) AS c(entry_date, account, account_name, account_type,
+                           debit, credit, sign)
+                    WHERE c.entry_date IS NOT NULL
+                    GROUP BY 1, 2, 3, 4
+                    ORDER BY 1, 2, 3, 4
+                LOOP
+                    -- Updates that leave these columns alone net to zero.
+                    CONTINUE WHEN d.row_count = 0 AND d.debit = 0
+                        AND d.credit = 0 AND d.net_credit = 0;
+                    INSERT INTO gl_period_balances AS g (
+                        month, account, account_name, account_type,
+                        debit, credit, net_credit, row_count
+                    ) VALUES (
+                        d.month, d.account, d.account_name, d.account_type,
+                        d.debit, d.credit, d.net_credit, d.row_count
+                    )
+                    ON CONFLICT (
+                        month, (account IS NULL), COALESCE(account, ''),
+                        (account_name IS NULL), COALESCE(account_name, ''),
+                        (account_type IS NULL), COALESCE(account_type, '')
+                    ) DO UPDATE SET
+                        debit = g.debit + EXCLUDED.debit,
+                        credit = g.credit + EXCLUDED.credit,
+                        net_credit = g.net_credit + EXCLUDED.net_credit,
+                        row_count = g.row_count + EXCLUDED.row_count
+                    RETURNING g.row_count INTO remaining;
+                    IF remaining = 0 THEN
+                        DELETE FROM gl_period_balances
+                        WHERE month = d.month
+                          AND account IS NOT DISTINCT FROM d.account
+                          AND account_name IS NOT DISTINCT FROM d.account_name
+                          AND account_type
+                              IS NOT DISTINCT FROM d.account_type;
+                    END IF;
+                END LOOP;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION gl_period_balances_sync()
+            RETURNS TRIGGER AS $$
+            DECLARE
+                dates DATE[];
+                accounts TEXT[];
+                names TEXT[];
+                types TEXT[];
+                debits NUMERIC[];
+                credits NUMERIC[];
+                signs INTEGER[];
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    SELECT array_agg(date::date), array_agg(account::text),
+                           array_agg(account_name::text),
+                           array_agg(account_type::text), array_agg(debit),
+                           array_agg(credit), array_agg(1)
+                    INTO dates, accounts, names, types, debits, credits,
+                         signs
+                    FROM new_rows;
+                ELSIF TG_OP = 'DELETE' THEN
+                    SELECT array_agg(date::date), array_agg(account::text),
+                           array_agg(account_name::text),
+                           array_agg(account_type::text), array_agg(debit),
+                           array_agg(credit), array_agg(-1)
+                    INTO dates, accounts, names, types, debits, credits,
+                         signs
+                    FROM old_rows;
+                ELSE
+                    SELECT array_agg(c.date), array_agg(c.account),
+                           array_agg(c.account_name),
+                           array_agg(c.account_type), array_agg(c.debit),
+                           array_agg(c.credit), array_agg(c.sign)
+                    INTO dates, accounts, names, types, debits, credits,
+                         signs
+                    FROM (
+                        SELECT date::date, account::text,
+                               account_name::text, account_type::text,
+                               debit, credit, 1 AS sign
+                        FROM new_rows
+                        UNION ALL
+                        SELECT date::date, account::text,
+                               account_name::text, account_type::text,
+                               debit, credit, -1
+                        FROM old_rows
+                    ) c;
+                END IF;
+                PERFORM gl_period_balances_apply(
+                    dates, accounts, names, types, debits, credits, signs
+                );
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            "DROP TRIGGER IF EXISTS trg_gl_period_balances_insert "
+            "ON general_ledger",
+            "DROP TRIGGER IF EXISTS trg_gl_period_balances_update "
+            "ON general_ledger",
+            "DROP TRIGGER IF EXISTS trg_gl_period_balances_delete "
+            "ON general_ledger",
+            """
+            CREATE TRIGGER trg_gl_period_balances_insert
+            AFTER INSERT ON general_ledger
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION gl_period_balances_sync()
+            """,
+            """
+            CREATE TRIGGER trg_gl_period_balances_update
+            AFTER UPDATE ON general_ledger
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION gl_period_balances_sync()
+            """,
+            """
+            CREATE TRIGGER trg_gl_period_balances_delete
+            AFTER DELETE ON general_ledger
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION gl_period_balances_sync()
+            """,
+            _backfill_gl_period_balances,
+        ],
+        requires=["general_ledger"],
+    ),
+    Migration(
+        20,
+        "keyset_pagination_indexes",
+        [_create_keyset_indexes],
+    ),
+    Migration(
+        21,
+        "kpi_snapshots",
+        [
+            # Precomputed dashboard KPIs; see app/kpi_snapshots.py.
+            """
+            CREATE TABLE IF NOT EXISTS kpi_snapshots (
+                snapshot_key TEXT PRIMARY KEY,
+                payload JSONB NOT NULL,
+                source_versions JSONB,
+                refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            # Versions the KPI tables added to REPORT_SOURCE_TABLES.
+            _attach_report_version_triggers,
+        ],
+        requires=["report_data_versions"],
+    ),
+    Migration(
+        22,
+        "daily_financial_facts",
+        [
+            # Daily revenue, expense, GST and pay totals; see
+            # app/financial_facts.py.
+            """
+            CREATE TABLE IF NOT EXISTS daily_financial_facts (
+                fact_date DATE NOT NULL,
+                source TEXT NOT NULL,
+                category TEXT,
+                account_code TEXT,
+                revenue NUMERIC NOT NULL DEFAULT 0,
+                expenses NUMERIC NOT NULL DEFAULT 0,
+                gst_collected NUMERIC NOT NULL DEFAULT 0,
+                gst_paid NUMERIC NOT NULL DEFAULT 0,
+                payments NUMERIC NOT NULL DEFAULT 0,
+                payroll NUMERIC NOT NULL DEFAULT 0,
+                row_count BIGINT NOT NULL DEFAULT 0
+            )
+            """,
+            # Leads with fact_date, so it also serves the range reads.
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_daily_financial_facts_key
+            ON daily_financial_facts (
+                fact_date, source,
+                (category IS NULL), COALESCE(category, ''),
+                (account_code IS NULL), COALESCE(account_code, '')
+            )
+            """,
+            # The triggers drop emptied rows after each statement.
+            """
+            CREATE INDEX IF NOT EXISTS idx_daily_financial_facts_empty
+            ON daily_financial_facts (fact_date)
+            WHERE row_count = 0
+            """,
+            _install_financial_facts,
+        ],
+    ),
+    Migration(
+        23,
+        "matview_refreshes",
+        [
+            # Refresh log of the API's materialized views; see
+            # app/matview_refresh.py.
+            """
+            CREATE TABLE IF NOT EXISTS matview_refreshes (
+                view_name TEXT PRIMARY KEY,
+                source_versions JSONB,
+                refreshed_at TIMESTAMPTZ,
+                duration_ms DOUBLE PRECISION,
+                pending_since TIMESTAMPTZ
+            )
+            """,
+        ],
+    ),
+    Migration(
+        24,
+        "receipts_vendor_name_lower_index",
+        [
+            # Vendor merges join receipts to a name mapping on
+            # lower(vendor_name); see app/vendor_merge.py.
+            """
+            CREATE INDEX IF NOT EXISTS idx_receipts_vendor_name_lower
+            ON receipts (lower(vendor_name))
+            """,
+        ],
+        requires=["receipts"],
+    ),
+)
+
+
+def applied_versions(conn) -> set[int]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return set()
+        cur.execute("SELECT version FROM schema_migrations")
+        return {int(row[0]) for row in cur.fetchall()}
+
+
+def _missing_tables(cur, tables: Sequence[str]) -> list[str]:
+    missing = []
+    for table in tables:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        if not cur.fetchone()[0]:
+            missing.append(table)
+    return missing
+
+
+def apply_migrations(
+    conn, migrations: Sequence[Migration] = MIGRATIONS
+) -> list[int]:
+    """Apply pending migrations in version order; return what was applied.
+
+    Each migration commits together with its ``schema_migrations`` row.
+    The advisory lock makes concurrent callers wait and then find the
+    work already done.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", (_ADVISORY_LOCK_KEY,))
+    applied: list[int] = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_LEDGER_SQL)
+        conn.commit()
+        done = applied_versions(conn)
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done:
+                continue
+            with conn.cursor() as cur:
+                missing = _missing_tables(cur, migration.requires)
+                if missing:
+                    logger.warning(
+                        "Skipping schema migration %s (%s): missing %s",
+                        migration.version,
+                        migration.name,
+                        ", ".join(missing),
+                    )
+                    continue
+                migration.apply(cur)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) "
+                    "VALUES (%s, %s)",
+                    (migration.version, migration.name),
+                )
+            conn.commit()
+            applied.append(migration.version)
+            logger.info(
+                "Applied schema migration %s (%s)",
+                migration.version,
+                migration.name,
+            )
+        if applied:
+            notify_schema_changed(conn)
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        with suppress(Exception), conn.cursor() as cur:
+            cur.execute(
+                "SELECT pg_advisory_unlock(%s)", (_ADVISORY_LOCK_KEY,)
+            )
+            conn.commit()
+    return applied
+
+
+# After a failed run, or one that skipped migrations whose required
+# tables are missing, ensure_schema() waits this long before trying
+# again, doubling per attempt up to the maximum.
+RETRY_AFTER_SECONDS = 5.0
+RETRY_AFTER_MAX_SECONDS = 300.0
+
+_ready = False
+_ready_lock = threading.Lock()
+# (monotonic time of the next attempt, current delay, error)
+_failure: tuple[float, float, Exception] | None = None
+# (monotonic time of the next attempt, current delay) while skipped
+# migrations wait for their required tables.
+_skipped: tuple[float, float] | None = None
+
+
+def _next_delay(previous: tuple | None) -> float:
+    if previous is None:
+        return RETRY_AFTER_SECONDS
+    return min(previous[1] * 2, RETRY_AFTER_MAX_SECONDS)
+
+
+def _waiting_for_tables(now: float) -> bool:
+    return _skipped is not None and now < _skipped[0]
+
+
+class SchemaNotReady(RuntimeError):
+    """Pending migrations failed recently and are not retried yet."""
+
+
+def ensure_schema() -> None:
+    """Make sure this process has seen every migration applied.
+
+    Normally the startup hook has already done the work and this is a
+    flag check. Otherwise the first caller applies pending migrations on
+    a dedicated connection, never on the caller's transaction.
+
+    A failed run is not repeated on every request: until the back-off
+    ends, callers get :class:`SchemaNotReady` without touching the
+    database. Migrations skipped because a required table is missing
+    are retried on the same back-off; meanwhile callers proceed.
+    """
+    global _ready, _failure, _skipped
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        now = time.monotonic()
+        if _failure is not None and now < _failure[0]:
+            raise SchemaNotReady(
+                f"schema migrations failed: {_failure[2]}; retrying in "
+                f"{_failure[0] - now:.0f}s"
+            ) from _failure[2]
+        if _waiting_for_tables(now):
+            return
+        try:
+            conn = dedicated_connection()
+            try:
+                apply_migrations(conn, MIGRATIONS)
+                done = applied_versions(conn)
+            finally:
+                conn.close()
+        except Exception as exc:
+            delay = _next_delay(_failure)
+            _failure = (now + delay, delay, exc)
+            logger.exception(
+                "Schema migrations failed; retrying in %.0fs", delay
+            )
+            raise
+        _failure = None
+        skipped = [m.version for m in MIGRATIONS if m.version not in done]
+        if skipped:
+            delay = _next_delay(_skipped)
+            _skipped = (now + delay, delay)
+            logger.info(
+                "Schema migrations %s wait for their tables; retrying in "
+                "%.0fs",
+                skipped,
+                delay,
+            )
+            return
+        _ready = True
+        _skipped = None
+
+
+async def ensure_schema_async() -> None:
+    """Async :func:`ensure_schema`; warm calls never leave the loop."""
+    if not _ready and not _waiting_for_tables(time.monotonic()):
+        await asyncio.to_thread(ensure_schema)
+
+
+def schema_ready() -> bool:
+    return _ready
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv) or ["upgrade"]
+    command = args[0]
+    if command not in ("status", "upgrade"):
+        print(
+            "usage: python -m modern_backend.app.schema_migrations "
+            "[status|upgrade]"
+        )
+        return 2
+
+    logging.basicConfig(level=logging.INFO)
+    conn = dedicated_connection()
+    try:
+        if command == "upgrade":
+            applied = apply_migrations(conn)
+            print(f"Applied {len(applied)} migration(s): {applied}")
+        done = applied_versions(conn)
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in done else "pending"
+            print(f"{migration.version:>4}  {state:<8} {migration.name}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+"""Login sessions shared by every worker process.
+
+Production runs several uvicorn workers, so a token issued by one worker
+must be valid in all of them. ``SessionStore`` keeps sessions in a
+backend that every worker can see:
+
+- ``PostgresSessionBackend`` (the default) uses the ``UNLOGGED``
+  ``auth_sessions`` table. Only a SHA-256 of each token is stored.
+- ``MemorySessionBackend`` keeps them in this process, for tests and
+  single-worker development (``SESSION_BACKEND=memory``).
+
+Each worker keeps an LRU cache of validated sessions. A cached session
+is re-read from the backend after ``SESSION_CACHE_TTL_SECONDS`` (5), so a
+logout on another worker takes effect within that window. Sliding expiry
+is tracked in memory and written back in one statement every
+``SESSION_FLUSH_INTERVAL_SECONDS`` (5) instead of on every request.
+Expired rows are purged by the same background thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from .db import pooled_connection
+from .schema_migrations import ensure_schema
+
+logger = logging.getLogger(__name__)
+
+SESSION_TIMEOUT = 30 * 60  # 30 minutes
+
+_PAYLOAD_KEYS = ("employee_id", "name", "username", "role", "permissions")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def token_key(token: str) -> str:
+    """Storage key for ``token``; raw tokens never leave the process."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class MemorySessionBackend:
+    """Process-local backend. Sessions are not shared between workers."""
+
+    def __init__(self):
+        self._rows: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, key: str, session: dict[str, Any]) -> None:
+        with self._lock:
+            self._rows[key] = dict(session)
+
+    def load(self, key: str, now: datetime) -> dict[str, Any] | None:
+        with self._lock:
+            session = self._rows.get(key)
+            if session is None or session["expires_at"] <= now:
+                return None
+            return dict(session)
+
+    def extend(self, expiries: dict[str, datetime]) -> None:
+        with self._lock:
+            for key, expires_at in expiries.items():
+                session = self._rows.get(key)
+                if session is not None:
+                    session["expires_at"] = max(
+                        session["expires_at"], expires_at
+                    )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._rows.pop(key, None)
+
+    def purge_expired(self, now: datetime) -> int:
+        with self._lock:
+            expired = [
+                key
+                for key, session in self._rows.items()
+                if session["expires_at"] <= now
+            ]
+            for key in expired:
+                del self._rows[key]
+        return len(expired)
+
+
+class PostgresSessionBackend:
+    """Sessions in the ``auth_sessions`` table (schema migration 12)."""
+
+    def __init__(self, connection: Callable[[], Any] = pooled_connection):
+        self._connection = connection
+
+    def _run(self, query: str, params: tuple[Any, ...] = ()):
+        ensure_schema()
+        with self._connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+                    rows = cur.fetchall() if cur.description else None
+                    count = cur.rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return rows, count
+
+    def save(self, key: str, session: dict[str, Any]) -> None:
+        payload = {k: session.get(k) for k in _PAYLOAD_KEYS}
+        self._run(
+            """
+            INSERT INTO auth_sessions (
+                token_hash, employee_id, payload, created_at, expires_at
+            ) VALUES (%s, %s, %s::jsonb, %s, %s)
+            ON CONFLICT (token_hash) DO UPDATE
+            SET payload = EXCLUDED.payload,
+                expires_at = EXCLUDED.expires_at
+            """,
+            (
+                key,
+                session.get("employee_id"),
+                json.dumps(payload, default=str),
+                session["created_at"],
+                session["expires_at"],
+            ),
+        )
+
+    def load(self, key: str, now: datetime) -> dict[str, Any] | None:
+        rows, _ = self._run(
+            """
+            SELECT payload, created_at, expires_at
+            FROM auth_sessions
+            WHERE token_hash = %s AND expires_at > %s
+            """,
+            (key, now),
+        )
+        if not rows:
+            return None
+        payload, created_at, expires_at = rows[0]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        return {
+            **payload,
+            "created_at": created_at,
+            "expires_at": expires_at,
+        }
+
+    def extend(self, expiries: dict[str, datetime]) -> None:
+        if not expiries:
+            return
+        values = ", ".join(["(%s, %s::timestamptz)"] * len(expiries))
+        params: list[Any] = []
+        for key, expires_at in expiries.items():
+            params.extend((key, expires_at))
+        self._run(
+            f"""
+            UPDATE auth_sessions s
+            SET expires_at = GREATEST(s.expires_at, v.expires_at)
+            FROM (VALUES {values}) AS v(token_hash, expires_at)
+            WHERE s.token_hash = v.token_hash
+            """,
+            tuple(params),
+        )
+
+    def delete(self, key: str) -> None:
+        self._run("DELETE FROM auth_sessions WHERE token_hash = %s", (key,))
+
+    def purge_expired(self, now: datetime) -> int:
+        _, count = self._run(
+            "DELETE FROM auth_sessions WHERE expires_at <= %s", (now,)
+        )
+        return max(count, 0)
+
+
+class SessionStore:
+    """Create, validate and revoke sessions through a shared backend."""
+
+    def __init__(
+        self,
+        backend,
+        *,
+        timeout: int = SESSION_TIMEOUT,
+        cache_size: int = 1024,
+        cache_ttl: float = 5.0,
+        flush_interval: float = 5.0,
+        purge_interval: float = 300.0,
+    ):
+        self.backend = backend
+        self.timeout = timeout
+        self.cache_size = max(0, cache_size)
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        # token key -> (session, monotonic time it was read from backend)
+        self._cache: OrderedDict[str, tuple[dict[str, Any], float]] = (
+            OrderedDict()
+        )
+        self._pending: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._hits = 0
+        self._misses = 0
+        self._flushed = 0
+        self._purged = 0
+
+    def create(
+        self,
+        employee_id: int,
+        name: str,
+        *,
+        role: str = "user",
+        permissions: dict | None = None,
+        username: str | None = None,
+    ) -> str:
+        token = secrets.token_urlsafe(32)
+        now = _utcnow()
+        session = {
+            "employee_id": employee_id,
+            "name": name,
+            "username": username or name,
+            "role": role,
+            "permissions": permissions or {},
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.timeout),
+        }
+        key = token_key(token)
+        self.backend.save(key, session)
+        self._remember(key, session)
+        return token
+
+    def get(self, token: str | None) -> dict[str, Any] | None:
+        """Return the live session for ``token`` and slide its expiry."""
+        if not token:
+            return None
+        key = token_key(token)
+        now = _utcnow()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and time.monotonic() - entry[1] < self.cache_ttl:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                session = entry[0]
+            else:
+                self._misses += 1
+                session = None
+        if session is None:
+            session = self.backend.load(key, now)
+            if session is None:
+                self._forget(key)
+                return None
+            with self._lock:
+                pending = self._pending.get(key)
+            if pending and pending > session["expires_at"]:
+                session["expires_at"] = pending
+            self._remember(key, session)
+        if session["expires_at"] <= now:
+            self._forget(key)
+            return None
+        session["expires_at"] = now + timedelta(seconds=self.timeout)
+        with self._lock:
+            self._pending[key] = session["expires_at"]
+        return session
+
+    async def get_async(self, token: str | None) -> dict[str, Any] | None:
+        """:meth:`get` that only leaves the event loop on a cache miss."""
+        if not token:
+            return None
+        with self._lock:
+            entry = self._cache.get(token_key(token))
+            fresh = (
+                entry is not None
+                and time.monotonic() - entry[1] < self.cache_ttl
+            )
+        if fresh:
+            return self.get(token)
+        return await asyncio.to_thread(self.get, token)
+
+    def revoke(self, token: str | None) -> None:
+        if not token:
+            return
+        key = token_key(token)
+        self._forget(key)
+        self.backend.delete(key)
+
+    def flush(self) -> int:
+        """Write pending sliding-expiry updates in one batch."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            self.backend.extend(pending)
+        except Exception:
+            # Keep them for the next flush; newer updates win.
+            with self._lock:
+                self._pending = {**pending, **self._pending}
+            raise
+        self._flushed += len(pending)
+        return len(pending)
+
+    def purge(self) -> int:
+        purged = self.backend.purge_expired(_utcnow())
+        self._purged += purged
+        return purged
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="session-store", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the background thread and write pending expiries."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Final session expiry flush failed")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            cached, pending = len(self._cache), len(self._pending)
+        return {
+            "backend": type(self.backend).__name__,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "cached": cached,
+            "cache_hits": self._hits,
+            "cache_misses": self._misses,
+            "pending_expiry_updates": pending,
+            "expiry_updates_flushed": self._flushed,
+            "sessions_purged": self._purged,
+        }
+
+    def _remember(self, key: str, session: dict[str, Any]) -> None:
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[key] = (session, time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+            self._pending.pop(key, None)
+
+    def _run(self) -> None:
+        next_purge = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Session expiry flush failed")
+            if time.monotonic() >= next_purge:
+                next_purge = time.monotonic() + self.purge_interval
+                try:
+                    self.purge()
+                except Exception:
+                    logger.exception("Expired session purge failed")
+
+
+def _default_backend():
+    if os.environ.get("SESSION_BACKEND", "postgres").lower() == "memory":
+        return MemorySessionBackend()
+    return PostgresSessionBackend()
+
+
+session_store = SessionStore(
+    _default_backend(),
+    cache_size=int(os.environ.get("SESSION_CACHE_SIZE", "1024")),
+    cache_ttl=float(os.environ.get("SESSION_CACHE_TTL_SECONDS", "5")),
+    flush_interval=float(
+        os.environ.get("SESSION_FLUSH_INTERVAL_SECONDS", "5")
+    ),
+)
@@ -23,6 +23,38 @@ class T2DataExtractor:
         """Create database connection."""
         return psycopg2.connect(**self.conn_params)
 
+    @staticmethod
+    def _year_bounds(tax_year: int) -> tuple[date, date]:
+        """Half-open range; unlike EXTRACT(YEAR ...) it can use indexes."""
+        return date(tax_year, 1, 1), date(tax_year + 1, 1, 1)
+
+    @staticmethod
+    def _receipt_totals_source(cur) -> dict:
+        """SQL fragments for per-receipt-group expense totals.
+
+        Reads the daily_financial_facts table (schema migration 22) when
+        it exists, otherwise the receipts themselves.
+        """
+        cur.execute("SELECT to_regclass('daily_financial_facts') IS NOT NULL")
+        if cur.fetchone()[0]:
+            return {
+                "relation": "daily_financial_facts r",
+                "where": "r.source = 'receipts' AND r.fact_date >= %s"
+                " AND r.fact_date < %s",
+                "gl_code": "r.account_code",
+                "count": "COALESCE(SUM(r.row_count), 0)",
+                "amount": "r.expenses",
+                "gst": "r.gst_paid",
+            }
+        return {
+            "relation": "receipts r",
+            "where": "r.receipt_date >= %s AND r.receipt_date < %s",
+            "gl_code": "r.gl_account_code",
+            "count": "COUNT(*)",
+            "amount": "r.gross_amount",
+            "gst": "r.gst_amount",
+        }
+
     def extract_revenue_data(self, tax_year: int) -> dict:
         """
         Extract all revenue for the tax year.
@@ -72,9 +104,9 @@ class T2DataExtractor:
                         COUNT(*) as payment_count,
                         COALESCE(SUM(amount), 0) as charter_revenue
                     FROM charter_payments
-                    WHERE EXTRACT(YEAR FROM payment_date) = %s
+                    WHERE payment_date >= %s AND payment_date < %s
                     """,
-                    (tax_year,),
+                    self._year_bounds(tax_year),
                 )
                 fallback_data = cur.fetchone()
                 charter_count = fallback_data[0] if fallback_data else 0
@@ -99,11 +131,11 @@ class T2DataExtractor:
                     COALESCE(SUM(credit_amount), 0) as total_credits,
                     COUNT(*) as credit_count
                 FROM banking_transactions
-                WHERE EXTRACT(YEAR FROM transaction_date) = %s
+                WHERE transaction_date >= %s AND transaction_date < %s
                 AND credit_amount > 0
                 AND receipt_id IS NULL  -- Not already matched to a receipt
             """,
-                (tax_year,),
+                self._year_bounds(tax_year),
             )
 
             banking_credits = cur.fetchone()
@@ -142,48 +174,49 @@ class T2DataExtractor:
 
         try:
             # Expenses by GL account code
+            src = self._receipt_totals_source(cur)
             cur.execute(
-                """
+                f"""
                 SELECT 
-                    COALESCE(r.gl_account_code, 'UNASSIGNED') as gl_code,
+                    COALESCE({src['gl_code']}, 'UNASSIGNED') as gl_code,
                     COALESCE(coa.account_name, 'Unassigned') as account_name,
                     COALESCE(coa.account_type, 'expense') as account_type,
                     r.category,
-                    COUNT(*) as transaction_count,
-                    COALESCE(SUM(r.gross_amount), 0) as total_amount,
-                    COALESCE(SUM(r.gst_amount), 0) as total_gst
-                FROM receipts r
-                LEFT JOIN chart_of_accounts coa ON r.gl_account_code =
+                    {src['count']} as transaction_count,
+                    COALESCE(SUM({src['amount']}), 0) as total_amount,
+                    COALESCE(SUM({src['gst']}), 0) as total_gst
+                FROM {src['relation']}
+                LEFT JOIN chart_of_accounts coa ON {src['gl_code']} =
                 coa.account_code
-                WHERE EXTRACT(YEAR FROM r.receipt_date) = %s
+                WHERE {src['where']}
                 AND r.category NOT LIKE '%%Income%%'
                 AND r.category != 'revenue'
-                GROUP BY r.gl_account_code, coa.account_name, coa.account_type,
+                GROUP BY {src['gl_code']}, coa.account_name, coa.account_type,
                 r.category
                 ORDER BY total_amount DESC
             """,
-                (tax_year,),
+                self._year_bounds(tax_year),
             )
 
             expense_details = cur.fetchall()
 
             # Summary by account type
             cur.execute(
-                """
+                f"""
                 SELECT 
                     COALESCE(coa.account_type, 'unassigned') as account_type,
-                    COUNT(*) as transaction_count,
-                    COALESCE(SUM(r.gross_amount), 0) as total_amount
-                FROM receipts r
-                LEFT JOIN chart_of_accounts coa ON r.gl_account_code =
+                    {src['count']} as transaction_count,
+                    COALESCE(SUM({src['amount']}), 0) as total_amount
+                FROM {src['relation']}
+                LEFT JOIN chart_of_accounts coa ON {src['gl_code']} =
                 coa.account_code
-                WHERE EXTRACT(YEAR FROM r.receipt_date) = %s
+                WHERE {src['where']}
                 AND r.category NOT LIKE '%%Income%%'
                 AND r.category != 'revenue'
                 GROUP BY coa.account_type
                 ORDER BY total_amount DESC
             """,
-                (tax_year,),
+                self._year_bounds(tax_year),
             )
 
             expense_summary = cur.fetchall()
@@ -285,9 +318,9 @@ class T2DataExtractor:
                 FROM receipts r
                 LEFT JOIN chart_of_accounts coa ON r.gl_account_code =
                 coa.account_code
-                WHERE EXTRACT(YEAR FROM r.receipt_date) = %s
+                WHERE r.receipt_date >= %s AND r.receipt_date < %s
                 """,
-                (tax_year,),
+                self._year_bounds(tax_year),
             )
             rows = cur.fetchall()
 
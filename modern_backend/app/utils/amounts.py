@@ -0,0 +1,30 @@
+"""Exact-amount lookups on integer cents.
+
+``ABS(amount - %s) < 0.01`` cannot use an index, so every amount search
+scanned the whole table. Schema migration 16 adds expression indexes on
+``cents_sql(column)`` for ``banking_transactions`` and ``receipts``.
+Queries compare the same expression with ``to_cents(amount)`` for
+equality, which the planner serves from those indexes.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+
+def cents_sql(column: str) -> str:
+    """SQL for ``column`` in whole cents; matches the migration-16 indexes.
+
+    PostgreSQL ``ROUND`` rounds half away from zero, like
+    :func:`to_cents`.
+    """
+    return f"(ROUND({column} * 100)::bigint)"
+
+
+def to_cents(amount: float | Decimal | str) -> int:
+    """``amount`` in whole cents (``12.345`` -> ``1235``)."""
+    cents = Decimal(str(amount)).scaleb(2)
+    return int(cents.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def amount_match_sql(*columns: str) -> str:
+    """Predicate: any of ``columns`` equals one ``%s`` cents parameter each."""
+    return "(" + " OR ".join(f"{cents_sql(c)} = %s" for c in columns) + ")"
@@ -0,0 +1,368 @@
+"""Fuzzy clustering of receipt vendor names.
+
+``/api/vendors/find-variations`` only finds names sharing a literal
+prefix, so "SHELL", "Shell Canada #4411" and "SHEL CANADA" take several
+searches. :func:`cluster_vendors` groups every distinct vendor name at
+once:
+
+1. Names are normalized: upper case, punctuation, numbers (store and
+   terminal ids) and legal suffixes such as ``INC`` are dropped.
+2. Each normalized name is split into character trigrams. Names sharing
+   a trigram form a block, so only names with something in common are
+   compared. Trigrams shared by more than ``max_block`` names carry
+   little signal and do not form blocks.
+3. Pair similarity is the cosine of the full trigram sets,
+   ``shared / sqrt(len_a * len_b)``, common trigrams included. Trigrams
+   shared within blocks are counted by a single ``numpy.unique`` over
+   the pair keys; the common ones by a sorted lookup of each pair's
+   ``(name, trigram)`` keys.
+4. Pairs at or above ``min_similarity`` are joined into clusters. Each
+   cluster suggests its most used name as the canonical one.
+
+Tens of thousands of names cluster in a few seconds. The endpoint runs
+:data:`vendor_cluster_job` in a background thread and keeps the result
+until the receipts' data version changes (see :mod:`app.report_cache`).
+"""
+
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from .db import cursor
+from .report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+STOP_TOKENS = frozenset(
+    {
+        "CO",
+        "COMPANY",
+        "CORP",
+        "CORPORATION",
+        "INC",
+        "INCORPORATED",
+        "LIMITED",
+        "LLC",
+        "LTD",
+        "THE",
+    }
+)
+
+_NON_WORD = re.compile(r"[^A-Z0-9]+")
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def normalize_vendor(name: str) -> str:
+    """Comparison key: ``"Shell Canada Ltd. #4411"`` -> ``"SHELL CANADA"``."""
+    tokens = _NON_WORD.sub(" ", name.upper().replace("&", " AND ")).split()
+    return " ".join(
+        t for t in tokens if t not in STOP_TOKENS and not _HAS_DIGIT.search(t)
+    )
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f" {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram cosine similarity of two names' normalized keys."""
+    ga, gb = trigrams(normalize_vendor(a)), trigrams(normalize_vendor(b))
+    if not ga or not gb:
+        return 0.0
+    return len(ga & gb) / (len(ga) * len(gb)) ** 0.5
+
+
+@lru_cache(maxsize=512)
+def _pairs_of(size: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.triu_indices(size, 1)
+
+
+def _candidate_pairs(
+    grams: list[set[str]], max_block: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """``(i, j, shared trigram count)`` for names sharing a trigram.
+
+    Only trigrams in at most ``max_block`` names make pairs, but the
+    count covers every trigram the two names share.
+    """
+    gram_ids: dict[str, int] = {}
+    name_idx: list[int] = []
+    gram_idx: list[int] = []
+    for i, name_grams in enumerate(grams):
+        for gram in name_grams:
+            name_idx.append(i)
+            gram_idx.append(gram_ids.setdefault(gram, len(gram_ids)))
+    empty = np.empty(0, dtype=np.int64)
+    if not gram_idx:
+        return empty, empty, empty
+    names = np.asarray(name_idx, dtype=np.int64)
+    gram_of = np.asarray(gram_idx, dtype=np.int64)
+
+    # Postings: names grouped by trigram, ascending within each group.
+    by_gram = np.argsort(gram_of, kind="stable")
+    members = names[by_gram]
+    block_grams, starts, sizes = np.unique(
+        gram_of[by_gram], return_index=True, return_counts=True
+    )
+    firsts, seconds = [], []
+    for start, size in zip(starts, sizes, strict=True):
+        if size < 2 or size > max_block:
+            continue
+        block = members[start : start + size]
+        a, b = _pairs_of(int(size))
+        firsts.append(block[a])
+        seconds.append(block[b])
+    if not firsts:
+        return empty, empty, empty
+
+    n = len(grams)
+    keys = np.concatenate(firsts) * n + np.concatenate(seconds)
+    pair_keys, shared = np.unique(keys, return_counts=True)
+    first, second = pair_keys // n, pair_keys % n
+    common = np.zeros(len(gram_ids), dtype=bool)
+    common[block_grams[sizes > max_block]] = True
+    return first, second, shared + _common_shared(
+        names, gram_of, common, first, second, n
+    )
+
+
+def _common_shared(
+    names: np.ndarray,
+    gram_of: np.ndarray,
+    common: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    n: int,
+) -> np.ndarray:
+    """Trigrams too common to block on that each pair still shares.
+
+    Each of ``first``'s common trigrams is looked up among ``second``'s
+    in one sorted array of ``name * grams + gram`` keys.
+    """
+    if not common.any():
+        return np.zeros(len(first), dtype=np.int64)
+    keep = common[gram_of]
+    names, gram_of = names[keep], gram_of[keep]
+    width = len(common)
+    postings = np.sort(names * width + gram_of)
+    # ``names`` is ascending, so each name's trigrams are one slice.
+    counts = np.bincount(names, minlength=n)
+    offsets = np.cumsum(counts) - counts
+    per_pair = counts[first]
+    pair_of = np.repeat(np.arange(len(first)), per_pair)
+    within = np.arange(len(pair_of)) - np.repeat(
+        np.cumsum(per_pair) - per_pair, per_pair
+    )
+    position = offsets[first][pair_of] + within
+    probes = second[pair_of] * width + gram_of[position]
+    found = np.minimum(np.searchsorted(postings, probes), len(postings) - 1)
+    hits = postings[found] == probes
+    return np.bincount(pair_of[hits], minlength=len(first))
+
+
+def cluster_vendors(
+    counts: dict[str, int],
+    *,
+    min_similarity: float = 0.6,
+    max_block: int = 200,
+) -> list[dict[str, Any]]:
+    """Merge clusters of ``{vendor name: receipt count}``.
+
+    Clusters are ranked by the receipts a merge into the suggested
+    canonical name would change.
+    """
+    names = [name for name in counts if normalize_vendor(name)]
+    grams = [trigrams(normalize_vendor(name)) for name in names]
+    first, second, shared = _candidate_pairs(grams, max_block)
+    lengths = np.asarray([len(g) for g in grams], dtype=np.float64)
+    scores = shared / np.sqrt(lengths[first] * lengths[second])
+    keep = scores >= min_similarity
+
+    parent = list(range(len(names)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    pairs = zip(first[keep].tolist(), second[keep].tolist(), strict=True)
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(names)):
+        groups.setdefault(find(i), []).append(i)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: (-counts[names[i]], names[i]))
+        canonical = names[members[0]]
+        canonical_grams = grams[members[0]]
+        vendors = [
+            {
+                "vendor_name": names[i],
+                "receipt_count": counts[names[i]],
+                "similarity": round(
+                    len(grams[i] & canonical_grams)
+                    / (len(grams[i]) * len(canonical_grams)) ** 0.5,
+                    3,
+                ),
+            }
+            for i in members
+        ]
+        total = sum(v["receipt_count"] for v in vendors)
+        clusters.append(
+            {
+                "canonical": canonical,
+                "receipt_count": total,
+                "receipts_to_merge": total - counts[canonical],
+                "vendors": vendors,
+            }
+        )
+    clusters.sort(
+        key=lambda c: (-c["receipts_to_merge"], -c["receipt_count"])
+    )
+    return clusters
+
+
+def load_vendor_counts(cur) -> dict[str, int]:
+    """Every distinct receipt vendor name and its receipt count."""
+    cur.execute(
+        """
+        SELECT vendor_name, COUNT(*)
+        FROM receipts
+        WHERE vendor_name IS NOT NULL AND vendor_name != ''
+        GROUP BY vendor_name
+        """
+    )
+    return {row[0]: int(row[1]) for row in cur.fetchall()}
+
+
+def receipt_versions() -> dict[str, int] | None:
+    """The receipts' data version, or None if it is not tracked."""
+    with cursor() as cur:
+        return report_cache.versions(cur, ("receipts",))
+
+
+class VendorClusterJob:
+    """Computes clusters in a background thread and caches the result.
+
+    A result is served while the receipts' data version is unchanged.
+    Where versions are not tracked it is served for ``ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], dict[str, int]] | None = None,
+        *,
+        ttl: float = 300.0,
+    ):
+        self._load = load or self._load_from_db
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._result: dict[str, Any] | None = None
+        self._key: tuple[Any, float] | None = None
+        self._computed_at = 0.0
+        self._runs = 0
+        self._last_error: str | None = None
+
+    @staticmethod
+    def _load_from_db() -> dict[str, int]:
+        with cursor() as cur:
+            return load_vendor_counts(cur)
+
+    def result(
+        self, versions: Any, min_similarity: float
+    ) -> dict[str, Any] | None:
+        """The cached result for these inputs, or None."""
+        with self._lock:
+            if self._result is None or self._key != (
+                versions,
+                min_similarity,
+            ):
+                return None
+            if versions is None and (
+                time.monotonic() - self._computed_at >= self.ttl
+            ):
+                return None
+            return self._result
+
+    def start(
+        self, versions: Any, min_similarity: float, *, replace: bool = False
+    ) -> bool:
+        """Start a run unless one is in progress; returns if started.
+
+        ``replace`` drops the cached result first, so :meth:`result`
+        returns None until the next run finishes.
+        """
+        with self._lock:
+            if replace:
+                self._result = None
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(
+                target=self.run,
+                args=(versions, min_similarity),
+                name="vendor-clusters",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def run(self, versions: Any, min_similarity: float) -> dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            counts = self._load()
+            clusters = cluster_vendors(counts, min_similarity=min_similarity)
+        except Exception as exc:
+            with self._lock:
+                self._last_error = str(exc)
+            logger.exception("Vendor clustering failed")
+            raise
+        duration_ms = (time.perf_counter() - started) * 1000
+        result = {
+            "computed_at": datetime.now().isoformat(),
+            "duration_ms": round(duration_ms, 1),
+            "vendor_count": len(counts),
+            "min_similarity": min_similarity,
+            "clusters": clusters,
+        }
+        with self._lock:
+            self._result = result
+            self._key = (versions, min_similarity)
+            self._computed_at = time.monotonic()
+            self._runs += 1
+            self._last_error = None
+        logger.info(
+            "Clustered %s vendor names into %s clusters in %.0f ms",
+            len(counts),
+            len(clusters),
+            duration_ms,
+        )
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None
+                and self._thread.is_alive(),
+                "runs": self._runs,
+                "last_error": self._last_error,
+            }
+
+
+vendor_cluster_job = VendorClusterJob()
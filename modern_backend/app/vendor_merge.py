@@ -0,0 +1,153 @@
+"""Set-based vendor name merges.
+
+A merge is a mapping of old vendor names to canonical names. Old names
+match case-insensitively. :func:`apply_mapping` loads the whole mapping
+into a temporary table with ``COPY`` and changes every receipt in one
+``UPDATE ... FROM`` joined on ``lower(vendor_name)``. That join uses the
+``receipts (lower(vendor_name))`` index from schema migration 24. The
+statement's ``RETURNING`` rows give the exact receipts changed per old
+name, which are written to ``vendor_standardization_log``.
+``mv_vendor_list`` is refreshed once at the end.
+
+The receipts' statement triggers (data versions, daily facts) fire once
+for the whole merge. Thousands of names are one transaction, not one
+statement per name.
+"""
+
+import csv
+import io
+import logging
+from collections.abc import Iterable
+from typing import Any
+
+from .matview_refresh import refresh_view
+from .report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+VENDOR_LIST_VIEW = "mv_vendor_list"
+
+
+def build_mapping(
+    pairs: Iterable[tuple[str, str]],
+) -> tuple[dict[str, tuple[str, str]], list[dict[str, Any]]]:
+    """``lower(old) -> (old, new)`` and the names mapped to two targets.
+
+    Blank names are ignored. A name whose targets disagree is left out
+    of the mapping and reported instead.
+    """
+    mapping: dict[str, tuple[str, str]] = {}
+    targets: dict[str, set[str]] = {}
+    for old, new in pairs:
+        old, new = (old or "").strip(), (new or "").strip()
+        if not old or not new:
+            continue
+        key = old.lower()
+        mapping.setdefault(key, (old, new))
+        targets.setdefault(key, set()).add(new)
+    conflicts = [
+        {"source": mapping[key][0], "targets": sorted(names)}
+        for key, names in targets.items()
+        if len(names) > 1
+    ]
+    for conflict in conflicts:
+        del mapping[conflict["source"].lower()]
+    return mapping, conflicts
+
+
+def _load_mapping(cur, mapping: dict[str, tuple[str, str]]) -> None:
+    cur.execute("DROP TABLE IF EXISTS pg_temp.vendor_merge_map")
+    cur.execute(
+        """
+        CREATE TEMP TABLE vendor_merge_map (
+            old_lower TEXT PRIMARY KEY,
+            old_name TEXT NOT NULL,
+            new_name TEXT NOT NULL
+        ) ON COMMIT DROP
+        """
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for key, (old, new) in mapping.items():
+        writer.writerow((key, old, new))
+    buffer.seek(0)
+    cur.copy_expert(
+        "COPY vendor_merge_map (old_lower, old_name, new_name)"
+        " FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+    # Lets the planner pick an index probe per name for small mappings.
+    cur.execute("ANALYZE vendor_merge_map")
+
+
+_PREVIEW_SQL = """
+    SELECT m.old_name, m.new_name, COUNT(r.vendor_name)
+    FROM vendor_merge_map m
+    LEFT JOIN receipts r
+      ON lower(r.vendor_name) = m.old_lower
+     AND r.vendor_name <> m.new_name
+    GROUP BY m.old_name, m.new_name
+    ORDER BY 3 DESC, m.old_name
+"""
+
+_APPLY_SQL = """
+    WITH changed AS (
+        UPDATE receipts r
+        SET vendor_name = m.new_name
+        FROM vendor_merge_map m
+        WHERE lower(r.vendor_name) = m.old_lower
+          AND r.vendor_name <> m.new_name
+        RETURNING m.old_lower
+    ), counts AS (
+        SELECT old_lower, COUNT(*) AS n FROM changed GROUP BY old_lower
+    ), merged AS (
+        SELECT m.old_name, m.new_name, COALESCE(c.n, 0) AS n
+        FROM vendor_merge_map m
+        LEFT JOIN counts c USING (old_lower)
+    ), logged AS (
+        INSERT INTO vendor_standardization_log
+            (old_name, new_name, affected_count, standardized_by)
+        SELECT old_name, new_name, n, %s FROM merged
+    )
+    SELECT old_name, new_name, n FROM merged
+    ORDER BY n DESC, old_name
+"""
+
+
+def apply_mapping(
+    conn,
+    mapping: dict[str, tuple[str, str]],
+    *,
+    dry_run: bool = False,
+    standardized_by: str = "admin",
+) -> list[dict[str, Any]]:
+    """Merge receipts' vendor names per ``mapping`` (see
+    :func:`build_mapping`); returns the receipts changed per old name.
+
+    With ``dry_run`` nothing changes and the counts are what would.
+    The caller commits.
+    """
+    if not mapping:
+        return []
+    with conn.cursor() as cur:
+        _load_mapping(cur, mapping)
+        if dry_run:
+            cur.execute(_PREVIEW_SQL)
+        else:
+            cur.execute(_APPLY_SQL, (standardized_by,))
+        results = [
+            {"old_name": r[0], "new_name": r[1], "receipts": int(r[2])}
+            for r in cur.fetchall()
+        ]
+        affected = sum(r["receipts"] for r in results)
+        if not dry_run and affected:
+            versions = report_cache.versions(cur, ("receipts",))
+            refresh_view(cur, VENDOR_LIST_VIEW, versions)
+        cur.execute("DROP TABLE vendor_merge_map")
+    logger.info(
+        "Vendor merge of %s names %s %s receipts",
+        len(mapping),
+        "would change" if dry_run else "changed",
+        affected,
+    )
+    return results
@@ -0,0 +1,29 @@
+-- Broadcast DDL so API workers can drop their cached schema catalog
+-- (app/schema_catalog.py) instead of probing information_schema per request.
+--
+-- Event triggers need superuser (or neon_superuser on Neon). Where they cannot
+-- be created the API falls back to SCHEMA_CATALOG_TTL_SECONDS and
+-- POST /api/schema-catalog/refresh.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION notify_schema_catalog()
+RETURNS event_trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM pg_notify('schema_catalog', tg_tag);
+END;
+$$;
+
+DROP EVENT TRIGGER IF EXISTS schema_catalog_ddl_end;
+CREATE EVENT TRIGGER schema_catalog_ddl_end
+    ON ddl_command_end
+    EXECUTE FUNCTION notify_schema_catalog();
+
+DROP EVENT TRIGGER IF EXISTS schema_catalog_sql_drop;
+CREATE EVENT TRIGGER schema_catalog_sql_drop
+    ON sql_drop
+    EXECUTE FUNCTION notify_schema_catalog();
+
+COMMIT;
@@ -1,6 +1,143 @@
+from types import SimpleNamespace
+
 import pytest
 
 
 @pytest.fixture(scope="session", autouse=True)
 def set_asyncio_mode(request):
     request.config.option.asyncio_mode = "auto"
+
+
+class FakeCursor:
+    """Cursor of a :class:`FakeConnection`; the connection answers."""
+
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.description = None
+        self.rowcount = -1
+        self.closed = False
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        rows, self._rows = self._rows, []
+        return iter(rows)
+
+    @property
+    def executed(self):
+        return self.conn.executed
+
+    def statements(self, prefix=""):
+        return self.conn.statements(prefix)
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.conn.executed.append((query, params))
+        self._rows = list(self.conn.respond(query, params))
+        self.rowcount = len(self._rows) or self.conn.rowcount
+        if self.conn.columns:
+            self.description = [(c,) for c in self.conn.columns]
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size):
+        self.conn.fetches.append(size)
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def mogrify(self, query, params):
+        return (query % tuple(f"'{p}'" for p in params)).encode()
+
+    def copy_expert(self, query, file):
+        self.conn.executed.append((query, None))
+        self.rowcount = self.conn.copy(query, file)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """In-memory stand-in for a psycopg2 connection.
+
+    ``replies`` maps a fragment of a query to the rows it returns, or to
+    a function of the query's parameters returning them. Queries are
+    recorded in :attr:`executed` with their whitespace collapsed. Tests
+    that simulate database state subclass this and override
+    :meth:`respond`.
+    """
+
+    def __init__(self, replies=None, *, columns=(), rowcount=-1):
+        self.replies = dict(replies or {})
+        self.columns = tuple(columns)
+        self.rowcount = rowcount
+        self.info = SimpleNamespace(transaction_status=0)
+        self.executed = []
+        self.cursors = []
+        self.fetches = []
+        self.copied = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = 0
+
+    def cursor(self, name=None):
+        cur = FakeCursor(self, name)
+        self.cursors.append(cur)
+        return cur
+
+    def respond(self, query, params):
+        for fragment, rows in self.replies.items():
+            if fragment in query:
+                return rows(params) if callable(rows) else rows
+        return []
+
+    def copy(self, query, file):
+        self.copied.append(file.read())
+        return -1
+
+    def statements(self, prefix=""):
+        return [q for q, _ in self.executed if q.startswith(prefix)]
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeAsyncCursor:
+    """Awaitable face of a :class:`FakeCursor`, like ``db.AsyncCursor``."""
+
+    def __init__(self, cur):
+        self.cur = cur
+
+    @property
+    def executed(self):
+        return self.cur.executed
+
+    async def execute(self, query, params=None):
+        self.cur.execute(query, params)
+
+    async def fetchone(self):
+        return self.cur.fetchone()
+
+    async def fetchall(self):
+        return self.cur.fetchall()
+
+
+def fake_cursor(replies=None, **options):
+    """A cursor of a new :class:`FakeConnection`."""
+    return FakeConnection(replies, **options).cursor()
@@ -0,0 +1,24 @@
+from decimal import Decimal
+
+from modern_backend.app.utils.amounts import (
+    amount_match_sql,
+    cents_sql,
+    to_cents,
+)
+
+
+def test_amounts_round_to_whole_cents_half_away_from_zero():
+    assert to_cents(45.2) == 4520
+    assert to_cents("0.005") == 1
+    assert to_cents(Decimal("-12.345")) == -1235
+    assert to_cents(0.1 + 0.2) == 30
+
+
+def test_amount_match_probes_the_indexed_expression():
+    assert cents_sql("bt.debit_amount") == (
+        "(ROUND(bt.debit_amount * 100)::bigint)"
+    )
+    assert amount_match_sql("debit_amount", "credit_amount") == (
+        "((ROUND(debit_amount * 100)::bigint) = %s"
+        " OR (ROUND(credit_amount * 100)::bigint) = %s)"
+    )
@@ -0,0 +1,66 @@
+from datetime import date
+
+from conftest import FakeConnection
+from modern_backend.app.audit.partitions import maintain_partitions
+
+
+class _FakeConnection(FakeConnection):
+    def __init__(self, partitions):
+        super().__init__({"pg_try_advisory_xact_lock": [(True,)]})
+        self.partitions = dict(partitions)
+
+    def respond(self, query, params):
+        if "FROM pg_inherits" in query:
+            return [(name,) for name in self.partitions]
+        if "to_regclass" in query:
+            return [(params[0] in self.partitions,)]
+        if query.startswith("CREATE TABLE"):
+            self.partitions[query.split()[2]] = None
+        elif query.startswith("SELECT MAX(retention_until)"):
+            return [(self.partitions[query.split()[-1]],)]
+        elif "DETACH PARTITION" in query:
+            del self.partitions[query.split()[-1]]
+        return super().respond(query, params)
+
+
+def test_creates_upcoming_years_and_detaches_the_oldest_expired_ones():
+    conn = _FakeConnection(
+        {
+            "audit_events_partitioned_default": None,
+            "audit_events_2017": date(2024, 12, 31),
+            "audit_events_2018": date(2031, 12, 31),
+            "audit_events_2019": None,
+            "audit_events_2026": date(2033, 12, 31),
+        }
+    )
+
+    result = maintain_partitions(conn, today=date(2026, 3, 1))
+
+    assert result["created"] == ["audit_events_2027"]
+    # 2019 has expired, but 2018 is still retained: detaching 2019 would
+    # leave a gap in the hash chain, so only 2017 goes.
+    assert result["detached"] == ["audit_events_2017"]
+    assert set(conn.partitions) == {
+        "audit_events_partitioned_default",
+        "audit_events_2018",
+        "audit_events_2019",
+        "audit_events_2026",
+        "audit_events_2027",
+    }
+    assert conn.commits == 1
+
+
+def test_expired_years_go_once_the_older_ones_have():
+    conn = _FakeConnection(
+        {
+            "audit_events_2018": date(2025, 12, 31),
+            "audit_events_2019": None,
+            "audit_events_2020": date(2026, 12, 31),
+            "audit_events_2021": None,
+        }
+    )
+
+    result = maintain_partitions(conn, today=date(2026, 3, 1))
+
+    assert result["detached"] == ["audit_events_2018", "audit_events_2019"]
+    assert "audit_events_2021" in conn.partitions
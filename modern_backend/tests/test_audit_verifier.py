@@ -0,0 +1,110 @@
+from datetime import date, datetime, timezone
+
+from conftest import FakeConnection
+from modern_backend.app.audit.schemas import AuditEvent, AuditEventActor
+from modern_backend.app.audit.verifier import verify_audit_chain
+from modern_backend.app.audit.writer import canonical_event_json, chain_hash
+
+
+def _chain(count, start_pk=1, prev=None):
+    rows = []
+    for pk in range(start_pk, start_pk + count):
+        event = AuditEvent(
+            occurred_at=datetime(2026, 1, 1, 9, 0, pk % 60),
+            module="tests",
+            entity_type="receipt",
+            entity_id=str(pk),
+            action="update",
+            source="api",
+            actor=AuditEventActor(username="auditor"),
+            after={"amount": pk * 1.5},
+            retention_until=date(2033, 12, 31),
+        )
+        event_hash = chain_hash(prev, canonical_event_json(event))
+        rows.append(
+            [
+                pk,
+                event.event_id,
+                # The database returns timestamptz values as aware datetimes.
+                event.occurred_at.replace(tzinfo=timezone.utc),
+                event.module,
+                event.entity_type,
+                event.entity_id,
+                event.action,
+                event.source,
+                event.correlation_id,
+                event.actor.model_dump(mode="json"),
+                event.before,
+                event.after,
+                event.evidence_links,
+                event.retention_until,
+                event.note,
+                prev,
+                event_hash,
+            ]
+        )
+        prev = event_hash
+    return rows
+
+
+class _Database:
+    def __init__(self, rows):
+        self.rows = rows
+        self.checkpoints = []
+        self.rows_read = 0
+
+
+class _Connection(FakeConnection):
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+
+    def respond(self, query, params):
+        if "FROM audit_chain_checkpoints" in query:
+            ok = [c for c in self.db.checkpoints if c[3] == "ok"]
+            return [ok[-1][:2]] if ok else []
+        if "MAX(audit_event_pk)" in query:
+            return [(max(r[0] for r in self.db.rows),)]
+        if "INSERT INTO audit_chain_checkpoints" in query:
+            self.db.checkpoints.append(params)
+            return []
+        low, high = params
+        rows = [r for r in self.db.rows if low < r[0] <= high]
+        self.db.rows_read += len(rows)
+        return rows
+
+
+def test_parallel_segments_stitch_and_checkpoint_resumes():
+    db = _Database(_chain(25))
+
+    first = verify_audit_chain(
+        lambda: _Connection(db), segment_size=7, workers=3
+    )
+    assert first["status"] == "ok"
+    assert first["segments"] == 4
+    assert first["events_verified"] == 25
+    assert first["head_hash"] == db.rows[-1][16]
+
+    db.rows.extend(_chain(5, start_pk=26, prev=db.rows[-1][16]))
+    db.rows_read = 0
+    second = verify_audit_chain(lambda: _Connection(db), segment_size=7)
+    assert second["mode"] == "incremental"
+    assert second["events_verified"] == 5
+    assert db.rows_read == 5
+    assert second["verified_through_pk"] == 30
+
+
+def test_tampered_row_and_broken_link_are_reported():
+    db = _Database(_chain(12))
+    db.rows[4][11] = {"amount": 0}
+    db.rows[8][15] = "forged"
+
+    result = verify_audit_chain(lambda: _Connection(db), segment_size=4)
+
+    assert result["status"] == "broken"
+    assert [(b["audit_event_pk"], b["problem"]) for b in result["breaks"]] == [
+        (5, "event_hash_mismatch"),
+        (9, "prev_hash_mismatch"),
+        (9, "event_hash_mismatch"),
+    ]
+    assert db.checkpoints[-1][3] == "broken"
@@ -0,0 +1,181 @@
+from concurrent.futures import Future
+from datetime import date
+
+import psycopg2.extensions
+import pytest
+from conftest import FakeConnection
+from modern_backend.app.audit import engine
+from modern_backend.app.audit.engine import record_audit_event
+from modern_backend.app.audit.schemas import AuditEvent, AuditEventActor
+from modern_backend.app.audit.writer import (
+    AuditWriter,
+    canonical_event_json,
+    chain_hash,
+)
+from modern_backend.app.db import GuardedConnection, pool_stats
+
+
+def _rows(params):
+    return [params[i : i + 16] for i in range(0, len(params), 16)]
+
+
+class _FakeConnection(FakeConnection):
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+        self.inserts = []
+
+    def respond(self, query, params):
+        if self.fail:
+            raise RuntimeError("connection lost")
+        if "INSERT INTO audit_events" in query:
+            self.inserts.append(list(params))
+        elif query.startswith("SELECT event_hash"):
+            rows = [row for insert in self.inserts for row in _rows(insert)]
+            return [(rows[-1][15],)] if rows else []
+        return []
+
+
+def _event(n):
+    return AuditEvent(
+        module="tests",
+        entity_type="receipt",
+        entity_id=str(n),
+        action="reclassify",
+        source="api",
+        actor=AuditEventActor(actor_type="service"),
+        retention_until=date(2033, 12, 31),
+    )
+
+
+def test_queued_events_are_chained_into_one_multi_row_insert():
+    conn = _FakeConnection()
+    writer = AuditWriter(lambda: conn)
+    events = [_event(n) for n in range(5)]
+    canonical = [canonical_event_json(e) for e in events]
+
+    futures = writer.submit_many(events)
+    for future in futures:
+        future.result(timeout=5)
+    writer.stop()
+
+    assert len(conn.statements("SELECT event_hash")) == 1
+    assert len(conn.inserts) == 1
+    rows = _rows(conn.inserts[0])
+    prev = None
+    for row, text in zip(rows, canonical, strict=True):
+        assert row[14] == prev
+        assert row[15] == chain_hash(prev, text)
+        prev = row[15]
+    assert writer.stats()["events_written"] == 5
+
+
+def test_fire_and_forget_is_written_by_flush_and_failures_surface():
+    conn = _FakeConnection()
+    writer = AuditWriter(lambda: conn, wait_by_default=False)
+    writer.record(_event(1))
+    writer.flush(timeout=5)
+    assert len(conn.inserts) == 1
+
+    broken = AuditWriter(lambda: _FakeConnection(fail=True))
+    with pytest.raises(RuntimeError):
+        broken.record(_event(2), wait=True)
+    assert broken.stats()["events_failed"] == 1
+    writer.stop()
+    broken.stop()
+
+
+class _NoTransaction(psycopg2.extensions.connection):
+    """Unconnected connection whose commit and rollback do nothing."""
+
+    def __init__(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class _HookedConnection(GuardedConnection, _NoTransaction):
+    pass
+
+
+def test_after_commit_hooks_run_on_commit_and_drop_on_rollback():
+    conn = _HookedConnection()
+    ran = []
+    conn.after_commit(lambda: ran.append("rolled back"))
+    conn.rollback()
+    conn.after_commit(lambda: ran.append("committed"))
+    conn.commit()
+    conn.commit()
+    assert ran == ["committed"]
+
+
+def test_connections_without_hooks_write_inline():
+    conn = _FakeConnection()
+    record_audit_event(conn, _event(1), ensure_storage=False, commit=True)
+    assert conn.commits == 1
+    assert len(_rows(conn.inserts[0])) == 1
+
+
+class _CommitHooks(_FakeConnection):
+    def __init__(self, fail=False):
+        super().__init__(fail)
+        self.hooks = []
+
+    def after_commit(self, callback):
+        self.hooks.append(callback)
+
+    def commit(self):
+        super().commit()
+        hooks, self.hooks = self.hooks, []
+        for hook in hooks:
+            hook()
+
+
+def test_synchronous_events_are_written_in_the_callers_transaction():
+    conn = _CommitHooks()
+    record_audit_event(
+        conn, _event(1), ensure_storage=False, commit=False, wait=True
+    )
+    assert len(conn.inserts) == 1 and conn.commits == 0
+    assert conn.statements("SELECT pg_advisory_xact_lock")
+
+    broken = _CommitHooks(fail=True)
+    with pytest.raises(RuntimeError):
+        record_audit_event(broken, _event(2), ensure_storage=False, wait=True)
+    assert broken.commits == 0
+
+
+def test_fire_and_forget_events_are_queued_after_commit(monkeypatch):
+    written = _FakeConnection()
+    writer = AuditWriter(lambda: written, wait_by_default=False)
+    monkeypatch.setattr(engine, "audit_writer", writer)
+    conn = _CommitHooks()
+
+    record_audit_event(
+        conn, _event(1), ensure_storage=False, commit=False, wait=False
+    )
+    assert conn.inserts == [] and conn.hooks
+    conn.commit()
+    writer.flush(timeout=5)
+    writer.stop()
+    assert conn.inserts == [] and len(written.inserts) == 1
+
+
+def test_failed_after_commit_hooks_are_counted_not_raised():
+    conn = _HookedConnection()
+    failed: Future = Future()
+    failed.set_exception(RuntimeError("audit insert failed"))
+    ran = []
+    before = pool_stats()["after_commit_failures"]
+
+    conn.after_commit(lambda: failed)
+    conn.after_commit(lambda: 1 / 0)
+    conn.after_commit(lambda: ran.append("still runs"))
+    conn.commit()
+
+    assert ran == ["still runs"]
+    assert pool_stats()["after_commit_failures"] == before + 2
@@ -0,0 +1,67 @@
+import asyncio
+from decimal import Decimal
+
+from conftest import FakeAsyncCursor, fake_cursor
+from modern_backend.app import schema_migrations
+from modern_backend.app.bank_balances import (
+    OPENING_BALANCES_SQL,
+    RUNNING_BALANCE_SQL,
+    opening_balances,
+    rebuild_checkpoints,
+)
+
+
+def test_opening_balances_read_checkpoints_for_all_accounts_at_once():
+    rows = [("111", Decimal("250.50")), ("222", None)]
+    cur = FakeAsyncCursor(fake_cursor({"bank_balance_checkpoints": rows}))
+
+    balances = asyncio.run(
+        opening_balances(cur, ["111", "222"], "2026-03-15")
+    )
+
+    assert balances == {"111": 250.5, "222": 0.0}
+    (sql, params), = cur.executed
+    assert sql == " ".join(OPENING_BALANCES_SQL.split())
+    assert params == [["111", "222"], "2026-03-15", "2026-03-15",
+                      "2026-03-15"]
+    assert "bank_balance_checkpoints" in sql
+    # Only the partial month before the start date is summed.
+    assert "bt.transaction_date >= date_trunc('month', %s::date)" in sql
+
+
+def test_no_accounts_skips_the_query():
+    cur = FakeAsyncCursor(fake_cursor())
+    assert asyncio.run(opening_balances(cur, [], "2026-03-15")) == {}
+    assert cur.executed == []
+
+
+def test_running_balance_windows_over_bank_rows_before_receipts():
+    window = RUNNING_BALANCE_SQL.index("OVER (")
+    join = RUNNING_BALANCE_SQL.index("LEFT JOIN receipts")
+    assert window < join
+
+
+def _cursor(column_count=3):
+    return fake_cursor({"pg_attribute": [(column_count,)]}, rowcount=3)
+
+
+def test_rebuild_replaces_checkpoints_under_a_share_lock():
+    cur = _cursor()
+    assert rebuild_checkpoints(cur) == 3
+    assert cur.statements()[0].startswith("LOCK TABLE banking_transactions")
+    assert cur.statements()[1] == "DELETE FROM bank_balance_checkpoints"
+
+
+def test_migration_skips_triggers_without_the_amount_column():
+    cur = _cursor(column_count=2)
+    schema_migrations._install_bank_balance_checkpoints(cur)
+    assert len(cur.executed) == 1
+    assert "pg_attribute" in cur.statements()[0]
+
+
+def test_migration_installs_triggers_then_backfills():
+    cur = _cursor()
+    schema_migrations._install_bank_balance_checkpoints(cur)
+    triggers = cur.statements("CREATE TRIGGER")
+    assert len(triggers) == 3
+    assert cur.statements()[-1].startswith("INSERT INTO")
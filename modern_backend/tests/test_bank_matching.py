@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+
+from conftest import FakeConnection
+from modern_backend.app import bank_matching
+from modern_backend.app.bank_matching import (
+    confidence,
+    suggest_matches,
+    text_similarity,
+)
+
+COLUMNS = [
+    "transaction_id",
+    "trans_date",
+    "trans_description",
+    "amount",
+    "receipt_id",
+    "receipt_date",
+    "description",
+    "vendor_name",
+    "gross_amount",
+    "date_gap",
+]
+
+
+def _row(txn, desc, receipt, vendor, gross, gap):
+    return (
+        txn,
+        date(2026, 3, 10),
+        desc,
+        Decimal("45.20"),
+        receipt,
+        date(2026, 3, 10 + gap),
+        None,
+        vendor,
+        Decimal(gross),
+        gap,
+    )
+
+
+def test_whole_account_run_is_one_query_ranked_per_transaction(
+    monkeypatch,
+):
+    monkeypatch.setattr(
+        bank_matching.schema_catalog,
+        "column_set",
+        lambda conn, table: frozenset({"vendor_name"}),
+    )
+    monkeypatch.setattr(
+        bank_matching.schema_catalog,
+        "first_existing_column",
+        lambda conn, table, candidates: candidates[0],
+    )
+    rows = [
+        _row(1, "POS PURCHASE SHELL C0123", 10, "Co-op", "45.20", 0),
+        _row(1, "POS PURCHASE SHELL C0123", 11, "Shell", "45.20", 1),
+        _row(2, "Cheque 991", 12, "Staples", "-45.20", 0),
+    ]
+    conn = FakeConnection({"JOIN LATERAL": rows}, columns=COLUMNS)
+
+    items = list(suggest_matches(conn, 4, window_days=2, max_results=None))
+
+    (sql, params), = conn.executed
+    assert "JOIN LATERAL" in sql
+    assert "(ROUND(r.gross_amount * 100)::bigint) IN" in sql
+    assert "ABS(r.gross_amount" not in sql
+    assert params == [4, 2, 2, 20]
+    assert [i["transaction_id"] for i in items] == [1, 2]
+    first = items[0]
+    assert [c["receipt_id"] for c in first["candidates"]] == [11, 10]
+    assert first["confidence"] == first["candidates"][0]["confidence"]
+    assert items[1]["candidates"][0]["confidence"] < 0.6
+
+
+def test_confidence_rewards_same_sign_near_dates_and_matching_words():
+    assert confidence(45.2, 45.2, 0, 1, 1.0) == 1.0
+    assert confidence(45.2, -45.2, 0, 1, 0.0) == 0.55
+    assert confidence(45.2, 45.2, 1, 1, 0.0) < confidence(45.2, 45.2, 0, 1, 0)
+    assert text_similarity("POS PURCHASE SHELL C0123", "Shell") == 1.0
+    assert text_similarity("Transfer", "Shell") == 0.0
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import pytest
+from conftest import FakeConnection
+from modern_backend.app import db
+
+
+def _thread_name(params):
+    db._guard_event_loop("execute")
+    return [(threading.current_thread().name,)]
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    raw = FakeConnection({"SELECT 1": _thread_name})
+    returned = []
+    monkeypatch.setattr(db, "_LOOP_GUARD_MODE", "raise")
+    monkeypatch.setattr(db, "_async_pool", None)
+    monkeypatch.setattr(db, "get_connection", lambda: raw)
+    monkeypatch.setattr(db, "return_connection", returned.append)
+    yield raw, returned
+    db.close_all_connections()
+
+
+def test_loop_guard_flags_sync_calls_on_event_loop(monkeypatch):
+    monkeypatch.setattr(db, "_LOOP_GUARD_MODE", "raise")
+
+    async def blocking_handler():
+        db._guard_event_loop("cursor")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(blocking_handler())
+    # Outside a running loop (e.g. threadpool handlers) the guard is silent.
+    db._guard_event_loop("cursor")
+
+
+def test_async_cursor_runs_off_the_event_loop(fake_pool):
+    raw, returned = fake_pool
+
+    async def scenario():
+        async with db.async_cursor() as cur:
+            await cur.execute("SELECT 1")
+            return await cur.fetchone()
+
+    row = asyncio.run(scenario())
+
+    assert row[0].startswith("db-async")
+    assert raw.executed == [("SELECT 1", None)]
+    assert raw.commits == 1
+    assert returned == [raw]
+
+
+def test_run_sync_bridges_connection_helpers(fake_pool):
+    raw, returned = fake_pool
+
+    def helper(conn, value):
+        db._guard_event_loop("helper")
+        return conn is raw and value
+
+    async def scenario():
+        async with db.async_connection() as conn:
+            return await conn.run_sync(helper, 42)
+
+    assert asyncio.run(scenario()) == 42
+    assert returned == [raw]
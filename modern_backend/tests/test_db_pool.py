@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+from conftest import FakeConnection
+from modern_backend.app import db
+
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    opened = []
+
+    def connect(**kwargs):
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(db.psycopg2, "connect", connect)
+    return opened
+
+
+def _pool(**overrides):
+    options = {"timeout": 0.2, "validate_idle_after": 60.0}
+    options.update(overrides)
+    return db.InstrumentedConnectionPool(0, 2, **options)
+
+
+def test_checkout_reuses_connections_without_ping(fake_connect):
+    conn_pool = _pool()
+    conn = conn_pool.getconn()
+    conn_pool.putconn(conn)
+    assert conn_pool.getconn() is conn
+    assert conn.executed == []
+
+    stats = conn_pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 1
+    assert stats["connections_opened"] == 1
+
+
+def test_returned_connections_drop_pending_commit_hooks(fake_connect):
+    conn_pool = _pool()
+    conn = conn_pool.getconn()
+    conn._after_commit = [lambda: None]
+    conn_pool.putconn(conn)
+    assert conn_pool.getconn()._after_commit == []
+
+
+def test_idle_connections_are_validated_after_threshold(fake_connect):
+    conn_pool = _pool(validate_idle_after=0.0)
+    conn = conn_pool.getconn()
+    conn_pool.putconn(conn)
+    conn_pool.getconn()
+    assert len(conn.executed) == 1
+    assert conn_pool.stats()["validations"] == 1
+
+
+def test_exhausted_pool_waits_then_times_out(fake_connect):
+    conn_pool = _pool()
+    first = conn_pool.getconn()
+    conn_pool.getconn()
+
+    with pytest.raises(db.PoolTimeout):
+        conn_pool.getconn()
+    assert conn_pool.stats()["timeouts"] == 1
+
+    threading.Timer(0.05, conn_pool.putconn, args=(first,)).start()
+    started = time.monotonic()
+    assert conn_pool.getconn() is first
+    assert time.monotonic() - started < 0.2
+
+
+def test_broken_connections_are_replaced(fake_connect):
+    conn_pool = _pool()
+    conn = conn_pool.getconn()
+    conn_pool.putconn(conn)
+    conn.closed = 1
+
+    replacement = conn_pool.getconn()
+    assert replacement is not conn
+    stats = conn_pool.stats()
+    assert stats["connections_opened"] == 2
+    assert stats["connections_closed"] == 1
+
+
+def test_closed_without_return_is_reclaimed(fake_connect, caplog):
+    conn_pool = _pool(timeout=1.0, leak_threshold=60.0)
+    with db.checkout_owner("GET /reports/fleet"):
+        leaked = conn_pool.getconn()
+    conn_pool.getconn()
+    leaked.close()
+
+    assert conn_pool.getconn() is not leaked
+    stats = conn_pool.stats()
+    assert stats["leaks_reclaimed"] == 1
+    assert "GET /reports/fleet" in caplog.text
+    conn_pool.closeall()
+
+
+def test_long_held_checkout_is_reported_once(fake_connect, caplog):
+    conn_pool = _pool(leak_threshold=0.01)
+    conn_pool._stop.set()  # drive the watchdog by hand
+    conn_pool.getconn()
+    time.sleep(0.02)
+    conn_pool.reap()
+    conn_pool.reap()
+
+    assert conn_pool.stats()["leaks_detected"] == 1
+    assert "test_long_held_checkout_is_reported_once" in caplog.text
+
+
+def test_get_db_returns_connection(monkeypatch):
+    conn = FakeConnection()
+    returned = []
+    monkeypatch.setattr(db, "get_connection", lambda: conn)
+    monkeypatch.setattr(db, "return_connection", returned.append)
+
+    dependency = db.get_db()
+    assert next(dependency) is conn
+    with pytest.raises(RuntimeError):
+        dependency.throw(RuntimeError("handler failed"))
+    assert returned == [conn]
@@ -0,0 +1,140 @@
+import asyncio
+import io
+import json
+import threading
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+from conftest import FakeConnection
+from modern_backend.app import export_stream
+from modern_backend.app.export_stream import (
+    QueryExport,
+    encode_csv,
+    export_response,
+    iter_query,
+    zip_query_exports,
+)
+
+
+def _connection(rows):
+    return FakeConnection({"SELECT 1": rows}, columns=("day", "amount"))
+
+
+def test_rows_are_fetched_in_chunks_and_encoded_incrementally():
+    rows = [(date(2026, 1, i % 28 + 1), Decimal("1.50")) for i in range(25)]
+    conn = _connection(rows)
+
+    records = iter_query(conn, "SELECT 1", (), chunk_size=10)
+    first = next(records)
+    assert first == {"day": date(2026, 1, 1), "amount": Decimal("1.50")}
+    assert conn.fetches == [10]
+
+    body = b"".join(encode_csv(records)).decode()
+    assert conn.fetches == [10, 10, 10, 10]
+    (cur,) = conn.cursors
+    assert cur.name, "exports must use a named (server-side) cursor"
+    assert cur.closed
+    # The first row was consumed above; the rest keep the first row's keys.
+    assert body.splitlines()[0] == "day,amount"
+    assert len(body.splitlines()) == 25
+
+
+def test_query_export_streams_ndjson_on_its_own_connection(monkeypatch):
+    conn = _connection([(date(2026, 2, 1), Decimal("2.25"))])
+
+    @contextmanager
+    def pooled():
+        yield conn
+
+    monkeypatch.setattr(export_stream, "pooled_connection", pooled)
+    response = export_response(
+        QueryExport("SELECT 1", [5]), "ndjson", "payments"
+    )
+    assert conn.executed == []
+
+    async def read_body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    body = asyncio.run(read_body())
+    lines = body.decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"day": "2026-02-01", "amount": 2.25}
+    ]
+    assert response.media_type == "application/x-ndjson"
+    assert 'filename="payments.ndjson"' in (
+        response.headers["Content-Disposition"]
+    )
+    assert conn.rollbacks == 1
+
+
+def test_empty_export_still_writes_the_header(monkeypatch):
+    conn = _connection([])
+
+    @contextmanager
+    def pooled():
+        yield conn
+
+    monkeypatch.setattr(export_stream, "pooled_connection", pooled)
+    assert b"".join(encode_csv(QueryExport("SELECT 1"))) == b"day,amount\r\n"
+
+
+class _CopyConnection(FakeConnection):
+    """Each ``COPY (SELECT * FROM <table>)`` writes that many rows."""
+
+    def __init__(self, tables):
+        super().__init__()
+        self.tables = tables
+
+    def copy(self, query, out):
+        assert query.startswith("COPY (SELECT * FROM ")
+        rows = self.tables[query.split()[4].rstrip(")")]
+        out.write(b"id,name\n")
+        for i in range(rows):
+            out.write(f"{i},row {i}\n".encode())
+        return rows
+
+
+def test_zip_export_streams_each_query_and_counts_copied_rows(monkeypatch):
+    tables = {"qb_export_a": 3, "qb_export_b": 0, "qb_export_c": 500}
+    threads = set()
+
+    @contextmanager
+    def pooled():
+        threads.add(threading.current_thread().name)
+        yield _CopyConnection(tables)
+
+    monkeypatch.setattr(export_stream, "pooled_connection", pooled)
+    members = [
+        (f"{name}.csv", f"SELECT * FROM {name}", []) for name in tables
+    ]
+
+    chunks = list(
+        zip_query_exports(
+            members,
+            workers=2,
+            readme=lambda counts: json.dumps(counts, sort_keys=True),
+        )
+    )
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == [
+        "qb_export_a.csv",
+        "qb_export_b.csv",
+        "qb_export_c.csv",
+        "README.txt",
+    ]
+    assert archive.read("qb_export_a.csv").decode().splitlines() == [
+        "id,name",
+        "0,row 0",
+        "1,row 1",
+        "2,row 2",
+    ]
+    assert json.loads(archive.read("README.txt")) == {
+        "qb_export_a.csv": 3,
+        "qb_export_b.csv": 0,
+        "qb_export_c.csv": 500,
+    }
+    assert all(name.startswith("export-zip") for name in threads)
+    assert len(chunks) > 1
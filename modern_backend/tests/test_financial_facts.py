@@ -0,0 +1,130 @@
+from datetime import date
+
+from conftest import fake_cursor
+from modern_backend.app.financial_facts import (
+    FACT_SOURCES,
+    install_fact_triggers,
+    month_bounds,
+    rebuild_facts,
+    source_rows_sql,
+    source_totals,
+    sync_function_sql,
+    year_bounds,
+)
+
+SOURCES = {source.table: source for source in FACT_SOURCES}
+RECEIPT_COLUMNS = {
+    "receipt_id",
+    "receipt_date",
+    "gross_amount",
+    "gst_amount",
+    "category",
+    "gl_account_code",
+}
+
+
+def _cursor(columns):
+    """Reports the given columns for each table, by name."""
+    return fake_cursor(
+        {
+            "pg_attribute": lambda params: [
+                (c,) for c in columns.get(params[0], ())
+            ],
+            "SELECT COALESCE(SUM(": [(None, 2)],
+        },
+        rowcount=3,
+    )
+
+
+def test_bounds_are_half_open():
+    assert month_bounds(2026, 1) == (date(2026, 1, 1), date(2026, 2, 1))
+    assert month_bounds(2025, 12) == (date(2025, 12, 1), date(2026, 1, 1))
+    assert year_bounds(2026) == (date(2026, 1, 1), date(2027, 1, 1))
+
+
+def test_receipt_rows_use_present_columns_and_zero_the_rest():
+    sql = source_rows_sql(
+        SOURCES["receipts"], RECEIPT_COLUMNS, "old_rows", -1
+    )
+    assert "r.receipt_date::date AS fact_date" in sql
+    assert "r.category::text AS category" in sql
+    assert "r.gl_account_code::text AS account_code" in sql
+    assert "COALESCE(r.gross_amount::numeric, 0) AS expenses" in sql
+    assert "COALESCE(r.gst_amount::numeric, 0) AS gst_paid" in sql
+    assert "0::numeric AS revenue" in sql
+    assert sql.endswith("FROM old_rows r WHERE r.receipt_date IS NOT NULL")
+    assert "-1 AS sign" in sql
+
+
+def test_charter_revenue_falls_back_to_grand_total():
+    columns = {"charter_date", "grand_total"}
+    sql = source_rows_sql(SOURCES["charters"], columns, "charters", 1)
+    assert "COALESCE(r.grand_total::numeric, 0) AS revenue" in sql
+    assert "NULL::text AS category" in sql
+    assert "0::numeric AS gst_collected" in sql
+
+
+def test_update_trigger_nets_old_rows_against_new_rows():
+    sql = sync_function_sql(SOURCES["receipts"], RECEIPT_COLUMNS)
+    assert "FROM new_rows r" in sql and "FROM old_rows r" in sql
+    assert "UNION ALL" in sql
+    assert "row_count = f.row_count + EXCLUDED.row_count" in sql
+    assert "DELETE FROM daily_financial_facts WHERE row_count = 0" in sql
+
+
+def test_tables_without_a_date_column_are_skipped():
+    cur = _cursor({"receipts": RECEIPT_COLUMNS, "payments": {"amount"}})
+    assert install_fact_triggers(cur) == ["receipts"]
+    triggers = cur.statements("CREATE TRIGGER")
+    assert len(triggers) == 3
+    assert all(" ON receipts " in s for s in triggers)
+    assert "REFERENCING OLD TABLE AS old_rows NEW TABLE" in triggers[1]
+
+
+def test_rebuild_sums_every_available_source():
+    cur = _cursor(
+        {
+            "receipts": RECEIPT_COLUMNS,
+            "payments": {"payment_date", "amount"},
+        }
+    )
+    assert rebuild_facts(cur) == 3
+    statements = cur.statements()
+    assert "LOCK TABLE receipts IN SHARE MODE" in statements
+    assert "LOCK TABLE charters IN SHARE MODE" not in statements
+    assert statements[-2] == "DELETE FROM daily_financial_facts"
+    assert "FROM receipts r" in statements[-1]
+    assert "FROM payments r" in statements[-1]
+
+
+def test_older_column_names_feed_the_facts():
+    sql = source_rows_sql(
+        SOURCES["receipts"], {"date", "amount"}, "receipts", 1
+    )
+    assert "r.date::date AS fact_date" in sql
+    assert "COALESCE(r.amount::numeric, 0) AS expenses" in sql
+    sql = source_rows_sql(
+        SOURCES["charters"], {"pickup_date", "grand_total"}, "charters", 1
+    )
+    assert "r.pickup_date::date AS fact_date" in sql
+
+
+def test_source_totals_read_the_table_when_facts_are_missing():
+    cur = _cursor({"receipts": {"date", "amount", "category"}})
+    start, end = year_bounds(2025)
+    totals = source_totals(
+        cur,
+        "receipts",
+        ("expenses", "gst_paid"),
+        start,
+        end,
+        exclude_category="personal",
+    )
+    assert totals == [0.0, 2.0]
+    sql, params = cur.executed[-1]
+    assert sql == (
+        "SELECT COALESCE(SUM(amount), 0), 0 FROM receipts"
+        " WHERE date >= %s AND date < %s AND category != %s"
+    )
+    assert params == [start, end, "personal"]
+    assert source_totals(cur, "charters", ("revenue",), start, end) == [0.0]
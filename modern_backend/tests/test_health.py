@@ -1,15 +1,31 @@
+import asyncio
+
 from fastapi import status
 from httpx import ASGITransport, AsyncClient
 
 from modern_backend.app.main import app
 
 
-async def test_health():
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        resp = await ac.get("/health")
-        assert resp.status_code == status.HTTP_200_OK
-        assert resp.json().get("status") == "ok"
+def _get(path):
+    async def request():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            return await ac.get(path)
+
+    return asyncio.run(request())
+
+
+def test_health():
+    resp = _get("/health")
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json().get("status") == "ok"
+
+
+def test_db_pool_requires_an_admin():
+    resp = _get("/db-pool")
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
 
 # Allow running via pytest-asyncio auto mode
 pytest_plugins = ("pytest_asyncio",)
@@ -0,0 +1,138 @@
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from conftest import fake_cursor
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from modern_backend.app import kpi_snapshots
+from modern_backend.app.kpi_snapshots import (
+    company_snapshot_key,
+    dashboard_key,
+    read_snapshot,
+    refresh_snapshots,
+)
+from modern_backend.app.routers import reports
+
+NOW = datetime.now(timezone.utc)
+
+
+def _refresh_cursor(locked, stored=None):
+    return fake_cursor(
+        {
+            "pg_try_advisory_xact_lock": [(locked,)],
+            "SELECT source_versions": [stored] if stored else [],
+        }
+    )
+
+
+def _snapshot_cursor(row=None):
+    return fake_cursor({"SELECT payload": [row] if row else []})
+
+
+def test_keys_cover_every_variant_and_fold_unknown_ones():
+    assert dashboard_key("this_month") == "dashboard:this_month"
+    assert dashboard_key("bogus") == "dashboard:"
+    assert company_snapshot_key("ytd") == "company-snapshot:ytd"
+    assert company_snapshot_key("custom") == "company-snapshot:all"
+
+
+def test_read_returns_payload_with_its_age():
+    cur = _snapshot_cursor(({"open_quotes": 3}, NOW, 42.04))
+    result = read_snapshot(cur, "dashboard:")
+    assert result["open_quotes"] == 3
+    assert result["snapshot_age_seconds"] == 42.0
+    assert cur.executed[0][1] == ("dashboard:",)
+
+
+def test_snapshots_from_another_day_are_not_served():
+    yesterday = NOW - timedelta(days=1, hours=1)
+    row = ({"x": 1}, yesterday, 9e4)
+    assert read_snapshot(_snapshot_cursor(row), "k") is None
+    assert read_snapshot(_snapshot_cursor(), "k") is None
+
+
+def _patch(monkeypatch, versions, specs):
+    monkeypatch.setattr(
+        kpi_snapshots.report_cache, "versions", lambda cur, t: versions
+    )
+    monkeypatch.setattr(kpi_snapshots, "snapshot_specs", lambda: specs)
+
+
+def test_fresh_snapshots_with_unchanged_versions_are_kept(monkeypatch):
+    _patch(monkeypatch, {"charters": 4}, {"a": lambda cur: {}})
+    cur = _refresh_cursor(True, ({"charters": 4}, NOW, 10.0))
+    assert refresh_snapshots(cur, interval=300) == 0
+    assert not cur.statements("INSERT")
+
+
+def test_changed_versions_refresh_every_variant(monkeypatch):
+    def broken(cur):
+        raise RuntimeError("no such table")
+
+    specs = {"a": lambda cur: {"n": 1}, "b": broken}
+    _patch(monkeypatch, {"charters": 5}, specs)
+    cur = _refresh_cursor(True, (json.dumps({"charters": 4}), NOW, 10.0))
+
+    assert refresh_snapshots(cur, interval=300) == 1
+    (insert,) = [p for s, p in cur.executed if s.startswith("INSERT")]
+    assert insert == ("a", '{"n": 1}', '{"charters": 5}')
+    # The failed variant is rolled back and keeps its old snapshot.
+    assert cur.statements("ROLLBACK TO SAVEPOINT kpi_snapshot")
+
+
+def test_another_worker_holding_the_lock_skips_the_refresh(monkeypatch):
+    _patch(monkeypatch, {}, {"a": lambda cur: {}})
+    cur = _refresh_cursor(False)
+    assert refresh_snapshots(cur, interval=300, force=True) == 0
+    assert len(cur.executed) == 1
+
+
+def test_versions_untracked_keep_fresh_snapshots(monkeypatch):
+    _patch(monkeypatch, None, {"a": lambda cur: {}})
+    cur = _refresh_cursor(True, (None, NOW, 10.0))
+    assert refresh_snapshots(cur, interval=300) == 0
+    cur = _refresh_cursor(True, (None, NOW, 400.0))
+    assert refresh_snapshots(cur, interval=300) == 1
+
+
+def _company_snapshot_client(monkeypatch, cur):
+    @contextmanager
+    def fake_cursor():
+        yield cur
+
+    monkeypatch.setattr(reports, "cursor", fake_cursor)
+    monkeypatch.setattr(reports, "ensure_schema", lambda: None)
+    app = FastAPI()
+    app.include_router(reports.router)
+    return TestClient(app)
+
+
+def test_company_snapshot_endpoint_serves_the_snapshot(monkeypatch):
+    cur = _snapshot_cursor(({"totals": {"revenue": 10}}, NOW, 5.0))
+    client = _company_snapshot_client(monkeypatch, cur)
+
+    response = client.get(
+        "/api/reports/company-snapshot", params={"date_range": "ytd"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["totals"] == {"revenue": 10}
+    assert response.json()["snapshot_age_seconds"] == 5.0
+    assert cur.executed[0][1] == ("company-snapshot:ytd",)
+
+
+def test_company_snapshot_endpoint_computes_when_missing(monkeypatch):
+    cur = _snapshot_cursor()
+    client = _company_snapshot_client(monkeypatch, cur)
+    monkeypatch.setattr(
+        reports,
+        "compute_company_snapshot",
+        lambda cur, *args: {"totals": {"revenue": 3}},
+    )
+
+    response = client.get("/api/reports/company-snapshot")
+
+    assert response.status_code == 200
+    assert response.json()["snapshot_age_seconds"] is None
+    assert cur.executed[0][1] == ("company-snapshot:mtd",)
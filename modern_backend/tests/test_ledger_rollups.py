@@ -0,0 +1,65 @@
+from datetime import date
+from decimal import Decimal
+
+from conftest import fake_cursor
+from modern_backend.app.ledger_rollups import (
+    check_rollups,
+    ledger_period_params,
+)
+
+
+def test_whole_months_come_from_rollups_and_edges_from_the_ledger():
+    params = ledger_period_params(date(2026, 1, 15), date(2026, 4, 10))
+    first_full, after_full, start, lead_end, trail_start, end = params
+    assert (first_full, after_full) == (date(2026, 2, 1), date(2026, 4, 1))
+    assert (start, lead_end) == (date(2026, 1, 15), date(2026, 2, 1))
+    assert (trail_start, end) == (date(2026, 4, 1), date(2026, 4, 10))
+
+
+def test_range_ending_on_month_end_needs_no_trailing_ledger_rows():
+    params = ledger_period_params(date(2026, 1, 1), date(2026, 3, 31))
+    assert params[:2] == [date(2026, 1, 1), date(2026, 4, 1)]
+    # Both ledger ranges are empty.
+    assert params[2] == params[3]
+    assert params[4] > params[5]
+
+
+def test_range_inside_one_month_reads_only_the_ledger():
+    params = ledger_period_params(date(2026, 5, 3), date(2026, 5, 20))
+    assert params[0] == params[1]
+    assert params[4:] == [date(2026, 5, 3), date(2026, 5, 20)]
+
+
+def test_trial_balance_without_start_rolls_up_all_history():
+    params = ledger_period_params(None, date(2026, 6, 10))
+    assert params[0] == date.min
+    assert params[1] == date(2026, 6, 1)
+    assert params[4:] == [date(2026, 6, 1), date(2026, 6, 10)]
+
+
+def test_check_reports_each_mismatched_rollup_row():
+    row = (
+        "missing", date(2026, 2, 1), "4000", "Sales", "Income",
+        Decimal("0"), Decimal("120.00"), Decimal("120.00"), 3, 2,
+    )
+    cur = fake_cursor({"EXCEPT": [row, ("unexpected", *row[1:])]})
+
+    result = check_rollups(cur, limit=10)
+
+    assert result["consistent"] is False
+    assert result["mismatch_count"] == 2
+    assert [m["side"] for m in result["mismatches"]] == [
+        "missing",
+        "unexpected",
+    ]
+    assert result["mismatches"][0]["month"] == "2026-02-01"
+    sql, params = cur.executed[0]
+    assert "EXCEPT" in sql and params == (10,)
+
+
+def test_check_passes_when_nothing_differs():
+    assert check_rollups(fake_cursor()) == {
+        "consistent": True,
+        "mismatch_count": 0,
+        "mismatches": [],
+    }
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from datetime import timedelta
+
+import pytest
+from modern_backend.app import login_guard
+from modern_backend.app.login_guard import (
+    LoginBusy,
+    LoginThrottle,
+    MemoryAttemptBackend,
+    check_password,
+)
+
+
+class _CountingBackend(MemoryAttemptBackend):
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+
+    def locked_until(self, username, now):
+        self.lookups += 1
+        return super().locked_until(username, now)
+
+
+def test_username_locks_after_max_failures_and_success_resets():
+    backend = _CountingBackend()
+    throttle = LoginThrottle(backend, max_attempts=3, lockout_minutes=15)
+
+    assert throttle.record_failure("Dana") is None
+    throttle.record_success("dana")
+    assert throttle.record_failure("dana") is None
+    assert throttle.record_failure("dana") is None
+    assert throttle.locked_until("dana") is None
+    until = throttle.record_failure(" DANA ")
+
+    assert until is not None
+    lookups = backend.lookups
+    assert throttle.locked_until("dana") == until
+    assert backend.lookups == lookups
+    assert LoginThrottle(backend).locked_until("dana") == until
+
+
+def test_stale_counters_are_purged_but_lockouts_kept(monkeypatch):
+    backend = MemoryAttemptBackend()
+    throttle = LoginThrottle(backend, lockout_minutes=15, purge_interval=0)
+    throttle.record_failure("typo")
+    later = login_guard._utcnow() + timedelta(minutes=16)
+    # Old failures, but still locked out: kept.
+    held_until = later + timedelta(minutes=5)
+    backend._rows["held"] = [0, later - timedelta(hours=1), held_until]
+    monkeypatch.setattr(login_guard, "_utcnow", lambda: later)
+
+    throttle.record_failure("new")
+
+    assert set(backend._rows) == {"held", "new"}
+
+
+def test_password_checks_run_off_the_loop_and_are_capped(monkeypatch):
+    release = threading.Event()
+
+    def verify(username, password):
+        release.wait(5)
+        return {"thread": threading.current_thread().name}
+
+    async def scenario():
+        slots = asyncio.Semaphore(1)
+        monkeypatch.setattr(login_guard, "_password_slots", slots)
+        monkeypatch.setattr(login_guard, "_LOGIN_QUEUE_TIMEOUT", 0.05)
+        first = asyncio.create_task(check_password(verify, "a", "pw"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(LoginBusy):
+            await check_password(verify, "b", "pw")
+        release.set()
+        return await first
+
+    result = asyncio.run(scenario())
+    assert result["thread"].startswith("login-verify")
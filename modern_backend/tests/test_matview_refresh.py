@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+
+from conftest import FakeConnection, fake_cursor
+from modern_backend.app import matview_refresh
+from modern_backend.app.matview_refresh import (
+    MatviewRefresher,
+    refresh_view,
+    status_headers,
+    view_status,
+)
+
+NOW = datetime.now(timezone.utc)
+
+
+def _populated(flag=None):
+    """Cursor answering whether the view is populated, if it exists."""
+    rows = [] if flag is None else [(flag,)]
+    return fake_cursor({"SELECT ispopulated": rows})
+
+
+def test_status_reports_age_and_pending_writes():
+    cur = fake_cursor({"SELECT refreshed_at": [(NOW, 12.34, 80.0, True)]})
+    status = view_status(cur, "mv_vendor_list")
+    assert status["snapshot_age_seconds"] == 12.3
+    assert status["refresh_pending"] is True
+    headers = status_headers(status)
+    assert headers["X-Refresh-Pending"] == "true"
+    assert headers["X-Snapshot-Age-Seconds"] == "12.3"
+
+
+def test_views_the_refresher_has_not_seen_have_no_status():
+    status = view_status(fake_cursor(), "mv_vendor_list")
+    assert status["snapshot_refreshed_at"] is None
+    assert status_headers(status) == {}
+
+
+def test_populated_views_refresh_concurrently():
+    cur = _populated(True)
+    assert refresh_view(cur, "mv_vendor_list", {"receipts": 3}) >= 0
+    assert cur.statements(
+        "REFRESH MATERIALIZED VIEW CONCURRENTLY mv_vendor_list"
+    )
+    (insert,) = [p for s, p in cur.executed if s.startswith("INSERT")]
+    assert insert[:2] == ("mv_vendor_list", '{"receipts": 3}')
+
+
+def test_unpopulated_views_refresh_plainly_and_missing_ones_are_skipped():
+    cur = _populated(False)
+    refresh_view(cur, "mv_vendor_list")
+    assert cur.statements("REFRESH MATERIALIZED VIEW mv_vendor_list")
+    assert refresh_view(_populated(), "mv_gone") is None
+
+
+def test_refresh_waits_for_writes_to_go_quiet():
+    refresher = MatviewRefresher(None, debounce=30, max_delay=300)
+    stored = ({"receipts": 1}, 60.0, 0.0)
+    assert not refresher.due("v", {"receipts": 1}, stored, now=0)
+    # A write lands; wait for the debounce before refreshing.
+    assert not refresher.due("v", {"receipts": 2}, stored, now=0)
+    assert not refresher.due("v", {"receipts": 2}, stored, now=20)
+    # Another write restarts the wait.
+    assert not refresher.due("v", {"receipts": 3}, stored, now=25)
+    assert not refresher.due("v", {"receipts": 3}, stored, now=50)
+    assert refresher.due("v", {"receipts": 3}, stored, now=55)
+
+
+def test_busy_tables_are_refreshed_after_the_max_delay():
+    refresher = MatviewRefresher(None, debounce=30, max_delay=300)
+    stored = ({"receipts": 1}, 400.0, 300.0)
+    assert refresher.due("v", {"receipts": 9}, stored, now=0)
+
+
+def test_interval_refreshes_even_without_writes():
+    refresher = MatviewRefresher(None, interval=3600)
+    assert refresher.due("v", None, (None, 3600.0, 0.0), now=0)
+    assert refresher.due("v", None, (None, None, 0.0), now=0)
+    assert not refresher.due("v", None, (None, 10.0, 0.0), now=0)
+
+
+def test_pending_writes_are_recorded_until_the_refresh(monkeypatch):
+    monkeypatch.setattr(
+        matview_refresh.report_cache, "versions", lambda cur, t: {"r": 2}
+    )
+    view = matview_refresh.MatView("mv_vendor_list", ("receipts",))
+    conn = FakeConnection(
+        {
+            "pg_try_advisory_xact_lock": [(True,)],
+            "SELECT source_versions": [({"r": 1}, 10.0, 0.0)],
+        }
+    )
+    refresher = MatviewRefresher(lambda: conn, views=(view,))
+    assert refresher.run_once() == 0
+    assert conn.statements("INSERT INTO matview_refreshes (view_name, pend")
+    assert not conn.statements("REFRESH")
+
+
+def test_another_worker_holding_the_lock_skips_the_view():
+    view = matview_refresh.MatView("mv_vendor_list", ("receipts",))
+    conn = FakeConnection({"pg_try_advisory_xact_lock": [(False,)]})
+    refresher = MatviewRefresher(lambda: conn, views=(view,))
+    assert refresher.run_once(force=True) == 0
+    assert len(conn.executed) == 1 and conn.commits == 1
@@ -0,0 +1,78 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from conftest import fake_cursor
+from fastapi import HTTPException
+from modern_backend.app.pagination import (
+    Keyset,
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+    next_cursor,
+    page_rows,
+)
+
+FILTERS = {"vendor": "shell", "start_date": date(2026, 1, 1)}
+
+
+def test_cursor_round_trips_dates_and_timestamps():
+    stamp = datetime(2026, 3, 4, 5, 6, 7, tzinfo=timezone.utc)
+    for value in (date(2026, 3, 4), stamp, None, "A-1"):
+        token = encode_cursor(value, 42, FILTERS)
+        assert "=" not in token
+        assert decode_cursor(token, FILTERS) == (value, 42)
+
+
+def test_cursor_is_rejected_for_other_filters_or_garbage():
+    token = encode_cursor(date(2026, 3, 4), 42, FILTERS)
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(token, {**FILTERS, "vendor": "esso"})
+    assert exc.value.detail == "cursor_filter_mismatch"
+    for bad in ("not-a-cursor", token[:-3], "e30"):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(bad, FILTERS)
+        assert exc.value.status_code == 400
+
+
+def test_descending_keyset_continues_below_the_last_row():
+    keyset = Keyset("transaction_date", "transaction_id")
+    assert keyset.order_by() == "transaction_date DESC, transaction_id DESC"
+    sql, params = keyset.after(date(2026, 3, 4), 42)
+    assert "(transaction_date, transaction_id) < (%s, %s)" in sql
+    assert params == [date(2026, 3, 4), date(2026, 3, 4), 42]
+    # NULL dates sort first when descending; dated rows still follow.
+    sql, params = keyset.after(None, 7)
+    assert "transaction_date IS NOT NULL" in sql and params == [7]
+
+
+def test_ascending_keyset_keeps_null_dates_for_the_end():
+    keyset = Keyset("date", "id", descending=False)
+    sql, _ = keyset.after(date(2026, 3, 4), 42)
+    assert "(date, id) > (%s, %s)" in sql and "date IS NULL" in sql
+    sql, params = keyset.after(None, 7)
+    assert sql == "(date IS NULL AND id > %s)" and params == [7]
+
+
+def test_first_page_has_no_predicate():
+    assert Keyset("d", "i").where(None, FILTERS) == (None, [])
+
+
+def test_next_cursor_points_after_the_last_row_of_a_full_page():
+    rows = [(3, date(2026, 1, 3)), (2, date(2026, 1, 2)), (1, None)]
+    page, has_more = page_rows(rows, 2)
+    assert page == rows[:2] and has_more
+    token = next_cursor(page, has_more, 1, 0, FILTERS)
+    assert decode_cursor(token, FILTERS) == (date(2026, 1, 2), 2)
+    assert next_cursor(rows, False, 1, 0, FILTERS) is None
+
+
+def _plan_cursor(plan):
+    return fake_cursor({"EXPLAIN": [(plan,)]})
+
+
+def test_estimate_reads_the_planner_row_count():
+    cur = _plan_cursor([{"Plan": {"Plan Rows": 1234}}])
+    assert estimate_count(cur, "SELECT 1 FROM receipts", []) == 1234
+    assert cur.executed[0][0].startswith("EXPLAIN (FORMAT JSON) SELECT 1")
+    text_plan = _plan_cursor('[{"Plan": {"Plan Rows": 5}}]')
+    assert estimate_count(text_plan, "x", []) == 5
@@ -0,0 +1,54 @@
+from conftest import fake_cursor
+from modern_backend.app.receipt_groups import (
+    link_groups,
+    linked_receipt_ids,
+    relink_receipts,
+)
+
+
+def test_groups_follow_every_link_transitively():
+    rows = [
+        # receipt, bank txn, parent, split group, split key
+        (10, 500, None, None, None),
+        (11, 500, None, 7, None),
+        (12, None, None, 7, "A"),
+        (13, None, None, None, "A"),
+        (14, None, 13, None, None),
+        (20, None, 20, None, "  "),
+        (21, None, 99, None, None),
+        (5, None, None, None, None),
+    ]
+
+    groups = link_groups(rows)
+
+    assert {groups[r] for r in (10, 11, 12, 13, 14)} == {10}
+    assert groups[20] == 20
+    # Blank split keys and missing parents link nothing.
+    assert groups[21] == 21
+    assert groups[5] == 5
+
+
+def test_parent_listed_after_child_still_joins_its_group():
+    groups = link_groups([(30, None, 40, None, None), (40, 1, None, None, "")])
+    assert groups == {30: 30, 40: 30}
+
+
+def _cursor(rows):
+    return fake_cursor({"SELECT": rows}, rowcount=len(rows))
+
+
+def test_relink_writes_groups_in_one_batched_update():
+    cur = _cursor([(2, 9, None, None, None), (1, 9, None, None, None)])
+
+    assert relink_receipts(cur) == 2
+    (_, params) = cur.executed[-1]
+    assert params == ([1, 2], [1, 1])
+
+
+def test_linked_ids_expand_through_the_group_column():
+    cur = _cursor([(3,), (4,)])
+    assert linked_receipt_ids(cur, [3, 8]) == {3, 4, 8}
+    sql, params = cur.executed[0]
+    assert "link_group_id = ANY" in sql
+    assert params == ([3, 8],)
+    assert linked_receipt_ids(cur, []) == set()
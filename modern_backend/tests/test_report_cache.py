@@ -0,0 +1,96 @@
+from conftest import FakeConnection
+from modern_backend.app import report_cache as report_cache_module
+from modern_backend.app.report_cache import ReportCache, cached_report
+
+
+class _VersionDb(FakeConnection):
+    def __init__(self, triggers):
+        super().__init__({"pg_try_advisory_xact_lock": [(True,)]})
+        self.triggers = set(triggers)
+        self.folded = {}
+        self.pending = {}
+
+    def respond(self, query, params):
+        if "pg_trigger" in query:
+            return [(t,) for t in params[1] if t in self.triggers]
+        if "unnest" in query:
+            return [
+                (t, self.folded.get(t, 0), self.pending.get(t, 0))
+                for t in params[0]
+            ]
+        if "DELETE FROM report_data_changes" in query:
+            for table, n in self.pending.items():
+                self.folded[table] = self.folded.get(table, 0) + n
+            self.pending.clear()
+        return super().respond(query, params)
+
+
+def _report(db, monkeypatch, cache, tables=("general_ledger",)):
+    monkeypatch.setattr(report_cache_module, "cursor", db.cursor)
+    calls = []
+
+    @cached_report("pl-summary", tables=tables, cache=cache)
+    def pl_summary(start_date=None, conn=None):
+        calls.append(start_date)
+        return {"start_date": start_date, "rows": [1, 2, 3]}
+
+    return pl_summary, calls
+
+
+def test_results_are_reused_until_a_source_table_changes(monkeypatch):
+    db = _VersionDb(triggers={"general_ledger"})
+    cache = ReportCache(compact_threshold=3)
+    report, calls = _report(db, monkeypatch, cache)
+
+    first = report(start_date="2026-01-01", conn=object())
+    assert report(start_date="2026-01-01", conn=object()) is first
+    report(start_date="2026-02-01")
+    assert calls == ["2026-01-01", "2026-02-01"]
+
+    db.pending["general_ledger"] = 1
+    report(start_date="2026-01-01")
+    assert len(calls) == 3
+
+    # Compaction keeps the version, so the entry stays valid.
+    db.pending["general_ledger"] = 3
+    report(start_date="2026-01-01")
+    assert db.folded == {"general_ledger": 3} and db.pending == {}
+    report(start_date="2026-01-01")
+    assert len(calls) == 4
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+
+
+def test_tables_without_the_version_trigger_bypass_the_cache(monkeypatch):
+    db = _VersionDb(triggers={"charters"})
+    cache = ReportCache()
+    report, calls = _report(
+        db, monkeypatch, cache, tables=("charters", "driver_payroll")
+    )
+
+    report(start_date=None)
+    report(start_date=None)
+
+    assert len(calls) == 2
+    assert cache.stats()["bypassed"] == 2
+    # The catalog is not queried again until the recheck interval passes.
+    assert sum("pg_trigger" in sql for sql in db.statements()) == 1
+
+
+def test_entries_are_evicted_by_size_least_recently_used_first():
+    cache = ReportCache(max_entries=10, max_bytes=100)
+    cache.put("a", {"v": 1}, 40)
+    cache.put("b", {"v": 2}, 40)
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3}, 40)
+    cache.put("huge", {"v": 4}, 101)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("huge") is None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 80
+    assert stats["evictions"] == 1
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from conftest import FakeConnection
+from modern_backend.app.report_grouping import (
+    Measure,
+    read_snapshot,
+    summarize,
+    summary_sql,
+)
+
+MEASURES = (
+    Measure("total_amount", "amount"),
+    Measure("total_balance", "balance"),
+)
+
+
+def _connection(rows=()):
+    return FakeConnection({"SELECT": list(rows)})
+
+
+def test_groups_and_grand_total_come_from_one_grouping_sets_query():
+    conn = _connection(
+        [
+            (True, None, 5, Decimal("500.005"), Decimal("120")),
+            (False, "", 1, Decimal("20"), Decimal("0")),
+            (False, "ACME", 4, Decimal("480.005"), Decimal("120")),
+        ]
+    )
+
+    summary = summarize(
+        conn,
+        "SELECT * FROM charters c WHERE c.x > %s",
+        [3],
+        MEASURES,
+        group_column="account_number",
+    )
+
+    (sql, params), = conn.executed
+    assert "GROUP BY GROUPING SETS" in sql
+    assert "LIMIT" not in sql
+    assert "COALESCE(r.account_number::text, '')" in sql
+    assert params == [3]
+    assert summary.totals == {
+        "runs": 5,
+        "total_amount": 500.0,
+        "total_balance": 120.0,
+    }
+    assert [g["group_value"] for g in summary.groups] == ["", "ACME"]
+    assert summary.groups[1]["runs"] == 4
+
+
+def test_ungrouped_summary_has_totals_only_and_no_rows_means_zero():
+    sql = summary_sql("SELECT 1", MEASURES)
+    assert "GROUPING SETS" not in sql
+    assert "SUM(r.balance) AS total_balance" in sql
+
+    summary = summarize(_connection(), "SELECT 1", (), MEASURES)
+    assert summary.totals == {
+        "runs": 0,
+        "total_amount": 0.0,
+        "total_balance": 0.0,
+    }
+    assert summary.groups == []
+
+
+def test_read_snapshot_starts_a_repeatable_read_transaction():
+    conn = _connection()
+    read_snapshot(conn)
+    assert conn.rollbacks == 1
+    assert "REPEATABLE READ" in conn.executed[0][0]
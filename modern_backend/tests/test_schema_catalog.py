@@ -0,0 +1,52 @@
+from conftest import FakeConnection
+from modern_backend.app.schema_catalog import SchemaCatalog
+
+ROWS = [
+    ("charters", "r", "charter_id"),
+    ("charters", "r", "reserve_number"),
+    ("charters", "r", "pickup_date"),
+    ("empty_table", "r", None),
+    ("qb_export_invoices", "v", "Date"),
+    ("qb_export_invoices", "v", "Amount"),
+    ("mv_receipt_verification_summary", "m", "total_receipts"),
+]
+
+
+def test_lookups_are_served_from_one_catalog_query():
+    conn = FakeConnection({"FROM pg_catalog.pg_class": ROWS})
+    catalog = SchemaCatalog(ttl=0)
+
+    assert catalog.has_table(conn, "charters")
+    assert catalog.has_table(conn, "empty_table")
+    assert not catalog.has_table(conn, "missing")
+    assert catalog.has_column(conn, "charters", "pickup_date")
+    assert not catalog.has_column(conn, "charters", "charter_date")
+    assert catalog.columns(conn, "charters") == (
+        "charter_id",
+        "reserve_number",
+        "pickup_date",
+    )
+    assert (
+        catalog.first_existing_column(
+            conn, "charters", ["charter_date", "pickup_date", "reserve_number"]
+        )
+        == "pickup_date"
+    )
+    assert catalog.views(conn, prefix="qb_export_") == ["qb_export_invoices"]
+    assert catalog.has_view(conn, "qb_export_invoices")
+    assert not catalog.has_view(conn, "mv_receipt_verification_summary")
+    assert len(conn.executed) == 1
+
+
+def test_invalidate_and_ttl_reload_the_snapshot():
+    conn = FakeConnection({"FROM pg_catalog.pg_class": ROWS})
+    catalog = SchemaCatalog(ttl=0)
+    catalog.has_table(conn, "charters")
+    catalog.invalidate()
+    catalog.has_table(conn, "charters")
+    assert len(conn.executed) == 2
+
+    expiring = SchemaCatalog(ttl=1e-9)
+    expiring.has_table(conn, "charters")
+    expiring.has_table(conn, "charters")
+    assert len(conn.executed) == 4
@@ -0,0 +1,150 @@
+import pytest
+from conftest import FakeConnection
+from modern_backend.app import schema_migrations
+from modern_backend.app.schema_migrations import (
+    Migration,
+    SchemaNotReady,
+    apply_migrations,
+)
+
+
+class _FakeConnection(FakeConnection):
+    def __init__(self, tables=(), applied=()):
+        super().__init__()
+        self.tables = set(tables) | {"schema_migrations"}
+        self.applied = set(applied)
+        self.pending = []
+
+    def respond(self, query, params):
+        if "to_regclass" in query:
+            name = params[0] if params else "schema_migrations"
+            return [(name in self.tables,)]
+        if query.startswith("SELECT version"):
+            return [(v,) for v in sorted(self.applied)]
+        if query.startswith("INSERT INTO schema_migrations"):
+            self.pending.append(params[0])
+        return []
+
+    def commit(self):
+        super().commit()
+        self.applied.update(self.pending)
+        self.pending.clear()
+
+    def rollback(self):
+        super().rollback()
+        self.pending.clear()
+
+
+MIGRATIONS = (
+    Migration(1, "one", ["CREATE TABLE one ()"]),
+    Migration(2, "two", ["CREATE TABLE two ()"], requires=["outside"]),
+    Migration(3, "three", [lambda cur: cur.execute("CREATE TABLE three ()")]),
+)
+
+
+def _created_tables(conn):
+    return [q for q in conn.statements("CREATE TABLE ") if q.endswith("()")]
+
+
+def test_pending_migrations_apply_once_in_order():
+    conn = _FakeConnection(tables={"outside"}, applied={1})
+
+    assert apply_migrations(conn, MIGRATIONS) == [2, 3]
+    assert conn.applied == {1, 2, 3}
+    assert _created_tables(conn) == [
+        "CREATE TABLE two ()",
+        "CREATE TABLE three ()",
+    ]
+    assert any("pg_advisory_unlock" in q for q in conn.statements())
+
+    conn.executed.clear()
+    assert apply_migrations(conn, MIGRATIONS) == []
+    assert not _created_tables(conn)
+
+
+def test_migration_waits_for_required_table():
+    conn = _FakeConnection()
+
+    assert apply_migrations(conn, MIGRATIONS) == [1, 3]
+    conn.tables.add("outside")
+    assert apply_migrations(conn, MIGRATIONS) == [2]
+
+
+def _fresh_process(monkeypatch, connect):
+    monkeypatch.setattr(schema_migrations, "_ready", False)
+    monkeypatch.setattr(schema_migrations, "_failure", None)
+    monkeypatch.setattr(schema_migrations, "_skipped", None)
+    monkeypatch.setattr(schema_migrations, "MIGRATIONS", MIGRATIONS)
+    monkeypatch.setattr(schema_migrations, "dedicated_connection", connect)
+
+
+def test_ensure_schema_runs_migrations_once_per_process(monkeypatch):
+    opened = []
+
+    def connect():
+        conn = _FakeConnection(tables={"outside"})
+        opened.append(conn)
+        return conn
+
+    _fresh_process(monkeypatch, connect)
+
+    schema_migrations.ensure_schema()
+    schema_migrations.ensure_schema()
+
+    assert len(opened) == 1
+    assert opened[0].closed
+    assert schema_migrations.schema_ready()
+    assert opened[0].applied == {1, 2, 3}
+
+
+def test_skipped_migrations_are_retried_after_the_back_off(monkeypatch):
+    conn = _FakeConnection()
+    opened = []
+
+    def connect():
+        opened.append(conn)
+        return conn
+
+    _fresh_process(monkeypatch, connect)
+
+    schema_migrations.ensure_schema()
+    schema_migrations.ensure_schema()
+    assert len(opened) == 1
+    assert not schema_migrations.schema_ready()
+
+    retry_at, delay = schema_migrations._skipped
+    assert delay == schema_migrations.RETRY_AFTER_SECONDS
+    monkeypatch.setattr(
+        schema_migrations, "_skipped", (retry_at - delay, delay)
+    )
+    conn.tables.add("outside")
+    schema_migrations.ensure_schema()
+    assert len(opened) == 2
+    assert conn.applied == {1, 2, 3}
+    assert schema_migrations.schema_ready()
+
+
+def test_failed_migrations_back_off_instead_of_rerunning(monkeypatch):
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        raise RuntimeError("backfill failed")
+
+    _fresh_process(monkeypatch, connect)
+
+    with pytest.raises(RuntimeError, match="backfill failed"):
+        schema_migrations.ensure_schema()
+    with pytest.raises(SchemaNotReady):
+        schema_migrations.ensure_schema()
+    assert len(attempts) == 1
+
+    retry_at, delay, error = schema_migrations._failure
+    assert delay == schema_migrations.RETRY_AFTER_SECONDS
+    monkeypatch.setattr(
+        schema_migrations, "_failure", (retry_at - delay, delay, error)
+    )
+    with pytest.raises(RuntimeError, match="backfill failed"):
+        schema_migrations.ensure_schema()
+    assert len(attempts) == 2
+    assert schema_migrations._failure[1] == delay * 2
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from modern_backend.app.sessions import (
+    MemorySessionBackend,
+    SessionStore,
+    _utcnow,
+    token_key,
+)
+
+
+class _CountingBackend(MemorySessionBackend):
+    def __init__(self):
+        super().__init__()
+        self.loads = 0
+        self.extends = []
+
+    def load(self, key, now):
+        self.loads += 1
+        return super().load(key, now)
+
+    def extend(self, expiries):
+        self.extends.append(dict(expiries))
+        super().extend(expiries)
+
+
+def test_token_from_one_worker_is_valid_in_another():
+    backend = _CountingBackend()
+    worker_a = SessionStore(backend)
+    worker_b = SessionStore(backend)
+
+    token = worker_a.create(7, "Dana", role="admin", username="dana")
+
+    session = worker_b.get(token)
+    assert session["employee_id"] == 7
+    assert session["role"] == "admin"
+    assert worker_b.get(token) is session
+    assert backend.loads == 1
+    assert worker_b.stats()["cache_hits"] == 1
+    assert token_key(token) in backend._rows
+    assert token not in backend._rows
+
+
+def test_sliding_expiry_is_written_back_in_batches():
+    backend = _CountingBackend()
+    store = SessionStore(backend)
+    tokens = [store.create(i, f"user{i}") for i in range(3)]
+    for key in list(backend._rows):
+        backend._rows[key]["expires_at"] -= timedelta(minutes=20)
+
+    for _ in range(5):
+        for token in tokens:
+            store.get(token)
+
+    assert backend.extends == []
+    assert store.flush() == 3
+    assert len(backend.extends) == 1
+    floor = _utcnow() + timedelta(minutes=29)
+    assert all(row["expires_at"] > floor for row in backend._rows.values())
+    assert store.flush() == 0
+
+
+def test_revocation_reaches_other_workers_and_expired_are_purged():
+    backend = MemorySessionBackend()
+    worker_a = SessionStore(backend, cache_ttl=0)
+    worker_b = SessionStore(backend, cache_ttl=0)
+    token = worker_a.create(1, "Sam")
+    stale = worker_a.create(2, "Old")
+    assert worker_b.get(token)
+
+    worker_a.revoke(token)
+    assert worker_b.get(token) is None
+
+    backend._rows[token_key(stale)]["expires_at"] = _utcnow()
+    assert worker_b.purge() == 1
+    assert worker_a.get(stale) is None
@@ -0,0 +1,115 @@
+import threading
+
+from modern_backend.app.vendor_clusters import (
+    VendorClusterJob,
+    cluster_vendors,
+    normalize_vendor,
+    similarity,
+)
+
+COUNTS = {
+    "SHELL CANADA": 40,
+    "Shell Canada Ltd. #4411": 12,
+    "SHEL CANADA": 2,
+    "shell canada 0093": 5,
+    "CANADA POST": 30,
+    "Canada Post Corp": 4,
+    "COSTCO WHOLESALE": 9,
+    "1234.567": 1,
+}
+
+
+def test_normalize_drops_ids_punctuation_and_legal_suffixes():
+    assert normalize_vendor("Shell Canada Ltd. #4411") == "SHELL CANADA"
+    assert normalize_vendor("A&W Restaurants") == "A AND W RESTAURANTS"
+    assert normalize_vendor("1234.567") == ""
+
+
+def test_similarity_tolerates_typos_but_not_shared_words():
+    assert similarity("SHELL CANADA", "SHEL CANADA") > 0.8
+    assert similarity("SHELL CANADA", "CANADA POST") < 0.6
+
+
+def test_clusters_group_variants_under_the_most_used_name():
+    clusters = cluster_vendors(COUNTS)
+    assert len(clusters) == 2
+    shell, post = clusters
+    assert shell["canonical"] == "SHELL CANADA"
+    assert {v["vendor_name"] for v in shell["vendors"]} == {
+        "SHELL CANADA",
+        "Shell Canada Ltd. #4411",
+        "SHEL CANADA",
+        "shell canada 0093",
+    }
+    assert shell["receipt_count"] == 59
+    assert shell["receipts_to_merge"] == 19
+    assert shell["vendors"][0]["similarity"] == 1.0
+    assert post["canonical"] == "CANADA POST"
+    assert post["receipts_to_merge"] == 4
+
+
+def test_oversized_blocks_are_not_compared():
+    names = {"ABCDEF": 1, "ABCXYZ": 1, "ABCQRS": 1}
+    # The three names only share " AB" and "ABC", so with blocks capped
+    # at two names there is nothing to compare.
+    assert cluster_vendors(names, min_similarity=0.2, max_block=3)
+    assert cluster_vendors(names, min_similarity=0.2, max_block=2) == []
+
+
+def test_common_trigrams_still_count_towards_similarity():
+    letters = "MNPRTVWXYZ"
+    filler = [
+        f"{a}{b}{c} CANADA" for a in letters for b in letters for c in letters
+    ]
+    counts = {"SHELL CANADA": 9, "SHEL CANADA": 1}
+    counts.update(dict.fromkeys(filler[:300], 1))
+    # " CA", "CAN", ... are in 302 names, so they form no blocks. "SHE"
+    # still pairs the two, and their score counts the CANADA trigrams.
+    clusters = cluster_vendors(counts, max_block=200)
+    shell = next(c for c in clusters if c["canonical"] == "SHELL CANADA")
+    assert {v["vendor_name"] for v in shell["vendors"]} == {
+        "SHELL CANADA",
+        "SHEL CANADA",
+    }
+
+
+def test_job_caches_results_until_receipts_change():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return COUNTS
+
+    job = VendorClusterJob(load)
+    assert job.result({"receipts": 1}, 0.6) is None
+    job.run({"receipts": 1}, 0.6)
+    cached = job.result({"receipts": 1}, 0.6)
+    assert cached["vendor_count"] == len(COUNTS)
+    assert len(cached["clusters"]) == 2
+    assert job.result({"receipts": 2}, 0.6) is None
+    assert job.result({"receipts": 1}, 0.8) is None
+    assert len(loads) == 1
+
+
+def test_replacing_drops_the_cached_result_until_the_run_ends():
+    gate = threading.Event()
+
+    def load():
+        gate.wait(5)
+        return COUNTS
+
+    job = VendorClusterJob(load)
+    gate.set()
+    job.run({"receipts": 1}, 0.6)
+    gate.clear()
+    assert job.start({"receipts": 1}, 0.6, replace=True)
+    assert job.result({"receipts": 1}, 0.6) is None
+    gate.set()
+    job._thread.join(5)
+    assert job.result({"receipts": 1}, 0.6) is not None
+
+
+def test_untracked_versions_expire_after_the_ttl():
+    job = VendorClusterJob(lambda: COUNTS, ttl=0)
+    job.run(None, 0.6)
+    assert job.result(None, 0.6) is None
@@ -0,0 +1,83 @@
+import csv
+
+from conftest import FakeConnection
+from modern_backend.app import vendor_merge
+from modern_backend.app.vendor_merge import apply_mapping, build_mapping
+
+
+def test_mapping_matches_old_names_case_insensitively():
+    mapping, conflicts = build_mapping(
+        [("shell", "SHELL CANADA"), (" Shell ", "SHELL CANADA"), ("", "X")]
+    )
+    assert mapping == {"shell": ("shell", "SHELL CANADA")}
+    assert conflicts == []
+
+
+def test_names_mapped_to_two_targets_are_reported_not_merged():
+    mapping, conflicts = build_mapping(
+        [("esso", "ESSO"), ("Esso", "IMPERIAL OIL"), ("pos", "POS")]
+    )
+    assert list(mapping) == ["pos"]
+    assert conflicts == [
+        {"source": "esso", "targets": ["ESSO", "IMPERIAL OIL"]}
+    ]
+
+
+def _connection(rows):
+    return FakeConnection(
+        {
+            "SELECT ispopulated": [(True,)],
+            "FROM vendor_merge_map m": rows,
+        }
+    )
+
+
+def test_merge_is_one_update_with_exact_counts(monkeypatch):
+    monkeypatch.setattr(
+        vendor_merge.report_cache, "versions", lambda cur, t: {"receipts": 7}
+    )
+    conn = _connection(
+        [("shell", "SHELL CANADA", 12), ("Shel", "SHELL CANADA", 0)]
+    )
+    mapping, _ = build_mapping(
+        [("shell", "SHELL CANADA"), ("Shel", "SHELL CANADA")]
+    )
+
+    result = apply_mapping(conn, mapping, standardized_by="kim")
+
+    (copied,) = conn.copied
+    assert list(csv.reader(copied.splitlines())) == [
+        ["shell", "shell", "SHELL CANADA"],
+        ["shel", "Shel", "SHELL CANADA"],
+    ]
+    (update,) = [
+        (s, p) for s, p in conn.executed if s.startswith("WITH changed")
+    ]
+    assert "lower(r.vendor_name) = m.old_lower" in update[0]
+    assert "INSERT INTO vendor_standardization_log" in update[0]
+    assert update[1] == ("kim",)
+    assert result[0] == {
+        "old_name": "shell",
+        "new_name": "SHELL CANADA",
+        "receipts": 12,
+    }
+    # The vendor list is refreshed once, after the merge.
+    assert conn.statements(
+        "REFRESH MATERIALIZED VIEW CONCURRENTLY mv_vendor_list"
+    )
+    assert conn.statements("DROP TABLE vendor_merge_map")
+
+
+def test_dry_run_only_counts():
+    conn = _connection([("shell", "SHELL", 3)])
+    mapping, _ = build_mapping([("shell", "SHELL")])
+    result = apply_mapping(conn, mapping, dry_run=True)
+    assert result[0]["receipts"] == 3
+    assert not conn.statements("WITH changed")
+    assert not conn.statements("REFRESH")
+
+
+def test_empty_mapping_touches_nothing():
+    conn = _connection([])
+    assert apply_mapping(conn, {}) == []
+    assert conn.executed == []
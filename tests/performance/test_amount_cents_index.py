@@ -0,0 +1,116 @@
+"""
+EXPLAIN regression tests: exact-amount lookups must use the cents indexes.
+"""
+import json
+from datetime import date
+
+import pytest
+
+from modern_backend.app.routers.receipts_simple import (
+    _BANK_AMOUNT_MATCH,
+    _DUPLICATE_SEED_SQL,
+)
+from modern_backend.app.schema_migrations import _create_amount_cents_indexes
+from modern_backend.app.utils.amounts import amount_match_sql, to_cents
+
+pytestmark = pytest.mark.performance
+
+
+@pytest.fixture
+def amount_tables(db_cursor):
+    """Temp copies of the tables (they shadow the real ones) with data."""
+    db_cursor.execute("""
+        CREATE TEMP TABLE banking_transactions (
+            transaction_id SERIAL PRIMARY KEY,
+            transaction_date DATE,
+            description TEXT,
+            debit_amount NUMERIC(12, 2),
+            credit_amount NUMERIC(12, 2),
+            account_number TEXT,
+            receipt_id INTEGER
+        ) ON COMMIT DROP
+    """)
+    db_cursor.execute("""
+        CREATE TEMP TABLE receipts (
+            receipt_id SERIAL PRIMARY KEY,
+            receipt_date DATE,
+            vendor_name TEXT,
+            gross_amount NUMERIC(12, 2),
+            gst_amount NUMERIC(12, 2),
+            category TEXT,
+            description TEXT,
+            banking_transaction_id INTEGER,
+            parent_receipt_id INTEGER,
+            split_group_id INTEGER,
+            split_key TEXT,
+            is_split_receipt BOOLEAN,
+            is_voided BOOLEAN,
+            exclude_from_reports BOOLEAN
+        ) ON COMMIT DROP
+    """)
+    db_cursor.execute("""
+        INSERT INTO banking_transactions
+            (transaction_date, description, debit_amount, credit_amount)
+        SELECT DATE '2020-01-01' + (g % 2000), 'row ' || g,
+               CASE WHEN g % 2 = 0 THEN (g % 50000) / 100.0 END,
+               CASE WHEN g % 2 = 1 THEN (g % 50000) / 100.0 END
+        FROM generate_series(1, 50000) AS g
+    """)
+    db_cursor.execute("""
+        INSERT INTO receipts (receipt_date, vendor_name, gross_amount)
+        SELECT DATE '2020-01-01' + (g % 2000), 'Vendor ' || (g % 300),
+               (g % 50000) / 100.0
+        FROM generate_series(1, 50000) AS g
+    """)
+    _create_amount_cents_indexes(db_cursor)
+    db_cursor.execute("ANALYZE banking_transactions")
+    db_cursor.execute("ANALYZE receipts")
+    return db_cursor
+
+
+def _plan_indexes(cur, sql, params):
+    cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    raw = cur.fetchone()[0]
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    found, stack = set(), [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if "Index Name" in node:
+            found.add(node["Index Name"])
+        stack.extend(node.get("Plans", []))
+    return found
+
+
+def test_banking_amount_search_uses_cents_indexes(amount_tables):
+    sql = (
+        "SELECT transaction_id FROM banking_transactions WHERE "
+        + amount_match_sql("debit_amount", "credit_amount")
+    )
+    cents = to_cents(123.45)
+    assert _plan_indexes(amount_tables, sql, [cents, cents]) == {
+        "idx_banking_transactions_debit_cents",
+        "idx_banking_transactions_credit_cents",
+    }
+
+
+def test_match_banking_uses_cents_indexes(amount_tables):
+    sql = (
+        "SELECT bt.transaction_id FROM banking_transactions bt WHERE "
+        + _BANK_AMOUNT_MATCH
+        + " AND bt.transaction_date BETWEEN %s AND %s"
+    )
+    cents = to_cents("77.10")
+    used = _plan_indexes(
+        amount_tables,
+        sql,
+        [cents, cents, date(2021, 1, 1), date(2021, 1, 8)],
+    )
+    assert "idx_banking_transactions_debit_cents" in used
+
+
+def test_duplicate_receipt_check_uses_cents_index(amount_tables):
+    params = ["%Vendor 12%", to_cents(45.2), date(2021, 3, 1), 7,
+              date(2021, 3, 1), 7]
+    assert "idx_receipts_gross_cents_date" in _plan_indexes(
+        amount_tables, _DUPLICATE_SEED_SQL, params
+    )